@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.routes import services
+from api.streaming import split_lines
+import json
+
+router = APIRouter(prefix="/api/v1/batches")
+
+# Runs uploaded batch files in the background (started and stopped with the services)
+batch_runner = services.batch_runner
+
+async def ndjson(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+def not_found() -> JSONResponse:
+    return JSONResponse({"error": "Batch job not found"}, status_code=404)
+
+@router.post("")
+async def create_batch(
+    request: Request,
+    concurrency: Optional[int] = None,
+    system_prompt: Optional[str] = None,
+    route: Optional[str] = None
+):
+    """
+    Queue a JSONL batch file (the request body) as a background job
+
+    Each line is an object with a ``prompt`` and optionally ``id``,
+    ``system_prompt``, ``options``, ``route`` and ``conversation_id``.
+    ``concurrency`` bounds the prompts in flight (default
+    ``LYRA_BATCH_CONCURRENCY``, at most 8). Returns 202 with the job, or
+    400 naming the first invalid line.
+    """
+    try:
+        job = await batch_runner.create(split_lines(request.stream()), concurrency, system_prompt, route)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(job.progress(), status_code=202)
+
+@router.get("")
+async def list_batches():
+    """All batch jobs with their progress, oldest first"""
+    return {"batches": [job.progress() for job in batch_runner.jobs.values()], **batch_runner.metrics()}
+
+@router.get("/{job_id}")
+async def get_batch(job_id: str):
+    """A job's status, counts, throughput and estimated time left"""
+    job = batch_runner.jobs.get(job_id)
+    if not job:
+        return not_found()
+    return job.progress()
+
+@router.get("/{job_id}/results")
+async def batch_results(job_id: str, follow: bool = False):
+    """
+    The job's results as NDJSON, in completion order
+
+    With ``follow=true`` the response stays open while the job runs,
+    streaming each result as it is written and a progress record whenever
+    the job changes; a final ``end`` record carries the job state.
+    """
+    job = batch_runner.jobs.get(job_id)
+    if not job:
+        return not_found()
+    return StreamingResponse(ndjson(batch_runner.stream(job, follow)), media_type="application/x-ndjson")
+
+@router.post("/{job_id}/cancel")
+async def cancel_batch(job_id: str):
+    """Stop a queued or running job; results written so far are kept"""
+    job = batch_runner.cancel(job_id)
+    if not job:
+        return not_found()
+    return job.progress()
@@ -0,0 +1,156 @@
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import time
+
+from api.streaming import StreamOptions, encode_chunk, encode_audio, MAX_REQUEST_ID_BYTES
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+
+WS_FRAMES = REGISTRY.counter("lyra_websocket_frames", "WebSocket frames by socket and direction", ["socket", "direction", "format"])
+
+log = get_logger("api.connection")
+
+class ChatConnection:
+    """One chat WebSocket carrying any number of concurrent requests
+
+    Requests that carry a ``request_id`` run as independent tasks, and
+    every frame they produce is tagged with that id, so a slow answer does
+    not hold up a quick classification sent after it. Requests without an
+    id keep the original behaviour and run one after another. Sends are
+    serialized so frames from different requests never interleave
+    mid-message.
+    """
+
+    def __init__(self, websocket, socket: str = "chat"):
+        self.websocket = websocket
+        self.socket = socket
+        self.stream_options = StreamOptions()
+        self.active: Dict[str, asyncio.Task] = {}
+        self.closed = False
+        self._serial: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self.frames_received = WS_FRAMES.labels(socket, "received", "any")
+        self._sent_text = WS_FRAMES.labels(socket, "sent", "text")
+        self._sent_binary = WS_FRAMES.labels(socket, "sent", "binary")
+
+    @staticmethod
+    def validate_request_id(request_id: Any) -> Optional[str]:
+        """Return an error message if ``request_id`` cannot tag frames, else None"""
+        if not isinstance(request_id, str) or not request_id:
+            return "request_id must be a non-empty string"
+        if len(request_id.encode("utf-8")) > MAX_REQUEST_ID_BYTES:
+            return f"request_id must be at most {MAX_REQUEST_ID_BYTES} bytes"
+        return None
+
+    async def send_json(self, payload: Dict[str, Any], request_id: Optional[str] = None):
+        """Send a control frame, tagged with the request it belongs to"""
+        if request_id is not None:
+            payload = {**payload, "request_id": request_id}
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(payload))
+        self._sent_text.inc()
+
+    async def send_chunk(self, content: str, request_id: Optional[str] = None):
+        """Send one (possibly coalesced) chunk in the connection's format"""
+        if self.stream_options.binary:
+            frame = encode_chunk(content, request_id)
+            async with self._send_lock:
+                await self.websocket.send_bytes(frame)
+            self._sent_binary.inc()
+        else:
+            await self.send_json({"type": "chunk", "content": content}, request_id)
+
+    async def send_audio(self, pcm: bytes, request_id: str):
+        """Send a block of synthesized speech (always binary)"""
+        frame = encode_audio(pcm, request_id)
+        async with self._send_lock:
+            await self.websocket.send_bytes(frame)
+        self._sent_binary.inc()
+
+    def start(
+        self,
+        request_id: Optional[str],
+        handler: Callable[[], Awaitable[None]],
+        serial: Optional[bool] = None
+    ) -> asyncio.Task:
+        """
+        Run a request handler as a task
+
+        Args:
+            request_id: Id tagging the request's frames, or None for untagged
+            handler: Coroutine function producing the response
+            serial: Wait for earlier serial requests first; defaults to
+                True for untagged requests and False for tagged ones
+
+        Returns:
+            The task running the request
+        """
+        if serial is None:
+            serial = request_id is None
+        run = handler
+        if serial:
+            previous = self._serial
+
+            async def run():
+                if previous:
+                    await asyncio.gather(previous, return_exceptions=True)
+                await handler()
+
+        task = asyncio.create_task(self._run(request_id, run))
+        if serial:
+            self._serial = task
+        if request_id is not None:
+            self.active[request_id] = task
+        return task
+
+    async def _run(self, request_id: Optional[str], handler: Callable[[], Awaitable[None]]):
+        try:
+            await handler()
+        except asyncio.CancelledError:
+            if not self.closed:
+                with suppress(Exception):
+                    await self.send_json({"type": "cancelled"}, request_id)
+        except Exception as e:
+            log.exception("request_failed", request_id=request_id, error=str(e))
+            if not self.closed:
+                with suppress(Exception):
+                    await self.send_json({"type": "error", "content": str(e)}, request_id)
+        finally:
+            if request_id is not None:
+                self.active.pop(request_id, None)
+
+    def cancel(self, request_id: Optional[str]) -> bool:
+        """
+        Cancel a running request; None cancels the current untagged request
+
+        Returns:
+            True if a running request was cancelled
+        """
+        task = self._serial if request_id is None else self.active.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def interrupt(self) -> Tuple[int, float]:
+        """
+        Cancel every running request and wait until all have stopped
+
+        Returns:
+            (number of requests cancelled, seconds until they had stopped)
+        """
+        started = time.monotonic()
+        tasks = {task for task in [*self.active.values(), self._serial] if task and not task.done()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks), time.monotonic() - started
+
+    async def close(self):
+        """Cancel every request still running (the client has gone away)"""
+        self.closed = True
+        cancelled, _ = await self.interrupt()
+        if cancelled:
+            log.info("websocket_closed_in_flight", cancelled=cancelled)
@@ -0,0 +1,199 @@
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from api.routes import memory
+from api.streaming import split_lines
+from observability.log import get_logger
+import asyncio
+import base64
+import binascii
+import hashlib
+import itertools
+import json
+
+router = APIRouter(prefix="/api/v1/conversations")
+log = get_logger("api.conversations")
+
+MAX_PAGE_SIZE = 200
+# Import records committed per transaction
+IMPORT_BATCH = 500
+
+def encode_cursor(info: Dict) -> str:
+    """Opaque listing cursor for the position after a conversation"""
+    return base64.urlsafe_b64encode(json.dumps([info["updated_at"], info["id"]]).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    """Raises ValueError for a cursor that was not produced by ``encode_cursor``"""
+    try:
+        updated_at, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return str(updated_at), str(conversation_id)
+
+def etag(*parts) -> str:
+    """Weak ETag over the values that determine a response"""
+    digest = hashlib.blake2b(json.dumps(parts, default=str).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+def not_modified(request: Request, tag: str) -> bool:
+    """True if the client's If-None-Match already names this representation"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or tag in (candidate.strip() for candidate in header.split(","))
+
+def cached_json(request: Request, tag: str, build) -> Response:
+    """304 when the client has ``tag``, otherwise ``build()`` as JSON with the ETag"""
+    if not_modified(request, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+    return JSONResponse(build(), headers={"ETag": tag})
+
+def version(info: Dict) -> tuple:
+    """Changes whenever a conversation is written to, deleted or recreated"""
+    return info["id"], info["created_at"], info["updated_at"], info["message_count"]
+
+def summary(info: Dict) -> Dict:
+    """Public fields of a conversation's metadata"""
+    return {key: info[key] for key in ("id", "created_at", "updated_at", "message_count")} | {"archived": bool(info["archive"])}
+
+def clamp(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def ndjson(records: Iterator[Dict]) -> Iterator[bytes]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+@router.get("")
+async def list_conversations(request: Request, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Conversation metadata, most recently updated first
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page; it
+    is None on the last page.
+    """
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    limit = clamp(limit)
+    page = list(itertools.islice(memory.iter_conversations(before), limit + 1))
+    has_more = len(page) > limit
+    page = [summary(info) for info in page[:limit]]
+    next_cursor = encode_cursor(page[-1]) if has_more else None
+    return cached_json(
+        request,
+        etag([version(info) for info in page], next_cursor),
+        lambda: {"conversations": page, "next_cursor": next_cursor}
+    )
+
+@router.get("/export")
+async def export_conversations():
+    """Every conversation as NDJSON: a conversation record followed by its message records, streamed"""
+    return StreamingResponse(
+        ndjson(memory.export_conversations()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="lyra-conversations.ndjson"'}
+    )
+
+@router.post("/import")
+async def import_conversations(request: Request):
+    """
+    Import an NDJSON export, streamed from the request body
+
+    Records are committed in batches as they arrive. Conversations that
+    already exist are skipped. A malformed line or record stops the import
+    with a 400 (with the line number for lines that are not JSON objects);
+    the records before it are kept.
+    """
+    counts = {"conversations": 0, "messages": 0, "skipped": 0}
+    skipped = set()
+    batch = []
+    line_number = 0
+
+    async def commit():
+        result = await asyncio.to_thread(memory.import_conversations, batch, skipped, IMPORT_BATCH)
+        for key, value in result.items():
+            counts[key] += value
+        batch.clear()
+
+    error, error_line = None, None
+    try:
+        async for line in split_lines(request.stream()):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                error, error_line = f"Line {line_number} is not a JSON object", line_number
+                break
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH:
+                await commit()
+        # Records read before a malformed line are still imported
+        await commit()
+    except ValueError as e:
+        error = str(e)
+    if error:
+        log.warning("conversation_import_failed", error=error, line=error_line, **counts)
+        return JSONResponse({"error": error, "line": error_line, "imported": counts}, status_code=400)
+    log.info("conversations_imported", **counts)
+    return {"imported": counts}
+
+@router.get("/{conversation_id}")
+async def get_conversation(request: Request, conversation_id: str):
+    """Conversation metadata (no messages)"""
+    info = memory.get_conversation_info(conversation_id)
+    if info is None:
+        return JSONResponse({"error": "Conversation not found"}, status_code=404)
+    return cached_json(request, etag(version(info)), lambda: summary(info))
+
+@router.get("/{conversation_id}/messages")
+async def list_messages(
+    request: Request,
+    conversation_id: str,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+    limit: int = 50
+):
+    """
+    One page of a conversation's messages, oldest first
+
+    Page forward with ``after`` (the returned ``next_after``), or backward
+    from the newest message with ``before`` (the returned
+    ``next_before``; pass a large ID such as 9223372036854775807 for the
+    latest page). Unchanged pages cost a 304 without loading the
+    conversation.
+    """
+    info = memory.get_conversation_info(conversation_id)
+    if info is None:
+        return JSONResponse({"error": "Conversation not found"}, status_code=404)
+    limit = clamp(limit)
+    tag = etag(version(info), after, before, limit)
+    if not_modified(request, tag):
+        return Response(status_code=304, headers={"ETag": tag})
+
+    backward = before is not None
+    messages = list(itertools.islice(
+        memory.iter_messages(conversation_id, after_id=after, before_id=before, reverse=backward),
+        limit + 1
+    ))
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if backward:
+        messages.reverse()
+    return JSONResponse({
+        "conversation_id": conversation_id,
+        "messages": messages,
+        "next_after": messages[-1]["id"] if has_more and not backward else None,
+        "next_before": messages[0]["id"] if has_more and backward else None
+    }, headers={"ETag": tag})
@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api.routes import scheduler, llm_service, services, memory
+from brain.model_lifecycle import ModelState
+from observability.metrics import REGISTRY
+
+router = APIRouter()
+
+def collect_service_state():
+    """Gauges read from the scheduler, model lifecycles, Ollama pool and memory tiers at scrape time"""
+    yield "lyra_scheduler_in_flight", "gauge", "Generations holding a slot", [("", {}, scheduler.in_flight)]
+    yield "lyra_scheduler_queued", "gauge", "Requests waiting for a generation slot", [("", {}, scheduler.queued)]
+    yield "lyra_model_ready", "gauge", "1 if the model is loaded in Ollama", [
+        ("", {"model": name}, 1 if lifecycle.state == ModelState.READY else 0)
+        for name, lifecycle in llm_service.lifecycles.items()
+    ]
+    pool = services.ollama
+    # No samples when this httpx version does not let the pool be inspected
+    yield "lyra_ollama_pool_connections", "gauge", "Open connections in the Ollama pool by state", [
+        ("", {"state": state}, count) for state, count in (pool.connection_counts() or {}).items()
+    ]
+    yield "lyra_ollama_pool_max_connections", "gauge", "Connection limit of the Ollama pool", [("", {}, pool.max_connections)]
+    yield "lyra_ollama_in_flight", "gauge", "Requests to Ollama awaiting or streaming a response", [("", {}, pool.in_flight)]
+    tiers = memory.tier_stats()
+    yield "lyra_memory_conversations", "gauge", "Conversations by storage tier", [
+        ("", {"tier": "hot"}, tiers["conversations"] - tiers["archived"]),
+        ("", {"tier": "archived"}, tiers["archived"])
+    ]
+    yield "lyra_memory_resident_conversations", "gauge", "Conversations loaded in memory: from the log, or hydrated from an archive", [
+        ("", {"tier": "hot"}, tiers["resident"]),
+        ("", {"tier": "cold"}, tiers["hydrated"])
+    ]
+    yield "lyra_memory_hydrated_bytes", "gauge", "Approximate size of hydrated archived conversations", [("", {}, tiers["hydrated_bytes"])]
+
+REGISTRY.register_collector(collect_service_state)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: requests, queue wait, TTFT, tokens/sec, frames, memory writes, tools, the Ollama pool and request stages"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,24 +1,116 @@
 import sys
 from pathlib import Path
+from typing import Optional, Callable, Awaitable
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from fastapi import APIRouter, WebSocket
-from brain.llm_service import LLMService
+from contextlib import aclosing, suppress
+from functools import partial
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from brain.scheduler import Priority
+from api.streaming import StreamOptions, coalesce
+from api.connection import ChatConnection
+from api.services import Services
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+from observability.tracing import start_trace, mark
+import asyncio
 import json
+import os
+import time
 
-router = APIRouter(prefix="/api/v1")
+log = get_logger("api.routes")
 
-# Initialize the LLM service
-llm_service = LLMService()
+REQUESTS = REGISTRY.counter("lyra_requests", "Chat requests by endpoint and outcome", ["endpoint", "outcome"])
+
+# The process-wide services; the router's lifespan starts them with the app
+# and closes them (including the Ollama connection pool) on shutdown. Data
+# lives in LYRA_MEMORY_DIR (default backend/memory)
+services = Services(Path(os.environ.get("LYRA_MEMORY_DIR", project_root / "memory")))
+memory = services.memory
+response_cache = services.response_cache
+scheduler = services.scheduler
+model_router = services.model_router
+llm_service = services.llm_service
+app_index = services.app_index
+tool_executor = services.tool_executor
+intent_router = services.intent_router
+agent = services.agent
+
+router = APIRouter(prefix="/api/v1", lifespan=services.lifespan)
+
+def record_turn(conversation_id: Optional[str], prompt: str, response: str):
+    """Store an exchange in conversation memory (an interrupted reply may be empty)"""
+    if conversation_id:
+        memory.add_message(conversation_id, "user", prompt)
+        if response:
+            memory.add_message(conversation_id, "assistant", response)
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint for the API"""
     return {"status": "healthy", "service": "Lyra API"}
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss/eviction metrics"""
+    if not response_cache:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.metrics()}
+
+@router.get("/scheduler/stats")
+async def scheduler_stats():
+    """Generation queue length, in-flight count and wait times"""
+    return scheduler.metrics()
+
+@router.get("/router/stats")
+async def router_stats():
+    """Per-route request counts, fallbacks, latency and tokens/sec"""
+    if not model_router:
+        return {"enabled": False}
+    return {"enabled": True, "routes": model_router.metrics()}
+
+@router.get("/intent/stats")
+async def intent_stats():
+    """Fast-path hit rate and latency of commands answered without the LLM"""
+    return intent_router.metrics.metrics()
+
+@router.get("/sessions/stats")
+async def session_stats():
+    """Prompt tokens, shared-prefix share and prompt-eval time across conversation turns"""
+    return llm_service.sessions.metrics()
+
+@router.get("/sessions/{conversation_id}")
+async def session_report(conversation_id: str):
+    """Per-turn prompt size, shared prefix, prompt-eval tokens and time for one conversation"""
+    session = llm_service.sessions.find(conversation_id)
+    if session is None:
+        return JSONResponse({"error": "No session for this conversation"}, status_code=404)
+    return session.report()
+
+@router.get("/memory/stats")
+async def memory_stats():
+    """Conversations per storage tier, hydrated archive cache usage and load counts"""
+    return memory.tier_stats()
+
+@router.get("/ollama/stats")
+async def ollama_stats():
+    """Shared Ollama connection pool: limits, open/idle connections, in-flight requests and reuse"""
+    return services.ollama.metrics()
+
+@router.get("/tools/stats")
+async def tools_stats():
+    """Per-tool call outcomes, timeouts and latency histograms"""
+    return tool_executor.metrics()
+
+@router.get("/agent/stats")
+async def agent_stats():
+    """Tool-calling rounds, calls and stop reasons of the agent loop"""
+    return {"enabled": agent.enabled, **agent.metrics.metrics()}
+
 @router.post("/chat")
 async def chat_completion(request: dict):
     """
@@ -27,46 +119,218 @@ async def chat_completion(request: dict):
     Expected request format:
     {
         "prompt": "User's message",
-        "system_prompt": "Optional system prompt"
+        "system_prompt": "Optional system prompt",
+        "conversation_id": "Optional conversation to continue",
+        "options": {"temperature": 0, "seed": 42},
+        "route": "Optional route or model name (e.g. small, large)"
     }
     """
     prompt = request.get("prompt", "")
     system_prompt = request.get("system_prompt")
+    conversation_id = request.get("conversation_id")
+    options = request.get("options")
+    route = request.get("route")
     
     if not prompt:
         return {"error": "Prompt is required"}
     
-    response = await llm_service.generate_response(prompt, system_prompt)
-    return {"response": response}
+    started = time.monotonic()
+    trace = start_trace("rest", conversation_id=conversation_id)
+    intent = await intent_router.handle(prompt)
+    if intent:
+        record_turn(conversation_id, prompt, intent.reply)
+        REQUESTS.labels("rest", "tool").inc()
+        trace.finish("tool")
+        return {"response": intent.reply, "tool": intent.tool_name, "result": intent.result, "queue_wait_ms": 0}
+    
+    waits = []
+    
+    async def record_wait(position: int, waited: float):
+        if not position:
+            waits.append(waited)
+    
+    if agent.enabled:
+        tool_frames = []
+        
+        async def record_status(frame: dict):
+            if frame["type"] == "tool":
+                tool_frames.append({"tool": frame["tool"], "parameters": frame["parameters"], "result": frame["result"]})
+        
+        chunks = [chunk async for chunk in agent.run(
+            prompt, system_prompt, conversation_id, options,
+            priority=Priority.BATCH, on_queued=record_wait, route=route, on_status=record_status
+        )]
+        response = "".join(chunks)
+    else:
+        tool_frames = None
+        response = await llm_service.generate_response(
+            prompt, system_prompt, conversation_id, options,
+            priority=Priority.BATCH, on_queued=record_wait, route=route
+        )
+    mark("last_token")
+    record_turn(conversation_id, prompt, response)
+    mark("persisted")
+    intent_router.metrics.record("llm", time.monotonic() - started)
+    REQUESTS.labels("rest", "completed").inc()
+    trace.finish("completed")
+    reply = {"response": response, "queue_wait_ms": round(waits[-1] * 1000) if waits else 0}
+    if tool_frames is not None:
+        reply["tool_calls"] = tool_frames
+    return reply
+
+async def stream_reply(
+    connection: ChatConnection,
+    message_data: dict,
+    request_id: Optional[str] = None,
+    on_first_chunk: Optional[Callable[[], Awaitable[None]]] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    record: bool = True
+) -> str:
+    """
+    Stream one response to the client, reporting queue position while waiting
+    
+    Tool commands the intent router is confident about are run directly
+    and answered with a tool frame and the tool's message instead. When
+    tools are permitted, other prompts go through the agent loop, whose
+    tool_call, tool and status frames are sent as they happen.
+    
+    If the request is cancelled (client cancel, interrupt or disconnect),
+    only the text the client actually received is stored as the reply.
+    
+    Returns:
+        The full response text
+    """
+    stream_options = connection.stream_options
+    prompt = message_data["prompt"]
+    system_prompt = message_data.get("system_prompt")
+    conversation_id = message_data.get("conversation_id")
+    options = message_data.get("options")
+    route = message_data.get("route")
+    
+    async def report_queue(position: int, waited: float):
+        if position:
+            await connection.send_json({"type": "queued", "position": position, "wait_ms": round(waited * 1000)}, request_id)
+        else:
+            await connection.send_json({"type": "started", "wait_ms": round(waited * 1000)}, request_id)
+    
+    async def tool_reply(reply: str):
+        yield reply
+    
+    async def send_status(frame: dict):
+        await connection.send_json(frame, request_id)
+    
+    chunks = []
+    started = time.monotonic()
+    trace = start_trace(connection.socket, request_id=request_id, conversation_id=conversation_id)
+    intent = await intent_router.handle(prompt)
+    if intent:
+        # A tool command answered without the LLM
+        await connection.send_json({
+            "type": "tool", "tool": intent.tool_name,
+            "parameters": intent.parameters, "result": intent.result
+        }, request_id)
+        stream = tool_reply(intent.reply)
+    elif agent.enabled:
+        stream = agent.run(
+            prompt, system_prompt, conversation_id, options,
+            priority=Priority.INTERACTIVE, on_queued=report_queue, route=route, on_status=send_status
+        )
+    else:
+        stream = llm_service.stream_response(
+            prompt, system_prompt, conversation_id, options,
+            priority=Priority.INTERACTIVE, on_queued=report_queue, route=route
+        )
+    if not intent and stream_options.coalescing:
+        stream = coalesce(stream, stream_options.coalesce_ms / 1000, stream_options.max_bytes)
+    try:
+        async with aclosing(stream):
+            async for chunk in stream:
+                await connection.send_chunk(chunk, request_id)
+                chunks.append(chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+                if len(chunks) == 1:
+                    mark("first_token")
+                    if on_first_chunk:
+                        await on_first_chunk()
+    except asyncio.CancelledError:
+        if record:
+            record_turn(conversation_id, prompt, "".join(chunks))
+        REQUESTS.labels(connection.socket, "cancelled").inc()
+        trace.finish("cancelled", delivered_chunks=len(chunks))
+        raise
+    mark("last_token")
+    response = "".join(chunks)
+    if record:
+        record_turn(conversation_id, prompt, response)
+        mark("persisted")
+    if not intent:
+        intent_router.metrics.record("llm", time.monotonic() - started)
+    outcome = "tool" if intent else "completed"
+    REQUESTS.labels(connection.socket, outcome).inc()
+    trace.finish(outcome, chunks=len(chunks))
+    
+    # Send end of response signal
+    await connection.send_json({"type": "end"}, request_id)
+    return response
 
 @router.websocket("/ws/chat")
 async def chat_websocket(websocket: WebSocket):
-    """WebSocket endpoint for real-time chat"""
-    print("WebSocket connection attempt")
+    """
+    WebSocket endpoint for real-time chat
+    
+    By default every token is sent as its own JSON chunk frame. Sending
+    {"type": "configure", "coalesce_ms": 25, "max_bytes": 1024, "format": "binary"}
+    switches the connection to coalesced and/or binary chunk frames.
+    
+    Prompts carrying a "request_id" run concurrently and all of their
+    frames are tagged with it; {"type": "cancel", "request_id": "..."}
+    stops one and {"type": "interrupt"} stops all of them. Prompts without
+    a request_id are answered one at a time.
+    """
     await websocket.accept()
-    print("WebSocket connection accepted")
+    connection = ChatConnection(websocket)
+    log.info("websocket_connected", client=websocket.client.host if websocket.client else None)
     
     try:
         while True:
-            # Receive message from client
+            # Receive message from client; replies stream from their own tasks
             data = await websocket.receive_text()
-            print(f"Received data: {data}")
+            connection.frames_received.inc()
             message_data = json.loads(data)
+            # Prompts are not logged, only their size
+            log.debug("websocket_message", type=message_data.get("type", "prompt"), bytes=len(data))
+            request_id = message_data.get("request_id")
             
-            prompt = message_data.get("prompt", "")
-            system_prompt = message_data.get("system_prompt")
+            if request_id is not None:
+                error = ChatConnection.validate_request_id(request_id)
+                if error:
+                    await connection.send_json({"type": "error", "content": error})
+                    continue
             
-            if prompt:
-                # Stream the response back to the client
-                async for chunk in llm_service.stream_response(prompt, system_prompt):
-                    await websocket.send_text(json.dumps({"type": "chunk", "content": chunk}))
-                
-                # Send end of response signal
-                await websocket.send_text(json.dumps({"type": "end"}))
+            if message_data.get("type") == "configure":
+                connection.stream_options = StreamOptions.from_message(message_data)
+                await connection.send_json(connection.stream_options.describe())
+            elif message_data.get("type") == "interrupt":
+                cancelled, seconds = await connection.interrupt()
+                await connection.send_json({"type": "interrupted", "cancelled": cancelled, "cancel_latency_ms": round(seconds * 1000, 1)})
+            elif message_data.get("type") == "cancel":
+                if not connection.cancel(request_id):
+                    await connection.send_json({"type": "error", "content": "No such request in progress"}, request_id)
+            elif message_data.get("prompt"):
+                if request_id in connection.active:
+                    await connection.send_json({"type": "error", "content": "request_id is already in use"}, request_id)
+                    continue
+                connection.start(request_id, partial(stream_reply, connection, message_data, request_id))
             else:
-                await websocket.send_text(json.dumps({"type": "error", "content": "Prompt is required"}))
+                await connection.send_json({"type": "error", "content": "Prompt is required"}, request_id)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        log.exception("websocket_error", error=str(e))
     finally:
-        await websocket.close()
-        print("WebSocket connection closed")
\ No newline at end of file
+        # The client is gone; stop any upstream generations
+        await connection.close()
+        with suppress(RuntimeError):
+            await websocket.close()
+        log.info("websocket_closed")
@@ -0,0 +1,150 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+import asyncio
+import os
+import re
+
+from brain.llm_service import LLMService
+from brain.context_builder import ContextBuilder
+from brain.response_cache import ResponseCache
+from brain.scheduler import RequestScheduler
+from brain.model_router import ModelRouter, ModelRoute
+from brain.ollama_pool import OllamaPool
+from brain.intent import IntentRouter
+from brain.agent import AgentLoop
+from brain.batch import BatchRunner
+from memory.storage import MemoryManager
+from memory.embeddings import HashingEmbedder, embedder_from_env
+from memory.vector_index import VectorIndex
+from observability.log import get_logger
+from tools.executor import ToolExecutor, ApplicationLauncher
+from tools.app_index import AppIndex
+
+DEFAULT_MODEL = "gemma3:4b-it-q4_K_M"
+
+log = get_logger("api.services")
+
+class Services:
+    """
+    The application's long-lived services, one set per process
+
+    Everything that talks to Ollama shares one ``OllamaPool`` client, so
+    the chat and voice routers, model lifecycles and agent all reuse the
+    same keep-alive connections. Building the container only wires
+    objects together; ``lifespan`` starts the background work (model
+    preload, keep-alive pings, unfinished batch jobs) when the app starts
+    and closes the pool, memory writer, tool workers and cache when it
+    stops.
+
+    Args:
+        memory_dir: Directory for conversations, vectors and caches
+        ollama_host: Ollama URL (default OLLAMA_HOST or localhost)
+    """
+
+    def __init__(self, memory_dir: Path, ollama_host: Optional[str] = None):
+        self.memory_dir = memory_dir
+        # One connection pool to Ollama for the whole process (LYRA_OLLAMA_* limits)
+        self.ollama = OllamaPool.from_env(ollama_host)
+
+        # Conversation memory; writes are batched off the request path.
+        # Conversations idle for LYRA_ARCHIVE_AFTER_DAYS (default 30, 0 keeps
+        # everything in the log) move to compressed archive segments, and up
+        # to LYRA_ARCHIVE_CACHE_MB of them are kept hydrated after a read
+        archive_days = float(os.environ.get("LYRA_ARCHIVE_AFTER_DAYS", "30"))
+        # Semantic recall embeds with LYRA_EMBED_MODEL when it is set (hashing
+        # otherwise). Each embedding model keeps its own index, built from the
+        # stored messages the first time it is used
+        embedder = embedder_from_env(ollama_host)
+        vectors = "vectors" if isinstance(embedder, HashingEmbedder) else "vectors-" + re.sub(r"[^\w.-]", "_", embedder.name)
+        self.memory = MemoryManager(
+            str(memory_dir / "conversations.json"),
+            write_behind=True,
+            vector_index=VectorIndex(str(memory_dir / vectors), embedder),
+            archive_after=archive_days * 86400 if archive_days > 0 else None,
+            max_hydrated_bytes=int(float(os.environ.get("LYRA_ARCHIVE_CACHE_MB", "16")) * 1024 * 1024)
+        )
+
+        # Response caching is opt-in: set LYRA_RESPONSE_CACHE=1 to enable it
+        self.response_cache = None
+        if os.environ.get("LYRA_RESPONSE_CACHE") == "1":
+            self.response_cache = ResponseCache(disk_path=str(memory_dir / "response_cache.db"))
+
+        # Admission control: one generation at a time by default (LYRA_MAX_IN_FLIGHT)
+        self.scheduler = RequestScheduler(max_in_flight=int(os.environ.get("LYRA_MAX_IN_FLIGHT", "1")))
+
+        # Multi-model routing is opt-in: set LYRA_SMALL_MODEL to a small model
+        # (e.g. gemma3:1b) to serve greetings and commands from it
+        self.model_router = None
+        if os.environ.get("LYRA_SMALL_MODEL"):
+            self.model_router = ModelRouter(
+                small=ModelRoute("small", os.environ["LYRA_SMALL_MODEL"], first_token_timeout=10.0),
+                large=ModelRoute("large", DEFAULT_MODEL, first_token_timeout=30.0)
+            )
+
+        self.llm_service = LLMService(
+            model_name=DEFAULT_MODEL,
+            # Evicting old turns in blocks keeps the prompt prefix stable for
+            # several turns, so Ollama can reuse the evaluated history
+            context_builder=ContextBuilder(self.memory, eviction_target=0.6),
+            response_cache=self.response_cache,
+            scheduler=self.scheduler,
+            router=self.model_router,
+            client=self.ollama.client
+        )
+
+        # Tools are opt-in: LYRA_ALLOWED_TOOLS=app_launcher lets the assistant run them.
+        # Commands for a permitted tool ("open kate") are answered without the LLM;
+        # other prompts go through the agent loop, which offers the permitted tools
+        # to the model.
+        self.app_index = AppIndex(cache_path=str(memory_dir / "app_index.json"))
+        self.tool_executor = ToolExecutor()
+        self.tool_executor.register_tool(ApplicationLauncher(self.app_index))
+        for tool_name in os.environ.get("LYRA_ALLOWED_TOOLS", "").split(","):
+            self.tool_executor.grant_permission(tool_name.strip())
+        self.intent_router = IntentRouter(self.tool_executor, self.app_index)
+        self.agent = AgentLoop(self.llm_service, self.tool_executor)
+
+        # Uploaded batch files run in the background at the lowest scheduling
+        # priority, LYRA_BATCH_CONCURRENCY prompts at a time (default 2)
+        self.batch_runner = BatchRunner(
+            self.llm_service,
+            str(memory_dir / "batches"),
+            concurrency=int(os.environ.get("LYRA_BATCH_CONCURRENCY", "2"))
+        )
+
+    async def start(self):
+        """Open the Ollama pool and memory, preload the models, keep them warm while the assistant is in use and resume unfinished batch jobs"""
+        self.ollama.open()
+        # Reopens the stores when an earlier lifespan closed them (catching up
+        # the vector index may call the embedding model)
+        await asyncio.to_thread(self.memory.open)
+        if self.response_cache:
+            self.response_cache.open()
+        for lifecycle in self.llm_service.lifecycles.values():
+            lifecycle.start()
+        if any(self.tool_executor.permissions.values()):
+            await asyncio.to_thread(self.intent_router.warm)
+        await self.batch_runner.start()
+        log.info("services_started", ollama_pool=self.ollama.max_connections, http2=self.ollama.http2)
+
+    async def close(self):
+        """Stop batch jobs and keep-alive pings, flush pending conversation writes and close the Ollama pool"""
+        await self.batch_runner.close()
+        for lifecycle in self.llm_service.lifecycles.values():
+            await lifecycle.stop()
+        self.memory.close()
+        self.tool_executor.close()
+        if self.response_cache:
+            self.response_cache.close()
+        await self.ollama.close()
+        log.info("services_closed", ollama_requests=self.ollama.requests, connections_opened=self.ollama.connections_opened)
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """FastAPI lifespan: services run from application startup to shutdown"""
+        await self.start()
+        try:
+            yield
+        finally:
+            await self.close()
@@ -0,0 +1,153 @@
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+
+# Binary frame layouts: a type byte, then for tagged frames a one-byte
+# request_id length and the request_id, then the payload (UTF-8 text for
+# chunks, 16-bit mono PCM for audio)
+CHUNK_FRAME = 0x01
+TAGGED_CHUNK_FRAME = 0x02
+AUDIO_FRAME = 0x03
+MAX_REQUEST_ID_BYTES = 255
+
+# Bounds for client-negotiated values
+MAX_COALESCE_MS = 250
+MAX_COALESCE_BYTES = 64 * 1024
+
+_END = object()
+
+class StreamOptions:
+    """How a WebSocket connection wants response chunks delivered
+
+    The defaults are the original protocol: one JSON ``chunk`` text frame
+    per model token. A client can send a ``configure`` message to have
+    tokens coalesced into fewer frames, and to receive chunks as compact
+    binary frames instead of JSON.
+    """
+
+    def __init__(self, coalesce_ms: float = 0, max_bytes: int = 0, binary: bool = False):
+        self.coalesce_ms = coalesce_ms
+        self.max_bytes = max_bytes
+        self.binary = binary
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "StreamOptions":
+        """
+        Build options from a client ``configure`` message, clamping values
+
+        Args:
+            message: {"type": "configure", "coalesce_ms": 25, "max_bytes": 1024, "format": "binary"}
+
+        Returns:
+            The effective stream options
+        """
+        coalesce_ms = min(max(float(message.get("coalesce_ms", 0)), 0), MAX_COALESCE_MS)
+        max_bytes = min(max(int(message.get("max_bytes", 0)), 0), MAX_COALESCE_BYTES)
+        return cls(coalesce_ms, max_bytes, message.get("format") == "binary")
+
+    @property
+    def coalescing(self) -> bool:
+        return self.coalesce_ms > 0 or self.max_bytes > 0
+
+    def describe(self) -> Dict[str, Any]:
+        """The ``configured`` acknowledgement sent back to the client"""
+        return {
+            "type": "configured",
+            "coalesce_ms": self.coalesce_ms,
+            "max_bytes": self.max_bytes,
+            "format": "binary" if self.binary else "json"
+        }
+
+def encode_chunk(content: str, request_id: Optional[str] = None) -> bytes:
+    """Encode a chunk as a binary frame, tagged with its request_id if given"""
+    if request_id is None:
+        return bytes((CHUNK_FRAME,)) + content.encode("utf-8")
+    tag = request_id.encode("utf-8")
+    return bytes((TAGGED_CHUNK_FRAME, len(tag))) + tag + content.encode("utf-8")
+
+def encode_audio(pcm: bytes, request_id: str) -> bytes:
+    """Encode synthesized speech as a binary frame tagged with its request_id"""
+    tag = request_id.encode("utf-8")
+    return bytes((AUDIO_FRAME, len(tag))) + tag + pcm
+
+async def coalesce(stream: AsyncIterator[str], window: float, max_bytes: int = 0) -> AsyncIterator[str]:
+    """
+    Merge a token stream into fewer, larger chunks
+
+    The first token is passed through at once so time to first token is
+    unchanged. After that, tokens are buffered until ``window`` seconds
+    have passed since the oldest buffered token or the buffer reaches
+    ``max_bytes``, whichever comes first. A stalled stream still flushes
+    when the window expires. Closing the coalescer closes the source.
+
+    Args:
+        stream: Source of text chunks
+        window: Maximum seconds a token may wait in the buffer (0 for no limit)
+        max_bytes: Flush once this many UTF-8 bytes are buffered (0 for no limit)
+
+    Yields:
+        Coalesced text chunks
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async with aclosing(stream):
+                async for chunk in stream:
+                    queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    producer = asyncio.create_task(pump())
+    buffer = []
+    size = 0
+    deadline = 0.0
+    first = True
+    try:
+        while True:
+            if buffer and window > 0:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    size = 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if first:
+                first = False
+                yield item
+                continue
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(item)
+            size += len(item.encode("utf-8"))
+            if max_bytes and size >= max_bytes:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+async def split_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed request body (NDJSON / JSONL) into lines as the chunks arrive"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
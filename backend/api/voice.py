@@ -0,0 +1,283 @@
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from functools import partial
+from fastapi import APIRouter, WebSocket
+from api.connection import ChatConnection
+from api.routes import stream_reply, record_turn
+from api.streaming import StreamOptions
+from observability.log import get_logger
+from voice.pipeline import SpeechPipeline, Utterance, VoiceMetrics
+from voice.recognizer import Recognizer, create_recognizer
+from voice.vad import VoiceActivityDetector
+from voice.tts import TTSService, SpeechOutput
+from voice.wakeword import WakeWordDetector, WakeWordMetrics, load_templates
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+log = get_logger("api.voice")
+
+# Speech recognition engine (LYRA_STT_ENGINE=faster-whisper|stub), loaded on
+# first use; transcription runs on LYRA_STT_WORKERS threads started with the app
+STT_ENGINE = os.environ.get("LYRA_STT_ENGINE", "faster-whisper")
+stt_executor: Optional[ThreadPoolExecutor] = None
+voice_metrics = VoiceMetrics()
+recognizer: Optional[Recognizer] = None
+recognizer_lock = threading.Lock()
+
+# Speech synthesis engine (LYRA_TTS_ENGINE=piper|sine) in a worker process pool
+TTS_ENGINE = os.environ.get("LYRA_TTS_ENGINE", "piper")
+TTS_OPTIONS = {"model_path": os.environ.get("LYRA_PIPER_MODEL")} if TTS_ENGINE == "piper" else {}
+COMMON_PHRASES = ["Hello!", "Sure.", "Okay.", "Done.", "Sorry, I didn't catch that."]
+tts_service: Optional[TTSService] = None
+# Held while the pool starts, so concurrent connections share one pool
+tts_lock = asyncio.Lock()
+
+# Wake word enrollment recordings (*.wav) for hands-free listening
+WAKE_WORD_DIR = os.environ.get("LYRA_WAKE_WORD_DIR")
+wake_word_metrics = WakeWordMetrics()
+wake_word_templates: Optional[List] = None
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start the transcription threads with the app; stop them and the synthesis worker processes on shutdown"""
+    global stt_executor, tts_service, tts_lock
+    tts_lock = asyncio.Lock()
+    stt_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("LYRA_STT_WORKERS", "2")), thread_name_prefix="stt")
+    try:
+        yield
+    finally:
+        stt_executor.shutdown(wait=False, cancel_futures=True)
+        stt_executor = None
+        if tts_service:
+            tts_service.close()
+            tts_service = None
+
+router = APIRouter(prefix="/api/v1", lifespan=lifespan)
+
+def get_recognizer() -> Recognizer:
+    """Create the recognizer on first use; loading a Whisper model takes seconds, so call it off the event loop"""
+    global recognizer
+    with recognizer_lock:
+        if recognizer is None:
+            recognizer = create_recognizer(STT_ENGINE)
+    return recognizer
+
+async def get_tts() -> TTSService:
+    """
+    Start the synthesis workers on first use and pre-synthesize common phrases
+
+    Raises:
+        ImportError, ValueError: If the engine cannot be built
+        BrokenExecutor: If the worker processes died while starting
+    """
+    global tts_service
+    async with tts_lock:
+        if tts_service is None:
+            service = TTSService(TTS_ENGINE, TTS_OPTIONS, workers=int(os.environ.get("LYRA_TTS_WORKERS", "2")))
+            try:
+                await service.warm(COMMON_PHRASES)
+            except BaseException:
+                service.close()
+                raise
+            tts_service = service
+    return tts_service
+
+def get_wake_word_templates() -> List:
+    """Load the wake word templates from ``LYRA_WAKE_WORD_DIR`` on first use"""
+    global wake_word_templates
+    if wake_word_templates is None:
+        paths = sorted(Path(WAKE_WORD_DIR).glob("*.wav")) if WAKE_WORD_DIR else []
+        if not paths:
+            raise ValueError("No wake word recordings found; set LYRA_WAKE_WORD_DIR to a directory of WAV files")
+        wake_word_templates = load_templates(paths)
+    return wake_word_templates
+
+@router.get("/voice/stats")
+async def voice_stats():
+    """Utterance counts, silence dropped by the VAD, end-of-speech latencies, wake word and TTS cache stats"""
+    return {
+        "engine": STT_ENGINE,
+        **voice_metrics.metrics(),
+        "wake_word": wake_word_metrics.metrics(),
+        "tts": tts_service.metrics() if tts_service else None
+    }
+
+@router.websocket("/ws/voice")
+async def voice_websocket(websocket: WebSocket):
+    """
+    WebSocket endpoint for spoken chat
+    
+    Binary messages are raw 16-bit little-endian mono PCM. Text messages
+    are JSON: {"type": "configure", "sample_rate": 16000, "conversation_id": "...",
+    "system_prompt": "...", "speak": true} (stream options as on /ws/chat are
+    accepted too) and {"type": "end"} to finalize the current utterance.
+    The server sends speech_start, partial, speech_end and final transcript
+    frames, then the reply as chunk frames tagged with the utterance's
+    request_id, a latency frame on the first token, and end. With "speak"
+    the reply is also spoken sentence by sentence: audio_start (with the
+    sample rate), binary audio frames (type 0x03, tagged like chunks) and
+    audio_end.
+    
+    Barge-in: when the user starts talking over a reply (unless configured
+    with "barge_in": false), or on {"type": "interrupt"}, generation and
+    speech stop, the stored reply is cut to what was delivered, and an
+    interrupted frame reports the cancellation latency.
+    
+    With "wake_word": true the stream is only searched for the wake word
+    (recordings in LYRA_WAKE_WORD_DIR) until it is heard; a wake frame
+    follows, the next utterance is transcribed as usual, and a sleep frame
+    marks the return to waiting.
+    """
+    await websocket.accept()
+    connection = ChatConnection(websocket, socket="voice")
+    try:
+        # The first connection loads (or downloads) the model on an STT thread
+        engine = await asyncio.get_running_loop().run_in_executor(stt_executor, get_recognizer)
+    except (ImportError, ValueError) as e:
+        await connection.send_json({"type": "error", "content": str(e)})
+        await websocket.close()
+        return
+    
+    settings = {"conversation_id": None, "system_prompt": None}
+    speak = False
+    barge_in = True
+    wake_word = False
+    utterance_ids = itertools.count(1)
+    
+    async def interrupt(reason: str):
+        cancelled, seconds = await connection.interrupt()
+        if cancelled:
+            voice_metrics.record_interrupt(seconds)
+            await connection.send_json({
+                "type": "interrupted", "reason": reason,
+                "cancelled": cancelled, "cancel_latency_ms": round(seconds * 1000, 1)
+            })
+    
+    async def emit(event: dict):
+        await connection.send_json(event)
+        if event["type"] == "speech_start" and barge_in and connection.active:
+            await interrupt("speech")
+    
+    async def on_utterance(utterance: Utterance):
+        request_id = f"utterance-{next(utterance_ids)}"
+        message_data = {"prompt": utterance.text, **settings}
+        
+        async def report_latency():
+            latency = voice_metrics.record(utterance, time.monotonic())
+            await connection.send_json({"type": "latency", **latency}, request_id)
+        
+        async def reply():
+            if not speak:
+                await stream_reply(connection, message_data, request_id, report_latency)
+                return
+            
+            async def audio_start(sample_rate: int):
+                await connection.send_json({"type": "audio_start", "sample_rate": sample_rate, "format": "pcm_s16le"}, request_id)
+            
+            speech = SpeechOutput(
+                await get_tts(), partial(connection.send_audio, request_id=request_id),
+                on_start=audio_start, started_at=utterance.ended_at
+            )
+            try:
+                response = await stream_reply(
+                    connection, message_data, request_id, report_latency,
+                    on_chunk=speech.feed, record=False
+                )
+                await speech.finish()
+            except asyncio.CancelledError:
+                # Interrupted: the user only heard the segments already sent
+                await speech.close()
+                record_turn(message_data["conversation_id"], utterance.text, speech.delivered_text)
+                raise
+            finally:
+                await speech.close()
+            record_turn(message_data["conversation_id"], utterance.text, response)
+            voice_metrics.record_first_audio(speech.time_to_first_audio)
+            await connection.send_json({
+                "type": "audio_end",
+                "end_of_speech_to_first_audio_ms": round(speech.time_to_first_audio * 1000, 1) if speech.time_to_first_audio else None
+            }, request_id)
+        
+        connection.start(request_id, reply, serial=True)
+    
+    def new_pipeline(sample_rate: int) -> SpeechPipeline:
+        detector = None
+        if wake_word:
+            detector = WakeWordDetector(get_wake_word_templates(), sample_rate=sample_rate, metrics=wake_word_metrics)
+        return SpeechPipeline(
+            engine, emit, on_utterance,
+            executor=stt_executor, sample_rate=sample_rate,
+            vad=VoiceActivityDetector(sample_rate=sample_rate),
+            wake_word=detector
+        )
+    
+    pipeline = new_pipeline(16000)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            connection.frames_received.inc()
+            if message.get("bytes") is not None:
+                await pipeline.feed(message["bytes"])
+                continue
+            
+            message_data = json.loads(message.get("text") or "{}")
+            if message_data.get("type") == "configure":
+                settings["conversation_id"] = message_data.get("conversation_id", settings["conversation_id"])
+                settings["system_prompt"] = message_data.get("system_prompt", settings["system_prompt"])
+                connection.stream_options = StreamOptions.from_message(message_data)
+                speak = bool(message_data.get("speak", speak))
+                barge_in = bool(message_data.get("barge_in", barge_in))
+                if speak:
+                    try:
+                        await get_tts()
+                    except (ImportError, ValueError) as e:
+                        speak = False
+                        await connection.send_json({"type": "error", "content": str(e)})
+                    except BrokenExecutor as e:
+                        speak = False
+                        log.error("tts_workers_failed", engine=TTS_ENGINE, error=str(e))
+                        await connection.send_json({"type": "error", "content": f"Speech synthesis ({TTS_ENGINE}) failed to start"})
+                wake_word_before = wake_word
+                wake_word = bool(message_data.get("wake_word", wake_word))
+                if wake_word:
+                    try:
+                        get_wake_word_templates()
+                    except (OSError, ValueError) as e:
+                        wake_word = False
+                        await connection.send_json({"type": "error", "content": str(e)})
+                sample_rate = int(message_data.get("sample_rate", pipeline.sample_rate))
+                if sample_rate != pipeline.sample_rate or wake_word != wake_word_before:
+                    voice_metrics.record_vad(pipeline.vad.stats)
+                    pipeline = new_pipeline(sample_rate)
+                await connection.send_json({
+                    **connection.stream_options.describe(),
+                    "sample_rate": sample_rate, "speak": speak, "barge_in": barge_in, "wake_word": wake_word
+                })
+            elif message_data.get("type") == "end":
+                await pipeline.finish()
+            elif message_data.get("type") == "interrupt":
+                await interrupt("request")
+            else:
+                await connection.send_json({"type": "error", "content": "Unknown message type"})
+    except Exception as e:
+        log.exception("voice_websocket_error", error=str(e))
+    finally:
+        voice_metrics.record_vad(pipeline.vad.stats)
+        await pipeline.close()
+        await connection.close()
+        with suppress(RuntimeError):
+            await websocket.close()
@@ -0,0 +1,91 @@
+"""
+Batch job throughput against one request at a time
+
+Runs the same prompt file (with a share of repeated prompts) through
+LLMService against the fake Ollama server twice: awaiting each prompt in
+turn, as a client looping over POST /api/v1/chat would, and as a
+BatchRunner job with bounded concurrency and deduplication. Reports wall
+time, prompts per second and the requests that reached the model.
+
+Usage:
+    python benchmarks/bench_batch.py [--prompts 200] [--unique 0.7] [--concurrency 4] [--ttft 0.05] [--token-rate 400]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ollama import AsyncClient
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.fake_ollama import FakeOllama
+from brain.batch import BatchRunner
+from brain.llm_service import LLMService
+from brain.scheduler import RequestScheduler, Priority
+
+def make_prompts(count: int, unique: float, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    distinct = max(1, int(count * unique))
+    return [f"Summarize conversation {rng.randrange(distinct)} in one sentence." for _ in range(count)]
+
+async def sequential(llm: LLMService, prompts: list) -> float:
+    started = time.perf_counter()
+    for prompt in prompts:
+        await llm.generate(prompt, options={"temperature": 0}, priority=Priority.BATCH)
+    return time.perf_counter() - started
+
+async def batched(llm: LLMService, prompts: list, concurrency: int) -> float:
+    async def lines():
+        for prompt in prompts:
+            # Greedy decoding, so repeated prompts can be deduplicated
+            yield json.dumps({"prompt": prompt, "options": {"temperature": 0}}).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = BatchRunner(llm, tmp, concurrency=concurrency)
+        await runner.start()
+        started = time.perf_counter()
+        job = await runner.create(lines())
+        async for _ in runner.stream(job, follow=True):
+            pass
+        elapsed = time.perf_counter() - started
+        await runner.close()
+    return elapsed
+
+def measure(mode: str, prompts: list, args) -> dict:
+    with FakeOllama(ttft=args.ttft, token_rate=args.token_rate) as fake:
+        llm = LLMService(
+            model_name="bench",
+            client=AsyncClient(host=fake.url),
+            scheduler=RequestScheduler(max_in_flight=args.concurrency)
+        )
+        if mode == "sequential":
+            elapsed = asyncio.run(sequential(llm, prompts))
+        else:
+            elapsed = asyncio.run(batched(llm, prompts, args.concurrency))
+        return {"mode": mode, "seconds": elapsed, "rate": len(prompts) / elapsed, "model_requests": fake.requests.get("/api/chat", 0)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--unique", type=float, default=0.7, help="Share of distinct prompts")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch prompts in flight (and the scheduler limit)")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Fake model time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=400.0, help="Fake model tokens per second")
+    args = parser.parse_args()
+
+    prompts = make_prompts(args.prompts, args.unique)
+    print(f"{'mode':<12} {'seconds':>8} {'prompts/s':>10} {'model requests':>15}")
+    for mode in ("sequential", "batch"):
+        result = measure(mode, prompts, args)
+        print(f"{result['mode']:<12} {result['seconds']:>8.2f} {result['rate']:>10.1f} {result['model_requests']:>15}")
+
+if __name__ == "__main__":
+    main()
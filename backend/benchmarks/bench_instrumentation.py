@@ -0,0 +1,106 @@
+"""
+Cost of the metrics, tracing and logging instrumentation
+
+Times each primitive (counter increment, histogram observation, trace
+marks, a queued log event, a filtered-out debug event), then streams
+requests in-process through the real WebSocket reply path against an
+instant stub model and compares the instrumentation a request performs
+with the CPU the whole request costs.
+
+Usage:
+    python benchmarks/bench_instrumentation.py [--tokens 200] [--requests 200]
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+import timeit
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import routes
+from api.connection import ChatConnection
+from observability import log
+from observability.metrics import Registry
+from observability.tracing import start_trace
+from conftest import StubOllamaClient, repeat
+
+class NullWebSocket:
+    """Accepts frames and throws them away"""
+
+    async def send_text(self, text):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+def per_call_us(statement, number=100_000) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=3)) / number * 1e6
+
+def primitives() -> dict:
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ["socket"]).labels("chat")
+    histogram = registry.histogram("bench_seconds", "bench", ["stage"])
+    bound = histogram.labels("first_token")
+    logger = log.get_logger("bench")
+
+    def traced():
+        trace = start_trace("bench")
+        for stage in ("context_built", "admitted", "first_token", "last_token", "persisted"):
+            trace.mark(stage)
+        trace.finish()
+
+    return {
+        "counter.inc": per_call_us(counter.inc),
+        "histogram.observe": per_call_us(lambda: bound.observe(0.05)),
+        "histogram.labels().observe": per_call_us(lambda: histogram.labels("first_token").observe(0.05)),
+        "log.debug (filtered)": per_call_us(lambda: logger.debug("bench", n=1)),
+        "log.info (queued)": per_call_us(lambda: logger.info("bench", n=1), number=20_000),
+        "trace (5 marks + finish)": per_call_us(traced, number=20_000)
+    }
+
+async def stream_requests(tokens: int, requests: int) -> float:
+    """CPU microseconds per request through stream_reply"""
+    connection = ChatConnection(NullWebSocket())
+    routes.llm_service.client = StubOllamaClient(repeat("t{i} ", tokens))
+    message = {"prompt": "benchmark"}
+    for _ in range(10):
+        await routes.stream_reply(connection, message, record=False)
+    started = time.thread_time()
+    for _ in range(requests):
+        await routes.stream_reply(connection, message, record=False)
+    return (time.thread_time() - started) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens per streamed response")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    # Log events are formatted and written on the listener thread; discard them
+    log.configure(level="INFO", fmt="json", stream=io.StringIO())
+    costs = primitives()
+    print(f"{'primitive':<28} {'us/call':>8}")
+    for name, cost in costs.items():
+        print(f"{name:<28} {cost:>8.2f}")
+
+    # Per request: a frame counter per chunk plus the end frame, queue-wait,
+    # TTFT and stage histograms, and one trace with its log event
+    instrumentation = (
+        (args.tokens + 1) * costs["counter.inc"]
+        + 3 * costs["histogram.labels().observe"]
+        + costs["trace (5 marks + finish)"]
+        + 2 * costs["counter.inc"]
+    )
+    request = asyncio.run(stream_requests(args.tokens, args.requests))
+    log.shutdown()
+    print()
+    print(f"request CPU ({args.tokens} tokens): {request:.0f} us")
+    print(f"instrumentation per request:  {instrumentation:.0f} us ({instrumentation / request:.1%} of the request)")
+
+if __name__ == "__main__":
+    main()
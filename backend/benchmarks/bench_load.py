@@ -0,0 +1,306 @@
+"""
+Load test: concurrent WebSocket and REST clients against the real server
+
+Starts a fake Ollama (token rate, time to first token and error rate are
+configurable) and main.py's app in a subprocess, then runs N WebSocket
+clients (each streaming prompts one after another over its own
+connection) and M REST clients side by side. Reports p50/p95/p99 time to
+first token and total latency, throughput, the server's CPU and memory
+and how well its Ollama connection pool was reused, and writes everything to a JSON file named after the current
+commit so runs can be compared with --compare.
+
+Usage:
+    python benchmarks/bench_load.py [--ws-clients 8] [--rest-clients 2] [--requests 10] [--tokens 100]
+        [--token-rate 200] [--ttft 0.05] [--error-rate 0] [--max-in-flight 4]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from websockets.asyncio.client import connect
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.bench_websocket_stream import free_port, cpu_seconds, wait_for_server
+
+RESULTS_DIR = project_root / "benchmarks" / "results"
+# What the server answers with when the model request failed
+ERROR_REPLY = "Sorry, I encountered an error while processing your request."
+# Metrics where a higher value is better; for everything else lower is better
+HIGHER_IS_BETTER = {"requests_per_second", "tokens_per_second"}
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max (nearest rank) and mean of a list of milliseconds"""
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    ordered = sorted(values)
+
+    def rank(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "count": len(ordered),
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(sum(ordered) / len(ordered), 2)
+    }
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MiB, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class ClientStats:
+    """Latencies and failures seen by one kind of client"""
+
+    def __init__(self):
+        self.ttft_ms: List[float] = []
+        self.latency_ms: List[float] = []
+        self.errors = 0
+        self.chunks = 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": len(self.latency_ms) + self.errors,
+            "errors": self.errors,
+            "ttft_ms": percentiles(self.ttft_ms),
+            "latency_ms": percentiles(self.latency_ms)
+        }
+
+async def websocket_client(url: str, requests: int, client_id: int, stats: ClientStats):
+    """Stream ``requests`` prompts one after another over one connection"""
+    async with connect(url, max_size=None) as websocket:
+        for i in range(requests):
+            started = time.perf_counter()
+            first = None
+            text = []
+            await websocket.send(json.dumps({"prompt": f"Load test prompt {client_id}-{i}"}))
+            while True:
+                frame = json.loads(await websocket.recv())
+                if frame["type"] == "chunk":
+                    if first is None:
+                        first = time.perf_counter()
+                    text.append(frame["content"])
+                elif frame["type"] in ("end", "error"):
+                    break
+            if frame["type"] == "error" or "".join(text) == ERROR_REPLY:
+                stats.errors += 1
+                continue
+            stats.ttft_ms.append((first - started) * 1000)
+            stats.latency_ms.append((time.perf_counter() - started) * 1000)
+            stats.chunks += len(text)
+
+async def rest_client(base_url: str, requests: int, client_id: int, stats: ClientStats):
+    """Post ``requests`` prompts one after another (REST has no first token: TTFT is the full latency)"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for i in range(requests):
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/v1/chat", json={"prompt": f"Load test prompt {client_id}-{i}"})
+                reply = response.json().get("response")
+            except (httpx.HTTPError, ValueError):
+                reply = None
+            if reply is None or reply == ERROR_REPLY:
+                stats.errors += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            stats.ttft_ms.append(elapsed)
+            stats.latency_ms.append(elapsed)
+
+async def sample_memory(pid: int, samples: List[float], interval: float = 0.1):
+    while True:
+        rss = rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        await asyncio.sleep(interval)
+
+async def run_load(base_url: str, pid: Optional[int], ws_clients: int, rest_clients: int, requests: int) -> Dict[str, Any]:
+    """Run every client to completion and summarize what they saw"""
+    ws_url = base_url.replace("http://", "ws://") + "/api/v1/ws/chat"
+    websocket, rest = ClientStats(), ClientStats()
+    memory: List[float] = []
+    sampler = asyncio.create_task(sample_memory(pid, memory)) if pid else None
+    cpu_before = cpu_seconds(pid) if pid else None
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(websocket_client(ws_url, requests, i, websocket) for i in range(ws_clients)),
+            *(rest_client(base_url, requests, i, rest) for i in range(rest_clients))
+        )
+    finally:
+        if sampler:
+            sampler.cancel()
+    elapsed = time.perf_counter() - started
+    cpu_after = cpu_seconds(pid) if pid else None
+
+    completed = len(websocket.latency_ms) + len(rest.latency_ms)
+    server: Dict[str, Any] = {}
+    if cpu_before is not None and cpu_after is not None:
+        server["cpu_seconds"] = round(cpu_after - cpu_before, 3)
+        server["cpu_percent"] = round((cpu_after - cpu_before) / elapsed * 100, 1)
+        server["cpu_ms_per_request"] = round((cpu_after - cpu_before) * 1000 / max(completed, 1), 2)
+    if memory:
+        server["rss_mb_peak"] = round(max(memory), 1)
+        server["rss_mb_end"] = round(memory[-1], 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+        pool = (await client.get("/api/v1/ollama/stats")).json()
+    return {
+        "seconds": round(elapsed, 3),
+        "websocket": websocket.summary(),
+        "rest": rest.summary(),
+        "throughput": {
+            "requests_per_second": round(completed / elapsed, 2),
+            "tokens_per_second": round(websocket.chunks / elapsed, 1)
+        },
+        "server": server,
+        "ollama_pool": {key: pool[key] for key in ("max_connections", "peak_in_flight", "requests", "connections_opened", "reused_requests")}
+    }
+
+@contextmanager
+def lyra_server(ollama_url: str, env: Optional[Dict[str, str]] = None) -> Iterator[subprocess.Popen]:
+    """Run main.py's app under uvicorn, pointed at ``ollama_url``"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=str(project_root),
+        env={**os.environ, "OLLAMA_HOST": ollama_url, "LYRA_LOG_LEVEL": "WARNING", **(env or {})},
+        stdout=subprocess.DEVNULL
+    )
+    server.base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_server(f"{server.base_url}/api/v1/health")
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(project_root),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def flatten(result: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """``{"websocket": {"ttft_ms": {"p95": 1}}}`` -> ``{"websocket.ttft_ms.p95": 1}``"""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Changes in the latency, throughput and server metrics between two runs
+
+    Returns:
+        One entry per shared metric with both values, the relative change
+        and whether it is a regression beyond ``threshold``
+    """
+    keys = ("websocket", "rest", "throughput", "server")
+    now = flatten({k: current["results"][k] for k in keys if k in current["results"]})
+    before = flatten({k: baseline["results"][k] for k in keys if k in baseline["results"]})
+    changes = []
+    for name in sorted(now.keys() & before.keys()):
+        if name.endswith(".count") or name.endswith(".requests"):
+            continue
+        old, new = before[name], now[name]
+        if old:
+            change = (new - old) / old
+        else:
+            # From nothing (e.g. no errors) to something counts as doubling
+            change = 0.0 if new == old else (1.0 if new > old else -1.0)
+        worse = -change if name.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        changes.append({"metric": name, "baseline": old, "current": new, "change": round(change, 4), "regression": worse > threshold})
+    return changes
+
+def print_report(report: Dict[str, Any]):
+    results = report["results"]
+    print(f"{'client':<10} {'requests':>8} {'errors':>6} {'ttft p50':>9} {'p95':>8} {'p99':>8} {'total p50':>10} {'p95':>8} {'p99':>8}  (ms)")
+    for kind in ("websocket", "rest"):
+        stats = results[kind]
+        ttft, latency = stats["ttft_ms"], stats["latency_ms"]
+        print(
+            f"{kind:<10} {stats['requests']:>8} {stats['errors']:>6} {ttft['p50']:>9.1f} {ttft['p95']:>8.1f} {ttft['p99']:>8.1f} "
+            f"{latency['p50']:>10.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}"
+        )
+    throughput = results["throughput"]
+    print(f"throughput: {throughput['requests_per_second']} requests/s, {throughput['tokens_per_second']} tokens/s")
+    if results["server"]:
+        print("server: " + ", ".join(f"{key}={value}" for key, value in results["server"].items()))
+    print("ollama pool: " + ", ".join(f"{key}={value}" for key, value in results["ollama_pool"].items()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ws-clients", type=int, default=8, help="Concurrent WebSocket clients")
+    parser.add_argument("--rest-clients", type=int, default=2, help="Concurrent REST clients")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    parser.add_argument("--tokens", type=int, default=100, help="Tokens per reply")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Fake model tokens per second (0 for unlimited)")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Fake model seconds before the first token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of model requests that fail")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="LYRA_MAX_IN_FLIGHT for the server")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/load-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    reply = " ".join(f"tok{i}" for i in range(args.tokens))
+    with FakeOllama(ttft=args.ttft, token_rate=args.token_rate, reply=reply, error_rate=args.error_rate, seed=0) as fake:
+        with lyra_server(fake.url, {"LYRA_MAX_IN_FLIGHT": str(args.max_in_flight)}) as server:
+            results = asyncio.run(run_load(server.base_url, server.pid, args.ws_clients, args.rest_clients, args.requests))
+        results["fake_ollama_errors"] = fake.errors
+        results["fake_ollama_connections"] = fake.connections
+
+    commit = git_commit()
+    report = {
+        "benchmark": "load",
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "results": results
+    }
+    print_report(report)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{commit}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print(f"\nCompared with {baseline.get('commit')} ({args.compare}):")
+        regressions = 0
+        for change in compare(report, baseline):
+            flag = "  REGRESSION" if change["regression"] else ""
+            regressions += change["regression"]
+            print(f"{change['metric']:<34} {change['baseline']:>10} -> {change['current']:>10} ({change['change']:+.1%}){flag}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
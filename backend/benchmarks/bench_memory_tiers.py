@@ -0,0 +1,79 @@
+"""
+Startup time, resident memory and read latency of MemoryManager with and without archived conversations
+
+Populates a store with synthetic history, then opens it twice: with every
+conversation in the log, and after archiving them all to compressed
+segments. Reports startup time, memory allocated by the manager (peak,
+via tracemalloc), the first read of a conversation (hot: from the log;
+cold: from its segment) and a repeated read.
+
+Usage:
+    python benchmarks/bench_memory_tiers.py [--conversations 20000] [--reads 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_storage import populate
+from memory.storage import MemoryManager
+
+def open_and_read(storage_path: str, conversations: int, reads: int) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    memory = MemoryManager(storage_path)
+    startup_ms = (time.perf_counter() - started) * 1000
+    startup_bytes = tracemalloc.get_traced_memory()[0]
+
+    first, repeat = [], []
+    for conv_id in random.sample(range(conversations), min(reads, conversations)):
+        for samples in (first, repeat):
+            started = time.perf_counter()
+            memory.get_conversation_history(f"conv-{conv_id}")
+            samples.append((time.perf_counter() - started) * 1000)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = memory.tier_stats()
+    memory.close()
+    return {
+        "startup_ms": startup_ms,
+        "startup_mb": startup_bytes / 1e6,
+        "peak_mb": peak_bytes / 1e6,
+        "first_read_ms": statistics.median(first),
+        "repeat_read_ms": statistics.median(repeat),
+        "archive_mb": stats["archive_bytes"] / 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--reads", type=int, default=200, help="Conversations read after startup")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage_path = os.path.join(tmp, "conversations.json")
+        populate(str(Path(storage_path).with_suffix(".db")), args.conversations)
+
+        print(f"{'tier':<10} {'startup (ms)':>13} {'startup MB':>11} {'peak MB':>8} {'1st read (ms)':>14} {'repeat':>8} {'archive MB':>11}")
+        results = [("hot", open_and_read(storage_path, args.conversations, args.reads))]
+        memory = MemoryManager(storage_path)
+        memory.archive_idle(0)
+        memory.close()
+        results.append(("archived", open_and_read(storage_path, args.conversations, args.reads)))
+        for label, result in results:
+            print(
+                f"{label:<10} {result['startup_ms']:>13.1f} {result['startup_mb']:>11.2f} {result['peak_mb']:>8.2f} "
+                f"{result['first_read_ms']:>14.3f} {result['repeat_read_ms']:>8.3f} {result['archive_mb']:>11.2f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Prompt re-evaluation across the turns of a long conversation
+
+Plays one conversation turn by turn through LLMService against the fake
+Ollama server, which (like Ollama) only evaluates the part of a prompt
+that follows the prefix it shares with the model's previous prompt.
+Compares a sliding history window (evicting a turn whenever one is
+added) with block eviction (cutting the window back to a share of the
+budget when it overflows), and reports prompt tokens evaluated and time
+to first token per turn.
+
+Usage:
+    python benchmarks/bench_prompt_cache.py [--turns 40] [--budget 1500] [--prompt-eval-rate 2000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ollama import AsyncClient
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.fake_ollama import FakeOllama
+from brain.context_builder import ContextBuilder
+from brain.llm_service import LLMService
+from memory.embeddings import HashingEmbedder
+from memory.storage import MemoryManager
+from memory.vector_index import VectorIndex
+
+async def converse(llm: LLMService, memory: MemoryManager, turns: int) -> list:
+    """Run the conversation, returning the time to first token of each turn"""
+    ttfts = []
+    for i in range(turns):
+        prompt = f"Question {i}: tell me more about part {i} of the plan. " + "context " * 40
+        reply = ""
+        started = time.perf_counter()
+        async for chunk in llm.stream_response(prompt, "You are Lyra, a helpful desktop assistant.", "bench"):
+            if not reply:
+                ttfts.append((time.perf_counter() - started) * 1000)
+            reply += chunk
+        memory.add_message("bench", "user", prompt)
+        memory.add_message("bench", "assistant", reply)
+    return ttfts
+
+def measure(eviction_target: float, turns: int, budget: int, prompt_eval_rate: float) -> dict:
+    reply = " ".join(["Here is a detailed answer about that part."] * 6)
+    with tempfile.TemporaryDirectory() as tmp, FakeOllama(prompt_eval_rate=prompt_eval_rate, reply=reply) as fake:
+        memory = MemoryManager(
+            os.path.join(tmp, "conversations.json"),
+            vector_index=VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder())
+        )
+        llm = LLMService(
+            model_name="bench",
+            context_builder=ContextBuilder(memory, token_budgets={"bench": budget}, eviction_target=eviction_target),
+            client=AsyncClient(host=fake.url)
+        )
+        ttfts = asyncio.run(converse(llm, memory, turns))
+        turns_report = llm.sessions.find("bench").report()["turns"]
+        memory.close()
+
+    evaluated = [turn["prompt_eval_tokens"] for turn in turns_report]
+    return {
+        "eviction_target": eviction_target,
+        "prompt_tokens": statistics.mean(turn["prompt_tokens"] for turn in turns_report),
+        "evaluated_mean": statistics.mean(evaluated),
+        "evaluated_max": max(evaluated),
+        "ttft_median_ms": statistics.median(ttfts),
+        "ttft_p95_ms": sorted(ttfts)[int(len(ttfts) * 0.95) - 1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=1500, help="Prompt token budget of the model")
+    parser.add_argument("--prompt-eval-rate", type=float, default=2000.0, help="Fake model prompt tokens per second")
+    args = parser.parse_args()
+
+    print(f"{'window':<18} {'prompt tokens':>14} {'evaluated mean':>15} {'max':>6} {'ttft p50 (ms)':>14} {'p95':>8}")
+    for target, label in ((1.0, "sliding"), (0.6, "block (0.6)")):
+        result = measure(target, args.turns, args.budget, args.prompt_eval_rate)
+        print(
+            f"{label:<18} {result['prompt_tokens']:>14.0f} {result['evaluated_mean']:>15.0f} {result['evaluated_max']:>6} "
+            f"{result['ttft_median_ms']:>14.1f} {result['ttft_p95_ms']:>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
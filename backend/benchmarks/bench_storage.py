@@ -0,0 +1,83 @@
+"""
+Per-message write latency of MemoryManager as total history grows
+
+Usage:
+    python benchmarks/bench_storage.py [--sizes 10,100,1000,10000,100000] [--writes 500] [--write-behind]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from memory.storage import MemoryManager
+from memory.sqlite_store import SQLiteStore
+
+MESSAGES_PER_CONVERSATION = 4
+
+def populate(db_path: str, conversations: int):
+    """Bulk-load a store with synthetic history"""
+    store = SQLiteStore(db_path)
+    now = datetime.now().isoformat()
+    conn = store._conn
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO conversations (id, created_at, updated_at) VALUES (?, ?, ?)",
+        ((f"conv-{i}", now, now) for i in range(conversations))
+    )
+    conn.executemany(
+        "INSERT INTO messages (conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+        (
+            (f"conv-{i}", "user" if j % 2 == 0 else "assistant", "lorem ipsum dolor sit amet " * 8, now)
+            for i in range(conversations)
+            for j in range(MESSAGES_PER_CONVERSATION)
+        )
+    )
+    conn.execute("COMMIT")
+    store.close()
+
+def measure(conversations: int, writes: int, write_behind: bool = False) -> dict:
+    """Time individual add_message calls against a pre-populated store"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage_path = os.path.join(tmp, "conversations.json")
+        populate(str(Path(storage_path).with_suffix(".db")), conversations)
+
+        memory = MemoryManager(storage_path, write_behind=write_behind)
+        samples = []
+        for _ in range(writes):
+            conv_id = f"conv-{random.randrange(conversations)}"
+            start = time.perf_counter()
+            memory.add_message(conv_id, "user", "How is the weather today?")
+            samples.append((time.perf_counter() - start) * 1e6)
+        memory.close()
+
+    samples.sort()
+    return {
+        "conversations": conversations,
+        "median_us": statistics.median(samples),
+        "p95_us": samples[int(len(samples) * 0.95) - 1],
+        "max_us": samples[-1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000")
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--write-behind", action="store_true", help="Queue writes for the background flusher")
+    args = parser.parse_args()
+
+    print(f"{'conversations':>14} {'median (us)':>12} {'p95 (us)':>10} {'max (us)':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = measure(size, args.writes, args.write_behind)
+        print(f"{result['conversations']:>14} {result['median_us']:>12.1f} {result['p95_us']:>10.1f} {result['max_us']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
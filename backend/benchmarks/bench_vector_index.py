@@ -0,0 +1,67 @@
+"""
+Top-k query latency of the semantic recall index
+
+Usage:
+    python benchmarks/bench_vector_index.py [--sizes 10000,100000,1000000] [--dim 256] [--queries 50]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from memory.embeddings import HashingEmbedder
+from memory.vector_index import VectorIndex
+
+CHUNK = 100_000
+
+def build(directory: str, size: int, dim: int) -> VectorIndex:
+    """Fill an index with random unit vectors, bypassing the embedder"""
+    index = VectorIndex(directory, HashingEmbedder(dim=dim), initial_capacity=size)
+    rng = np.random.default_rng(0)
+    for start in range(0, size, CHUNK):
+        count = min(CHUNK, size - start)
+        ids = np.arange(start + 1, start + count + 1, dtype=np.int64)
+        index.append_vectors(ids, rng.standard_normal((count, dim), dtype=np.float32))
+    return index
+
+def measure(size: int, dim: int, queries: int, k: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        index = build(tmp, size, dim)
+        index.search("warm up the page cache", k=k)
+        samples = []
+        for i in range(queries):
+            start = time.perf_counter()
+            index.search(f"what did we talk about regarding topic {i}", k=k)
+            samples.append((time.perf_counter() - start) * 1e3)
+        index.close()
+
+    samples.sort()
+    return {
+        "messages": size,
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'messages':>10} {'median (ms)':>12} {'p95 (ms)':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = measure(size, args.dim, args.queries, args.k)
+        print(f"{result['messages']:>10} {result['median_ms']:>12.2f} {result['p95_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Wake-word detector accuracy and CPU cost on WAV recordings
+
+A fixtures directory holds enrollment clips of the wake word, test
+streams and labels.json ({"enrollment": [...], "streams": {"name.wav":
+[end time of each wake word in seconds]}). Without --fixtures, a
+synthetic set is generated first (see wake_word_fixtures.py).
+
+Usage:
+    python benchmarks/bench_wake_word.py [--fixtures DIR] [--block-ms 20] [--threshold 0.75]
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.wake_word_fixtures import write_fixtures
+from voice.wakeword import WakeWordDetector, WakeWordMetrics, load_templates, read_wav
+
+# A detection this close to a labelled wake word end counts as a hit
+EARLY_TOLERANCE = 0.5
+LATE_TOLERANCE = 0.3
+
+def run_stream(path: Path, templates, wake_ends, block_ms: int, threshold: float) -> dict:
+    rate, samples = read_wav(path)
+    metrics = WakeWordMetrics()
+    detector = WakeWordDetector(templates, sample_rate=rate, threshold=threshold, metrics=metrics)
+    block = rate * block_ms // 1000
+    detections = []
+    for start in range(0, samples.size, block):
+        detections += [(start + offset) / rate for offset, _ in detector.process(samples[start:start + block])]
+
+    unmatched = list(wake_ends)
+    false_triggers = 0
+    for at in detections:
+        match = next((end for end in unmatched if end - EARLY_TOLERANCE <= at <= end + LATE_TOLERANCE), None)
+        if match is None:
+            false_triggers += 1
+        else:
+            unmatched.remove(match)
+    return {
+        "stream": path.name,
+        "seconds": metrics.audio_seconds,
+        "cpu_ms_per_s": metrics.metrics()["cpu_ms_per_audio_second"],
+        "wake_words": len(wake_ends),
+        "hits": len(wake_ends) - len(unmatched),
+        "false_triggers": false_triggers
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="Directory with labels.json; generated when omitted")
+    parser.add_argument("--block-ms", type=int, default=20, help="Audio block size, as sent by a client")
+    parser.add_argument("--threshold", type=float, default=0.75)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(args.fixtures) if args.fixtures else write_fixtures(tmp)
+        labels = json.loads((directory / "labels.json").read_text())
+        templates = load_templates([directory / name for name in labels["enrollment"]])
+        results = [
+            run_stream(directory / name, templates, wake_ends, args.block_ms, args.threshold)
+            for name, wake_ends in labels["streams"].items()
+        ]
+
+    print(f"{'stream':>14} {'seconds':>8} {'cpu ms/s':>9} {'hits':>8} {'false':>6}")
+    for r in results:
+        print(f"{r['stream']:>14} {r['seconds']:>8.1f} {r['cpu_ms_per_s']:>9.2f} {r['hits']:>4}/{r['wake_words']:<3} {r['false_triggers']:>6}")
+    seconds = sum(r["seconds"] for r in results)
+    wake_words = sum(r["wake_words"] for r in results)
+    hits = sum(r["hits"] for r in results)
+    false_triggers = sum(r["false_triggers"] for r in results)
+    cpu = sum(r["cpu_ms_per_s"] * r["seconds"] for r in results) / seconds
+    print(f"\nCPU: {cpu:.2f} ms per second of audio ({cpu / 10:.2f}% of one core)")
+    print(f"Detection rate: {hits}/{wake_words} ({hits / max(wake_words, 1):.1%})")
+    print(f"False triggers: {false_triggers} in {seconds / 60:.1f} min ({false_triggers / (seconds / 3600):.1f}/hour)")
+
+if __name__ == "__main__":
+    main()
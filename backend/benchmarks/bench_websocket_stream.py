@@ -0,0 +1,123 @@
+"""
+Frames/sec and server CPU per response for the chat WebSocket streaming modes
+
+Starts the real server in a subprocess against the fake Ollama and streams
+responses in each mode: one JSON frame per token (the default protocol),
+coalesced JSON frames, and coalesced binary frames. Server CPU is read from
+/proc, so CPU figures are only reported on Linux.
+
+Usage:
+    python benchmarks/bench_websocket_stream.py [--tokens 1000] [--token-rate 500] [--responses 5] [--coalesce-ms 25] [--no-deflate]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from websockets.asyncio.client import connect
+from benchmarks.fake_ollama import FakeOllama
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time of a process, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def wait_for_server(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start at {url}")
+
+async def stream_responses(url: str, configure: Optional[Dict[str, Any]], responses: int, deflate: bool) -> Dict[str, Any]:
+    """Stream several responses over one connection, counting frames and bytes"""
+    frames = 0
+    payload_bytes = 0
+    async with connect(url, compression="deflate" if deflate else None, max_size=None) as websocket:
+        if configure:
+            await websocket.send(json.dumps(configure))
+            json.loads(await websocket.recv())
+        started = time.perf_counter()
+        for i in range(responses):
+            await websocket.send(json.dumps({"prompt": f"Benchmark prompt {i}"}))
+            while True:
+                message = await websocket.recv()
+                if isinstance(message, bytes):
+                    frames += 1
+                    payload_bytes += len(message)
+                    continue
+                data = json.loads(message)
+                if data["type"] == "end":
+                    break
+                if data["type"] == "chunk":
+                    frames += 1
+                    payload_bytes += len(message)
+        elapsed = time.perf_counter() - started
+    return {"frames": frames, "bytes": payload_bytes, "seconds": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000, help="Tokens per response")
+    parser.add_argument("--token-rate", type=float, default=500.0, help="Fake model tokens per second (0 for unlimited)")
+    parser.add_argument("--responses", type=int, default=5)
+    parser.add_argument("--coalesce-ms", type=float, default=25.0)
+    parser.add_argument("--no-deflate", action="store_true", help="Do not negotiate permessage-deflate")
+    args = parser.parse_args()
+
+    modes = [
+        ("json per token", None),
+        ("json coalesced", {"type": "configure", "coalesce_ms": args.coalesce_ms, "max_bytes": 4096}),
+        ("binary coalesced", {"type": "configure", "coalesce_ms": args.coalesce_ms, "max_bytes": 4096, "format": "binary"})
+    ]
+    reply = " ".join(f"tok{i}" for i in range(args.tokens))
+    with FakeOllama(token_rate=args.token_rate, reply=reply) as fake:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=str(project_root),
+            env={**os.environ, "OLLAMA_HOST": fake.url},
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server(f"http://127.0.0.1:{port}/api/v1/health")
+            url = f"ws://127.0.0.1:{port}/api/v1/ws/chat"
+            print(f"{'mode':<18} {'frames/resp':>12} {'frames/sec':>11} {'KB/resp':>8} {'server CPU ms/resp':>19}")
+            for name, configure in modes:
+                cpu_before = cpu_seconds(server.pid)
+                result = asyncio.run(stream_responses(url, configure, args.responses, not args.no_deflate))
+                cpu_after = cpu_seconds(server.pid)
+                cpu = f"{(cpu_after - cpu_before) * 1000 / args.responses:.1f}" if cpu_before is not None else "n/a"
+                print(
+                    f"{name:<18} {result['frames'] / args.responses:>12.0f} "
+                    f"{result['frames'] / result['seconds']:>11.0f} "
+                    f"{result['bytes'] / args.responses / 1024:>8.1f} {cpu:>19}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
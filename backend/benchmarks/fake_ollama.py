@@ -0,0 +1,340 @@
+"""
+A local stand-in for the Ollama HTTP API
+
+Serves just enough of /api/chat, /api/generate, /api/ps, /api/embed and
+/api/tags for tests and benchmarks to run without a real model. Model
+load time, prompt evaluation time, token rate and the share of chat
+requests that fail are configurable, and responses carry Ollama-style
+timing stats. Like Ollama, each model keeps its last chat prompt and
+only evaluates what follows the prefix the next prompt shares with it.
+
+Usage:
+    python benchmarks/fake_ollama.py [--port 11435] [--load-delay 2] [--ttft 0.2] [--token-rate 40] [--error-rate 0.05]
+        [--prompt-eval-rate 500]
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional
+
+DEFAULT_REPLY = "Hello! I'm Lyra, a fake model answering from a local test server."
+
+def parse_keep_alive(value: Any, default: float = 300.0) -> float:
+    """Convert an Ollama keep_alive value ("5m", "30s", 120, -1) to seconds"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * units[suffix]
+    return float(value)
+
+class FakeOllama:
+    """Threaded fake Ollama server with configurable latencies"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        load_delay: float = 0.0,
+        ttft: float = 0.0,
+        token_rate: float = 0.0,
+        reply: str = DEFAULT_REPLY,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        prompt_eval_rate: float = 0.0
+    ):
+        self.load_delay = load_delay
+        self.ttft = ttft
+        # Prompt tokens evaluated per second on top of ``ttft`` (0 for free)
+        self.prompt_eval_rate = prompt_eval_rate
+        # model name -> last chat prompt, the emulated prompt cache
+        self.prompts: Dict[str, str] = {}
+        self.token_rate = token_rate
+        self.reply = reply
+        # Share of chat requests answered with an HTTP 500 after the TTFT delay
+        self.error_rate = error_rate
+        self.errors = 0
+        # TCP connections accepted; with keep-alive clients this stays far below the request count
+        self.connections = 0
+        self._random = random.Random(seed)
+        # model name -> monotonic expiry time of the loaded model
+        self.loaded: Dict[str, float] = {}
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def unload(self, model: Optional[str] = None):
+        """Simulate Ollama evicting a model (or all models) from memory"""
+        with self._lock:
+            if model:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded.clear()
+
+    def _count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _ensure_loaded(self, model: str, keep_alive: Any) -> float:
+        """Load the model if needed; returns the simulated load time in seconds"""
+        now = time.monotonic()
+        with self._lock:
+            loaded = self.loaded.get(model, 0) > now
+        load_time = 0.0
+        if not loaded:
+            time.sleep(self.load_delay)
+            load_time = self.load_delay
+        with self._lock:
+            seconds = parse_keep_alive(keep_alive)
+            if seconds == 0:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded[model] = float("inf") if seconds < 0 else time.monotonic() + seconds
+        return load_time
+
+    def _evaluate(self, model: str, prompt: str) -> int:
+        """Tokens of ``prompt`` not covered by the model's cached prefix; updates the cache"""
+        with self._lock:
+            previous = self.prompts.get(model, "")
+            self.prompts[model] = prompt
+        shared = 0
+        for a, b in zip(previous, prompt):
+            if a != b:
+                break
+            shared += 1
+        return max((len(prompt) - shared) // 4, 1)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return failed
+
+    def _tokens(self):
+        """Split the canned reply into word-sized tokens"""
+        words = self.reply.split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _start_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+            def _send_chunk(self, payload: Dict[str, Any]):
+                data = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _end_stream(self):
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                fake._count(self.path)
+                if self.path == "/api/ps":
+                    now = time.monotonic()
+                    with fake._lock:
+                        models = [
+                            {
+                                "name": name,
+                                "model": name,
+                                "expires_at": (
+                                    datetime.now(timezone.utc) + timedelta(seconds=min(expiry - now, 10 ** 9))
+                                ).isoformat()
+                            }
+                            for name, expiry in fake.loaded.items() if expiry > now
+                        ]
+                    self._send_json({"models": models})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": name, "model": name} for name in fake.loaded]})
+                else:
+                    body = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def do_POST(self):
+                fake._count(self.path)
+                request = self._read_json()
+                if self.path == "/api/chat":
+                    self._chat(request)
+                elif self.path == "/api/generate":
+                    self._generate(request)
+                elif self.path == "/api/embed":
+                    self._embed(request)
+                else:
+                    self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+            def _stats(self, started: float, load_time: float, prompt_tokens: int, prompt_eval: float, tokens: int, eval_time: float):
+                return {
+                    "total_duration": int((time.monotonic() - started) * 1e9),
+                    "load_duration": int(load_time * 1e9),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(prompt_eval * 1e9),
+                    "eval_count": tokens,
+                    "eval_duration": int(eval_time * 1e9)
+                }
+
+            def _chat(self, request: Dict[str, Any]):
+                started = time.monotonic()
+                model = request.get("model", "")
+                prompt = json.dumps(request.get("tools") or []) + "".join(
+                    f"<{m.get('role')}>{m.get('content', '')}" for m in request.get("messages", [])
+                )
+                load_time = fake._ensure_loaded(model, request.get("keep_alive"))
+                prompt_tokens = fake._evaluate(model, prompt)
+                prompt_eval = fake.ttft + (prompt_tokens / fake.prompt_eval_rate if fake.prompt_eval_rate else 0.0)
+                time.sleep(prompt_eval)
+                if fake._should_fail():
+                    self._send_json({"error": "fake model failure"}, status=500)
+                    return
+                prompt_done = time.monotonic()
+                tokens = fake._tokens()
+                delay = 1.0 / fake.token_rate if fake.token_rate else 0.0
+
+                if request.get("stream", True):
+                    self._start_stream()
+                    for token in tokens:
+                        time.sleep(delay)
+                        self._send_chunk({
+                            "model": model,
+                            "created_at": datetime.now(timezone.utc).isoformat(),
+                            "message": {"role": "assistant", "content": token},
+                            "done": False
+                        })
+                    self._send_chunk({
+                        "model": model,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "message": {"role": "assistant", "content": ""},
+                        "done": True,
+                        "done_reason": "stop",
+                        **self._stats(started, load_time, prompt_tokens, prompt_eval, len(tokens), time.monotonic() - prompt_done)
+                    })
+                    self._end_stream()
+                else:
+                    time.sleep(delay * len(tokens))
+                    self._send_json({
+                        "model": model,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "done": True,
+                        "done_reason": "stop",
+                        **self._stats(started, load_time, prompt_tokens, prompt_eval, len(tokens), time.monotonic() - prompt_done)
+                    })
+
+            def _generate(self, request: Dict[str, Any]):
+                started = time.monotonic()
+                model = request.get("model", "")
+                prompt = request.get("prompt", "")
+                load_time = fake._ensure_loaded(model, request.get("keep_alive"))
+                # An empty prompt only loads the model, like the real server
+                response = "".join(fake._tokens()) if request.get("prompt") else ""
+                payload = {
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "response": response,
+                    "done": True,
+                    "done_reason": "load" if not response else "stop",
+                    **self._stats(started, load_time, len(prompt) // 4, 0.0, len(response.split()), 0.0)
+                }
+                if request.get("stream", True):
+                    self._start_stream()
+                    self._send_chunk(payload)
+                    self._end_stream()
+                else:
+                    self._send_json(payload)
+
+            def _embed(self, request: Dict[str, Any]):
+                inputs = request.get("input", [])
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                embeddings = []
+                for text in inputs:
+                    digest = hashlib.sha256(text.encode()).digest()
+                    embeddings.append([(byte - 128) / 128 for byte in digest[:32]])
+                self._send_json({"model": request.get("model", ""), "embeddings": embeddings})
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load-delay", type=float, default=2.0, help="Seconds to 'load' a cold model")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds of prompt evaluation before the first token")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="Tokens per second (0 for unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of chat requests that fail with HTTP 500")
+    parser.add_argument("--prompt-eval-rate", type=float, default=0.0, help="Uncached prompt tokens evaluated per second (0 for free)")
+    args = parser.parse_args()
+
+    fake = FakeOllama(
+        args.host, args.port, args.load_delay, args.ttft, args.token_rate,
+        error_rate=args.error_rate, prompt_eval_rate=args.prompt_eval_rate
+    )
+    print(f"Fake Ollama listening on {fake.url} (set OLLAMA_HOST={fake.url})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Synthetic spoken-word recordings for wake-word tests and benchmarks
+
+Words are built from voiced syllables: a harmonic source following a
+pitch contour, shaped by two formant resonances and a syllable envelope.
+Each rendering varies speaking rate, pitch, formants and level, and the
+streams mix in background noise, so templates never match exactly.
+
+Usage:
+    python benchmarks/wake_word_fixtures.py DIRECTORY [--streams 6] [--seconds 60]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from voice.wakeword import write_wav
+
+RATE = 16000
+
+# (start pitch Hz, end pitch Hz, first formant Hz, second formant Hz, seconds)
+WAKE_WORD = [(190, 210, 530, 1850, 0.16), (205, 175, 300, 2200, 0.12), (180, 140, 750, 1200, 0.22)]
+VOWELS = [(300, 2300), (400, 2000), (530, 1850), (750, 1200), (600, 900), (350, 800), (450, 1050), (660, 1700)]
+
+def syllable(rng: np.random.Generator, f0_start, f0_end, formant1, formant2, seconds, rate=RATE) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = np.linspace(f0_start, f0_end, t.size)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    audio = np.zeros(t.size)
+    for harmonic in range(1, 30):
+        frequency = harmonic * pitch.mean()
+        if frequency > rate / 2 - 500:
+            break
+        gain = np.exp(-((frequency - formant1) / 120) ** 2) + 0.6 * np.exp(-((frequency - formant2) / 160) ** 2) + 0.02
+        audio += gain / harmonic ** 0.5 * np.sin(harmonic * phase + rng.uniform(0, 2 * np.pi))
+    attack = np.minimum(1, t / 0.02)
+    release = np.minimum(1, (t[-1] - t) / 0.04)
+    return audio * attack * release
+
+def render(word: List[Tuple], rng: np.random.Generator, vary: bool = True, rate=RATE) -> np.ndarray:
+    """One spoken rendering of a word, peaking at roughly 0.3"""
+    tempo = rng.uniform(0.9, 1.1) if vary else 1.0
+    pitch = rng.uniform(0.92, 1.08) if vary else 1.0
+    parts = []
+    for f0_start, f0_end, formant1, formant2, seconds in word:
+        shift = rng.uniform(0.95, 1.05) if vary else 1.0
+        parts.append(syllable(rng, f0_start * pitch, f0_end * pitch, formant1 * shift, formant2 * shift, seconds * tempo, rate))
+        parts.append(np.zeros(int(rng.uniform(0.01, 0.04) * rate)))
+    audio = np.concatenate(parts)
+    level = 10 ** (rng.uniform(-6, 3) / 20) if vary else 1.0
+    return (0.3 * level * audio / np.abs(audio).max()).astype(np.float32)
+
+def random_word(rng: np.random.Generator) -> List[Tuple]:
+    """A distractor: 1-4 syllables with random vowels and pitch contours"""
+    word = []
+    for _ in range(rng.integers(1, 5)):
+        formant1, formant2 = VOWELS[rng.integers(len(VOWELS))]
+        f0 = rng.uniform(120, 220)
+        word.append((f0, f0 * rng.uniform(0.8, 1.2), formant1, formant2, rng.uniform(0.08, 0.25)))
+    return word
+
+def enrollment(count: int = 3, seed: int = 1) -> List[np.ndarray]:
+    """Clean recordings of the wake word, with leading and trailing silence"""
+    rng = np.random.default_rng(seed)
+    pad = np.zeros(int(0.2 * RATE), dtype=np.float32)
+    return [np.concatenate((pad, render(WAKE_WORD, rng), pad)) for _ in range(count)]
+
+def stream(seconds: float, seed: int, wake_every: float = 8.0, noise_db: float = -40.0) -> Tuple[np.ndarray, List[float]]:
+    """
+    A stretch of "room audio": distractor words, pauses and occasional wake words
+
+    Returns:
+        (samples, times in seconds at which each wake word ends)
+    """
+    rng = np.random.default_rng(seed)
+    parts, wake_ends, position = [], [], 0
+    next_wake = rng.uniform(2, wake_every)
+    while position < seconds * RATE:
+        if position >= next_wake * RATE:
+            word = render(WAKE_WORD, rng)
+            wake_ends.append((position + word.size) / RATE)
+            next_wake = position / RATE + rng.uniform(wake_every / 2, wake_every * 1.5)
+        elif rng.random() < 0.25:
+            word = np.zeros(int(rng.uniform(0.5, 2.5) * RATE), dtype=np.float32)
+        else:
+            word = render(random_word(rng), rng)
+        parts.append(word)
+        parts.append(np.zeros(int(rng.uniform(0.05, 0.4) * RATE), dtype=np.float32))
+        position += word.size + parts[-1].size
+    audio = np.concatenate(parts)[:int(seconds * RATE)]
+    audio += rng.normal(0, 10 ** (noise_db / 20), audio.size).astype(np.float32)
+    return audio, [end for end in wake_ends if end <= audio.size / RATE]
+
+def write_fixtures(directory: str, streams: int = 6, seconds: float = 60.0) -> Path:
+    """Write enrollment clips, test streams and labels.json to ``directory``"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    labels = {"enrollment": [], "streams": {}}
+    for i, clip in enumerate(enrollment()):
+        name = f"enroll_{i}.wav"
+        write_wav(directory / name, RATE, clip)
+        labels["enrollment"].append(name)
+    for i in range(streams):
+        # Half the streams are noisier, and one has no wake words at all
+        audio, wake_ends = stream(seconds, seed=100 + i, wake_every=8.0 if i else 1e9, noise_db=-40.0 if i % 2 else -30.0)
+        name = f"stream_{i}.wav"
+        write_wav(directory / name, RATE, audio)
+        labels["streams"][name] = wake_ends
+    (directory / "labels.json").write_text(json.dumps(labels, indent=2))
+    return directory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--streams", type=int, default=6)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    args = parser.parse_args()
+    print(f"Fixtures written to {write_fixtures(args.directory, args.streams, args.seconds)}")
+
+if __name__ == "__main__":
+    main()
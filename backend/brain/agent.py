@@ -0,0 +1,186 @@
+from collections import deque
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import time
+
+from brain.llm_service import LLMService
+from brain.scheduler import Priority, QueueCallback
+from observability.log import get_logger
+from tools.executor import ToolExecutor
+
+StatusCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+LATENCY_REPLY = "Sorry, that is taking too long, so I stopped."
+ERROR_REPLY = "Sorry, I encountered an error while processing your request."
+
+log = get_logger("brain.agent")
+
+class AgentMetrics:
+    """Rounds, tool calls and stop reasons of agent runs"""
+
+    def __init__(self, window: int = 200):
+        self.runs = 0
+        self.tool_calls = 0
+        self.parallel_batches = 0
+        self.stopped = {"iterations": 0, "latency": 0}
+        self.iterations = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "runs": self.runs,
+            "tool_calls": self.tool_calls,
+            "parallel_batches": self.parallel_batches,
+            "stopped": dict(self.stopped),
+            "iterations_max": max(self.iterations, default=0),
+            "latency_ms_p50": round(latencies[len(latencies) // 2], 2) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else 0.0
+        }
+
+class AgentLoop:
+    """Lets the model call tools before it answers
+
+    Every round streams a chat request through ``LLMService.stream_chat``
+    (so routing, fallback and scheduling apply) that offers the executor's
+    permitted tools. Text is passed through as it arrives; if the model
+    asks for tools, the calls are run concurrently through
+    ``ToolExecutor.execute_tools`` (which still checks permissions), their
+    results are appended to the conversation as tool messages and the
+    model is asked again. The final round offers no tools so the model
+    has to answer, and the whole run, including waits for a generation
+    slot, is bounded by ``latency_budget``.
+    Status frames (tool_call, tool, status) are reported through a
+    callback so a WebSocket client can show progress.
+    """
+
+    def __init__(
+        self,
+        llm_service: LLMService,
+        executor: ToolExecutor,
+        max_iterations: int = 4,
+        latency_budget: float = 30.0
+    ):
+        self.llm_service = llm_service
+        self.executor = executor
+        self.max_iterations = max_iterations
+        self.latency_budget = latency_budget
+        self.metrics = AgentMetrics()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any tool is permitted, i.e. whether there is anything to offer the model"""
+        return any(self.executor.permissions.values())
+
+    async def run(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.INTERACTIVE,
+        on_queued: Optional[QueueCallback] = None,
+        route: Optional[str] = None,
+        on_status: Optional[StatusCallback] = None
+    ):
+        """
+        Answer a prompt, calling tools as the model requests them
+
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to guide the model
+            conversation_id: Optional conversation whose history provides context
+            options: Optional Ollama sampling options
+            priority: Scheduling priority while waiting for a generation slot
+            on_queued: Optional callback reporting queue position (first round only)
+            route: Optional route or model name overriding the router's choice
+            on_status: Optional callback receiving tool_call, tool and status frames
+
+        Yields:
+            Chunks of the model's text as they are generated
+        """
+        async def status(frame: Dict[str, Any]):
+            if on_status:
+                await on_status(frame)
+
+        started = time.monotonic()
+        deadline = started + self.latency_budget
+        self.metrics.runs += 1
+        # Tool calls and their results, sent after the prompt in later rounds
+        exchange: List[Dict[str, Any]] = []
+        iteration = 0
+        answered = False
+        try:
+            while True:
+                iteration += 1
+                # The last round offers no tools, so the model has to answer
+                tools = self.executor.tool_schemas() if iteration < self.max_iterations else None
+                content: List[str] = []
+                requested = []
+                # A round whose stream is empty keeps the current route
+                model_name = route
+                stream = self.llm_service.stream_chat(
+                    prompt, system_prompt, conversation_id, options, priority,
+                    on_queued if iteration == 1 else None,
+                    route, tools=tools, tool_messages=exchange, deadline=deadline
+                )
+                async with aclosing(stream):
+                    async for model_name, chunk in stream:
+                        message = chunk["message"]
+                        requested.extend(message.get("tool_calls") or [])
+                        if message.get("content"):
+                            content.append(message["content"])
+                            answered = True
+                            yield message["content"]
+                # Later rounds stay on the model that answered this one
+                route = model_name
+
+                if not requested:
+                    break
+                if tools is None:
+                    self.metrics.stopped["iterations"] += 1
+                    await status({"type": "status", "stage": "stopped", "reason": "max_iterations", "iteration": iteration})
+                    break
+
+                calls = self._parse_calls(requested)
+                exchange.append({
+                    "role": "assistant",
+                    "content": "".join(content),
+                    "tool_calls": [{"function": {"name": name, "arguments": arguments}} for name, arguments in calls]
+                })
+                for name, arguments in calls:
+                    await status({"type": "tool_call", "tool": name, "parameters": arguments, "iteration": iteration})
+                self.metrics.tool_calls += len(calls)
+                if len(calls) > 1:
+                    self.metrics.parallel_batches += 1
+                results = await asyncio.wait_for(self.executor.execute_tools(calls), deadline - time.monotonic())
+                for (name, arguments), result in zip(calls, results):
+                    await status({"type": "tool", "tool": name, "parameters": arguments, "result": result})
+                    exchange.append({"role": "tool", "tool_name": name, "content": json.dumps(result)})
+        except asyncio.TimeoutError:
+            self.metrics.stopped["latency"] += 1
+            await status({"type": "status", "stage": "stopped", "reason": "latency_budget", "iteration": iteration})
+            if not answered:
+                yield LATENCY_REPLY
+        except Exception as e:
+            log.error("agent_failed", error=str(e), iteration=iteration)
+            yield ERROR_REPLY
+        finally:
+            self.metrics.iterations.append(iteration)
+            self.metrics.latencies.append((time.monotonic() - started) * 1000)
+
+    def _parse_calls(self, requested: List[Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(name, arguments) pairs from Ollama tool calls; string arguments are decoded as JSON"""
+        calls = []
+        for call in requested:
+            function = call["function"]
+            arguments = function["arguments"] or {}
+            if isinstance(arguments, str):
+                try:
+                    arguments = json.loads(arguments)
+                except ValueError:
+                    arguments = {}
+            calls.append((function["name"], dict(arguments)))
+        return calls
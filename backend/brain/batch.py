@@ -0,0 +1,449 @@
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from brain.llm_service import LLMService
+from brain.response_cache import is_deterministic
+from brain.scheduler import Priority
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+
+BATCH_ITEMS = REGISTRY.counter("lyra_batch_items", "Batch job prompts by outcome", ["outcome"])
+BATCH_ITEM_SECONDS = REGISTRY.histogram("lyra_batch_item_seconds", "Time to answer one batch prompt, including queueing behind chat")
+
+log = get_logger("brain.batch")
+
+MAX_CONCURRENCY = 8
+# Jobs in these states are run (again) when the runner starts
+ACTIVE = ("queued", "running")
+ITEM_FIELDS = {"id", "prompt", "system_prompt", "options", "route", "conversation_id"}
+
+def parse_item(line: bytes, line_number: int) -> Dict[str, Any]:
+    """
+    Validate one line of a batch file
+
+    Raises:
+        ValueError: If the line is not a JSON object with a non-empty
+            ``prompt`` and only known fields
+    """
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise ValueError(f"Line {line_number} is not valid JSON")
+    if not isinstance(item, dict) or not isinstance(item.get("prompt"), str) or not item["prompt"].strip():
+        raise ValueError(f"Line {line_number} needs a non-empty \"prompt\"")
+    unknown = set(item) - ITEM_FIELDS
+    if unknown:
+        raise ValueError(f"Line {line_number} has unknown fields: {', '.join(sorted(unknown))}")
+    if item.get("options") is not None and not isinstance(item["options"], dict):
+        raise ValueError(f"Line {line_number}: \"options\" must be an object")
+    return item
+
+class BatchJob:
+    """
+    A batch job and its directory
+
+    ``job.json`` holds the job's state, ``input.jsonl`` the validated
+    prompts (one per line, in order) and ``results.jsonl`` one record per
+    answered prompt, appended as they finish. The results file is the
+    checkpoint: a resumed job skips every prompt that already has a
+    record.
+    """
+
+    def __init__(self, directory: str, state: Dict[str, Any]):
+        self.directory = directory
+        self.state = state
+        self.in_flight = 0
+        self.task: Optional[asyncio.Task] = None
+        self._run_started: Optional[float] = None
+        self._run_finished = 0
+        self._updated = asyncio.Event()
+
+    @property
+    def id(self) -> str:
+        return self.state["id"]
+
+    @property
+    def status(self) -> str:
+        return self.state["status"]
+
+    @property
+    def input_path(self) -> str:
+        return os.path.join(self.directory, "input.jsonl")
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.directory, "results.jsonl")
+
+    @classmethod
+    def load(cls, directory: str) -> "BatchJob":
+        with open(os.path.join(directory, "job.json")) as f:
+            return cls(directory, json.load(f))
+
+    def save(self):
+        """Write the job state atomically"""
+        path = os.path.join(self.directory, "job.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(path + ".tmp", path)
+
+    def notify(self):
+        """Wake everyone following the job's progress"""
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait(self, timeout: float):
+        """Wait until the job changes, or ``timeout`` seconds"""
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._updated.wait(), timeout)
+
+    def iter_inputs(self) -> Iterator[Dict[str, Any]]:
+        with open(self.input_path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def read_checkpoint(self) -> List[Dict[str, Any]]:
+        """Records of answered prompts; a record cut short by a crash is dropped from the file"""
+        records = []
+        valid = 0
+        with suppress(FileNotFoundError), open(self.results_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid += len(line)
+        if os.path.exists(self.results_path) and os.path.getsize(self.results_path) != valid:
+            os.truncate(self.results_path, valid)
+        return records
+
+    def progress(self) -> Dict[str, Any]:
+        """Job state with in-flight prompts, throughput and an estimate of the time left"""
+        state = self.state
+        finished = state["completed"] + state["failed"]
+        rate = None
+        if self._run_started and self._run_finished:
+            rate = self._run_finished / (time.monotonic() - self._run_started)
+        return {
+            **state,
+            "finished": finished,
+            "in_flight": self.in_flight,
+            "prompts_per_second": round(rate, 3) if rate else None,
+            "eta_seconds": round((state["total"] - finished) / rate, 1) if rate and self.status == "running" else None
+        }
+
+class BatchRunner:
+    """
+    Runs batch jobs in the background through ``LLMService``
+
+    Jobs run one after another in submission order. Within a job, at most
+    ``concurrency`` prompts are outstanding at once, and every generation
+    waits for a scheduler slot at ``Priority.BACKGROUND``, so chat requests
+    overtake queued batch prompts. Identical deterministic prompts in a job
+    are generated once and the answer is reused. Results are appended to
+    the job's checkpoint as they finish; jobs still queued or running when
+    the runner stops are resumed by the next ``start``.
+
+    Args:
+        llm_service: Service that generates the responses
+        directory: Where job directories are kept
+        concurrency: Default number of prompts in flight per job
+    """
+
+    def __init__(self, llm_service: LLMService, directory: str, concurrency: int = 2):
+        self.llm_service = llm_service
+        self.directory = directory
+        self.concurrency = concurrency
+        self.jobs: Dict[str, BatchJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load existing jobs and resume the unfinished ones"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue()
+        jobs = []
+        for name in os.listdir(self.directory):
+            try:
+                jobs.append(BatchJob.load(os.path.join(self.directory, name)))
+            except (OSError, ValueError) as e:
+                log.warning("batch_job_unreadable", job=name, error=str(e))
+        for job in sorted(jobs, key=lambda job: job.state["created_at"]):
+            self.jobs[job.id] = job
+            if job.status in ACTIVE:
+                # Repair the checkpoint before anyone streams it
+                finished = len(job.read_checkpoint())
+                self._queue.put_nowait(job)
+                log.info("batch_job_resumed", job=job.id, finished=finished, total=job.state["total"])
+        self._worker = asyncio.create_task(self._work())
+
+    async def close(self):
+        """Stop the running job; it stays "running" on disk and resumes on the next start"""
+        if self._worker:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+
+    async def create(
+        self,
+        lines: AsyncIterator[bytes],
+        concurrency: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+        route: Optional[str] = None
+    ) -> BatchJob:
+        """
+        Queue a job from the lines of a JSONL batch file
+
+        Each line is an object with a ``prompt`` and optionally an ``id``
+        (echoed in its result), ``system_prompt``, ``options``, ``route``
+        and ``conversation_id``. The job's ``system_prompt`` and ``route``
+        apply to lines without their own.
+
+        Raises:
+            ValueError: For an invalid line (nothing is queued) or an empty file
+        """
+        job_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        directory = os.path.join(self.directory, job_id)
+        os.makedirs(directory)
+        total = 0
+        try:
+            with open(os.path.join(directory, "input.jsonl"), "wb") as f:
+                line_number = 0
+                async for line in lines:
+                    line_number += 1
+                    if not line.strip():
+                        continue
+                    item = parse_item(line, line_number)
+                    f.write(json.dumps(item, ensure_ascii=False).encode() + b"\n")
+                    total += 1
+            if not total:
+                raise ValueError("The batch file has no prompts")
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+        job = BatchJob(directory, {
+            "id": job_id,
+            "status": "queued",
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "total": total,
+            "completed": 0,
+            "failed": 0,
+            "deduplicated": 0,
+            "concurrency": max(1, min(concurrency or self.concurrency, MAX_CONCURRENCY)),
+            "system_prompt": system_prompt,
+            "route": route
+        })
+        job.save()
+        self.jobs[job_id] = job
+        self._queue.put_nowait(job)
+        log.info("batch_job_queued", job=job_id, total=total, concurrency=job.state["concurrency"])
+        return job
+
+    def cancel(self, job_id: str) -> Optional[BatchJob]:
+        """Cancel a queued or running job (answered prompts stay in its results)"""
+        job = self.jobs.get(job_id)
+        if job and job.status in ACTIVE:
+            job.state["status"] = "cancelled"
+            job.state["finished_at"] = datetime.now().isoformat()
+            job.save()
+            if job.task:
+                job.task.cancel()
+            job.notify()
+            log.info("batch_job_cancelled", job=job_id)
+        return job
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            if job.status not in ACTIVE:
+                continue
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                # A cancelled job ends its task without stopping the runner
+                await asyncio.wait([job.task])
+            except asyncio.CancelledError:
+                job.task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await job.task
+                raise
+            if not job.task.cancelled() and job.task.exception():
+                log.error("batch_job_failed", job=job.id, error=repr(job.task.exception()))
+                job.state.update(status="failed", error=str(job.task.exception()), finished_at=datetime.now().isoformat())
+                job.save()
+                job.notify()
+
+    async def _run(self, job: BatchJob):
+        """Answer the job's remaining prompts, appending each result to the checkpoint"""
+        done: Set[int] = set()
+        answers: Dict[str, str] = {}
+        counts = {"completed": 0, "failed": 0, "deduplicated": 0}
+        for record in job.read_checkpoint():
+            done.add(record["index"])
+            if "error" in record:
+                counts["failed"] += 1
+                continue
+            counts["completed"] += 1
+            counts["deduplicated"] += bool(record.get("deduplicated"))
+            if record.get("key"):
+                answers[record["key"]] = record["response"]
+        job.state.update(counts, status="running")
+        job.state["started_at"] = job.state["started_at"] or datetime.now().isoformat()
+        job.save()
+        job._run_started, job._run_finished = time.monotonic(), 0
+        job.notify()
+
+        pending: Dict[str, asyncio.Future] = {}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=job.state["concurrency"] * 2)
+
+        def dedup_key(item: Dict[str, Any]) -> Optional[str]:
+            # Randomly sampled prompts are expected to differ, so they are never shared
+            if not is_deterministic(item.get("options")):
+                return None
+            payload = [
+                item["prompt"], item.get("system_prompt") or job.state["system_prompt"], item.get("options") or {},
+                item.get("route") or job.state["route"], item.get("conversation_id")
+            ]
+            return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+        async def generate(item: Dict[str, Any]) -> str:
+            return await self.llm_service.generate(
+                item["prompt"],
+                item.get("system_prompt") or job.state["system_prompt"],
+                item.get("conversation_id"),
+                item.get("options"),
+                priority=Priority.BACKGROUND,
+                route=item.get("route") or job.state["route"]
+            )
+
+        async def answer(index: int, item: Dict[str, Any], out):
+            key = dedup_key(item)
+            record: Dict[str, Any] = {"index": index, "id": item.get("id")}
+            started = time.monotonic()
+            try:
+                if key in answers:
+                    record.update(response=answers[key], deduplicated=True)
+                elif key in pending:
+                    record.update(response=await asyncio.shield(pending[key]), deduplicated=True)
+                else:
+                    future = asyncio.get_running_loop().create_future()
+                    if key:
+                        pending[key] = future
+                    try:
+                        response = await generate(item)
+                    except asyncio.CancelledError:
+                        future.cancel()
+                        raise
+                    except Exception as e:
+                        future.set_exception(e)
+                        # Mark the exception retrieved in case no duplicate is waiting
+                        future.exception()
+                        raise
+                    finally:
+                        pending.pop(key, None)
+                    future.set_result(response)
+                    if key:
+                        answers[key] = response
+                    record["response"] = response
+            except Exception as e:
+                record["error"] = str(e) or repr(e)
+            record["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+            if key:
+                record["key"] = key
+
+            outcome = "failed" if "error" in record else "deduplicated" if record.get("deduplicated") else "completed"
+            job.state["failed" if outcome == "failed" else "completed"] += 1
+            job.state["deduplicated"] += outcome == "deduplicated"
+            job._run_finished += 1
+            BATCH_ITEMS.labels(outcome).inc()
+            BATCH_ITEM_SECONDS.observe(record["latency_ms"] / 1000)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            job.notify()
+
+        async def worker(out):
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                job.in_flight += 1
+                try:
+                    await answer(*entry, out)
+                finally:
+                    job.in_flight -= 1
+
+        with open(job.results_path, "a", encoding="utf-8") as out:
+            workers = [asyncio.create_task(worker(out)) for _ in range(job.state["concurrency"])]
+            try:
+                for index, item in enumerate(job.iter_inputs()):
+                    if index not in done:
+                        await queue.put((index, item))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                out.flush()
+                os.fsync(out.fileno())
+                if job.status == "running":
+                    job.save()
+
+        job.state.update(status="completed", finished_at=datetime.now().isoformat())
+        job.save()
+        job.notify()
+        log.info("batch_job_completed", job=job.id, **{key: job.state[key] for key in ("total", "completed", "failed", "deduplicated")})
+
+    async def stream(self, job: BatchJob, follow: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the job's results from its checkpoint, then its progress
+
+        Args:
+            job: The job
+            follow: Keep yielding new results, with a progress record
+                whenever the job changes, until it is no longer running
+
+        Yields:
+            ``{"type": "result", ...}`` records (index, id and response or
+            error, in completion order), ``{"type": "progress", ...}``
+            records and a final ``{"type": "end", ...}`` with the job state
+        """
+        offset = 0
+        buffer = b""
+        while True:
+            active = job.status in ACTIVE
+            with suppress(FileNotFoundError), open(job.results_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+                offset += len(data)
+                *lines, buffer = (buffer + data).split(b"\n")
+                for line in lines:
+                    record = json.loads(line)
+                    record.pop("key", None)
+                    yield {"type": "result", **record}
+            if not follow or not active:
+                break
+            yield {"type": "progress", **job.progress()}
+            await job.wait(1.0)
+        yield {"type": "end", **job.progress()}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Jobs per status and the job currently running"""
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        running = [job.id for job in self.jobs.values() if job.status == "running"]
+        return {"jobs": statuses, "running": running[0] if running else None, "default_concurrency": self.concurrency}
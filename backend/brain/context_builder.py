@@ -0,0 +1,270 @@
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import re
+import threading
+
+from memory.storage import MemoryManager
+from observability.log import get_logger
+
+# Prompt budgets (in approximate tokens) per model, leaving room for the reply
+MODEL_TOKEN_BUDGETS = {
+    "gemma3:4b-it-q4_K_M": 4096,
+    "gemma3:1b-it-q4_K_M": 2048,
+}
+
+# Per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+log = get_logger("brain.context_builder")
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without running a tokenizer
+
+    Roughly four characters per token for English, with a floor of one
+    token per word so short, punctuation-heavy text isn't undercounted.
+    """
+    return max((len(text) + 3) // 4, len(text.split()))
+
+class TokenCounter:
+    """Approximate token counter with a per-message cache"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, message: Dict[str, Any]) -> int:
+        """Count the tokens a message occupies in the prompt"""
+        key = message.get("id")
+        if key is None:
+            return approximate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+            tokens = approximate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            self._cache[key] = tokens
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+def extractive_summary(previous: str, messages: List[Dict], max_tokens: int) -> str:
+    """
+    Fold evicted messages into a running summary
+
+    Keeps the first sentence of each message and drops the oldest lines
+    once the summary outgrows its budget.
+
+    Args:
+        previous: Summary of the messages evicted earlier
+        messages: Newly evicted messages, oldest first
+        max_tokens: Token budget for the summary
+
+    Returns:
+        The updated summary
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        first_sentence = SENTENCE_END.split(message["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{message['role']}: {first_sentence}")
+
+    total = sum(approximate_tokens(line) for line in lines)
+    while lines and total > max_tokens:
+        total -= approximate_tokens(lines.pop(0))
+    return "\n".join(lines)
+
+class ContextBuilder:
+    """Assembles token-budgeted prompts from conversation history
+
+    The window holds the most recent turns. Relevant snippets from other
+    parts of the history are added through semantic recall, and turns that
+    no longer fit are folded into a rolling summary. The summary is cached
+    per conversation and only extended with newly evicted turns.
+
+    Prompts are laid out so consecutive turns share a byte-identical
+    prefix, which lets Ollama reuse the evaluated prompt instead of
+    re-reading the whole history: system prompt, summary and window
+    first, then the per-prompt snippets, then the prompt. The window
+    keeps its first turn for as long as everything from there fits; when
+    it overflows, the oldest turns are evicted in one block down to
+    ``eviction_target`` of the budget, so the prefix (and the summary)
+    only changes every few turns instead of on every one.
+
+    ``build`` reads memory and the vector index, so ``LLMService`` calls
+    it on a worker thread; the caches are safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryManager,
+        token_budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = 2048,
+        retrieval_k: int = 3,
+        retrieval_share: float = 0.15,
+        summary_share: float = 0.15,
+        summarizer: Callable[[str, List[Dict], int], str] = extractive_summary,
+        eviction_target: float = 1.0,
+        max_sessions: int = 256
+    ):
+        self.memory = memory
+        self.token_budgets = {**MODEL_TOKEN_BUDGETS, **(token_budgets or {})}
+        self.default_budget = default_budget
+        self.retrieval_k = retrieval_k
+        self.retrieval_share = retrieval_share
+        self.summary_share = summary_share
+        self.summarizer = summarizer
+        # Share of the history budget the window shrinks to when it overflows
+        # (1.0 evicts only what no longer fits, turn by turn)
+        self.eviction_target = eviction_target
+        self.counter = TokenCounter()
+        # Conversations (and conversation/model pairs) whose summary and
+        # window are kept, least recently used evicted first
+        self.max_sessions = max_sessions
+        # conversation_id -> (last summarised message ID, summary text)
+        self._summaries: OrderedDict = OrderedDict()
+        # (conversation_id, model) -> ID of the first message in the window
+        self._window_starts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def budget_for(self, model_name: str) -> int:
+        """Prompt token budget for a model"""
+        return self.token_budgets.get(model_name, self.default_budget)
+
+    def build(
+        self,
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Build the message list for a chat request
+
+        Args:
+            model_name: Model the prompt is for, which selects the budget
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to guide the model
+            conversation_id: Optional conversation whose history to include
+
+        Returns:
+            Messages ready for the Ollama chat API
+        """
+        user_message = {"role": "user", "content": prompt}
+        budget = self.budget_for(model_name) - self.counter.count(user_message)
+        if system_prompt:
+            budget -= self.counter.count({"role": "system", "content": system_prompt})
+
+        history = self.memory.get_conversation_history(conversation_id) if conversation_id else []
+        summary_budget = int(budget * self.summary_share)
+        retrieval_budget = int(budget * self.retrieval_share)
+        history_budget = budget - summary_budget - retrieval_budget
+
+        recent, evicted = self._window(conversation_id, model_name, history, history_budget)
+
+        # Stable prefix: only changes when turns are evicted
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        summary = self._summarize(conversation_id, evicted, summary_budget) if evicted else ""
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of earlier conversation:\n{summary}"})
+
+        messages.extend({"role": message["role"], "content": message["content"]} for message in recent)
+
+        # Volatile content goes last so it never invalidates the prefix
+        snippets = self._retrieve(prompt, {message["id"] for message in recent}, retrieval_budget)
+        if snippets:
+            messages.append({"role": "system", "content": "Relevant memories:\n" + "\n".join(snippets)})
+
+        messages.append(user_message)
+        return messages
+
+    def _window(
+        self,
+        conversation_id: Optional[str],
+        model_name: str,
+        history: List[Dict],
+        budget: int
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Split the history into the turns sent verbatim and the evicted ones"""
+        key = (conversation_id, model_name)
+        start_id = self._recall(self._window_starts, key, 0)
+        start = 0
+        while start < len(history) and history[start]["id"] < start_id:
+            start += 1
+
+        used = sum(self.counter.count(message) for message in history[start:])
+        if used > budget:
+            target = budget * self.eviction_target
+            while start < len(history) and used > target:
+                used -= self.counter.count(history[start])
+                start += 1
+        if conversation_id and start < len(history):
+            self._remember(self._window_starts, key, history[start]["id"])
+        return history[start:], history[:start]
+
+    def _summarize(self, conversation_id: str, evicted: List[Dict], max_tokens: int) -> str:
+        """Extend the cached summary with turns evicted since the last call"""
+        covered_id, summary = self._recall(self._summaries, conversation_id, (0, ""))
+        new_messages = [message for message in evicted if message["id"] > covered_id]
+        if new_messages:
+            summary = self.summarizer(summary, new_messages, max_tokens)
+            self._remember(self._summaries, conversation_id, (new_messages[-1]["id"], summary))
+        return summary
+
+    def _recall(self, cache: OrderedDict, key, default):
+        """Cached value for a key, marking it as recently used"""
+        with self._lock:
+            if key not in cache:
+                return default
+            cache.move_to_end(key)
+            return cache[key]
+
+    def _remember(self, cache: OrderedDict, key, value):
+        """Cache a value, evicting the least recently used beyond ``max_sessions``"""
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_sessions:
+                cache.popitem(last=False)
+
+    def _retrieve(self, prompt: str, exclude_ids: set, max_tokens: int) -> List[str]:
+        """Relevant snippets from anywhere in the history, within a token budget"""
+        if not self.memory.vector_index or max_tokens <= 0:
+            return []
+
+        try:
+            found = self.memory.search_messages(prompt, k=self.retrieval_k + len(exclude_ids))
+        except Exception as e:
+            # An embedding model that is down costs the recall, not the reply
+            log.warning("recall_failed", error=str(e))
+            return []
+
+        snippets = []
+        used = 0
+        for message in found:
+            if message["id"] in exclude_ids:
+                continue
+            snippet = f"- ({message['role']}) {message['content']}"
+            tokens = approximate_tokens(snippet)
+            if used + tokens > max_tokens:
+                break
+            snippets.append(snippet)
+            used += tokens
+            if len(snippets) == self.retrieval_k:
+                break
+        return snippets
+
+    def forget(self, conversation_id: str):
+        """Drop the cached summary and window of a conversation"""
+        with self._lock:
+            self._summaries.pop(conversation_id, None)
+            for key in [key for key in self._window_starts if key[0] == conversation_id]:
+                del self._window_starts[key]
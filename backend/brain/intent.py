@@ -0,0 +1,160 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+import time
+
+from tools.executor import ToolExecutor
+from tools.app_index import AppIndex
+
+# "open kate", "Lyra, please launch the firefox app", "could you start vlc?"
+LAUNCH_PATTERNS = [
+    r"(?:(?:hey\s+)?lyra[,\s]+)?(?:please\s+)?(?:(?:can|could|would)\s+you\s+)?(?:open|launch|start)\s+(?:up\s+)?(?:the\s+|my\s+)?"
+    r"(?P<app>[\w.+-]+(?:\s+[\w.+-]+){0,3}?)(?:\s+(?:app|application|program))?(?:\s+(?:please|for me))?\s*[.!?]*"
+]
+
+Resolver = Callable[[Dict[str, str]], Optional[Tuple[Dict[str, Any], float]]]
+
+class IntentPattern:
+    """A compiled command pattern for one tool
+
+    ``resolve`` turns the pattern's named groups into tool parameters and
+    a confidence in [0, 1]; without one the groups are passed through with
+    full confidence.
+    """
+
+    def __init__(self, tool_name: str, pattern: str, resolve: Optional[Resolver] = None):
+        self.tool_name = tool_name
+        self.regex = re.compile(pattern, re.IGNORECASE)
+        self.resolve = resolve
+
+class IntentMatch:
+    """A command recognized without the LLM, and the tool's result once run"""
+
+    def __init__(self, tool_name: str, parameters: Dict[str, Any], confidence: float):
+        self.tool_name = tool_name
+        self.parameters = parameters
+        self.confidence = confidence
+        self.result: Optional[Dict[str, Any]] = None
+
+    @property
+    def reply(self) -> str:
+        """What to tell the user about the tool call"""
+        result = self.result or {}
+        return result.get("message") or result.get("error") or f"Done: {self.tool_name}"
+
+class IntentMetrics:
+    """Fast-path hit rate and latency by path"""
+
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.hits = 0
+        self.latencies: Dict[str, deque] = {"fast_path": deque(maxlen=window), "llm": deque(maxlen=window)}
+        self.match_ms = deque(maxlen=window)
+
+    def record(self, path: str, seconds: float):
+        """Record the end-to-end latency of a request answered by ``path``"""
+        self.latencies[path].append(seconds * 1000)
+
+    def metrics(self) -> Dict[str, Any]:
+        def summary(values):
+            ordered = sorted(values)
+            return {
+                "count": len(ordered),
+                "p50": round(ordered[len(ordered) // 2], 2) if ordered else 0.0,
+                "p95": round(ordered[int(len(ordered) * 0.95)], 2) if ordered else 0.0
+            }
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.requests if self.requests else 0.0,
+            "latency_ms": {path: summary(values) for path, values in self.latencies.items()},
+            "match_ms": summary(self.match_ms)
+        }
+
+class IntentRouter:
+    """Answers tool commands before they reach the LLM
+
+    Every prompt is tried against compiled patterns for the tools
+    registered with the executor. Application names are resolved through
+    the fuzzy index of installed applications (anything with a
+    ``search(query, limit)`` method returning (name, score) pairs);
+    ``AppIndex.search`` only reads the index in memory and refreshes it
+    on a background thread, so matching never scans the disk. Only a
+    confident match (a close name with no close runner-up) runs the tool
+    directly through ``ToolExecutor.execute_tool``, which still checks
+    permissions; anything ambiguous is left for the model.
+    """
+
+    def __init__(
+        self,
+        executor: ToolExecutor,
+        app_index: Optional[AppIndex] = None,
+        min_confidence: float = 0.8,
+        margin: float = 0.1
+    ):
+        self.executor = executor
+        self.min_confidence = min_confidence
+        self.margin = margin
+        self.patterns: List[IntentPattern] = []
+        self.metrics = IntentMetrics()
+        self.app_index = app_index or AppIndex()
+        for pattern in LAUNCH_PATTERNS:
+            self.add_pattern("app_launcher", pattern, self._resolve_app)
+
+    def warm(self):
+        """Load the application index now rather than on the first command"""
+        len(self.app_index)
+
+    def add_pattern(self, tool_name: str, pattern: str, resolve: Optional[Resolver] = None):
+        """
+        Register a command pattern for a tool
+
+        Args:
+            tool_name: Tool to run when the pattern matches the whole prompt
+            pattern: Regular expression with named groups for the parameters
+            resolve: Maps the named groups to (parameters, confidence), or
+                None when the groups make no sense for the tool
+        """
+        self.patterns.append(IntentPattern(tool_name, pattern, resolve))
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        """The confident tool call for ``text``, if there is one"""
+        text = text.strip()
+        for pattern in self.patterns:
+            if not self.executor.permissions.get(pattern.tool_name, False):
+                continue
+            found = pattern.regex.fullmatch(text)
+            if not found:
+                continue
+            groups = {name: value for name, value in found.groupdict().items() if value is not None}
+            resolved = pattern.resolve(groups) if pattern.resolve else (groups, 1.0)
+            if resolved and resolved[1] >= self.min_confidence:
+                return IntentMatch(pattern.tool_name, *resolved)
+        return None
+
+    async def handle(self, text: str) -> Optional[IntentMatch]:
+        """
+        Run ``text`` as a tool command if it confidently is one
+
+        Returns:
+            The match with its tool result, or None to send the prompt to the LLM
+        """
+        started = time.monotonic()
+        self.metrics.requests += 1
+        intent = self.match(text)
+        if intent is None:
+            self.metrics.match_ms.append((time.monotonic() - started) * 1000)
+            return None
+        intent.result = await self.executor.execute_tool(intent.tool_name, intent.parameters)
+        self.metrics.hits += 1
+        self.metrics.record("fast_path", time.monotonic() - started)
+        return intent
+
+    def _resolve_app(self, groups: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], float]]:
+        candidates = self.app_index.search(groups["app"], limit=2)
+        if not candidates:
+            return None
+        name, score = candidates[0]
+        if len(candidates) > 1 and score - candidates[1][1] < self.margin:
+            return None
+        return {"app_name": name}, score
@@ -1,70 +1,397 @@
 from ollama import AsyncClient
-from typing import List, Dict, Any, Optional
+from contextlib import aclosing
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 import asyncio
+import time
+
+from brain.context_builder import ContextBuilder
+from brain.response_cache import ResponseCache, is_deterministic, replay_chunks
+from brain.scheduler import RequestScheduler, Priority, QueueCallback
+from brain.model_lifecycle import ModelLifecycle
+from brain.model_router import ModelRouter, ModelRoute
+from brain.session import SessionStore
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+from observability.tracing import mark
+
+FIRST_TOKEN = REGISTRY.histogram("lyra_time_to_first_token_seconds", "Time from sending a streamed request to its first chunk", ["model"])
+
+log = get_logger("brain.llm_service")
 
 class LLMService:
     """LLM service for interacting with Ollama models"""
     
-    def __init__(self, model_name: str = "gemma3:4b-it-q4_K_M"):
+    def __init__(
+        self,
+        model_name: str = "gemma3:4b-it-q4_K_M",
+        context_builder: Optional[ContextBuilder] = None,
+        response_cache: Optional[ResponseCache] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        host: Optional[str] = None,
+        keep_alive: float = 600,
+        router: Optional[ModelRouter] = None,
+        client: Optional[AsyncClient] = None
+    ):
         self.model_name = model_name
-        self.client = AsyncClient()
+        # Pass the process-wide pooled client (OllamaPool.client) to share connections
+        self.client = client or AsyncClient(host=host)
+        self.context_builder = context_builder
+        self.response_cache = response_cache
+        self.scheduler = scheduler or RequestScheduler()
+        self.router = router
+        # Per-conversation prompt-cache state and prompt-eval figures
+        self.sessions = SessionStore()
+        # One lifecycle per model so every routed model is preloaded and kept warm
+        self.lifecycles: Dict[str, ModelLifecycle] = {
+            name: ModelLifecycle(self.client, name, keep_alive=keep_alive)
+            for name in [model_name, *(router.model_names if router else [])]
+        }
+    
+    @property
+    def lifecycle(self) -> ModelLifecycle:
+        """Lifecycle of the default model"""
+        return self.lifecycles[self.model_name]
+    
+    def _lifecycle_for(self, model_name: str) -> ModelLifecycle:
+        if model_name not in self.lifecycles:
+            self.lifecycles[model_name] = ModelLifecycle(self.client, model_name, keep_alive=self.lifecycle.keep_alive)
+        return self.lifecycles[model_name]
+    
+    def _routes_for(self, prompt: str, route: Optional[str]) -> List[ModelRoute]:
+        """Models to try for a request: the routed choice, then its fallback"""
+        if self.router:
+            return self.router.choose(prompt, route)
+        model_name = route or self.model_name
+        return [ModelRoute(model_name, model_name, first_token_timeout=None)]
+    
+    def _cache_key(
+        self,
+        model_name: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        conversation_id: Optional[str],
+        options: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Cache key for a request, or None when the response must not be reused"""
+        if not self.response_cache:
+            return None
+        # Responses that depend on conversation history or random sampling are never reused
+        if conversation_id or not is_deterministic(options):
+            self.response_cache.record_bypass()
+            return None
+        return self.response_cache.make_key(model_name, system_prompt, prompt, options)
+    
+    def _cache_put(self, model_name: str, prompt: str, system_prompt: Optional[str], options: Optional[Dict[str, Any]], response: str):
+        """Cache a response under the model that produced it (the fallback's answer is not the routed model's)"""
+        self.response_cache.put(self.response_cache.make_key(model_name, system_prompt, prompt, options), response)
+    
+    def _build_messages(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        model_name: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages, including budgeted history when a conversation is given"""
+        if self.context_builder and conversation_id:
+            messages = self.context_builder.build(model_name or self.model_name, prompt, system_prompt, conversation_id)
+            mark("context_built")
+            return messages
+        
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+            
+        messages.append({"role": "user", "content": prompt})
+        mark("context_built")
+        return messages
+    
+    def _record_turn(
+        self,
+        conversation_id: Optional[str],
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        reply: str,
+        response: Any,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Report a conversation turn's prompt-eval cost against its shared prefix"""
+        if not conversation_id:
+            return
+        turn = self.sessions.record_turn(conversation_id, model_name, messages, reply, response, tools)
+        log.debug("prompt_eval", conversation_id=conversation_id, **turn)
     
-    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    async def generate_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.INTERACTIVE,
+        on_queued: Optional[QueueCallback] = None,
+        route: Optional[str] = None
+    ) -> str:
         """
         Generate a response from the LLM
         
         Args:
             prompt: The user's prompt
             system_prompt: Optional system prompt to guide the model
+            conversation_id: Optional conversation whose history provides context
+            options: Optional Ollama sampling options (temperature, seed, ...)
+            priority: Scheduling priority while waiting for a generation slot
+            on_queued: Optional callback reporting queue position and wait time
+            route: Optional route or model name overriding the router's choice
             
         Returns:
-            The generated response text
+            The generated response text (an apology if generation failed)
         """
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-            
-        messages.append({"role": "user", "content": prompt})
-        
         try:
-            response = await self.client.chat(
-                model=self.model_name,
-                messages=messages
-            )
-            return response['message']['content']
+            return await self.generate(prompt, system_prompt, conversation_id, options, priority, on_queued, route)
         except Exception as e:
-            print(f"Error generating response: {e}")
+            log.error("generate_failed", error=str(e))
             return "Sorry, I encountered an error while processing your request."
     
-    async def stream_response(self, prompt: str, system_prompt: Optional[str] = None):
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.INTERACTIVE,
+        on_queued: Optional[QueueCallback] = None,
+        route: Optional[str] = None
+    ) -> str:
+        """
+        Generate a response like ``generate_response``, raising when every model fails
+        
+        The response is streamed from Ollama and collected, so a route's
+        ``first_token_timeout`` only bounds the wait for the first chunk,
+        not the whole generation.
+        
+        Raises:
+            Exception: The last model's error
+        """
+        routes = self._routes_for(prompt, route)
+        cache_key = self._cache_key(routes[0].model_name, prompt, system_prompt, conversation_id, options)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        chunks = []
+        model_route = routes[0]
+        async for model_route, chunk in self._stream_routes(routes, prompt, system_prompt, conversation_id, options, priority, on_queued):
+            chunks.append(chunk['message']['content'])
+        content = "".join(chunks)
+        # An empty stream is an empty reply, which is not worth caching
+        if cache_key and chunks:
+            self._cache_put(model_route.model_name, prompt, system_prompt, options, content)
+        return content
+    
+    async def stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.INTERACTIVE,
+        on_queued: Optional[QueueCallback] = None,
+        route: Optional[str] = None
+    ):
         """
         Stream a response from the LLM
         
+        Cancelling the consumer (or closing the generator) closes the
+        upstream Ollama stream, which stops generation on the server. A
+        routed request falls back to the other model if the first one
+        errors or produces no token within its timeout.
+        
         Args:
             prompt: The user's prompt
             system_prompt: Optional system prompt to guide the model
+            conversation_id: Optional conversation whose history provides context
+            options: Optional Ollama sampling options (temperature, seed, ...)
+            priority: Scheduling priority while waiting for a generation slot
+            on_queued: Optional callback reporting queue position and wait time
+            route: Optional route or model name overriding the router's choice
             
         Yields:
             Chunks of the response as they are generated
         """
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-            
-        messages.append({"role": "user", "content": prompt})
+        routes = self._routes_for(prompt, route)
+        cache_key = self._cache_key(routes[0].model_name, prompt, system_prompt, conversation_id, options)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                # Replay as a stream so clients see the usual chunk protocol
+                for chunk in replay_chunks(cached):
+                    yield chunk
+                return
         
         try:
-            async for chunk in await self.client.chat(
-                model=self.model_name,
-                messages=messages,
-                stream=True
-            ):
-                yield chunk['message']['content']
+            chunks = []
+            stream = self._stream_routes(routes, prompt, system_prompt, conversation_id, options, priority, on_queued)
+            async with aclosing(stream):
+                async for model_route, chunk in stream:
+                    chunks.append(chunk['message']['content'])
+                    yield chunk['message']['content']
+            if cache_key:
+                self._cache_put(model_route.model_name, prompt, system_prompt, options, "".join(chunks))
         except Exception as e:
-            print(f"Error streaming response: {e}")
+            log.error("stream_failed", error=str(e))
             yield "Sorry, I encountered an error while processing your request."
+    
+    async def stream_chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.INTERACTIVE,
+        on_queued: Optional[QueueCallback] = None,
+        route: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_messages: Optional[List[Dict[str, Any]]] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream raw Ollama chat chunks, with routing, fallback and scheduling
+        
+        The building block of ``generate`` and ``stream_response``, for
+        callers that need tool calls: ``tools`` are offered to the model and
+        ``tool_messages`` (earlier tool calls and their results) follow the
+        prompt. With ``deadline`` (a ``time.monotonic()`` value) the wait for
+        a generation slot and for every chunk are bounded by it.
+        
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to guide the model
+            conversation_id: Optional conversation whose history provides context
+            options: Optional Ollama sampling options
+            priority: Scheduling priority while waiting for a generation slot
+            on_queued: Optional callback reporting queue position and wait time
+            route: Optional route or model name overriding the router's choice
+            tools: Optional tool schemas to offer the model
+            tool_messages: Optional messages appended after the prompt
+            deadline: Optional ``time.monotonic()`` time by which the request must finish
+        
+        Yields:
+            (model name, chunk) pairs; the model is the one that answered
+        
+        Raises:
+            asyncio.TimeoutError: If the deadline passes
+            Exception: The last model's error
+        """
+        routes = self._routes_for(prompt, route)
+        async for model_route, chunk in self._stream_routes(
+            routes, prompt, system_prompt, conversation_id, options, priority, on_queued, tools, tool_messages, deadline
+        ):
+            yield model_route.model_name, chunk
+    
+    async def _stream_routes(
+        self,
+        routes: List[ModelRoute],
+        prompt: str,
+        system_prompt: Optional[str],
+        conversation_id: Optional[str],
+        options: Optional[Dict[str, Any]],
+        priority: int,
+        on_queued: Optional[QueueCallback],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_messages: Optional[List[Dict[str, Any]]] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Tuple[ModelRoute, Dict[str, Any]]]:
+        """
+        Stream chunks from the first route that starts answering
+        
+        A route that errors or produces no chunk within its
+        ``first_token_timeout`` falls back to the next one; after the first
+        chunk the request is committed to that model. Running into the
+        deadline raises instead of falling back. Yields (route, chunk) pairs
+        so callers know which model answered.
+        
+        Raises:
+            asyncio.TimeoutError: If the deadline passes
+            Exception: The last route's error
+        """
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+        
+        async def build(model_name: str) -> List[Dict[str, Any]]:
+            if self.context_builder and conversation_id:
+                # History, summary and recall read memory and the vector index: off the event loop
+                messages = await asyncio.to_thread(self._build_messages, prompt, system_prompt, conversation_id, model_name)
+            else:
+                messages = self._build_messages(prompt, system_prompt, conversation_id, model_name)
+            return messages + list(tool_messages or [])
+        
+        async def request(model_name: str, messages: List[Dict[str, Any]], keep_alive: float):
+            # Sent on the first anext, so the first-token timeout covers a model that cannot be reached
+            stream = await self.client.chat(
+                model=model_name,
+                messages=messages,
+                tools=tools,
+                stream=True,
+                options=options,
+                keep_alive=keep_alive
+            )
+            async with aclosing(stream):
+                async for chunk in stream:
+                    yield chunk
+        
+        # Context is built before queueing so it does not hold a generation slot
+        messages = await build(routes[0].model_name)
+        async with self.scheduler.slot(priority, on_queued, timeout=remaining()):
+            for attempt, model_route in enumerate(routes):
+                if attempt:
+                    messages = await build(model_route.model_name)
+                lifecycle = self._lifecycle_for(model_route.model_name)
+                lifecycle.record_request()
+                started = time.monotonic()
+                stream = request(model_route.model_name, messages, lifecycle.keep_alive)
+                async with aclosing(stream):
+                    # Fallback is only possible until the first token is out
+                    timeout = model_route.first_token_timeout
+                    budget = remaining()
+                    out_of_budget = budget is not None and (timeout is None or budget <= timeout)
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), budget if out_of_budget else timeout)
+                    except StopAsyncIteration:
+                        # The model answered with an empty stream: an empty reply, not a failure
+                        if self.router:
+                            self.router.record(model_route, time.monotonic() - started, fallback=attempt > 0)
+                        break
+                    except Exception as e:
+                        if out_of_budget and isinstance(e, asyncio.TimeoutError):
+                            raise
+                        if self.router:
+                            self.router.record(model_route, time.monotonic() - started, error=True, fallback=attempt > 0)
+                        if attempt == len(routes) - 1:
+                            raise
+                        log.warning("model_fallback", model=model_route.model_name, error=repr(e))
+                        continue
+                    FIRST_TOKEN.labels(model_route.model_name).observe(time.monotonic() - started)
+                    mark("first_token")
+                    
+                    chunks = []
+                    final = None
+                    while True:
+                        if chunk.get('done'):
+                            final = chunk
+                            lifecycle.record_response(chunk)
+                            if self.router:
+                                self.router.record(model_route, time.monotonic() - started, chunk, fallback=attempt > 0)
+                        chunks.append(chunk['message'].get('content') or "")
+                        yield model_route, chunk
+                        try:
+                            chunk = await asyncio.wait_for(anext(stream), remaining())
+                        except StopAsyncIteration:
+                            break
+                    if final is not None:
+                        self._record_turn(conversation_id, model_route.model_name, messages, "".join(chunks), final, tools)
+                break
 
 # Example usage
 if __name__ == "__main__":
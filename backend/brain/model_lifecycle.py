@@ -0,0 +1,199 @@
+from enum import Enum
+from typing import Dict, Any, Optional
+import asyncio
+import time
+
+from observability.log import get_logger
+from observability.metrics import REGISTRY, RATE_BUCKETS
+
+EVAL_TOKENS = REGISTRY.counter("lyra_eval_tokens", "Tokens generated", ["model"])
+EVAL_SECONDS = REGISTRY.counter("lyra_eval_seconds", "Time spent generating tokens", ["model"])
+PROMPT_EVAL_TOKENS = REGISTRY.counter("lyra_prompt_eval_tokens", "Prompt tokens evaluated", ["model"])
+TOKENS_PER_SECOND = REGISTRY.histogram("lyra_tokens_per_second", "Generation speed of each response", ["model"], RATE_BUCKETS)
+
+log = get_logger("brain.model_lifecycle")
+
+class ModelState(str, Enum):
+    """Readiness of the model inside Ollama"""
+    COLD = "cold"
+    LOADING = "loading"
+    READY = "ready"
+    ERROR = "error"
+
+# Load times above this are a real model load rather than a residency check
+COLD_LOAD_SECONDS = 0.25
+
+def _seconds(stats: Any, field: str) -> float:
+    """Read an Ollama nanosecond duration field as seconds"""
+    return (stats.get(field) or 0) / 1e9
+
+class ModelLifecycle:
+    """Keeps a model loaded in Ollama and tracks where request time goes
+
+    ``preload`` loads the model with an empty prompt (Ollama's documented
+    way to load without generating). While traffic is recent, a background
+    loop re-arms ``keep_alive`` before Ollama's idle timer unloads the
+    model. Once the assistant has been idle for ``idle_timeout`` the pings
+    stop and Ollama may free the memory. Every response's load, prompt
+    evaluation and generation times are recorded.
+    """
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        keep_alive: float = 600,
+        idle_timeout: float = 3600,
+        check_interval: float = 30
+    ):
+        self.client = client
+        self.model_name = model_name
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.state = ModelState.COLD
+        self.error: Optional[str] = None
+        self.last_request = time.monotonic()
+        self.last_touch = 0.0
+        self._ready = asyncio.Event()
+        self._keep_alive_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "requests": 0,
+            "cold_starts": 0,
+            "keep_alive_pings": 0,
+            "load_seconds": 0.0,
+            "prompt_eval_seconds": 0.0,
+            "prompt_eval_tokens": 0,
+            "eval_seconds": 0.0,
+            "eval_tokens": 0,
+            "last": {}
+        }
+
+    async def preload(self):
+        """Load the model into memory (or refresh its keep_alive) and mark it ready"""
+        if self.state != ModelState.READY:
+            self.state = ModelState.LOADING
+            self._ready.clear()
+        started = time.monotonic()
+        try:
+            response = await self.client.generate(model=self.model_name, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            self.state = ModelState.ERROR
+            self.error = str(e)
+            log.error("model_preload_failed", model=self.model_name, error=str(e))
+        else:
+            self.state = ModelState.READY
+            self.error = None
+            self.last_touch = time.monotonic()
+            load_seconds = _seconds(response, "load_duration")
+            self.stats["load_seconds"] += load_seconds
+            if load_seconds > COLD_LOAD_SECONDS:
+                self.stats["cold_starts"] += 1
+                self.stats["preload_seconds"] = round(time.monotonic() - started, 3)
+        finally:
+            self._ready.set()
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """
+        Wait for an in-progress preload to finish
+
+        Returns at once when no preload is running or scheduled (the
+        lifecycle was never started, or was stopped).
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the model is ready
+        """
+        if not self.running and self.state != ModelState.LOADING:
+            return self.state == ModelState.READY
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.state == ModelState.READY
+
+    @property
+    def running(self) -> bool:
+        """True while the preload / keep-alive loop is active"""
+        return self._keep_alive_task is not None and not self._keep_alive_task.done()
+
+    def start(self):
+        """Preload in the background and start the keep-alive loop"""
+        if self._keep_alive_task is None:
+            self._keep_alive_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the keep-alive loop"""
+        if self._keep_alive_task:
+            self._keep_alive_task.cancel()
+            await asyncio.gather(self._keep_alive_task, return_exceptions=True)
+            self._keep_alive_task = None
+
+    async def _run(self):
+        await self.preload()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.maintain()
+
+    async def maintain(self):
+        """Re-arm keep_alive if there has been traffic and the model would unload soon"""
+        now = time.monotonic()
+        if now - self.last_request > self.idle_timeout:
+            # Idle long enough: let Ollama unload the model
+            if self.state == ModelState.READY and now - self.last_touch > self.keep_alive:
+                self.state = ModelState.COLD
+            return
+        if now - self.last_touch > self.keep_alive - 2 * self.check_interval:
+            self.stats["keep_alive_pings"] += 1
+            await self.preload()
+
+    def record_request(self):
+        """Note that a request is about to use the model"""
+        self.last_request = time.monotonic()
+        self.stats["requests"] += 1
+
+    def record_response(self, response: Any):
+        """
+        Record timing stats from a final Ollama response (or stream chunk)
+
+        Args:
+            response: Chat response, or the final chunk of a stream
+        """
+        self.last_touch = time.monotonic()
+        load_seconds = _seconds(response, "load_duration")
+        if load_seconds > COLD_LOAD_SECONDS:
+            self.stats["cold_starts"] += 1
+        self.state = ModelState.READY
+        self._ready.set()
+
+        last = {
+            "load_seconds": load_seconds,
+            "prompt_eval_seconds": _seconds(response, "prompt_eval_duration"),
+            "prompt_eval_tokens": response.get("prompt_eval_count") or 0,
+            "eval_seconds": _seconds(response, "eval_duration"),
+            "eval_tokens": response.get("eval_count") or 0
+        }
+        for key, value in last.items():
+            self.stats[key] += value
+        self.stats["last"] = last
+        if last["eval_tokens"]:
+            EVAL_TOKENS.labels(self.model_name).inc(last["eval_tokens"])
+            PROMPT_EVAL_TOKENS.labels(self.model_name).inc(last["prompt_eval_tokens"])
+            EVAL_SECONDS.labels(self.model_name).inc(last["eval_seconds"])
+            if last["eval_seconds"]:
+                TOKENS_PER_SECOND.labels(self.model_name).observe(last["eval_tokens"] / last["eval_seconds"])
+
+    def metrics(self) -> Dict[str, Any]:
+        """Readiness plus cumulative load / prompt-eval / generation timings"""
+        eval_seconds = self.stats["eval_seconds"]
+        return {
+            "model": self.model_name,
+            "state": self.state.value,
+            "error": self.error,
+            "keep_alive": self.keep_alive,
+            "idle_seconds": round(time.monotonic() - self.last_request, 1),
+            **self.stats,
+            "tokens_per_second": self.stats["eval_tokens"] / eval_seconds if eval_seconds else 0.0
+        }
@@ -0,0 +1,122 @@
+from collections import deque
+from typing import Dict, Any, List, Optional
+import re
+
+# Turns that a small model handles as well as a large one
+GREETING = re.compile(r"^\s*(hi|hello|hey|thanks|thank you|good (morning|afternoon|evening|night)|bye)\b", re.IGNORECASE)
+COMMAND = re.compile(r"^\s*(please\s+)?(open|launch|start|run|close|quit|play|pause|stop|mute|unmute|set|turn|show|what time|what's the time)\b", re.IGNORECASE)
+# Turns that benefit from the larger model
+REASONING = re.compile(r"\b(why|explain|compare|analy[sz]e|reason|plan|design|debug|prove|derive|step[- ]by[- ]step|write|code|summari[sz]e|translate)\b", re.IGNORECASE)
+
+class ModelRoute:
+    """A named model configuration the router can send requests to"""
+
+    def __init__(self, name: str, model_name: str, first_token_timeout: Optional[float] = 30.0):
+        self.name = name
+        self.model_name = model_name
+        self.first_token_timeout = first_token_timeout
+
+class RouteStats:
+    """Latency and throughput of one route"""
+
+    def __init__(self, window: int = 200):
+        self.requests = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.eval_tokens = 0
+        self.eval_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "tokens_per_second": self.eval_tokens / self.eval_seconds if self.eval_seconds else 0.0
+        }
+
+class ModelRouter:
+    """Chooses a small or large model per request
+
+    Classification is a handful of regexes and a length check, so it costs
+    microseconds: greetings, app commands and other short prompts go to the
+    small route, while long or reasoning-heavy prompts go to the large one.
+    The other route is the fallback on error or timeout.
+    """
+
+    def __init__(self, small: ModelRoute, large: ModelRoute, short_prompt_words: int = 12):
+        self.routes: Dict[str, ModelRoute] = {small.name: small, large.name: large}
+        self.small = small
+        self.large = large
+        self.short_prompt_words = short_prompt_words
+        self.stats: Dict[str, RouteStats] = {name: RouteStats() for name in self.routes}
+
+    @property
+    def model_names(self) -> List[str]:
+        return [route.model_name for route in self.routes.values()]
+
+    def classify(self, prompt: str) -> ModelRoute:
+        """Pick a route for a prompt using cheap heuristics"""
+        words = len(prompt.split())
+        if REASONING.search(prompt) or words > 3 * self.short_prompt_words:
+            return self.large
+        if GREETING.match(prompt) or COMMAND.match(prompt) or words <= self.short_prompt_words:
+            return self.small
+        return self.large
+
+    def resolve(self, override: str) -> ModelRoute:
+        """Look up a route by route name or model name; unknown names become ad-hoc routes"""
+        if override in self.routes:
+            return self.routes[override]
+        for route in self.routes.values():
+            if route.model_name == override:
+                return route
+        return ModelRoute(override, override, first_token_timeout=None)
+
+    def choose(self, prompt: str, override: Optional[str] = None) -> List[ModelRoute]:
+        """
+        Routes to try for a request, in order
+
+        Args:
+            prompt: The user's prompt
+            override: Optional route or model name from the request payload
+
+        Returns:
+            The primary route followed by its fallback (if any)
+        """
+        primary = self.resolve(override) if override else self.classify(prompt)
+        if primary.name not in self.routes:
+            return [primary]
+        fallback = self.large if primary is self.small else self.small
+        return [primary, fallback]
+
+    def record(self, route: ModelRoute, latency: float, response: Any = None, error: bool = False, fallback: bool = False):
+        """
+        Record the outcome of a request on a route
+
+        Args:
+            route: Route that served (or failed) the request
+            latency: Seconds from dispatch to the final token (or failure)
+            response: Final Ollama response or stream chunk carrying eval stats
+            error: Whether the attempt failed
+            fallback: Whether this attempt was a fallback
+        """
+        stats = self.stats.setdefault(route.name, RouteStats())
+        stats.requests += 1
+        stats.errors += int(error)
+        stats.fallbacks += int(fallback)
+        if not error:
+            stats.latencies.append(latency)
+        if response is not None:
+            stats.eval_tokens += response.get("eval_count") or 0
+            stats.eval_seconds += (response.get("eval_duration") or 0) / 1e9
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-route request, error, latency and throughput stats"""
+        return {
+            name: {"model": self.routes[name].model_name if name in self.routes else name, **stats.metrics()}
+            for name, stats in self.stats.items()
+        }
@@ -0,0 +1,237 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+import os
+import time
+
+import httpx
+from ollama import AsyncClient
+
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+
+POOL_REQUESTS = REGISTRY.counter("lyra_ollama_requests", "HTTP requests sent to Ollama through the shared pool")
+CONNECTIONS_OPENED = REGISTRY.counter("lyra_ollama_connections_opened", "New TCP connections opened to Ollama")
+CONNECT_SECONDS = REGISTRY.histogram("lyra_ollama_connect_seconds", "Time spent opening a new connection to Ollama")
+
+log = get_logger("brain.ollama_pool")
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class _PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Keep-alive transport that counts requests, in-flight streams and new connections
+
+    The underlying connection pool is created on first use (or ``open``)
+    and dropped on ``aclose``, so the client holding this transport can be
+    reused after a shutdown: the next request simply opens a fresh pool.
+    """
+
+    def __init__(self, pool: "OllamaPool"):
+        self._owner = pool
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+    def open(self) -> httpx.AsyncHTTPTransport:
+        if self._transport is None:
+            owner = self._owner
+            self._transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=owner.max_connections,
+                    max_keepalive_connections=owner.max_keepalive,
+                    keepalive_expiry=owner.keepalive_expiry
+                ),
+                http2=owner.http2,
+                retries=1
+            )
+        return self._transport
+
+    @property
+    def connections(self) -> Optional[List[Any]]:
+        """
+        The httpcore connections currently in the pool
+
+        httpx does not expose its pool publicly, so this reads it
+        defensively: None means this httpx version keeps it elsewhere and
+        the connection counts are unknown.
+        """
+        if self._transport is None:
+            return []
+        connections = getattr(getattr(self._transport, "_pool", None), "connections", None)
+        return list(connections) if connections is not None else None
+
+    def _tracer(self):
+        """httpcore trace hook for one request, timing the connection it opens (if any)"""
+        started = [0.0]
+
+        async def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.started":
+                started[0] = time.monotonic()
+            elif event == "connection.connect_tcp.complete":
+                self._owner._connection_opened(time.monotonic() - started[0])
+        return trace
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self.open()
+        request.extensions["trace"] = self._tracer()
+        self._owner._request_started()
+        try:
+            response = await transport.handle_async_request(request)
+        except BaseException:
+            self._owner._request_finished()
+            raise
+        response.stream = _TrackedStream(response.stream, self._owner._request_finished)
+        return response
+
+    async def aclose(self):
+        transport, self._transport = self._transport, None
+        if transport is not None:
+            await transport.aclose()
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports when it is closed, so streamed replies count as in flight"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close:
+                on_close()
+
+class OllamaPool:
+    """
+    One Ollama client and keep-alive connection pool shared by the whole process
+
+    Every model lifecycle, generation and agent round goes through this
+    client, so a request reuses a warm connection instead of paying TCP
+    setup before its first token. The pool is bounded (requests beyond
+    ``max_connections`` wait up to the pool timeout for a free
+    connection), idle connections are kept for ``keepalive_expiry``
+    seconds, and HTTP/2 is used when requested and the ``h2`` package is
+    installed.
+
+    Args:
+        host: Ollama URL (default OLLAMA_HOST or localhost)
+        max_connections: Upper bound on open connections
+        max_keepalive: Idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+        connect_timeout: Seconds allowed to open a connection
+        read_timeout: Seconds allowed between chunks (None waits forever;
+            model loads can take minutes and first-token timeouts are
+            enforced by the model router)
+        pool_timeout: Seconds a request may wait for a free connection
+        http2: Multiplex requests over one HTTP/2 connection
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        max_connections: int = 8,
+        max_keepalive: int = 8,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 5.0,
+        read_timeout: Optional[float] = None,
+        pool_timeout: float = 30.0,
+        http2: bool = False
+    ):
+        if http2 and not _http2_available():
+            log.warning("ollama_http2_unavailable", reason="h2 is not installed; using HTTP/1.1 keep-alive")
+            http2 = False
+        self.max_connections = max_connections
+        self.max_keepalive = min(max_keepalive, max_connections)
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_opened = 0
+        self.connect_times = deque(maxlen=200)
+        self._transport = _PooledTransport(self)
+        self.client = AsyncClient(
+            host=host,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout),
+            transport=self._transport
+        )
+
+    @classmethod
+    def from_env(cls, host: Optional[str] = None) -> "OllamaPool":
+        """Pool sized from LYRA_OLLAMA_MAX_CONNECTIONS, LYRA_OLLAMA_KEEPALIVE, LYRA_OLLAMA_CONNECT_TIMEOUT, LYRA_OLLAMA_READ_TIMEOUT, LYRA_OLLAMA_POOL_TIMEOUT and LYRA_OLLAMA_HTTP2"""
+        max_connections = int(os.environ.get("LYRA_OLLAMA_MAX_CONNECTIONS", "8"))
+        read_timeout = os.environ.get("LYRA_OLLAMA_READ_TIMEOUT")
+        return cls(
+            host=host,
+            max_connections=max_connections,
+            max_keepalive=max_connections,
+            keepalive_expiry=float(os.environ.get("LYRA_OLLAMA_KEEPALIVE", "60")),
+            connect_timeout=float(os.environ.get("LYRA_OLLAMA_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(read_timeout) if read_timeout else None,
+            pool_timeout=float(os.environ.get("LYRA_OLLAMA_POOL_TIMEOUT", "30")),
+            http2=os.environ.get("LYRA_OLLAMA_HTTP2") == "1"
+        )
+
+    def open(self):
+        """Create the connection pool (requests also create it on demand)"""
+        self._transport.open()
+
+    async def close(self):
+        """Close every pooled connection; the client reconnects if used again"""
+        await self._transport.aclose()
+
+    def _request_started(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        POOL_REQUESTS.inc()
+
+    def _request_finished(self):
+        self.in_flight -= 1
+
+    def _connection_opened(self, seconds: float):
+        self.connections_opened += 1
+        self.connect_times.append(seconds)
+        CONNECTIONS_OPENED.inc()
+        CONNECT_SECONDS.observe(seconds)
+
+    def connection_counts(self) -> Optional[Dict[str, int]]:
+        """Open pooled connections by state: active (serving a request) or idle (None if unknown)"""
+        connections = self._transport.connections
+        if connections is None:
+            return None
+        counts = {"active": 0, "idle": 0}
+        for connection in connections:
+            if connection.is_closed():
+                continue
+            counts["idle" if connection.is_idle() else "active"] += 1
+        return counts
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool limits and utilization: connections, in-flight requests and reuse"""
+        times = sorted(self.connect_times)
+        counts = self.connection_counts()
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "connections": counts["active"] + counts["idle"] if counts else None,
+            "active_connections": counts["active"] if counts else None,
+            "idle_connections": counts["idle"] if counts else None,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": round(counts["active"] / self.max_connections, 3) if counts else None,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reused_requests": max(self.requests - self.connections_opened, 0),
+            "connect_ms_p50": round(times[len(times) // 2] * 1000, 2) if times else None,
+            "connect_ms_p95": round(times[int(len(times) * 0.95)] * 1000, 2) if times else None
+        }
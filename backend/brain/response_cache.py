@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# Splits text into word-sized pieces (keeping whitespace) for stream replay
+REPLAY_CHUNK = re.compile(r"\S+\s*|\s+")
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different spellings share a cache entry"""
+    return " ".join(prompt.split()).casefold()
+
+def is_deterministic(options: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether sampling options allow a response to be reused
+
+    Only requests with a fixed seed or an explicit zero temperature are
+    deterministic. Without options Ollama samples at its default
+    temperature (0.8), so those responses are fresh samples and are never
+    reused, like any other non-zero temperature without a seed.
+    """
+    if not options:
+        return False
+    if options.get("seed") is not None:
+        return True
+    return options.get("temperature") == 0
+
+def replay_chunks(response: str):
+    """Split a cached response into stream-sized chunks"""
+    return REPLAY_CHUNK.findall(response)
+
+class ResponseCache:
+    """LRU + TTL cache of LLM responses with an optional SQLite disk tier
+
+    The disk tier holds at most ``max_disk_entries`` responses: every
+    ``prune_interval`` writes (and when it is opened), expired rows and
+    then the oldest rows beyond the limit are deleted.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 3600,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+        prune_interval: int = 100
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.prune_interval = prune_interval
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "bypassed": 0, "disk_evictions": 0}
+        self._disk = None
+        self._disk_writes = 0
+        self.open()
+
+    def open(self):
+        """Open the disk tier, if configured and not already open (``close`` closes it)"""
+        if not self.disk_path or self._disk is not None:
+            return
+        os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+        self._disk = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None)
+        self._disk.execute("PRAGMA journal_mode = WAL")
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created_at REAL NOT NULL, response TEXT NOT NULL)"
+        )
+        self._disk.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete expired disk rows, then the oldest beyond ``max_disk_entries``
+
+        Returns:
+            Number of rows deleted
+        """
+        if self._disk is None:
+            return 0
+        expired = self._disk.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+        overflow = self._disk.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        self.stats["expirations"] += expired
+        self.stats["disk_evictions"] += overflow
+        return expired + overflow
+
+    @staticmethod
+    def make_key(model_name: str, system_prompt: Optional[str], prompt: str, options: Optional[Dict[str, Any]]) -> str:
+        """Build the cache key for a request"""
+        payload = json.dumps(
+            [model_name, system_prompt or "", normalize_prompt(prompt), options or {}],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            created_at, response = entry
+            if now - created_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return response
+            del self._entries[key]
+            self.stats["expirations"] += 1
+
+        if self._disk is not None:
+            row = self._disk.execute("SELECT created_at, response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[0] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                self.stats["disk_hits"] += 1
+                return row[1]
+            if row:
+                self._disk.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats["expirations"] += 1
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, response: str):
+        """Store a response in every tier"""
+        created_at = time.time()
+        self._remember(key, created_at, response)
+        if self._disk is not None:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO responses (key, created_at, response) VALUES (?, ?, ?)",
+                (key, created_at, response)
+            )
+            self._disk_writes += 1
+            if self._disk_writes % self.prune_interval == 0:
+                self.prune()
+
+    def _remember(self, key: str, created_at: float, response: str):
+        self._entries[key] = (created_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def record_bypass(self):
+        """Count a request that was not eligible for caching"""
+        self.stats["bypassed"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus the current size"""
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        """Drop every cached response"""
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.execute("DELETE FROM responses")
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
@@ -0,0 +1,163 @@
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import asyncio
+import heapq
+import itertools
+import time
+
+from observability.metrics import REGISTRY
+from observability.tracing import mark
+
+QUEUE_WAIT = REGISTRY.histogram("lyra_queue_wait_seconds", "Time requests waited for a generation slot", ["priority"])
+
+class Priority(IntEnum):
+    """Scheduling priority; lower values are admitted first"""
+    INTERACTIVE = 0
+    BATCH = 10
+    # Offline batch jobs: only admitted when no chat request is waiting
+    BACKGROUND = 20
+
+def _priority_label(priority: int) -> str:
+    try:
+        return Priority(priority).name.lower()
+    except ValueError:
+        return str(priority)
+
+# Called with (queue position, seconds waited); position 0 means admitted
+QueueCallback = Callable[[int, float], Awaitable[None]]
+
+class Ticket:
+    """A request waiting for (or holding) a generation slot"""
+
+    def __init__(self, priority: int, sequence: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.granted = asyncio.get_running_loop().create_future()
+        self.cancelled = False
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent queued (so far, if still waiting)"""
+        end = self.admitted_at if self.admitted_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+class RequestScheduler:
+    """Admission control in front of the model
+
+    At most ``max_in_flight`` generations run at once. The rest wait in a
+    priority queue, so interactive traffic overtakes batch work, and FIFO
+    order holds within a priority.
+    """
+
+    def __init__(self, max_in_flight: int = 1, report_interval: float = 1.0):
+        self.max_in_flight = max_in_flight
+        self.report_interval = report_interval
+        self.in_flight = 0
+        self._queue: List[Ticket] = []
+        self._sequence = itertools.count()
+        self.stats = {"admitted": 0, "completed": 0, "cancelled_while_queued": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot"""
+        return sum(1 for ticket in self._queue if not ticket.cancelled)
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based queue position of a waiting ticket (0 once admitted)"""
+        if ticket.granted.done():
+            return 0
+        return 1 + sum(1 for other in self._queue if not other.cancelled and other < ticket)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = Priority.INTERACTIVE, on_queued: Optional[QueueCallback] = None, timeout: Optional[float] = None):
+        """
+        Hold a generation slot for the duration of the block
+
+        Args:
+            priority: Scheduling priority of the request
+            on_queued: Optional callback reporting queue position and wait
+                time while queued, and once more (position 0) on admission;
+                never called when a slot is free straight away
+            timeout: Optional limit on the seconds spent queued
+
+        Yields:
+            The admitted Ticket
+
+        Raises:
+            asyncio.TimeoutError: If no slot was granted within ``timeout``
+        """
+        ticket = Ticket(priority, next(self._sequence))
+        queued = self.in_flight >= self.max_in_flight or self.queued > 0
+        if queued:
+            heapq.heappush(self._queue, ticket)
+            # Timing out cancels the wait, which leaves the queue like any cancellation
+            await asyncio.wait_for(self._wait(ticket, on_queued), timeout)
+        else:
+            self._admit(ticket)
+
+        try:
+            mark("admitted")
+            if queued and on_queued:
+                await on_queued(0, ticket.wait_time)
+            yield ticket
+        finally:
+            self.in_flight -= 1
+            self.stats["completed"] += 1
+            self._admit_next()
+
+    async def _wait(self, ticket: Ticket, on_queued: Optional[QueueCallback]):
+        """Wait for admission, reporting position changes along the way"""
+        last_position = None
+        try:
+            while not ticket.granted.done():
+                position = self.position(ticket)
+                if on_queued and position != last_position:
+                    await on_queued(position, ticket.wait_time)
+                    last_position = position
+                try:
+                    await asyncio.wait_for(asyncio.shield(ticket.granted), self.report_interval)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled (client went away) or the callback failed
+            if ticket.granted.done():
+                # Admitted just as we were cancelled; hand the slot on
+                self.in_flight -= 1
+                self._admit_next()
+            else:
+                ticket.cancelled = True
+                self.stats["cancelled_while_queued"] += 1
+            raise
+
+    def _admit(self, ticket: Ticket):
+        self.in_flight += 1
+        ticket.admitted_at = time.monotonic()
+        self.stats["admitted"] += 1
+        self.stats["total_wait"] += ticket.wait_time
+        self.stats["max_wait"] = max(self.stats["max_wait"], ticket.wait_time)
+        QUEUE_WAIT.labels(_priority_label(ticket.priority)).observe(ticket.wait_time)
+        if not ticket.granted.done():
+            ticket.granted.set_result(True)
+
+    def _admit_next(self):
+        while self._queue and self.in_flight < self.max_in_flight:
+            ticket = heapq.heappop(self._queue)
+            if not ticket.cancelled:
+                self._admit(ticket)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current load and cumulative queueing statistics"""
+        admitted = self.stats["admitted"]
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "mean_wait": self.stats["total_wait"] / admitted if admitted else 0.0
+        }
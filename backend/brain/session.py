@@ -0,0 +1,172 @@
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+import hashlib
+import json
+import time
+
+from brain.context_builder import approximate_tokens, MESSAGE_OVERHEAD_TOKENS
+from observability.metrics import REGISTRY
+
+PROMPT_EVAL_SECONDS = REGISTRY.histogram(
+    "lyra_prompt_eval_seconds",
+    "Prompt evaluation time per conversation turn",
+    ["model"]
+)
+PREFIX_TOKENS = REGISTRY.counter(
+    "lyra_prompt_prefix_tokens",
+    "Estimated prompt tokens shared with the conversation's previous request",
+    ["model"]
+)
+
+def fingerprint(message: Dict[str, Any]) -> str:
+    """Digest of a message's exact bytes as sent to Ollama"""
+    data = json.dumps(message, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def _tokens(message: Dict[str, Any]) -> int:
+    if "tools" in message:
+        return approximate_tokens(json.dumps(message["tools"]))
+    return approximate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+def _prompt(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """What the chat template renders, in order: tool schemas (if any), then the messages"""
+    return [{"tools": tools}, *messages] if tools else list(messages)
+
+def _seconds(response: Any, key: str) -> float:
+    return (response.get(key) or 0) / 1e9
+
+class ConversationSession:
+    """
+    Prompt-cache state of one conversation
+
+    Ollama keeps the evaluated prompt of a model's last request and only
+    evaluates what follows the longest shared prefix. The session
+    remembers what the conversation last sent (its messages plus the
+    reply, which the next turn's history will contain) so every turn can
+    report how much of its prompt should have been reused, next to the
+    prompt-eval tokens and time Ollama actually spent.
+    """
+
+    def __init__(self, conversation_id: str, max_turns: int = 50):
+        self.conversation_id = conversation_id
+        self.model_name: Optional[str] = None
+        self.model_switches = 0
+        self.last_used = time.monotonic()
+        self.turns: Deque[Dict[str, Any]] = deque(maxlen=max_turns)
+        # Fingerprints and token counts of the last request plus its reply
+        self._fingerprints: List[str] = []
+        self._tokens: List[int] = []
+
+    def shared_prefix(self, model_name: str, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Estimated tokens of the prompt that match the previous request to the same model"""
+        if model_name != self.model_name:
+            return 0
+        shared = 0
+        for message, previous, tokens in zip(_prompt(messages, tools), self._fingerprints, self._tokens):
+            if fingerprint(message) != previous:
+                break
+            shared += tokens
+        return shared
+
+    def record_turn(
+        self,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        reply: str,
+        response: Any,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a finished turn
+
+        Args:
+            model_name: Model that answered
+            messages: Messages sent for the turn
+            reply: The reply text
+            response: Final Ollama response (or stream chunk) with timing stats
+            tools: Tool schemas offered with the messages, if any
+
+        Returns:
+            The turn's prompt figures
+        """
+        prompt = _prompt(messages, tools)
+        turn = {
+            "model": model_name,
+            "messages": len(messages),
+            "prompt_tokens": sum(_tokens(message) for message in prompt),
+            "prefix_tokens": self.shared_prefix(model_name, messages, tools),
+            "prompt_eval_tokens": response.get("prompt_eval_count") or 0,
+            "prompt_eval_ms": round(_seconds(response, "prompt_eval_duration") * 1000, 2)
+        }
+        if self.model_name and model_name != self.model_name:
+            self.model_switches += 1
+        self.model_name = model_name
+        self.last_used = time.monotonic()
+        self.turns.append(turn)
+
+        sent = [*prompt, {"role": "assistant", "content": reply}]
+        self._fingerprints = [fingerprint(message) for message in sent]
+        self._tokens = [_tokens(message) for message in sent]
+        return turn
+
+    def report(self) -> Dict[str, Any]:
+        """Per-turn prompt sizes, shared prefix and prompt-eval cost"""
+        return {
+            "conversation_id": self.conversation_id,
+            "model": self.model_name,
+            "model_switches": self.model_switches,
+            "turns": list(self.turns)
+        }
+
+class SessionStore:
+    """Sessions of the most recently active conversations (least recently used are dropped)"""
+
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self.stats = {"turns": 0, "prompt_tokens": 0, "prefix_tokens": 0, "prompt_eval_tokens": 0, "prompt_eval_ms": 0.0}
+
+    def get(self, conversation_id: str) -> ConversationSession:
+        """The conversation's session, created on first use"""
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            session = self._sessions[conversation_id] = ConversationSession(conversation_id)
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(conversation_id)
+        return session
+
+    def find(self, conversation_id: str) -> Optional[ConversationSession]:
+        return self._sessions.get(conversation_id)
+
+    def forget(self, conversation_id: str):
+        self._sessions.pop(conversation_id, None)
+
+    def record_turn(
+        self,
+        conversation_id: str,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        reply: str,
+        response: Any,
+        tools: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Record a turn on its conversation's session and in the totals"""
+        turn = self.get(conversation_id).record_turn(model_name, messages, reply, response, tools)
+        for key in self.stats:
+            self.stats[key] += turn[key] if key != "turns" else 1
+        PROMPT_EVAL_SECONDS.labels(model_name).observe(turn["prompt_eval_ms"] / 1000)
+        PREFIX_TOKENS.labels(model_name).inc(turn["prefix_tokens"])
+        return turn
+
+    def metrics(self) -> Dict[str, Any]:
+        """Totals across conversations, with the share of prompt tokens that was a shared prefix"""
+        stats = self.stats
+        return {
+            "sessions": len(self._sessions),
+            **stats,
+            "prompt_eval_ms": round(stats["prompt_eval_ms"], 2),
+            "prefix_share": round(stats["prefix_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else None,
+            "prompt_eval_ms_per_turn": round(stats["prompt_eval_ms"] / stats["turns"], 2) if stats["turns"] else None
+        }
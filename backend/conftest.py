@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+
+# Importing api.routes builds the process-wide services; keep the test
+# run's conversations, vectors, caches and batch jobs out of backend/memory
+_memory_dir = tempfile.TemporaryDirectory(prefix="lyra-test-memory-")
+os.environ["LYRA_MEMORY_DIR"] = _memory_dir.name
+
+from brain.llm_service import LLMService
+from brain.response_cache import replay_chunks
+
+class StubOllamaClient:
+    """Stands in for ollama.AsyncClient, streaming a canned reply per chat call
+
+    `reply` is a string, formatted with the request's ``model`` and
+    ``prompt`` and streamed in replay-sized chunks, or a function of the
+    prompt returning the parts to stream. A `script` instead replays one
+    entry per call (text chunks and tool-call lists, None for a stream that
+    ends without a chunk), repeating the last once it runs out.
+
+    Args:
+        delay: Seconds slept before each streamed part
+        latency: Seconds slept before the first part
+        behaviour: Per-model 'ok', 'error', 'hang', 'slow' (a quick first
+            token, then slow generation) or 'empty' (no chunks at all)
+        failing: A prompt whose stream crashes after `latency`
+
+    Requests, streamed parts, closed streams and peak concurrency are kept
+    for inspection.
+    """
+
+    def __init__(self, reply="Answer from {model}", *, script=None, behaviour=None,
+                 delay=0.0, latency=0.0, failing=None):
+        self.reply = reply
+        self.script = script
+        self.behaviour = behaviour or {}
+        self.delay = delay
+        self.latency = latency
+        self.failing = failing
+        self.requests = []
+        # Prompts whose streams have been closed, finished or not
+        self.closed = []
+        self.sent = 0
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def models(self):
+        return [request["model"] for request in self.requests]
+
+    @property
+    def prompts(self):
+        return [request["prompt"] for request in self.requests]
+
+    def _parts(self, model, prompt):
+        if self.script is not None:
+            return self.script[min(len(self.requests), len(self.script)) - 1]
+        if callable(self.reply):
+            return list(self.reply(prompt))
+        return list(replay_chunks(self.reply.format(model=model, prompt=prompt)))
+
+    async def chat(self, model, messages, stream=False, tools=None, options=None, **kwargs):
+        prompt = messages[-1]["content"]
+        self.requests.append({
+            "model": model,
+            "prompt": prompt,
+            "messages": [dict(m) for m in messages],
+            "tools": tools,
+            "options": options
+        })
+        mode = self.behaviour.get(model, "ok")
+        parts = self._parts(model, prompt)
+
+        async def chunks():
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            try:
+                if mode == "error":
+                    raise ConnectionError(f"{model} unavailable")
+                await asyncio.sleep(10 if mode == "hang" else self.latency)
+                if prompt == self.failing:
+                    raise RuntimeError("model crashed")
+                if mode == "empty" or parts is None:
+                    return
+                final = {"done": True, "eval_count": len(parts), "eval_duration": 100_000_000}
+                if not parts:
+                    yield {"message": {"role": "assistant", "content": ""}, **final}
+                for i, part in enumerate(parts):
+                    await asyncio.sleep(0.1 if mode == "slow" and i else self.delay)
+                    self.sent += 1
+                    if isinstance(part, str):
+                        message = {"role": "assistant", "content": part}
+                    else:
+                        message = {"role": "assistant", "content": "", "tool_calls": part}
+                    # The last part carries the generation stats, as Ollama's done chunk does
+                    yield {"message": message, **(final if i == len(parts) - 1 else {"done": False})}
+            finally:
+                self.active -= 1
+                self.closed.append(prompt)
+        return chunks()
+
+def repeat(template, count):
+    """A reply of `count` parts, ``{i}`` in `template` numbering each"""
+    return lambda prompt: [template.format(i=i) for i in range(count)]
+
+def echo_prompt(prompt):
+    """A reply for a "word count" prompt: `count` copies of `word`"""
+    word, count = prompt.split()
+    return [f"{word} "] * int(count)
+
+def make_llm(client=None, model_name="test-model", **kwargs):
+    """An LLMService talking to `client`, a default StubOllamaClient if omitted"""
+    return LLMService(model_name=model_name, client=client or StubOllamaClient(), **kwargs)
@@ -7,63 +7,49 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
-from api.routes import router as api_router
+from api.routes import router as api_router, llm_service
+from api.voice import router as voice_router
+from api.metrics import router as metrics_router
+from api.conversations import router as conversations_router
+from api.batches import router as batches_router
+from brain.model_lifecycle import ModelState
 
 app = FastAPI(title="Lyra AI Agent", description="Privacy-first desktop AI companion")
 
-# Include API routes with proper prefix
+# Include API routes with proper prefix; the API router's lifespan starts the
+# shared services (Ollama pool, model preload, memory writer) and closes them
 app.include_router(api_router)
-
-# Add a direct WebSocket route for debugging
-from fastapi import WebSocket
-import json
-from brain.llm_service import LLMService
-
-llm_service = LLMService()
-
-@app.websocket("/api/v1/ws/chat")
-async def chat_websocket(websocket: WebSocket):
-    """Direct WebSocket endpoint for real-time chat"""
-    print("Direct WebSocket connection attempt")
-    await websocket.accept()
-    print("Direct WebSocket connection accepted")
-    
-    try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            print(f"Direct WebSocket received data: {data}")
-            message_data = json.loads(data)
-            
-            prompt = message_data.get("prompt", "")
-            system_prompt = message_data.get("system_prompt")
-            
-            if prompt:
-                # Stream the response back to the client
-                async for chunk in llm_service.stream_response(prompt, system_prompt):
-                    await websocket.send_text(json.dumps({"type": "chunk", "content": chunk}))
-                
-                # Send end of response signal
-                await websocket.send_text(json.dumps({"type": "end"}))
-            else:
-                await websocket.send_text(json.dumps({"type": "error", "content": "Prompt is required"}))
-    except Exception as e:
-        print(f"Direct WebSocket error: {e}")
-    finally:
-        await websocket.close()
-        print("Direct WebSocket connection closed")
+app.include_router(voice_router)
+app.include_router(metrics_router)
+app.include_router(conversations_router)
+app.include_router(batches_router)
 
 # Health check endpoint
 @app.get("/health")
-async def health_check():
-    """Basic health check endpoint"""
-    return {"status": "healthy", "service": "Lyra AI Agent"}
+async def health_check(wait: float = 10.0):
+    """
+    Health check endpoint
+    
+    Waits up to ``wait`` seconds for a running model preload, then reports
+    readiness and model timing metrics. Returns 503 unless the model is
+    loaded: while it is loading, failed to load, or is cold (not preloaded
+    yet, or unloaded after the idle timeout).
+    """
+    await llm_service.lifecycle.wait_ready(wait)
+    model = llm_service.lifecycle.metrics()
+    healthy = llm_service.lifecycle.state == ModelState.READY
+    return JSONResponse(
+        {"status": "healthy" if healthy else model["state"], "service": "Lyra AI Agent", "model": model},
+        status_code=200 if healthy else 503
+    )
 
 # Serve static files from the gui directory
 # The html=True parameter allows serving index.html and other static files
 app.mount("/", StaticFiles(directory="../gui", html=True), name="gui")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=5252)
\ No newline at end of file
+    # permessage-deflate compresses chat frames for clients that negotiate it
+    uvicorn.run(app, host="127.0.0.1", port=5252, ws_per_message_deflate=True)
\ No newline at end of file
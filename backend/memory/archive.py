@@ -0,0 +1,98 @@
+from typing import Any, Dict, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+
+# zstd from the standard library (Python 3.14+) or the zstandard package,
+# otherwise archives fall back to gzip
+try:
+    from compression import zstd as _stdlib_zstd
+except ImportError:
+    _stdlib_zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_AVAILABLE = bool(_stdlib_zstd or zstandard)
+
+def _zstd_compress(data: bytes) -> bytes:
+    if _stdlib_zstd:
+        return _stdlib_zstd.compress(data, level=9)
+    return zstandard.ZstdCompressor(level=9).compress(data)
+
+def _zstd_decompress(data: bytes) -> bytes:
+    if _stdlib_zstd:
+        return _stdlib_zstd.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+EXTENSIONS = {"zstd": ".json.zst", "gzip": ".json.gz"}
+
+def default_codec() -> str:
+    return "zstd" if ZSTD_AVAILABLE else "gzip"
+
+class ConversationArchive:
+    """
+    Compressed per-conversation segments for the cold tier
+
+    Each archived conversation is one file holding its JSON (metadata and
+    messages) compressed with zstd when available, otherwise gzip. Files
+    are named after a digest of the conversation ID and written atomically;
+    the codec is read back from the extension, so archives written with
+    either codec stay readable.
+
+    Args:
+        directory: Where the segment files live
+        codec: "zstd" or "gzip" (default: zstd if installed)
+    """
+
+    def __init__(self, directory: str, codec: Optional[str] = None):
+        self.directory = directory
+        self.codec = codec or default_codec()
+        if self.codec == "zstd" and not ZSTD_AVAILABLE:
+            raise ValueError("zstd archives need Python 3.14 or the zstandard package")
+
+    def filename(self, conversation_id: str) -> str:
+        digest = hashlib.blake2b(conversation_id.encode(), digest_size=12).hexdigest()
+        return digest + EXTENSIONS[self.codec]
+
+    def write(self, conversation: Dict[str, Any]) -> Tuple[str, int]:
+        """
+        Write a conversation's segment
+
+        Returns:
+            The file name (relative to the archive directory) and its size in bytes
+        """
+        data = json.dumps(conversation, ensure_ascii=False, separators=(",", ":")).encode()
+        if self.codec == "zstd":
+            data = _zstd_compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+        os.makedirs(self.directory, exist_ok=True)
+        name = self.filename(conversation["id"])
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        return name, len(data)
+
+    def read(self, name: str) -> Dict[str, Any]:
+        """Load a conversation from its segment"""
+        with open(os.path.join(self.directory, name), "rb") as f:
+            data = f.read()
+        if name.endswith(EXTENSIONS["zstd"]):
+            if not ZSTD_AVAILABLE:
+                raise ValueError(f"{name} is zstd-compressed; install zstandard to read it")
+            data = _zstd_decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    def delete(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
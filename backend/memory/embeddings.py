@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import hashlib
+import os
+import re
+
+import numpy as np
+from ollama import Client
+
+class Embedder(ABC):
+    """Abstract base class for text embedders"""
+
+    def __init__(self, name: str, dim: int):
+        self.name = name
+        self.dim = dim
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dim)
+        """
+        pass
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-words embedder using signed feature hashing
+
+    Needs no model, so it works offline and in tests. Unigrams and bigrams
+    are hashed with BLAKE2 rather than ``hash()`` so vectors are stable
+    across processes.
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self, dim: int = 256):
+        super().__init__(name=f"hashing-{dim}", dim=dim)
+
+    def _features(self, text: str) -> List[int]:
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [
+            int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little")
+            for gram in grams
+        ]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array(self._features(text), dtype=np.uint64)
+            if not hashes.size:
+                continue
+            columns = (hashes % np.uint64(self.dim)).astype(np.intp)
+            signs = np.where(hashes >> np.uint64(63), -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], columns, signs)
+        return vectors
+
+class OllamaEmbedder(Embedder):
+    """Embedder backed by an Ollama embedding model
+
+    Uses the blocking client: embeddings are computed by the memory
+    flusher thread and by searches that run off the event loop.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "nomic-embed-text",
+        dim: int = 768,
+        host: Optional[str] = None,
+        timeout: float = 30.0
+    ):
+        super().__init__(name=f"ollama-{model_name}", dim=dim)
+        self.model_name = model_name
+        self.client = Client(host=host, timeout=timeout)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embed(model=self.model_name, input=texts)
+        vectors = np.asarray(response["embeddings"], dtype=np.float32)
+        if vectors.shape != (len(texts), self.dim):
+            raise ValueError(f"Expected embeddings of shape {(len(texts), self.dim)}, got {vectors.shape}")
+        return vectors
+
+def embedder_from_env(host: Optional[str] = None) -> Embedder:
+    """
+    The embedder for semantic recall
+
+    ``LYRA_EMBED_MODEL`` names an Ollama embedding model (for example
+    ``nomic-embed-text``) with ``LYRA_EMBED_DIM`` dimensions (default 768).
+    Without it, the offline ``HashingEmbedder`` is used, which only
+    matches messages that share words with the query.
+
+    Args:
+        host: Ollama URL (default OLLAMA_HOST or localhost)
+    """
+    model_name = os.environ.get("LYRA_EMBED_MODEL")
+    if not model_name:
+        return HashingEmbedder()
+    return OllamaEmbedder(model_name, dim=int(os.environ.get("LYRA_EMBED_DIM", "768")), host=host)
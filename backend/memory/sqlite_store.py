@@ -0,0 +1,279 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+from memory.archive import ConversationArchive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, id);
+CREATE TABLE IF NOT EXISTS archives (
+    conversation_id TEXT PRIMARY KEY REFERENCES conversations(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    message_count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archived_messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_archived_messages_conversation ON archived_messages(conversation_id);
+"""
+
+class SQLiteStore:
+    """Append-only conversation log stored in SQLite (WAL mode)
+
+    Messages are only ever inserted, so the cost of persisting a chat turn
+    is a single row insert regardless of how much history exists.
+
+    The database is also the metadata index of the cold tier: an archived
+    conversation keeps its ``conversations`` row, its messages move to a
+    compressed segment file recorded in ``archives``, and
+    ``archived_messages`` still maps their IDs to the conversation. Segment
+    files of archives that are restored or deleted are removed once the
+    change is committed.
+    """
+
+    def __init__(self, db_path: str, compact_interval: int = 1000, archive: Optional[ConversationArchive] = None):
+        self.db_path = db_path
+        self.archive = archive
+        self.compact_interval = compact_interval
+        self._mutations = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect before the first table is created
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def load_index(self) -> List[Dict]:
+        """Metadata of every conversation in creation order, without reading any message text"""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT conversation_id, COUNT(*) FROM messages GROUP BY conversation_id"
+            ))
+            return [
+                {
+                    "id": conv_id,
+                    "created_at": created_at,
+                    "updated_at": updated_at,
+                    "message_count": archived_count if path else counts.get(conv_id, 0),
+                    "archive": path,
+                    "archive_bytes": size or 0
+                }
+                for conv_id, created_at, updated_at, path, archived_count, size in self._conn.execute(
+                    "SELECT c.id, c.created_at, c.updated_at, a.path, a.message_count, a.bytes "
+                    "FROM conversations c LEFT JOIN archives a ON a.conversation_id = c.id ORDER BY c.rowid"
+                )
+            ]
+
+    def load_messages(self, conversation_id: str) -> List[Dict]:
+        """Messages of a (hot) conversation, oldest first"""
+        with self._lock:
+            return [
+                {"id": message_id, "role": role, "content": content, "timestamp": timestamp}
+                for message_id, role, content, timestamp in self._conn.execute(
+                    "SELECT id, role, content, timestamp FROM messages WHERE conversation_id = ? ORDER BY id",
+                    (conversation_id,)
+                )
+            ]
+
+    def messages_after(self, message_id: int) -> List[Tuple[int, str]]:
+        """(id, content) of hot messages newer than ``message_id``"""
+        with self._lock:
+            return list(self._conn.execute("SELECT id, content FROM messages WHERE id > ? ORDER BY id", (message_id,)))
+
+    def conversation_of(self, message_id: int) -> Optional[str]:
+        """ID of the conversation a message belongs to, hot or archived"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT conversation_id FROM messages WHERE id = ? "
+                "UNION ALL SELECT conversation_id FROM archived_messages WHERE id = ?",
+                (message_id, message_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def max_message_id(self) -> int:
+        """Return the highest message ID in the log (0 when empty)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM messages UNION ALL SELECT MAX(id) FROM archived_messages)"
+            ).fetchone()
+        return row[0] or 0
+
+    def archive_conversation(self, conversation_id: str, path: str, message_count: int, size: int, archived_at: str):
+        """Record a written segment and drop the conversation's message rows"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO archives (conversation_id, path, message_count, bytes, archived_at) VALUES (?, ?, ?, ?, ?)",
+                    (conversation_id, path, message_count, size, archived_at)
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO archived_messages (id, conversation_id) SELECT id, conversation_id FROM messages WHERE conversation_id = ?",
+                    (conversation_id,)
+                )
+                self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.commits += 1
+            self._after_mutation()
+
+    def insert_conversation(self, conversation: Dict):
+        """Persist a new (empty) conversation"""
+        self.apply([("conversation", conversation)])
+
+    def append_message(self, conversation_id: str, message: Dict, updated_at: str):
+        """Append a message to the log and bump the conversation timestamp"""
+        self.apply([("message", conversation_id, message, updated_at)])
+
+    def delete_conversation(self, conversation_id: str):
+        """Delete a conversation and all of its messages"""
+        self.apply([("delete", conversation_id)])
+
+    def apply(self, operations: List[Tuple]):
+        """
+        Apply a batch of mutations in a single transaction (group commit)
+
+        Args:
+            operations: Tuples of ("conversation", conversation),
+                ("message", conversation_id, message, updated_at),
+                ("restore", conversation_id, messages) (bring an archived
+                conversation's messages back into the log) or
+                ("delete", conversation_id), applied in order
+        """
+        if not operations:
+            return
+
+        with self._lock:
+            removed_archives = []
+            self._conn.execute("BEGIN")
+            try:
+                for operation in operations:
+                    kind = operation[0]
+                    if kind == "conversation":
+                        conversation = operation[1]
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO conversations (id, created_at, updated_at) VALUES (?, ?, ?)",
+                            (conversation["id"], conversation["created_at"], conversation["updated_at"])
+                        )
+                    elif kind == "message":
+                        _, conversation_id, message, updated_at = operation
+                        self._conn.execute(
+                            "INSERT INTO messages (id, conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                            (message["id"], conversation_id, message["role"], message["content"], message["timestamp"])
+                        )
+                        self._conn.execute(
+                            "UPDATE conversations SET updated_at = ? WHERE id = ?",
+                            (updated_at, conversation_id)
+                        )
+                    elif kind == "restore":
+                        _, conversation_id, messages = operation
+                        removed_archives.extend(self._archive_paths(conversation_id))
+                        self._conn.executemany(
+                            "INSERT OR IGNORE INTO messages (id, conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                            ((m["id"], conversation_id, m["role"], m["content"], m["timestamp"]) for m in messages)
+                        )
+                        self._conn.execute("DELETE FROM archived_messages WHERE conversation_id = ?", (conversation_id,))
+                        self._conn.execute("DELETE FROM archives WHERE conversation_id = ?", (conversation_id,))
+                    elif kind == "delete":
+                        removed_archives.extend(self._archive_paths(operation[1]))
+                        self._conn.execute("DELETE FROM conversations WHERE id = ?", (operation[1],))
+                    else:
+                        raise ValueError(f"Unknown storage operation: {kind}")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.commits += 1
+            self._after_mutation(len(operations))
+        if self.archive:
+            for path in removed_archives:
+                self.archive.delete(path)
+
+    def _archive_paths(self, conversation_id: str) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT path FROM archives WHERE conversation_id = ?", (conversation_id,))]
+
+    def _after_mutation(self, count: int = 1):
+        """Count mutations and compact the database periodically (lock held)"""
+        self._mutations += count
+        if self.compact_interval and self._mutations >= self.compact_interval:
+            self._compact()
+
+    def compact(self):
+        """Fold the WAL back into the main file and reclaim freed pages"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        self._mutations = 0
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.execute("PRAGMA incremental_vacuum")
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        Import conversations from a legacy conversations.json file
+
+        Args:
+            json_path: Path to the JSON file written by older versions
+
+        Returns:
+            Number of conversations imported
+        """
+        try:
+            with open(json_path, 'r') as f:
+                conversations = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+        with self._lock:
+            next_id = (self._conn.execute(
+                "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM messages UNION ALL SELECT MAX(id) FROM archived_messages)"
+            ).fetchone()[0] or 0) + 1
+            self._conn.execute("BEGIN")
+            try:
+                for conversation in conversations:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO conversations (id, created_at, updated_at) VALUES (?, ?, ?)",
+                        (conversation["id"], conversation["created_at"], conversation["updated_at"])
+                    )
+                    for message in conversation.get("messages", []):
+                        self._conn.execute(
+                            "INSERT INTO messages (id, conversation_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                            (next_id, conversation["id"], message["role"], message["content"], message["timestamp"])
+                        )
+                        next_id += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        os.replace(json_path, json_path + ".migrated")
+        return len(conversations)
+
+    def close(self):
+        """Checkpoint and close the database connection"""
+        with self._lock:
+            self._compact()
+            self._conn.close()
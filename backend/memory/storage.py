@@ -1,40 +1,244 @@
-import json
+import atexit
+import bisect
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from memory.archive import ConversationArchive
+from memory.sqlite_store import SQLiteStore
+from memory.vector_index import VectorIndex
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+
+SAVE_SECONDS = REGISTRY.histogram("lyra_memory_save_seconds", "Conversation writes: one write-through or one batched flush", ["mode"])
+SAVED_MUTATIONS = REGISTRY.counter("lyra_memory_saved_mutations", "Conversation mutations committed to the store", ["mode"])
+LOAD_SECONDS = REGISTRY.histogram("lyra_memory_load_seconds", "Loading a conversation that was not resident, from the log (hot) or its archive segment (cold)", ["tier"])
+ARCHIVED_CONVERSATIONS = REGISTRY.counter("lyra_memory_archived_conversations", "Idle conversations moved to compressed archive segments")
+
+# Rough per-message overhead of a hydrated conversation beyond its text
+MESSAGE_OVERHEAD_BYTES = 200
+
+log = get_logger("memory.storage")
+
+def _resident_size(conversation: Dict) -> int:
+    """Approximate memory held by a loaded conversation"""
+    return sum(len(message["content"]) + MESSAGE_OVERHEAD_BYTES for message in conversation["messages"])
+
+def _imported_timestamp(record: Dict, field: str, default: str) -> str:
+    """A timestamp field of an import record, normalised; ``default`` when it is missing"""
+    value = record.get(field)
+    if value is None or value == "":
+        return default
+    try:
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    raise ValueError(f"{field} must be an ISO-8601 timestamp, not {value!r}")
+
 class MemoryManager:
-    """Manages conversation history and user preferences in JSON format"""
+    """Manages conversation history and user preferences
+
+    Conversations are persisted in an append-only SQLite log. Startup only
+    reads a metadata index (IDs, timestamps, message counts); a
+    conversation's messages are loaded the first time it is used and then
+    stay resident. With ``write_behind`` enabled, mutations only touch
+    memory and a background flusher group-commits them every
+    ``flush_interval`` seconds or once ``flush_threshold`` mutations are
+    pending. An optional ``VectorIndex`` is fed every new message for
+    semantic recall across conversations.
+
+    Conversations idle for longer than ``archive_after`` seconds are moved
+    by the flusher (or ``archive_idle``) to compressed per-conversation
+    segments next to the database, and their messages leave both memory
+    and the log. Reading an archived conversation hydrates it into an LRU
+    bounded by ``max_hydrated_bytes``; writing to one moves it back to the
+    log.
+    """
     
-    def __init__(self, storage_path: str = "../memory/conversations.json"):
+    def __init__(
+        self,
+        storage_path: str = "../memory/conversations.json",
+        compact_interval: int = 1000,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        flush_threshold: int = 64,
+        vector_index: Optional[VectorIndex] = None,
+        archive_after: Optional[float] = None,
+        archive_interval: float = 3600.0,
+        max_hydrated_bytes: int = 16 * 1024 * 1024,
+        archive_codec: Optional[str] = None
+    ):
         # Convert to absolute path if it's a relative path
         if not os.path.isabs(storage_path):
             storage_path = os.path.join(os.path.dirname(__file__), storage_path)
         
         self.storage_path = storage_path
+        self.db_path = str(Path(storage_path).with_suffix(".db"))
+        self.compact_interval = compact_interval
+        self.archive = ConversationArchive(str(Path(storage_path).with_suffix(".archive")), codec=archive_codec)
+        self.max_hydrated_bytes = max_hydrated_bytes
+        self.archive_after = archive_after
+        self.archive_interval = archive_interval
+        self.tier_counters = {"hot_loads": 0, "cold_loads": 0, "cold_hits": 0, "evictions": 0, "archive_writes": 0, "restores": 0}
+        self.vector_index = vector_index
+        
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: List[Tuple] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        # Tiers: the metadata index covers every conversation; _hot holds the
+        # loaded conversations still in the log and _hydrated the archived
+        # ones read back recently (least recently used first)
+        self._tier_lock = threading.RLock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = True
+        self.open()
+    
+    def open(self):
+        """
+        Open the store and read the metadata index
+        
+        Called by the constructor; calling it again after ``close`` reopens
+        the manager (an app whose lifespan runs more than once does this).
+        Does nothing while the manager is open.
+        """
+        if not self._closed:
+            return
         self._ensure_storage_path()
-        self.conversations = self._load_conversations()
+        self.store = SQLiteStore(self.db_path, compact_interval=self.compact_interval, archive=self.archive)
+        self._migrate_legacy_json()
+        
+        with self._tier_lock:
+            self._meta: Dict[str, Dict] = {entry["id"]: entry for entry in self.store.load_index()}
+            self._hot: Dict[str, Dict] = {}
+            self._hydrated: "OrderedDict[str, Tuple[Dict, int]]" = OrderedDict()
+            self._hydrated_bytes = 0
+            self._next_message_id = self.store.max_message_id() + 1
+            # Message ID -> conversation for resident conversations; the store
+            # answers for everything else
+            self._message_conversations: Dict[int, str] = {}
+        self._next_archive_pass = time.monotonic()
+        
+        if self.vector_index:
+            self._catch_up_vector_index()
+        
+        self._closed = False
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="memory-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+    
+    @property
+    def conversations(self) -> List[Dict]:
+        """Metadata of all conversations (messages are not loaded), in creation order"""
+        with self._tier_lock:
+            return [dict(entry) for entry in self._meta.values()]
     
     def _ensure_storage_path(self):
         """Ensure the storage path exists"""
         os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-        if not os.path.exists(self.storage_path):
-            with open(self.storage_path, 'w') as f:
-                json.dump([], f)
     
-    def _load_conversations(self) -> List[Dict]:
-        """Load conversations from storage"""
+    def _migrate_legacy_json(self):
+        """Import a conversations.json file left behind by the JSON backend"""
+        if self.storage_path != self.db_path and os.path.exists(self.storage_path):
+            migrated = self.store.migrate_json(self.storage_path)
+            log.info("migrated_legacy_json", conversations=migrated, source=self.storage_path, target=self.db_path)
+    
+    def _catch_up_vector_index(self):
+        """Embed messages written since the index was last flushed"""
+        # Archived messages were embedded before their conversation was archived
+        missing = self.store.messages_after(self.vector_index.last_id)
+        if not missing:
+            return
         try:
-            with open(self.storage_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            self.vector_index.add_many(missing)
+        except Exception as e:
+            # Still queued: the flusher (or the next search) retries them
+            log.warning("vector_catch_up_failed", pending=self.vector_index.pending, error=str(e))
     
-    def _save_conversations(self):
-        """Save conversations to storage"""
-        with open(self.storage_path, 'w') as f:
-            json.dump(self.conversations, f, indent=2)
+    def _persist(self, operation: Tuple):
+        """Write a mutation through, or queue it for the flusher in write-behind mode"""
+        if not self.write_behind:
+            started = time.perf_counter()
+            self.store.apply([operation])
+            SAVE_SECONDS.labels("write_through").observe(time.perf_counter() - started)
+            SAVED_MUTATIONS.labels("write_through").inc()
+            return
+        
+        with self._pending_lock:
+            self._pending.append(operation)
+            pending = len(self._pending)
+        if pending >= self.flush_threshold:
+            self._flush_requested.set()
+    
+    def flush(self) -> int:
+        """
+        Commit all pending mutations in a single transaction
+        
+        Returns:
+            Number of mutations written
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                operations, self._pending = self._pending, []
+            if not operations:
+                return 0
+            started = time.perf_counter()
+            try:
+                self.store.apply(operations)
+            except Exception:
+                # Keep the batch so the next flush retries it in order
+                with self._pending_lock:
+                    self._pending[:0] = operations
+                raise
+            SAVE_SECONDS.labels("flush").observe(time.perf_counter() - started)
+            SAVED_MUTATIONS.labels("flush").inc(len(operations))
+        return len(operations)
+    
+    def _flush_loop(self):
+        """Background flusher for write-behind mode"""
+        while not self._closed:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+                if self.vector_index:
+                    self.vector_index.flush()
+            except Exception as e:
+                log.error("flush_failed", error=str(e))
+            if self.archive_after is not None and time.monotonic() >= self._next_archive_pass:
+                self._next_archive_pass = time.monotonic() + self.archive_interval
+                try:
+                    self.archive_idle(self.archive_after)
+                except Exception as e:
+                    log.error("archive_failed", error=str(e))
+    
+    def close(self):
+        """Flush pending mutations and close the underlying store (``open`` reopens it)"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._flusher:
+            self._flush_requested.set()
+            self._flusher.join()
+            self._flusher = None
+            atexit.unregister(self.close)
+        self.flush()
+        self.store.close()
+        if self.vector_index:
+            try:
+                self.vector_index.close()
+            except Exception as e:
+                # The messages are stored; the index catches up on the next start
+                log.warning("vector_flush_failed", pending=self.vector_index.pending, error=str(e))
     
     def create_conversation(self, conversation_id: Optional[str] = None) -> str:
         """
@@ -49,15 +253,27 @@ class MemoryManager:
         if not conversation_id:
             conversation_id = datetime.now().isoformat()
         
-        conversation = {
-            "id": conversation_id,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "messages": []
-        }
-        
-        self.conversations.append(conversation)
-        self._save_conversations()
+        with self._tier_lock:
+            if conversation_id in self._meta:
+                return conversation_id
+            
+            conversation = {
+                "id": conversation_id,
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+                "messages": []
+            }
+            
+            self._meta[conversation_id] = {
+                "id": conversation_id,
+                "created_at": conversation["created_at"],
+                "updated_at": conversation["updated_at"],
+                "message_count": 0,
+                "archive": None,
+                "archive_bytes": 0
+            }
+            self._hot[conversation_id] = conversation
+            self._persist(("conversation", conversation))
         return conversation_id
     
     def add_message(self, conversation_id: str, role: str, content: str):
@@ -69,25 +285,44 @@ class MemoryManager:
             role: Role of the message sender (user, assistant, system)
             content: Content of the message
         """
-        conversation = self._get_conversation(conversation_id)
-        if not conversation:
-            # Create conversation if it doesn't exist
-            self.create_conversation(conversation_id)
-            conversation = self._get_conversation(conversation_id)
-            
-            # Ensure conversation is not None after creation
+        with self._tier_lock:
+            conversation = self._writable_conversation(conversation_id)
             if not conversation:
-                raise RuntimeError(f"Failed to create or retrieve conversation with ID: {conversation_id}")
-        
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        conversation["messages"].append(message)
-        conversation["updated_at"] = datetime.now().isoformat()
-        self._save_conversations()
+                # Create conversation if it doesn't exist
+                self.create_conversation(conversation_id)
+                conversation = self._writable_conversation(conversation_id)
+                
+                # Ensure conversation is not None after creation
+                if not conversation:
+                    raise RuntimeError(f"Failed to create or retrieve conversation with ID: {conversation_id}")
+            
+            message = {
+                "id": self._next_message_id,
+                "role": role,
+                "content": content,
+                "timestamp": datetime.now().isoformat()
+            }
+            self._next_message_id += 1
+            
+            conversation["messages"].append(message)
+            conversation["updated_at"] = datetime.now().isoformat()
+            entry = self._meta[conversation_id]
+            entry["updated_at"] = conversation["updated_at"]
+            entry["message_count"] += 1
+            self._message_conversations[message["id"]] = conversation_id
+            self._persist(("message", conversation_id, message, conversation["updated_at"]))
+        self._index_message(message)
+    
+    def _index_message(self, message: Dict):
+        """Queue a message for embedding; batches are embedded off the write path when possible"""
+        if not self.vector_index:
+            return
+        pending = self.vector_index.add(message["id"], message["content"])
+        if pending >= self.vector_index.batch_size:
+            if self.write_behind:
+                self._flush_requested.set()
+            else:
+                self.vector_index.flush()
     
     def get_conversation(self, conversation_id: str) -> Optional[Dict]:
         """
@@ -102,11 +337,73 @@ class MemoryManager:
         return self._get_conversation(conversation_id)
     
     def _get_conversation(self, conversation_id: str) -> Optional[Dict]:
-        """Internal method to get a conversation by ID"""
-        for conversation in self.conversations:
-            if conversation["id"] == conversation_id:
+        """Internal method to get a conversation by ID, loading it from the log or its archive if needed"""
+        with self._tier_lock:
+            entry = self._meta.get(conversation_id)
+            if not entry:
+                return None
+            conversation = self._hot.get(conversation_id)
+            if conversation is not None:
                 return conversation
-        return None
+            if entry["archive"]:
+                return self._hydrate(entry)
+            return self._load(entry)
+    
+    def _load(self, entry: Dict) -> Dict:
+        """Make a conversation that is still in the log resident (tier lock held)"""
+        started = time.perf_counter()
+        conversation = {
+            "id": entry["id"],
+            "created_at": entry["created_at"],
+            "updated_at": entry["updated_at"],
+            "messages": self.store.load_messages(entry["id"])
+        }
+        self._hot[entry["id"]] = conversation
+        for message in conversation["messages"]:
+            self._message_conversations[message["id"]] = entry["id"]
+        self.tier_counters["hot_loads"] += 1
+        LOAD_SECONDS.labels("hot").observe(time.perf_counter() - started)
+        return conversation
+    
+    def _hydrate(self, entry: Dict) -> Dict:
+        """Read an archived conversation through the hydrated LRU (tier lock held)"""
+        cached = self._hydrated.get(entry["id"])
+        if cached:
+            self._hydrated.move_to_end(entry["id"])
+            self.tier_counters["cold_hits"] += 1
+            return cached[0]
+        
+        started = time.perf_counter()
+        conversation = self.archive.read(entry["archive"])
+        size = _resident_size(conversation)
+        self._hydrated[entry["id"]] = (conversation, size)
+        self._hydrated_bytes += size
+        # Always keep the conversation just read, even if it alone exceeds the bound
+        while self._hydrated_bytes > self.max_hydrated_bytes and len(self._hydrated) > 1:
+            _, (_, evicted) = self._hydrated.popitem(last=False)
+            self._hydrated_bytes -= evicted
+            self.tier_counters["evictions"] += 1
+        self.tier_counters["cold_loads"] += 1
+        LOAD_SECONDS.labels("cold").observe(time.perf_counter() - started)
+        return conversation
+    
+    def _writable_conversation(self, conversation_id: str) -> Optional[Dict]:
+        """Get a conversation for appending, moving it back to the log if it was archived (tier lock held)"""
+        conversation = self._get_conversation(conversation_id)
+        entry = self._meta.get(conversation_id)
+        if conversation is None or not entry["archive"]:
+            return conversation
+        
+        _, size = self._hydrated.pop(conversation_id)
+        self._hydrated_bytes -= size
+        self._hot[conversation_id] = conversation
+        for message in conversation["messages"]:
+            self._message_conversations[message["id"]] = conversation_id
+        entry["archive"] = None
+        entry["archive_bytes"] = 0
+        self._persist(("restore", conversation_id, list(conversation["messages"])))
+        self.tier_counters["restores"] += 1
+        return conversation
     
     def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
         """
@@ -128,6 +425,258 @@ class MemoryManager:
             messages = messages[-limit:]
         return messages
     
+    def get_conversation_info(self, conversation_id: str) -> Optional[Dict]:
+        """
+        Get a conversation's metadata without loading its messages
+        
+        Returns:
+            ``id``, ``created_at``, ``updated_at``, ``message_count`` and
+            ``archive`` (segment name, or None while in the log), or None
+            if not found
+        """
+        with self._tier_lock:
+            entry = self._meta.get(conversation_id)
+            return dict(entry) if entry else None
+    
+    def iter_conversations(self, before: Optional[Tuple[str, str]] = None) -> Iterator[Dict]:
+        """
+        Iterate over conversation metadata, most recently updated first
+        
+        Args:
+            before: Cursor ``(updated_at, id)`` of the last conversation
+                already seen; iteration resumes right after it
+        
+        Yields:
+            Conversation metadata (see ``get_conversation_info``)
+        """
+        with self._tier_lock:
+            keys = sorted((entry["updated_at"], entry["id"]) for entry in self._meta.values())
+        end = bisect.bisect_left(keys, tuple(before)) if before else len(keys)
+        for position in range(end - 1, -1, -1):
+            info = self.get_conversation_info(keys[position][1])
+            if info:
+                yield info
+
+    def iter_messages(
+        self,
+        conversation_id: str,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        reverse: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Iterate over a conversation's messages between two message IDs
+
+        Args:
+            conversation_id: ID of the conversation
+            after_id: Only messages with a greater ID
+            before_id: Only messages with a smaller ID
+            reverse: Newest first instead of oldest first
+
+        Yields:
+            Messages (an archived conversation is hydrated first)
+        """
+        conversation = self._get_conversation(conversation_id)
+        if not conversation:
+            return
+        messages = conversation["messages"]
+        key = lambda message: message["id"]
+        start = bisect.bisect_right(messages, after_id, key=key) if after_id is not None else 0
+        end = bisect.bisect_left(messages, before_id, key=key) if before_id is not None else len(messages)
+        positions = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        for position in positions:
+            yield dict(messages[position])
+
+    def export_conversations(self) -> Iterator[Dict]:
+        """
+        Iterate over every conversation as export records, oldest first
+
+        One conversation's messages are read at a time, and reading them
+        for the export does not make the conversation resident.
+
+        Yields:
+            A ``{"type": "conversation", ...}`` record per conversation,
+            followed by a ``{"type": "message", ...}`` record per message
+        """
+        with self._tier_lock:
+            conversation_ids = list(self._meta)
+        for conversation_id in conversation_ids:
+            with self._tier_lock:
+                entry = self._meta.get(conversation_id)
+                if not entry:
+                    continue
+                info = dict(entry)
+                conversation = self._hot.get(conversation_id) or (self._hydrated.get(conversation_id) or (None,))[0]
+                messages = list(conversation["messages"]) if conversation else None
+            if messages is None:
+                messages = self.archive.read(info["archive"])["messages"] if info["archive"] else self.store.load_messages(conversation_id)
+            yield {
+                "type": "conversation",
+                "id": conversation_id,
+                "created_at": info["created_at"],
+                "updated_at": info["updated_at"],
+                "message_count": len(messages)
+            }
+            for message in messages:
+                yield {"type": "message", "conversation_id": conversation_id, **message}
+
+    def import_conversations(self, records: Iterable[Dict], skipped: Optional[Set[str]] = None, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Import export records, committing them in batches as they are read
+
+        A conversation record for a conversation that already exists is
+        skipped together with its message records. Imported messages get
+        new IDs; their role, content and timestamp are kept. Imported
+        conversations are written straight to the log and only loaded
+        when used.
+
+        Args:
+            records: Conversation and message records (see ``export_conversations``);
+                a message must follow its conversation
+            skipped: IDs of existing conversations seen so far, to carry
+                the state across calls when one import arrives in chunks
+            batch_size: Records per transaction
+
+        Returns:
+            Counts of ``conversations`` and ``messages`` imported and
+            ``skipped`` records
+
+        Raises:
+            ValueError: For a malformed record; earlier batches stay committed
+        """
+        skipped = set() if skipped is None else skipped
+        counts = {"conversations": 0, "messages": 0, "skipped": 0}
+        batch: List[Dict] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._import_batch(batch, skipped, counts)
+                batch = []
+        self._import_batch(batch, skipped, counts)
+        return counts
+
+    def _import_batch(self, records: List[Dict], skipped: Set[str], counts: Dict[str, int]):
+        """Apply one batch of import records in a single transaction (records before a malformed one are kept)"""
+        operations = []
+        messages = []
+        with self._tier_lock:
+            # Pending writes go first so the log sees every change in order
+            self.flush()
+            try:
+                for record in records:
+                    kind = record.get("type")
+                    if kind == "conversation":
+                        conversation_id = record.get("id")
+                        if not isinstance(conversation_id, str) or not conversation_id:
+                            raise ValueError("Conversation record without an id")
+                        if conversation_id in self._meta or conversation_id in skipped:
+                            skipped.add(conversation_id)
+                            counts["skipped"] += 1
+                            continue
+                        created_at = _imported_timestamp(record, "created_at", datetime.now().isoformat())
+                        conversation = {
+                            "id": conversation_id,
+                            "created_at": created_at,
+                            "updated_at": _imported_timestamp(record, "updated_at", created_at)
+                        }
+                        self._meta[conversation_id] = {**conversation, "message_count": 0, "archive": None, "archive_bytes": 0}
+                        operations.append(("conversation", conversation))
+                        counts["conversations"] += 1
+                    elif kind == "message":
+                        conversation_id = record.get("conversation_id")
+                        if conversation_id in skipped:
+                            counts["skipped"] += 1
+                            continue
+                        entry = self._meta.get(conversation_id)
+                        if not entry:
+                            raise ValueError(f"Message record for {conversation_id!r} comes before its conversation record")
+                        if not isinstance(record.get("role"), str) or not isinstance(record.get("content"), str):
+                            raise ValueError("Message record needs a role and content")
+                        message = {
+                            "id": self._next_message_id,
+                            "role": record["role"],
+                            "content": record["content"],
+                            "timestamp": _imported_timestamp(record, "timestamp", datetime.now().isoformat())
+                        }
+                        self._next_message_id += 1
+                        entry["message_count"] += 1
+                        entry["updated_at"] = max(entry["updated_at"], message["timestamp"])
+                        # Conversations that were loaded (or archived) meanwhile get the message in memory too
+                        if entry["archive"] or conversation_id in self._hot:
+                            resident = self._writable_conversation(conversation_id)
+                            resident["messages"].append(message)
+                            resident["updated_at"] = entry["updated_at"]
+                            self._message_conversations[message["id"]] = conversation_id
+                            self.flush()
+                        operations.append(("message", conversation_id, message, entry["updated_at"]))
+                        messages.append(message)
+                        counts["messages"] += 1
+                    else:
+                        raise ValueError(f"Unknown record type: {kind!r}")
+            finally:
+                if operations:
+                    # Imported conversations are not resident, so their
+                    # records are written through even in write-behind mode
+                    started = time.perf_counter()
+                    self.store.apply(operations)
+                    SAVE_SECONDS.labels("import").observe(time.perf_counter() - started)
+                    SAVED_MUTATIONS.labels("import").inc(len(operations))
+        for message in messages:
+            self._index_message(message)
+    
+    def search_messages(self, query: str, k: int = 5, conversation_id: Optional[str] = None) -> List[Dict]:
+        """
+        Find the messages most relevant to a query across all conversations
+        
+        Args:
+            query: Text to search for
+            k: Maximum number of results
+            conversation_id: Optional conversation to restrict the search to
+            
+        Returns:
+            Messages (with ``conversation_id`` and ``score`` added), best first
+        
+        Blocks on the vector search; call it off the event loop.
+        """
+        if not self.vector_index:
+            return []
+        
+        allowed_ids = None
+        if conversation_id:
+            conversation = self._get_conversation(conversation_id)
+            if not conversation:
+                return []
+            allowed_ids = [message["id"] for message in conversation["messages"]]
+        
+        # In write-behind mode only the flusher embeds; messages it has not
+        # reached yet are still in the recent window
+        hits = self.vector_index.search(query, k, allowed_ids=allowed_ids, flush=not self.write_behind)
+        results = []
+        # Deleted conversations' vectors are removed from the index; a search
+        # racing a delete may still see them, so unknown IDs are skipped
+        for message_id, score in hits:
+            located = self._get_message(message_id)
+            if located:
+                owner, message = located
+                results.append({**message, "conversation_id": owner, "score": score})
+            if len(results) == k:
+                break
+        return results
+    
+    def _get_message(self, message_id: int) -> Optional[Tuple[str, Dict]]:
+        """Internal method to get a message and the ID of its conversation"""
+        with self._tier_lock:
+            conversation_id = self._message_conversations.get(message_id) or self.store.conversation_of(message_id)
+            conversation = self._get_conversation(conversation_id or "")
+        if not conversation:
+            return None
+        messages = conversation["messages"]
+        # Message IDs are assigned in increasing order within a conversation
+        position = bisect.bisect_left(messages, message_id, key=lambda message: message["id"])
+        if position < len(messages) and messages[position]["id"] == message_id:
+            return conversation_id, messages[position]
+        return None
+    
     def delete_conversation(self, conversation_id: str) -> bool:
         """
         Delete a conversation
@@ -138,13 +687,101 @@ class MemoryManager:
         Returns:
             True if deleted, False if not found
         """
-        conversation = self._get_conversation(conversation_id)
-        if not conversation:
-            return False
-        
-        self.conversations.remove(conversation)
-        self._save_conversations()
+        with self._tier_lock:
+            # Loaded first (from its archive if need be) to find the vectors to drop
+            conversation = self._get_conversation(conversation_id) if self.vector_index else None
+            if not self._meta.pop(conversation_id, None):
+                return False
+            
+            conversation = self._hot.pop(conversation_id, None) or conversation
+            if conversation:
+                for message in conversation["messages"]:
+                    self._message_conversations.pop(message["id"], None)
+            hydrated = self._hydrated.pop(conversation_id, None)
+            if hydrated:
+                self._hydrated_bytes -= hydrated[1]
+            # The store removes the archive segment, if any, once the delete is committed
+            self._persist(("delete", conversation_id))
+        if conversation and self.vector_index:
+            self.vector_index.remove(message["id"] for message in conversation["messages"])
         return True
+    
+    def archive_idle(self, max_idle: float) -> int:
+        """
+        Move conversations idle for longer than ``max_idle`` seconds to archive segments
+        
+        Each conversation is written to its compressed segment before its
+        messages are dropped from the log, and is skipped if it was written
+        to in the meantime.
+        
+        Args:
+            max_idle: Seconds since a conversation's last message
+            
+        Returns:
+            Number of conversations archived
+        """
+        cutoff = datetime.now() - timedelta(seconds=max_idle)
+        
+        def idle(entry: Optional[Dict]) -> bool:
+            return bool(entry and not entry["archive"] and entry["message_count"]
+                        and datetime.fromisoformat(entry["updated_at"]) <= cutoff)
+        
+        with self._tier_lock:
+            candidates = [entry["id"] for entry in self._meta.values() if idle(entry)]
+        if not candidates:
+            return 0
+        if self.vector_index:
+            # Archived messages are never read back for embedding
+            self.vector_index.flush()
+        
+        archived = 0
+        started = time.perf_counter()
+        for conversation_id in candidates:
+            with self._tier_lock:
+                entry = self._meta.get(conversation_id)
+                if not idle(entry):
+                    continue
+                # The segment and the log must agree, so pending writes go first
+                self.flush()
+                conversation = self._hot.get(conversation_id)
+                messages = conversation["messages"] if conversation else self.store.load_messages(conversation_id)
+                name, size = self.archive.write({
+                    "id": conversation_id,
+                    "created_at": entry["created_at"],
+                    "updated_at": entry["updated_at"],
+                    "messages": messages
+                })
+                self.store.archive_conversation(conversation_id, name, len(messages), size, datetime.now().isoformat())
+                entry["archive"] = name
+                entry["archive_bytes"] = size
+                if conversation:
+                    del self._hot[conversation_id]
+                    for message in messages:
+                        self._message_conversations.pop(message["id"], None)
+                archived += 1
+        
+        self.tier_counters["archive_writes"] += archived
+        ARCHIVED_CONVERSATIONS.inc(archived)
+        log.info("archived_idle_conversations", count=archived, seconds=round(time.perf_counter() - started, 3))
+        return archived
+    
+    def tier_stats(self) -> Dict[str, Any]:
+        """Conversations per tier, hydrated LRU usage and load counters"""
+        with self._tier_lock:
+            archived = [entry for entry in self._meta.values() if entry["archive"]]
+            return {
+                "conversations": len(self._meta),
+                "archived": len(archived),
+                "resident": len(self._hot),
+                "resident_messages": len(self._message_conversations),
+                "hydrated": len(self._hydrated),
+                "hydrated_bytes": self._hydrated_bytes,
+                "max_hydrated_bytes": self.max_hydrated_bytes,
+                "archive_bytes": sum(entry["archive_bytes"] for entry in archived),
+                "archive_codec": self.archive.codec,
+                "archive_after_seconds": self.archive_after,
+                **self.tier_counters
+            }
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from typing import List, Tuple, Optional, Iterable
+
+import numpy as np
+
+from memory.embeddings import Embedder
+
+class VectorIndex:
+    """Semantic recall index over message embeddings
+
+    Unit-normalised vectors live in a memory-mapped float32 matrix
+    (``vectors.f32``) with a parallel int64 array of message IDs
+    (``ids.i64``), so cosine similarity is a single matrix-vector product
+    and the index never has to fit in RAM. Messages are buffered and
+    embedded in batches. Removed messages keep their row with the ID
+    negated (a tombstone), so IDs stay in order and searches skip them.
+    """
+
+    def __init__(self, directory: str, embedder: Embedder, batch_size: int = 32, initial_capacity: int = 1024):
+        self.directory = directory
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Tuple[int, str]] = []
+
+        os.makedirs(directory, exist_ok=True)
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._ids_path = os.path.join(directory, "ids.i64")
+
+        self.count = 0
+        self.capacity = initial_capacity
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta["embedder"] != embedder.name or meta["dim"] != self.dim:
+                raise ValueError(
+                    f"Index at {directory} was built with {meta['embedder']} ({meta['dim']} dims), "
+                    f"not {embedder.name} ({self.dim} dims)"
+                )
+            self.count = meta["count"]
+            self.capacity = max(meta["capacity"], 1)
+        self._open(create=not os.path.exists(self._meta_path))
+
+    def _open(self, create: bool):
+        """Map the vector and ID files, sizing them to the current capacity"""
+        for path, itemsize in ((self._vectors_path, 4 * self.dim), (self._ids_path, 8)):
+            with open(path, 'wb' if create else 'r+b') as f:
+                f.truncate(self.capacity * itemsize)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(self.capacity, self.dim))
+        self._ids = np.memmap(self._ids_path, dtype=np.int64, mode='r+', shape=(self.capacity,))
+
+    def _ensure_capacity(self, needed: int):
+        """Grow the mapped files geometrically (lock held)"""
+        if needed <= self.capacity:
+            return
+        self._vectors.flush()
+        self._ids.flush()
+        del self._vectors, self._ids
+        while self.capacity < needed:
+            self.capacity *= 2
+        self._open(create=False)
+
+    def _write_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"embedder": self.embedder.name, "dim": self.dim, "count": self.count, "capacity": self.capacity}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    @property
+    def last_id(self) -> int:
+        """Highest message ID that has been embedded (0 when empty)"""
+        return abs(int(self._ids[self.count - 1])) if self.count else 0
+
+    @property
+    def pending(self) -> int:
+        """Number of messages waiting to be embedded"""
+        return len(self._pending)
+
+    def add(self, message_id: int, text: str) -> int:
+        """
+        Queue a message for embedding
+
+        Args:
+            message_id: ID of the message
+            text: Message content
+
+        Returns:
+            Number of messages now waiting to be embedded
+        """
+        with self._lock:
+            self._pending.append((message_id, text))
+            return len(self._pending)
+
+    def add_many(self, items: Iterable[Tuple[int, str]]):
+        """Queue and embed many messages, batch by batch (if embedding fails, the rest stay queued)"""
+        items = iter(items)
+        for message_id, text in items:
+            if self.add(message_id, text) >= self.batch_size:
+                try:
+                    self.flush()
+                except Exception:
+                    for item in items:
+                        self.add(*item)
+                    raise
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Embed all queued messages and append them to the index
+
+        Returns:
+            Number of messages embedded
+        """
+        # Serialised so batches are appended in message ID order
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                try:
+                    vectors = self.embedder.embed([text for _, text in batch])
+                except Exception:
+                    # Requeue what is left so the next flush retries it
+                    with self._lock:
+                        self._pending[:0] = pending[start:]
+                    raise
+                self.append_vectors(np.array([message_id for message_id, _ in batch], dtype=np.int64), vectors)
+        return len(pending)
+
+    def append_vectors(self, ids: np.ndarray, vectors: np.ndarray):
+        """Normalise and append precomputed vectors for the given message IDs"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        with self._lock:
+            end = self.count + len(ids)
+            self._ensure_capacity(end)
+            self._vectors[self.count:end] = vectors
+            self._ids[self.count:end] = ids
+            self.count = end
+            self._vectors.flush()
+            self._ids.flush()
+            self._write_meta()
+
+    def remove(self, message_ids: Iterable[int]) -> int:
+        """
+        Drop messages from search results, including any still queued
+
+        Args:
+            message_ids: IDs of the messages to remove
+
+        Returns:
+            Number of embedded vectors tombstoned
+        """
+        removed = np.fromiter(message_ids, dtype=np.int64)
+        if not len(removed):
+            return 0
+        # Serialised with flush so a batch being embedded cannot slip past
+        with self._flush_lock, self._lock:
+            dropped = set(removed.tolist())
+            self._pending = [item for item in self._pending if item[0] not in dropped]
+            ids = self._ids[:self.count]
+            hits = np.isin(ids, removed)
+            ids[hits] = -ids[hits]
+            self._ids.flush()
+        return int(hits.sum())
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        allowed_ids: Optional[np.ndarray] = None,
+        flush: bool = True
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the messages most similar to a query
+
+        Args:
+            query: Query text
+            k: Number of results to return
+            allowed_ids: Optional array of message IDs to restrict the search to
+            flush: Embed queued messages first; pass False when a background
+                flusher embeds them, so queued messages are not searched yet
+
+        Returns:
+            List of (message_id, cosine similarity) pairs, best first
+        """
+        if flush:
+            self.flush()
+        query_vector = self.embedder.embed([query])[0]
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+        with self._lock:
+            count = self.count
+            ids = self._ids[:count]
+            scores = self._vectors[:count] @ query_vector
+            live = ids > 0
+            if allowed_ids is not None:
+                live &= np.isin(ids, allowed_ids)
+            scores = np.where(live, scores, -np.inf)
+
+        k = min(k, count)
+        if k <= 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def close(self):
+        """Embed anything still queued and release the mapped files (even if embedding fails)"""
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._vectors.flush()
+                self._ids.flush()
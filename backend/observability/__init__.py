@@ -0,0 +1 @@
+# Package initialization for the observability module
\ No newline at end of file
@@ -0,0 +1,126 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event and the event's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.msg,
+            **getattr(record, "fields", {})
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """``HH:MM:SS level logger event key=value ...`` for reading in a terminal"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname.lower():7} {record.name} {record.msg} {fields}".rstrip()
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records as they are; formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def configure(level: Optional[str] = None, fmt: Optional[str] = None, stream=None):
+    """
+    Route the ``lyra`` loggers through a queue to a background writer thread
+
+    Logging from the event loop then only costs building a record and a
+    queue put; formatting and the blocking write happen on the listener
+    thread. Called automatically on first use.
+
+    Args:
+        level: Minimum level (LYRA_LOG_LEVEL, default INFO)
+        fmt: "json" or "text" (LYRA_LOG_FORMAT, default text)
+        stream: Where to write (default stderr)
+    """
+    global _listener
+    with _configure_lock:
+        if _listener:
+            _listener.stop()
+        level = (level or os.environ.get("LYRA_LOG_LEVEL") or "INFO").upper()
+        fmt = fmt or os.environ.get("LYRA_LOG_FORMAT") or "text"
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        root = logging.getLogger("lyra")
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_DeferredQueueHandler(records))
+        root.setLevel(level)
+        root.propagate = False
+        _listener = QueueListener(records, output)
+        _listener.start()
+
+def shutdown():
+    """Write out everything still queued and stop the writer thread"""
+    global _listener
+    with _configure_lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+
+atexit.register(shutdown)
+
+class StructuredLogger:
+    """Logs an event name plus keyword fields, e.g. ``log.info("ws_connected", client="1.2.3.4")``"""
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"lyra.{name}")
+
+    def _log(self, level: int, event: str, exc_info: Any = None, **fields: Any):
+        if _listener is None:
+            configure()
+        if self._logger.isEnabledFor(level):
+            # Built directly: Logger.log would also walk the stack to find the caller
+            if exc_info is True:
+                exc_info = sys.exc_info()
+            record = logging.LogRecord(self._logger.name, level, "", 0, event, None, exc_info)
+            record.fields = fields
+            self._logger.handle(record)
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def debug(self, event: str, **fields: Any):
+        self._log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any):
+        self._log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any):
+        self._log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any):
+        self._log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields: Any):
+        """Log at error level with the current exception's traceback"""
+        self._log(logging.ERROR, event, exc_info=True, **fields)
+
+def get_logger(name: str) -> StructuredLogger:
+    """Structured logger under the ``lyra`` hierarchy"""
+    return StructuredLogger(name)
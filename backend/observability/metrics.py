@@ -0,0 +1,223 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import math
+import threading
+
+# Latency buckets in seconds, from sub-millisecond bookkeeping to slow generations
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300)
+
+Labels = Tuple[str, ...]
+# (sample name suffix, labels, value) as yielded by metrics and collectors
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class CounterChild:
+    """One labelled series of a counter"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class GaugeChild:
+    """One labelled series of a gauge"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+class HistogramChild:
+    """One labelled series of a histogram; bucket counts are kept non-cumulative"""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Metric:
+    """A named metric family with a fixed set of label names
+
+    ``labels(...)`` returns the series for one combination of label
+    values; hot paths should look the series up once and keep it.
+
+    Updates take no lock, to keep them in the sub-microsecond range on
+    the event loop. Each series should therefore be updated from a single
+    thread (the event loop, or one worker such as the memory flusher); a
+    scrape may see a histogram one observation out of step.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Labels = tuple(labelnames)
+        self._children: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str, **named: str):
+        """The series for these label values (positional or by name)"""
+        key = tuple(str(v) for v in values) if values else tuple(str(named[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, child in list(self._children.items()):
+            yield "_total", dict(zip(self.labelnames, key)), child.value
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+    def set(self, value: float):
+        self._children[()].set(value)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, child in list(self._children.items()):
+            yield "", dict(zip(self.labelnames, key)), child.value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._children[()].observe(value)
+
+    def samples(self) -> Iterable[Sample]:
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket in zip((*self.bounds, math.inf), counts):
+                cumulative += bucket
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+class Registry:
+    """The metric families and collectors rendered at /metrics
+
+    Collectors are callables returning (name, kind, help, samples) tuples
+    for figures that are already tracked elsewhere and only need to be
+    read at scrape time.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in list(self.metrics.values())]
+        for collector in list(self.collectors):
+            families.extend(collector())
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def value(self, name: str, **labels: str) -> Optional[float]:
+        """Current value of a counter or gauge series (or a histogram's count), for tests and stats"""
+        metric = self.metrics.get(name)
+        if metric is None:
+            return None
+        key = tuple(str(labels[n]) for n in metric.labelnames)
+        child = metric._children.get(key)
+        if child is None:
+            return 0.0
+        return child.count if isinstance(child, HistogramChild) else child.value
+
+# The process-wide registry served at /metrics
+REGISTRY = Registry()
@@ -0,0 +1,101 @@
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+import itertools
+import time
+
+from observability.log import get_logger
+from observability.metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "lyra_request_stage_seconds",
+    "Time from the previous stage of a request to this one",
+    ["stage"]
+)
+
+log = get_logger("trace")
+_ids = itertools.count(1)
+_stage_series: Dict[str, Any] = {}
+_current: ContextVar[Optional["Trace"]] = ContextVar("lyra_trace", default=None)
+
+class Trace:
+    """Timeline of one request, built from named stage marks
+
+    A request is traced from when it is received. Components deeper in
+    the stack (context building, the scheduler, the model stream) call
+    ``mark`` without being handed the trace: it is found through a context
+    variable, so marks land on the request whose task is running them and
+    are no-ops outside a traced request. Only the first mark of a stage
+    counts, so retries and extra agent rounds keep the first timings.
+
+    Typical stages are context_built, admitted (left the queue),
+    first_token, last_token and persisted.
+    """
+
+    def __init__(self, name: str, **fields: Any):
+        self.name = name
+        self.trace_id = f"{next(_ids):x}"
+        self.fields = fields
+        self.started = time.monotonic()
+        self.marks: List[Tuple[str, float]] = []
+        self._seen = set()
+        self.finished = False
+
+    def mark(self, stage: str):
+        if stage not in self._seen:
+            self._seen.add(stage)
+            self.marks.append((stage, time.monotonic()))
+
+    def elapsed(self, stage: str) -> Optional[float]:
+        """Seconds from receipt to ``stage``, or None if it has not happened"""
+        for name, at in self.marks:
+            if name == stage:
+                return at - self.started
+        return None
+
+    @property
+    def spans(self) -> Dict[str, float]:
+        """Milliseconds spent reaching each stage from the one before it"""
+        spans = {}
+        previous = self.started
+        for stage, at in self.marks:
+            spans[stage] = round((at - previous) * 1000, 3)
+            previous = at
+        return spans
+
+    def finish(self, outcome: str = "ok", **fields: Any):
+        """Record the stage durations and log the trace (once)"""
+        if self.finished:
+            return
+        self.finished = True
+        previous = self.started
+        for stage, at in self.marks:
+            series = _stage_series.get(stage)
+            if series is None:
+                series = _stage_series[stage] = STAGE_SECONDS.labels(stage)
+            series.observe(at - previous)
+            previous = at
+        log.info(
+            "request_trace",
+            trace=self.name,
+            trace_id=self.trace_id,
+            outcome=outcome,
+            total_ms=round((time.monotonic() - self.started) * 1000, 3),
+            spans=self.spans,
+            **self.fields,
+            **fields
+        )
+
+def start_trace(name: str, **fields: Any) -> Trace:
+    """Begin tracing a request in the current task (and the tasks it starts)"""
+    trace = Trace(name, **fields)
+    _current.set(trace)
+    return trace
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+def mark(stage: str):
+    """Mark ``stage`` on the current request's trace, if there is one"""
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(stage)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, make_llm
+from api import routes
+from brain.agent import AgentLoop, LATENCY_REPLY
+from test_tool_executor import SleepTool, make_executor
+
+def tool_call(name, **arguments):
+    return {"function": {"name": name, "arguments": arguments}}
+
+def make_agent(script, *tools, **kwargs):
+    llm = make_llm(StubOllamaClient(script=script, delay=0.005))
+    return AgentLoop(llm, make_executor(*tools), **kwargs), llm.client
+
+async def run_agent(agent, prompt):
+    frames = []
+
+    async def on_status(frame):
+        frames.append(frame)
+
+    chunks = [chunk async for chunk in agent.run(prompt, on_status=on_status)]
+    return "".join(chunks), frames
+
+def test_tool_calls_run_in_parallel_and_feed_back():
+    async def scenario():
+        weather, clock = SleepTool(name="weather"), SleepTool(name="clock")
+        agent, client = make_agent(
+            [[[tool_call("weather", seconds=0.1), tool_call("clock", seconds=0.1)]], ["It is ", "sunny."]],
+            weather, clock
+        )
+        agent.executor.register_tool(SleepTool(name="not_permitted"))
+
+        started = time.monotonic()
+        reply, frames = await run_agent(agent, "weather and time?")
+        elapsed = time.monotonic() - started
+        assert reply == "It is sunny."
+        assert elapsed < 0.18  # both 0.1 s tools ran at once
+        assert [f["type"] for f in frames] == ["tool_call", "tool_call", "tool", "tool"]
+        assert frames[2]["result"]["status"] == "success"
+
+        offered = [tool["function"]["name"] for tool in client.requests[0]["tools"]]
+        assert offered == ["weather", "clock"]
+        followup = client.requests[1]["messages"]
+        assert followup[-3]["role"] == "assistant" and len(followup[-3]["tool_calls"]) == 2
+        assert [(m["role"], m["tool_name"]) for m in followup[-2:]] == [("tool", "weather"), ("tool", "clock")]
+        assert json.loads(followup[-1]["content"])["status"] == "success"
+
+        metrics = agent.metrics.metrics()
+        assert metrics["tool_calls"] == 2 and metrics["parallel_batches"] == 1
+
+    asyncio.run(scenario())
+
+def test_iteration_and_latency_caps():
+    async def scenario():
+        # A model that never stops asking for tools
+        agent, client = make_agent([[[tool_call("loop", seconds=0)]]], SleepTool(name="loop"), max_iterations=3)
+        reply, frames = await run_agent(agent, "go")
+        assert len(client.requests) == 3
+        assert client.requests[-1]["tools"] is None  # the last round must answer
+        assert frames[-1] == {"type": "status", "stage": "stopped", "reason": "max_iterations", "iteration": 3}
+
+        agent, _ = make_agent([[[tool_call("slow", seconds=5)]], ["never"]], SleepTool(name="slow"), latency_budget=0.1)
+        started = time.monotonic()
+        reply, frames = await run_agent(agent, "go")
+        assert time.monotonic() - started < 0.3
+        assert reply == LATENCY_REPLY
+        assert frames[-1]["reason"] == "latency_budget"
+        assert agent.metrics.stopped == {"iterations": 0, "latency": 1}
+
+    asyncio.run(scenario())
+
+def test_latency_budget_covers_queueing_and_fallback():
+    from brain.model_router import ModelRouter, ModelRoute
+    from brain.scheduler import Priority
+
+    async def scenario():
+        # Queued behind a batch prompt that holds the only slot
+        agent, client = make_agent([["never"]], SleepTool(name="t"), latency_budget=0.1)
+        async with agent.llm_service.scheduler.slot(Priority.BACKGROUND):
+            started = time.monotonic()
+            reply, frames = await run_agent(agent, "go")
+            assert time.monotonic() - started < 0.3
+        assert reply == LATENCY_REPLY and frames[-1]["reason"] == "latency_budget"
+        assert client.requests == [] and agent.llm_service.scheduler.queued == 0
+
+        # Rounds go through the router, so a failing model falls back
+        agent, client = make_agent([["Hi."]], SleepTool(name="t"))
+        agent.llm_service.router = ModelRouter(ModelRoute("small", "tiny"), ModelRoute("large", "big"))
+        chat = client.chat
+
+        async def failing_small(model, messages, **kwargs):
+            if model == "tiny":
+                raise ConnectionError("tiny unavailable")
+            return await chat(model, messages, **kwargs)
+
+        client.chat = failing_small
+        reply, _ = await run_agent(agent, "hello")
+        assert reply == "Hi." and agent.llm_service.router.metrics()["small"]["errors"] == 1
+
+    asyncio.run(scenario())
+
+def test_an_empty_round_ends_the_run_quietly():
+    async def scenario():
+        agent, client = make_agent([None])
+        reply, frames = await run_agent(agent, "hello")
+        # Not reported as an error
+        assert reply == ""
+        assert len(client.requests) == 1 and frames == []
+        assert agent.metrics.iterations[-1] == 1
+
+    asyncio.run(scenario())
+
+def test_websocket_streams_tool_frames():
+    agent, _ = make_agent([[[tool_call("weather", seconds=0.01)]], ["Sunny."]], SleepTool(name="weather"))
+    original = routes.agent
+    routes.agent = agent
+    conversation_id = f"agent-{time.time()}"
+    app = FastAPI()
+    app.include_router(routes.router)
+    try:
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                websocket.send_text(json.dumps({"prompt": "what's the weather?", "conversation_id": conversation_id}))
+                frames = []
+                while not frames or frames[-1]["type"] != "end":
+                    frames.append(websocket.receive_json())
+                types = [f["type"] for f in frames]
+                assert types == ["tool_call", "tool", "chunk", "end"]
+                assert frames[0]["tool"] == "weather" and frames[2]["content"] == "Sunny."
+
+            # The script is used up, so the model answers straight away
+            response = client.post("/api/v1/chat", json={"prompt": "and tomorrow?"}).json()
+            assert response["response"] == "Sunny." and response["tool_calls"] == []
+            assert client.get("/api/v1/agent/stats").json()["runs"] == 2
+        history = routes.memory.get_conversation_history(conversation_id)
+        assert [m["content"] for m in history] == ["what's the weather?", "Sunny."]
+    finally:
+        routes.agent = original
+
+if __name__ == "__main__":
+    test_tool_calls_run_in_parallel_and_feed_back()
+    test_iteration_and_latency_caps()
+    test_latency_budget_covers_queueing_and_fallback()
+    test_an_empty_round_ends_the_run_quietly()
+    test_websocket_streams_tool_frames()
+    print("✅ Agent loop tests passed")
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from brain.intent import IntentRouter
+from tools.app_index import AppIndex, exec_command
+from tools.executor import ToolExecutor, ApplicationLauncher
+
+def write_entry(directory, name, body):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w") as f:
+        f.write("[Desktop Entry]\nType=Application\n" + body)
+    # Coarse filesystem timestamps must not hide the change
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def make_tree(root):
+    user = os.path.join(root, "home", "applications")
+    system = os.path.join(root, "usr", "applications")
+    bin_dir = os.path.join(root, "bin")
+    write_entry(system, "org.kde.kate.desktop", "Name=Kate\nGenericName=Advanced Text Editor\nKeywords=text;editor;\nExec=kate -b %U\n")
+    write_entry(os.path.join(system, "kde4"), "dolphin.desktop", "Name=Dolphin\nGenericName=File Manager\nExec=\"/opt/dolphin bin/dolphin\" %u\n")
+    write_entry(system, "firefox.desktop", "Name=Firefox Web Browser\nKeywords=browser;internet;\nExec=firefox %u\n")
+    write_entry(system, "helper.desktop", "Name=Helper\nNoDisplay=true\nExec=helper\n")
+    write_entry(system, "spam.desktop", "Name=Spam\nExec=spam\n")
+    # The user's entry hides the system one with the same desktop ID
+    write_entry(user, "spam.desktop", "Name=Spam\nHidden=true\nExec=spam\n")
+    os.makedirs(bin_dir)
+    for name in ("vlc", "htop"):
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\nexit 0\n")
+        os.chmod(path, 0o755)
+    return user, system, bin_dir
+
+def test_index_reads_desktop_entries_and_path():
+    with tempfile.TemporaryDirectory() as root:
+        user, system, bin_dir = make_tree(root)
+        index = AppIndex(desktop_dirs=[user, system], path_dirs=[bin_dir])
+        assert index.stats["directories_scanned"] == 0  # nothing until first use
+
+        assert index.resolve("kate").command == ["kate", "-b"]
+        assert index.resolve("Kate").app_id == "org.kde.kate"
+        assert index.resolve("kde4-dolphin").command == ["/opt/dolphin bin/dolphin"]
+        assert index.resolve("firefx").app_id == "firefox"
+        assert index.resolve("vlc").command == [os.path.join(bin_dir, "vlc")]
+        assert index.search("text editor")[0][0] == "org.kde.kate"
+        assert index.search("browser")[0][0] == "firefox"
+        assert index.resolve("helper") is None and index.resolve("spam") is None
+        assert exec_command("sh -c 'echo 100%%' %F") == ["sh", "-c", "echo 100%"]
+
+def test_refresh_only_rescans_changed_directories_and_persists():
+    with tempfile.TemporaryDirectory() as root:
+        user, system, bin_dir = make_tree(root)
+        cache_path = os.path.join(root, "cache", "apps.json")
+        index = AppIndex(desktop_dirs=[user, system], path_dirs=[bin_dir], cache_path=cache_path, refresh_interval=0)
+        count = len(index)
+        scanned, parsed = index.stats["directories_scanned"], index.stats["files_parsed"]
+
+        assert not index.refresh()
+        assert index.stats["directories_scanned"] == scanned
+
+        write_entry(system, "vscode.desktop", "Name=Visual Studio Code\nExec=code %F\n")
+        assert index.resolve("visual studio code").command == ["code"]
+        assert len(index) == count + 1
+        assert index.stats["directories_scanned"] == scanned + 1
+        # Only the new file is parsed; the others are reused from the last scan
+        assert index.stats["files_parsed"] == parsed + 1
+
+        # A restart loads the saved scan and only stats the directories
+        restarted = AppIndex(desktop_dirs=[user, system], path_dirs=[bin_dir], cache_path=cache_path)
+        assert restarted.resolve("visual studio code") is not None
+        assert restarted.stats["directories_scanned"] == 0 and restarted.stats["files_parsed"] == 0
+
+def test_search_refreshes_in_the_background():
+    with tempfile.TemporaryDirectory() as root:
+        user, system, bin_dir = make_tree(root)
+        index = AppIndex(desktop_dirs=[user, system], path_dirs=[bin_dir], refresh_interval=0)
+        gate = threading.Event()
+        scan = index.refresh
+
+        def slow_refresh():
+            gate.wait(5)
+            return scan()
+
+        index.refresh = slow_refresh
+        # The caller never waits for a scan; nothing is found before the first load
+        started = time.monotonic()
+        assert index.search("kate") == []
+        assert time.monotonic() - started < 0.5
+        gate.set()
+        index._refresher.join(5)
+        assert index.search("kate")[0][0] == "org.kde.kate"
+        index._refresher.join(5)
+
+        # A change is picked up by a later background refresh
+        write_entry(system, "vscode.desktop", "Name=Visual Studio Code\nExec=code %F\n")
+        index.search("visual studio code")
+        index._refresher.join(5)
+        assert index.search("visual studio code")[0][0] == "vscode"
+
+def test_path_executables_launched_by_a_desktop_entry_are_not_separate_apps():
+    with tempfile.TemporaryDirectory() as root:
+        system = os.path.join(root, "usr", "applications")
+        bin_dir = os.path.join(root, "usr", "bin")
+        write_entry(system, "org.kde.kate.desktop", "Name=Kate\nExec=kate\n")
+        write_entry(system, "vlc.desktop", f"Name=VLC media player\nExec={os.path.join(bin_dir, 'vlc')} %U\n")
+        os.makedirs(bin_dir)
+        for name in ("kate", "vlc", "htop"):
+            path = os.path.join(bin_dir, name)
+            with open(path, "w") as f:
+                f.write("#!/bin/sh\nexit 0\n")
+            os.chmod(path, 0o755)
+
+        index = AppIndex(desktop_dirs=[system], path_dirs=[bin_dir])
+        assert len(index) == 3 and sorted(index.apps) == ["htop", "org.kde.kate", "vlc"]
+        assert index.search("kate") == [("org.kde.kate", 1.0)]
+        assert index.apps["vlc"].source.endswith("vlc.desktop")
+
+        # The intent fast path finds one confident match
+        executor = ToolExecutor()
+        executor.register_tool(ApplicationLauncher(index))
+        executor.grant_permission("app_launcher")
+        intent = IntentRouter(executor, index).match("open kate")
+        assert intent is not None and intent.parameters == {"app_name": "org.kde.kate"}
+
+def test_launcher_resolves_names_and_reaps_children():
+    async def scenario():
+        with tempfile.TemporaryDirectory() as root:
+            user, system, bin_dir = make_tree(root)
+            launcher = ApplicationLauncher(AppIndex(desktop_dirs=[user, system], path_dirs=[bin_dir]))
+            executor = ToolExecutor()
+            executor.register_tool(launcher)
+            executor.grant_permission("app_launcher")
+
+            result = await executor.execute_tool("app_launcher", {"app_name": "VLC"})
+            assert result["status"] == "success" and result["app_id"] == "vlc"
+            await asyncio.gather(*launcher._reapers)
+            # Already reaped: there is no zombie left to wait for
+            try:
+                os.waitpid(result["pid"], os.WNOHANG)
+                assert False, "child was not reaped"
+            except ChildProcessError:
+                pass
+
+            result = await executor.execute_tool("app_launcher", {"app_name": "photoshop"})
+            assert result["status"] == "error"
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_index_reads_desktop_entries_and_path()
+    test_refresh_only_rescans_changed_directories_and_persists()
+    test_search_refreshes_in_the_background()
+    test_path_executables_launched_by_a_desktop_entry_are_not_separate_apps()
+    test_launcher_resolves_names_and_reaps_children()
+    print("✅ Application index tests passed")
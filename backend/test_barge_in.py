@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, repeat
+from api import routes, voice
+from voice.recognizer import StubRecognizer
+from voice.tts import TTSService
+from test_voice_pipeline import tone, silence, blocks
+
+def make_app():
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.include_router(voice.router)
+    return app
+
+def history(conversation_id):
+    return [(m["role"], m["content"]) for m in routes.memory.get_conversation_history(conversation_id)]
+
+def test_chat_interrupt_stores_only_delivered_text():
+    stub = StubOllamaClient(repeat("t{i} ", 1000), delay=0.01)
+    original = routes.llm_service.client
+    routes.llm_service.client = stub
+    conversation_id = f"barge-in-chat-{time.time()}"
+    try:
+        with TestClient(make_app()) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                websocket.send_text(json.dumps({"request_id": "r1", "prompt": "Talk forever", "conversation_id": conversation_id}))
+                received = ""
+                while len(received) < 20:
+                    frame = websocket.receive_json()
+                    if frame["type"] == "chunk":
+                        received += frame["content"]
+                websocket.send_text(json.dumps({"type": "interrupt"}))
+                while True:
+                    frame = websocket.receive_json()
+                    if frame["type"] == "chunk":
+                        received += frame["content"]
+                    elif frame["type"] == "interrupted":
+                        break
+                assert frame["cancelled"] == 1 and frame["cancel_latency_ms"] < 500
+        assert len(stub.closed) == 1 and stub.sent < 1000
+        assert history(conversation_id) == [("user", "Talk forever"), ("assistant", received)]
+    finally:
+        routes.llm_service.client = original
+
+def test_voice_barge_in_stops_speech_and_truncates_reply():
+    stub = StubOllamaClient(repeat("Sentence number {i} is here. ", 200), delay=0.05)
+    originals = routes.llm_service.client, voice.recognizer, voice.tts_service
+    routes.llm_service.client = stub
+    voice.recognizer = StubRecognizer("tell me a story")
+    tts = voice.tts_service = TTSService("sine", {"seconds_per_char": 0.005}, workers=1)
+    conversation_id = f"barge-in-voice-{time.time()}"
+    try:
+        with TestClient(make_app()) as client:
+            with client.websocket_connect("/api/v1/ws/voice") as websocket:
+                websocket.send_text(json.dumps({"type": "configure", "speak": True, "conversation_id": conversation_id}))
+                websocket.receive_json()
+                for block in blocks(tone(0.5) + silence(0.5)):
+                    websocket.send_bytes(block)
+
+                # Wait until Lyra is speaking, then talk over her
+                audio_frames = 0
+                while audio_frames < 2:
+                    message = websocket.receive()
+                    if message.get("bytes") is not None:
+                        audio_frames += 1
+                for block in blocks(tone(0.3)):
+                    websocket.send_bytes(block)
+
+                frames = []
+                while not frames or frames[-1]["type"] != "interrupted":
+                    message = websocket.receive()
+                    if message.get("text"):
+                        frames.append(json.loads(message["text"]))
+                assert {"type": "cancelled", "request_id": "utterance-1"} in frames
+                assert frames[-1]["reason"] == "speech" and frames[-1]["cancel_latency_ms"] < 500
+        assert len(stub.closed) == 1 and stub.sent < 200
+        stored = history(conversation_id)
+        assert stored[0] == ("user", "tell me a story")
+        spoken = stored[1][1]
+        assert spoken.startswith("Sentence number 0 is here.") and len(spoken) < stub.sent * 30
+        assert voice.voice_metrics.metrics()["interrupts"] >= 1
+    finally:
+        tts.close()
+        routes.llm_service.client, voice.recognizer, voice.tts_service = originals
+
+def test_barge_in_can_be_disabled():
+    stub = StubOllamaClient(repeat("t{i} ", 30), delay=0.01)
+    originals = routes.llm_service.client, voice.recognizer
+    routes.llm_service.client = stub
+    voice.recognizer = StubRecognizer("hello")
+    try:
+        with TestClient(make_app()) as client:
+            with client.websocket_connect("/api/v1/ws/voice") as websocket:
+                websocket.send_text(json.dumps({"type": "configure", "barge_in": False}))
+                assert websocket.receive_json()["barge_in"] is False
+                for block in blocks(tone(0.4) + silence(0.5)):
+                    websocket.send_bytes(block)
+                while websocket.receive_json()["type"] != "chunk":
+                    pass
+                for block in blocks(tone(0.3)):
+                    websocket.send_bytes(block)
+                kinds = []
+                while not kinds or kinds[-1] != "end":
+                    kinds.append(websocket.receive_json()["type"])
+                assert "interrupted" not in kinds and "cancelled" not in kinds
+        assert stub.sent == 30
+    finally:
+        routes.llm_service.client, voice.recognizer = originals
+
+if __name__ == "__main__":
+    test_chat_interrupt_stores_only_delivered_text()
+    test_voice_barge_in_stops_speech_and_truncates_reply()
+    test_barge_in_can_be_disabled()
+    print("✅ Barge-in tests passed")
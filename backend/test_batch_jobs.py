@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, make_llm
+from api import batches
+from brain.batch import BatchRunner
+from brain.scheduler import RequestScheduler, Priority
+
+ANSWER = "answer to {prompt}"
+
+def make_runner(directory, client, max_in_flight=4, concurrency=2):
+    llm = make_llm(client, scheduler=RequestScheduler(max_in_flight=max_in_flight))
+    return BatchRunner(llm, directory, concurrency=concurrency)
+
+async def lines(items):
+    for item in items:
+        yield json.dumps(item).encode()
+
+def test_batch_deduplicates_and_bounds_concurrency():
+    async def scenario(tmp):
+        client = StubOllamaClient(ANSWER, latency=0.01, failing="fail")
+        runner = make_runner(tmp, client)
+        await runner.start()
+        items = [{"id": f"item-{i}", "prompt": f"prompt {i % 8}", "options": {"temperature": 0}} for i in range(12)]
+        items.append({"prompt": "prompt 0", "options": {"temperature": 0.9}})
+        items.append({"prompt": "fail"})
+        job = await runner.create(lines(items), concurrency=3, system_prompt="Be brief")
+        records = [record async for record in runner.stream(job, follow=True)]
+        await runner.close()
+        return client, job, records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, job, records = asyncio.run(scenario(tmp))
+        results = {r["index"]: r for r in records if r["type"] == "result"}
+        assert sorted(results) == list(range(14))
+        # Eight distinct prompts, the sampled duplicate and the failing one
+        assert len(client.prompts) == 10 and client.peak <= 3
+        assert all(results[i]["response"] == f"answer to prompt {i % 8}" and results[i]["id"] == f"item-{i}" for i in range(12))
+        assert sum(bool(r.get("deduplicated")) for r in results.values()) == 4
+        assert results[13]["error"] == "model crashed"
+        end = records[-1]
+        assert end["type"] == "end" and end["status"] == "completed"
+        assert (end["completed"], end["failed"], end["deduplicated"]) == (13, 1, 4)
+        assert any(r["type"] == "progress" for r in records)
+
+def test_restarted_runner_resumes_from_the_checkpoint():
+    async def first_run(tmp):
+        client = StubOllamaClient(ANSWER, latency=0.03)
+        runner = make_runner(tmp, client)
+        await runner.start()
+        job = await runner.create(lines([{"prompt": f"question {i}"} for i in range(20)]))
+        while job.state["completed"] < 6:
+            await job.wait(1.0)
+        await runner.close()
+        return job
+
+    async def second_run(tmp):
+        client = StubOllamaClient(ANSWER, latency=0.01)
+        runner = make_runner(tmp, client)
+        await runner.start()
+        job = next(iter(runner.jobs.values()))
+        records = [record async for record in runner.stream(job, follow=True)]
+        await runner.close()
+        return client, records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        job = asyncio.run(first_run(tmp))
+        with open(os.path.join(job.directory, "job.json")) as f:
+            assert json.load(f)["status"] == "running"
+        answered = job.state["completed"]
+        # A record cut short by the crash is discarded on resume
+        with open(job.results_path, "ab") as f:
+            f.write(b'{"index": 19, "resp')
+
+        client, records = asyncio.run(second_run(tmp))
+        indices = [r["index"] for r in records if r["type"] == "result"]
+        assert sorted(indices) == list(range(20))
+        assert len(client.prompts) == 20 - answered
+        assert records[-1]["status"] == "completed" and records[-1]["completed"] == 20
+
+def test_chat_overtakes_queued_batch_prompts():
+    async def scenario(tmp):
+        client = StubOllamaClient(ANSWER, latency=0.02)
+        runner = make_runner(tmp, client, max_in_flight=1, concurrency=4)
+        await runner.start()
+        job = await runner.create(lines([{"prompt": f"batch {i}"} for i in range(8)]))
+        while not client.prompts:
+            await asyncio.sleep(0.005)
+        reply = await runner.llm_service.generate_response("chat", priority=Priority.INTERACTIVE)
+        records = [record async for record in runner.stream(job, follow=True)]
+        await runner.close()
+        return client, reply, records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, reply, records = asyncio.run(scenario(tmp))
+        assert reply == "answer to chat"
+        # Only the batch prompt already generating runs before the chat request
+        assert client.prompts.index("chat") == 1
+        assert records[-1]["completed"] == 8
+
+def test_batch_endpoints():
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = make_runner(tmp, StubOllamaClient(ANSWER, latency=0.01))
+
+        @asynccontextmanager
+        async def lifespan(app):
+            await runner.start()
+            yield
+            await runner.close()
+
+        original = batches.batch_runner
+        batches.batch_runner = runner
+        app = FastAPI(lifespan=lifespan)
+        app.include_router(batches.router)
+        try:
+            with TestClient(app) as client:
+                bad = client.post("/api/v1/batches", content=b'{"prompt": "ok"}\n{"text": "no prompt"}\n')
+                assert bad.status_code == 400 and "Line 2" in bad.json()["error"]
+                assert client.post("/api/v1/batches", content=b"\n").status_code == 400
+
+                body = b"".join(json.dumps({"id": i, "prompt": f"q{i % 3}", "options": {"seed": 1}}).encode() + b"\n" for i in range(9))
+                created = client.post("/api/v1/batches", params={"concurrency": 2}, content=body)
+                assert created.status_code == 202
+                job_id = created.json()["id"]
+                assert created.json()["total"] == 9 and created.json()["concurrency"] == 2
+
+                streamed = client.get(f"/api/v1/batches/{job_id}/results", params={"follow": True})
+                assert streamed.headers["content-type"].startswith("application/x-ndjson")
+                records = [json.loads(line) for line in streamed.text.splitlines()]
+                assert sum(r["type"] == "result" for r in records) == 9
+                assert records[-1]["type"] == "end" and records[-1]["deduplicated"] == 6
+
+                status = client.get(f"/api/v1/batches/{job_id}").json()
+                assert status["status"] == "completed" and status["finished"] == 9
+                assert client.get("/api/v1/batches").json()["jobs"] == {"completed": 1}
+                assert client.post(f"/api/v1/batches/{job_id}/cancel").json()["status"] == "completed"
+                assert client.get("/api/v1/batches/missing").status_code == 404
+        finally:
+            batches.batch_runner = original
+
+if __name__ == "__main__":
+    test_batch_deduplicates_and_bounds_concurrency()
+    test_restarted_runner_resumes_from_the_checkpoint()
+    test_chat_overtakes_queued_batch_prompts()
+    test_batch_endpoints()
+    print("✅ Batch job tests passed")
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.fake_ollama import FakeOllama
+from brain.context_builder import ContextBuilder, approximate_tokens
+from brain.llm_service import LLMService
+from memory.embeddings import HashingEmbedder
+from memory.storage import MemoryManager
+from memory.vector_index import VectorIndex
+
+def fill(memory: MemoryManager, conversation_id: str, turns: int):
+    for i in range(turns):
+        memory.add_message(conversation_id, "user", f"Question {i}. " + "filler words " * 20)
+        memory.add_message(conversation_id, "assistant", f"Answer {i}. " + "more filler " * 20)
+
+def prompt_tokens(messages):
+    return sum(approximate_tokens(m["content"]) + 4 for m in messages)
+
+def test_window_stays_within_budget():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        builder = ContextBuilder(memory, token_budgets={"tiny": 400})
+        fill(memory, "long", 200)
+
+        messages = builder.build("tiny", "What was question 3 about?", "You are Lyra", "long")
+        assert prompt_tokens(messages) <= 400
+        assert messages[0] == {"role": "system", "content": "You are Lyra"}
+        assert messages[1]["content"].startswith("Summary of earlier conversation:")
+        assert messages[-1] == {"role": "user", "content": "What was question 3 about?"}
+        assert messages[-2]["content"].startswith("Answer 199.")
+
+        # Unknown models fall back to the default budget
+        assert builder.budget_for("unknown") == builder.default_budget
+        memory.close()
+
+def test_summary_is_extended_incrementally():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        summarized = []
+
+        def summarizer(previous, messages, max_tokens):
+            summarized.append(len(messages))
+            return f"{previous}|{len(messages)}"
+
+        builder = ContextBuilder(memory, token_budgets={"tiny": 400}, summarizer=summarizer)
+        fill(memory, "long", 20)
+        builder.build("tiny", "next", conversation_id="long")
+        first = summarized[-1]
+
+        builder.build("tiny", "again", conversation_id="long")
+        assert summarized == [first]
+
+        fill(memory, "long", 1)
+        builder.build("tiny", "and again", conversation_id="long")
+        assert summarized == [first, 2]
+        memory.close()
+
+def test_block_eviction_keeps_the_prefix_stable():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        builder = ContextBuilder(memory, token_budgets={"tiny": 2400}, eviction_target=0.6)
+        fill(memory, "chat", 30)
+
+        prefixes = []
+        for turn in range(5):
+            messages = builder.build("tiny", f"Question {turn}?", "You are Lyra", "chat")
+            assert prompt_tokens(messages) <= 2400
+            prefixes.append(messages[:3])
+            fill(memory, "chat", 1)
+        # The first build cut the window back far enough that the following
+        # turns all extend the same prefix
+        assert all(prefix == prefixes[0] for prefix in prefixes)
+
+        # Without slack the window slides, and the prefix changes every turn
+        sliding = ContextBuilder(memory, token_budgets={"tiny": 2400})
+        first = sliding.build("tiny", "next", "You are Lyra", "chat")[:3]
+        fill(memory, "chat", 1)
+        assert sliding.build("tiny", "next", "You are Lyra", "chat")[:3] != first
+        memory.close()
+
+def test_cached_windows_and_summaries_are_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        builder = ContextBuilder(memory, token_budgets={"tiny": 400}, max_sessions=3)
+        for i in range(5):
+            fill(memory, f"chat-{i}", 20)
+            builder.build("tiny", "next", conversation_id=f"chat-{i}")
+            # Using the oldest conversation again keeps it cached
+            builder.build("tiny", "again", conversation_id="chat-0")
+
+        assert list(builder._window_starts) == [("chat-3", "tiny"), ("chat-4", "tiny"), ("chat-0", "tiny")]
+        assert list(builder._summaries) == ["chat-3", "chat-4", "chat-0"]
+
+        # An evicted conversation is rebuilt from scratch within the budget
+        assert prompt_tokens(builder.build("tiny", "back", conversation_id="chat-1")) <= 400
+        assert len(builder._window_starts) == 3 and "chat-1" in builder._summaries
+        memory.close()
+
+def test_retrieved_snippets_and_llm_service_wiring():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder())
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+        memory.add_message("old", "user", "My favourite editor is kate")
+        memory.add_message("new", "user", "Hi there")
+
+        llm = LLMService(model_name="tiny", context_builder=ContextBuilder(memory, token_budgets={"tiny": 400}))
+        messages = llm._build_messages("Which editor do I like?", conversation_id="new")
+        # Recalled snippets change with every prompt, so they follow the history
+        assert messages[-2]["content"].startswith("Relevant memories:") and "kate" in messages[-2]["content"]
+        assert messages[-3] == {"role": "user", "content": "Hi there"}
+
+        # Without a conversation the prompt is sent on its own
+        assert llm._build_messages("Hello") == [{"role": "user", "content": "Hello"}]
+        memory.close()
+
+class SlowEmbedder(HashingEmbedder):
+    """Hashing embedder that takes ``delay`` seconds per call"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def embed(self, texts):
+        time.sleep(self.delay)
+        return super().embed(texts)
+
+def test_retrieval_stays_off_the_event_loop():
+    with tempfile.TemporaryDirectory() as tmp, FakeOllama() as fake:
+        index = VectorIndex(os.path.join(tmp, "vectors"), SlowEmbedder(0.3), batch_size=100)
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), write_behind=True, flush_interval=60, vector_index=index)
+        memory.add_message("chat", "user", "My favourite editor is kate")
+        llm = LLMService(model_name="tiny", host=fake.url, context_builder=ContextBuilder(memory, token_budgets={"tiny": 400}))
+
+        async def scenario():
+            gaps = []
+
+            async def ticker():
+                while True:
+                    started = time.monotonic()
+                    await asyncio.sleep(0.01)
+                    gaps.append(time.monotonic() - started)
+
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0.05)
+            reply = "".join([chunk async for chunk in llm.stream_response("Which editor?", conversation_id="chat")])
+            await asyncio.sleep(0.05)
+            task.cancel()
+            return reply, gaps
+
+        reply, gaps = asyncio.run(scenario())
+        assert reply == fake.reply
+        # The query embedding ran on a worker thread while the loop kept ticking
+        assert max(gaps) < 0.2
+        # Queued messages are left for the flusher rather than embedded by the search
+        assert index.pending == 1
+        memory.close()
+        assert index.pending == 0
+
+if __name__ == "__main__":
+    test_window_stays_within_budget()
+    test_summary_is_extended_incrementally()
+    test_block_eviction_keeps_the_prefix_stable()
+    test_cached_windows_and_summaries_are_bounded()
+    test_retrieved_snippets_and_llm_service_wiring()
+    test_retrieval_stays_off_the_event_loop()
+    print("✅ Context builder tests passed")
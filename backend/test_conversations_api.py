@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import conversations
+from memory.storage import MemoryManager
+
+def client_for(memory):
+    conversations.memory = memory
+    app = FastAPI()
+    app.include_router(conversations.router)
+    return TestClient(app)
+
+def test_conversation_listing_is_cursor_paginated():
+    original = conversations.memory
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        for i in range(7):
+            memory.add_message(f"conv-{i}", "user", f"Hello {i}")
+        memory.add_message("conv-2", "assistant", "Most recent")
+        try:
+            client = client_for(memory)
+            seen, cursor = [], None
+            while True:
+                page = client.get("/api/v1/conversations", params={"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+                seen.extend(page["conversations"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            assert [c["id"] for c in seen] == ["conv-2", "conv-6", "conv-5", "conv-4", "conv-3", "conv-1", "conv-0"]
+            assert seen[0]["message_count"] == 2 and not seen[0]["archived"]
+            assert client.get("/api/v1/conversations", params={"cursor": "nonsense"}).status_code == 400
+
+            first = client.get("/api/v1/conversations", params={"limit": 3})
+            tag = first.headers["etag"]
+            assert client.get("/api/v1/conversations", params={"limit": 3}, headers={"If-None-Match": tag}).status_code == 304
+            memory.add_message("conv-0", "user", "Back to the top")
+            changed = client.get("/api/v1/conversations", params={"limit": 3}, headers={"If-None-Match": tag})
+            assert changed.status_code == 200 and changed.json()["conversations"][0]["id"] == "conv-0"
+        finally:
+            conversations.memory = original
+            memory.close()
+
+def test_messages_are_paginated_with_etags():
+    original = conversations.memory
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+        for i in range(25):
+            memory.add_message("long", "user" if i % 2 == 0 else "assistant", f"message {i}")
+        try:
+            client = client_for(memory)
+            contents, after = [], None
+            while True:
+                page = client.get("/api/v1/conversations/long/messages", params={"limit": 10, **({"after": after} if after else {})}).json()
+                contents.extend(m["content"] for m in page["messages"])
+                after = page["next_after"]
+                if not after:
+                    break
+            assert contents == [f"message {i}" for i in range(25)]
+
+            latest = client.get("/api/v1/conversations/long/messages", params={"before": 2**63 - 1, "limit": 10}).json()
+            assert [m["content"] for m in latest["messages"]] == [f"message {i}" for i in range(15, 25)]
+            older = client.get("/api/v1/conversations/long/messages", params={"before": latest["next_before"], "limit": 10}).json()
+            assert [m["content"] for m in older["messages"]] == [f"message {i}" for i in range(5, 15)]
+            assert client.get("/api/v1/conversations/missing/messages").status_code == 404
+
+            # Unchanged archived conversations are answered without reading their segment
+            memory.archive_idle(0)
+            response = client.get("/api/v1/conversations/long/messages", params={"limit": 10})
+            assert response.status_code == 200 and memory.tier_stats()["cold_loads"] == 1
+            memory.close()
+            memory = MemoryManager(os.path.join(tmp, "conversations.json"))
+            client = client_for(memory)
+            revalidated = client.get("/api/v1/conversations/long/messages", params={"limit": 10}, headers={"If-None-Match": response.headers["etag"]})
+            assert revalidated.status_code == 304 and memory.tier_stats()["cold_loads"] == 0
+            info = client.get("/api/v1/conversations/long")
+            assert info.json()["archived"] and info.json()["message_count"] == 25
+            assert client.get("/api/v1/conversations/long", headers={"If-None-Match": info.headers["etag"]}).status_code == 304
+        finally:
+            conversations.memory = original
+            memory.close()
+
+def test_ndjson_export_and_import_round_trip():
+    original = conversations.memory
+    with tempfile.TemporaryDirectory() as tmp:
+        source = MemoryManager(os.path.join(tmp, "source", "conversations.json"))
+        for i in range(30):
+            for j in range(4):
+                source.add_message(f"conv-{i}", "user" if j % 2 == 0 else "assistant", f"conversation {i} line {j}")
+        source.archive_idle(0)
+        source.add_message("conv-29", "user", "Still hot")
+        target = MemoryManager(os.path.join(tmp, "target", "conversations.json"))
+        target.add_message("conv-0", "user", "Already here")
+        try:
+            response = client_for(source).get("/api/v1/conversations/export")
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            records = [json.loads(line) for line in response.text.splitlines()]
+            assert sum(r["type"] == "conversation" for r in records) == 30
+            assert sum(r["type"] == "message" for r in records) == 121
+            # Exporting does not load archived conversations into memory
+            assert source.tier_stats()["hydrated"] == 0
+
+            client = client_for(target)
+            imported = client.post("/api/v1/conversations/import", content=response.content).json()["imported"]
+            assert imported == {"conversations": 29, "messages": 117, "skipped": 5}
+            assert [m["content"] for m in target.get_conversation_history("conv-0")] == ["Already here"]
+            for i in (1, 29):
+                exported = [(m["role"], m["content"], m["timestamp"]) for m in source.get_conversation_history(f"conv-{i}")]
+                assert [(m["role"], m["content"], m["timestamp"]) for m in target.get_conversation_history(f"conv-{i}")] == exported
+            assert target.get_conversation_info("conv-29")["updated_at"] == source.get_conversation_info("conv-29")["updated_at"]
+
+            again = client.post("/api/v1/conversations/import", content=response.content).json()["imported"]
+            assert again["conversations"] == 0 and again["messages"] == 0
+
+            bad = client.post("/api/v1/conversations/import", content=b'{"type": "conversation", "id": "new"}\nnot json\n')
+            assert bad.status_code == 400 and bad.json()["line"] == 2
+            assert bad.json()["imported"]["conversations"] == 1 and target.get_conversation_info("new")
+
+            # Timestamps must be ISO-8601 text; a bad one leaves nothing behind
+            for record in ({"type": "conversation", "id": "b", "updated_at": 7}, {"type": "conversation", "id": "b", "created_at": "yesterday"}):
+                bad = client.post("/api/v1/conversations/import", content=json.dumps(record).encode())
+                assert bad.status_code == 400 and "ISO-8601" in bad.json()["error"]
+            bad = client.post(
+                "/api/v1/conversations/import",
+                content=b'{"type": "message", "conversation_id": "new", "role": "user", "content": "x", "timestamp": [1]}\n'
+            )
+            assert bad.status_code == 400
+            assert target.get_conversation_info("b") is None and target.get_conversation_info("new")["message_count"] == 0
+            assert client.get("/api/v1/conversations").status_code == 200
+        finally:
+            conversations.memory = original
+            source.close()
+            target.close()
+
+if __name__ == "__main__":
+    test_conversation_listing_is_cursor_paginated()
+    test_messages_are_paginated_with_etags()
+    test_ndjson_export_and_import_round_trip()
+    print("✅ Conversations API tests passed")
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, repeat
+from api import routes
+from brain.intent import IntentRouter
+from tools.executor import Tool, ToolExecutor
+from tools.name_index import NameIndex
+
+APPS = ["kate", "katex", "firefox", "firefox-esr", "code", "codium", "vlc", "libreoffice", "gnome-terminal", "konsole"]
+
+class RecordingLauncher(Tool):
+    """Stands in for ApplicationLauncher without starting anything"""
+
+    def __init__(self):
+        super().__init__(name="app_launcher", description="Launch desktop applications")
+        self.launched = []
+
+    async def execute(self, parameters):
+        self.launched.append(parameters["app_name"])
+        return {"status": "success", "message": f"Launched {parameters['app_name']}"}
+
+def make_router(permitted=True):
+    executor = ToolExecutor()
+    launcher = RecordingLauncher()
+    executor.register_tool(launcher)
+    if permitted:
+        executor.grant_permission("app_launcher")
+    index = NameIndex()
+    for name in APPS:
+        index.add(name, name)
+    return IntentRouter(executor, index), launcher
+
+def test_name_index_ranks_exact_then_fuzzy_matches():
+    index = NameIndex()
+    for name in APPS:
+        index.add(name, name)
+    assert index.search("Kate")[0] == ("kate", 1.0)
+    assert index.search("firefx")[0][0] == "firefox"
+    assert index.search("gnome terminal")[0] == ("gnome-terminal", 1.0)
+    assert all(score < 0.5 for _, score in index.search("spotify"))
+
+def test_confident_commands_run_the_tool_directly():
+    async def scenario():
+        router, launcher = make_router()
+        assert (await router.handle("Open kate")).reply == "Launched kate"
+        assert (await router.handle("Lyra, please launch the firefx app.")).parameters == {"app_name": "firefox"}
+        # Ambiguous or unknown names and ordinary questions go to the model
+        assert await router.handle("open libre") is None
+        assert await router.handle("open the pod bay doors") is None
+        assert await router.handle("what's the weather like?") is None
+        assert launcher.launched == ["kate", "firefox"]
+
+        metrics = router.metrics.metrics()
+        assert metrics["requests"] == 5 and metrics["hits"] == 2
+        assert metrics["latency_ms"]["fast_path"]["p95"] < 50
+
+        # Permissions still gate the fast path
+        router.executor.revoke_permission("app_launcher")
+        assert await router.handle("open kate") is None
+        assert launcher.launched == ["kate", "firefox"]
+
+    asyncio.run(scenario())
+
+def test_websocket_answers_commands_without_the_llm():
+    stub = StubOllamaClient(repeat("t{i} ", 5), delay=0.01)
+    intent_router, launcher = make_router()
+    originals = routes.llm_service.client, routes.intent_router
+    routes.llm_service.client = stub
+    routes.intent_router = intent_router
+    conversation_id = f"intent-{time.time()}"
+    app = FastAPI()
+    app.include_router(routes.router)
+    try:
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                started = time.monotonic()
+                websocket.send_text(json.dumps({"prompt": "open kate", "conversation_id": conversation_id}))
+                frames = [websocket.receive_json() for _ in range(3)]
+                elapsed = time.monotonic() - started
+                assert [f["type"] for f in frames] == ["tool", "chunk", "end"]
+                assert frames[0]["tool"] == "app_launcher" and frames[0]["result"]["status"] == "success"
+                assert frames[1]["content"] == "Launched kate"
+                assert elapsed < 0.5 and stub.sent == 0
+
+                websocket.send_text(json.dumps({"prompt": "tell me a joke"}))
+                while websocket.receive_json()["type"] != "end":
+                    pass
+                assert stub.sent == 5
+
+            stats = client.get("/api/v1/intent/stats").json()
+            assert stats["hits"] == 1 and stats["hit_rate"] == 0.5
+            assert stats["latency_ms"]["llm"]["count"] == 1
+
+            response = client.post("/api/v1/chat", json={"prompt": "start vlc"}).json()
+            assert response["tool"] == "app_launcher" and response["response"] == "Launched vlc"
+        assert launcher.launched == ["kate", "vlc"]
+        history = routes.memory.get_conversation_history(conversation_id)
+        assert [m["content"] for m in history] == ["open kate", "Launched kate"]
+    finally:
+        routes.llm_service.client, routes.intent_router = originals
+
+if __name__ == "__main__":
+    test_name_index_ranks_exact_then_fuzzy_matches()
+    test_confident_commands_run_the_tool_directly()
+    test_websocket_answers_commands_without_the_llm()
+    print("✅ Intent fast-path tests passed")
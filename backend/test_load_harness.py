@@ -0,0 +1,57 @@
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+from benchmarks.bench_load import compare, lyra_server, percentiles, run_load
+from benchmarks.fake_ollama import FakeOllama
+
+def post_chat(url):
+    request = urllib.request.Request(
+        f"{url}/api/chat",
+        data=json.dumps({"model": "m", "messages": [{"role": "user", "content": "hi"}], "stream": False}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+def test_fake_ollama_emulates_errors():
+    with FakeOllama(error_rate=1.0) as fake:
+        try:
+            post_chat(fake.url)
+            assert False, "expected an HTTP 500"
+        except urllib.error.HTTPError as e:
+            assert e.code == 500
+        assert fake.errors == 1
+    with FakeOllama(reply="a b c") as fake:
+        assert post_chat(fake.url)["message"]["content"] == "a b c"
+
+def test_percentiles_and_regression_check():
+    stats = percentiles([float(i) for i in range(1, 101)])
+    assert (stats["p50"], stats["p95"], stats["p99"], stats["max"]) == (51.0, 96.0, 100.0, 100.0)
+
+    baseline = {"results": {"websocket": {"errors": 0, "ttft_ms": {"p95": 100.0}}, "throughput": {"requests_per_second": 10.0}}}
+    current = {"results": {"websocket": {"errors": 2, "ttft_ms": {"p95": 105.0}}, "throughput": {"requests_per_second": 8.0}}}
+    changes = {c["metric"]: c for c in compare(current, baseline)}
+    assert not changes["websocket.ttft_ms.p95"]["regression"]  # within 10%
+    assert changes["websocket.errors"]["regression"]
+    assert changes["throughput.requests_per_second"]["regression"]  # lower throughput is worse
+
+def test_load_run_against_the_server():
+    with FakeOllama(ttft=0.02, token_rate=500, reply=" ".join(["tok"] * 20)) as fake:
+        with lyra_server(fake.url, {"LYRA_MAX_IN_FLIGHT": "2"}) as server:
+            results = asyncio.run(run_load(server.base_url, server.pid, ws_clients=2, rest_clients=1, requests=2))
+    assert results["websocket"]["requests"] == 4 and results["websocket"]["errors"] == 0
+    assert results["rest"]["requests"] == 2 and results["rest"]["errors"] == 0
+    assert results["websocket"]["ttft_ms"]["p50"] >= 20
+    assert results["websocket"]["latency_ms"]["p99"] >= results["websocket"]["ttft_ms"]["p50"]
+    assert results["throughput"]["tokens_per_second"] > 0
+    # Six chats plus the model preload went through a pool of warm connections
+    assert results["ollama_pool"]["connections_opened"] < results["ollama_pool"]["requests"]
+    json.dumps(results)
+
+if __name__ == "__main__":
+    test_fake_ollama_emulates_errors()
+    test_percentiles_and_regression_check()
+    test_load_run_against_the_server()
+    print("✅ Load harness tests passed")
@@ -0,0 +1,134 @@
+import os
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import routes
+from memory.embeddings import HashingEmbedder
+from memory.storage import MemoryManager
+from memory.vector_index import VectorIndex
+
+def populate(memory, conversations, messages=4):
+    for i in range(conversations):
+        for j in range(messages):
+            memory.add_message(f"conv-{i}", "user" if j % 2 == 0 else "assistant", f"conversation {i} message {j} " + "lorem ipsum " * 20)
+
+def test_idle_conversations_are_archived_and_read_back():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        memory = MemoryManager(path)
+        populate(memory, 5)
+        before = {f"conv-{i}": memory.get_conversation_history(f"conv-{i}") for i in range(5)}
+        assert memory.archive_idle(3600) == 0
+        assert memory.archive_idle(0) == 5
+        assert memory.tier_stats()["resident"] == 0
+        assert len(os.listdir(memory.archive.directory)) == 5
+        assert memory.store.load_messages("conv-0") == []
+        memory.close()
+
+        # Startup only reads the metadata index
+        reopened = MemoryManager(path)
+        stats = reopened.tier_stats()
+        assert stats["conversations"] == 5 and stats["archived"] == 5
+        assert stats["resident"] == 0 and stats["resident_messages"] == 0 and stats["hydrated"] == 0
+        assert [c["message_count"] for c in reopened.conversations] == [4] * 5
+
+        # Reads hydrate archived conversations transparently
+        assert reopened.get_conversation_history("conv-3") == before["conv-3"]
+        assert reopened.get_conversation("conv-1")["messages"] == before["conv-1"]
+        assert reopened.get_conversation_history("conv-3", limit=2) == before["conv-3"][-2:]
+        assert reopened.tier_stats()["cold_loads"] == 2 and reopened.tier_stats()["cold_hits"] == 1
+
+        # Writing to one moves it back to the log and drops its segment
+        reopened.add_message("conv-3", "user", "Back again")
+        ids = [m["id"] for m in reopened.get_conversation_history("conv-3")]
+        assert ids == sorted(ids) and ids[-1] > max(m["id"] for history in before.values() for m in history)
+        assert reopened.delete_conversation("conv-1")
+        assert len(os.listdir(reopened.archive.directory)) == 3
+        reopened.close()
+
+        final = MemoryManager(path)
+        assert [m["content"] for m in final.get_conversation_history("conv-3")][-1] == "Back again"
+        assert len(final.get_conversation_history("conv-3")) == 5
+        assert final.get_conversation("conv-1") is None
+        assert final.tier_stats()["archived"] == 3
+        final.close()
+
+def test_hydrated_archives_are_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), max_hydrated_bytes=4000)
+        populate(memory, 20)
+        memory.archive_idle(0)
+        for i in range(20):
+            assert len(memory.get_conversation_history(f"conv-{i}")) == 4
+        stats = memory.tier_stats()
+        assert 1 <= stats["hydrated"] < 20 and stats["hydrated_bytes"] <= 4000
+        assert stats["evictions"] == 20 - stats["hydrated"]
+        # Evicted conversations are simply read again
+        assert memory.get_conversation("conv-0")["id"] == "conv-0"
+        memory.close()
+
+def test_search_finds_archived_messages():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        memory = MemoryManager(path, vector_index=VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder()))
+        memory.add_message("old", "user", "My cat is called Miso and she likes tuna")
+        memory.add_message("recent", "user", "What's the weather like today?")
+        memory.archive_idle(0)
+        memory.close()
+
+        reopened = MemoryManager(path, vector_index=VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder()))
+        best = reopened.search_messages("what is my cat called", k=1)[0]
+        assert best["conversation_id"] == "old" and "Miso" in best["content"]
+        assert reopened.search_messages("cat", k=1, conversation_id="old")[0]["content"] == best["content"]
+        reopened.close()
+
+def test_flusher_archives_in_the_background():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(
+            os.path.join(tmp, "conversations.json"),
+            write_behind=True,
+            flush_interval=0.05,
+            archive_after=0,
+            archive_interval=0
+        )
+        populate(memory, 3)
+        deadline = time.monotonic() + 5
+        while memory.tier_stats()["archived"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert memory.tier_stats()["archived"] == 3
+        assert len(memory.get_conversation_history("conv-2")) == 4
+        memory.close()
+
+def test_closed_manager_reopens():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), write_behind=True, flush_interval=0.05)
+        populate(memory, 2)
+        memory.archive_idle(0)
+        memory.close()
+        # A second app lifespan reopens the same manager
+        memory.open()
+        assert len(memory.get_conversation_history("conv-1")) == 4
+        memory.add_message("conv-1", "user", "Still here")
+        memory.close()
+        memory.open()
+        assert memory.get_conversation_history("conv-1")[-1]["content"] == "Still here"
+        memory.close()
+
+def test_memory_stats_endpoint():
+    app = FastAPI()
+    app.include_router(routes.router)
+    with TestClient(app) as client:
+        stats = client.get("/api/v1/memory/stats").json()
+    assert {"conversations", "archived", "resident", "hydrated_bytes", "archive_codec"} <= stats.keys()
+
+if __name__ == "__main__":
+    test_idle_conversations_are_archived_and_read_back()
+    test_hydrated_archives_are_bounded()
+    test_search_finds_archived_messages()
+    test_flusher_archives_in_the_background()
+    test_closed_manager_reopens()
+    test_memory_stats_endpoint()
+    print("✅ Memory tiering tests passed")
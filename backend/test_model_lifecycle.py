@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_ollama import FakeOllama
+from brain.llm_service import LLMService
+from brain.model_lifecycle import ModelLifecycle, ModelState
+
+def test_preload_marks_ready_and_records_load_time():
+    with FakeOllama(load_delay=0.3) as fake:
+        async def scenario():
+            llm = LLMService(model_name="test-model", host=fake.url)
+            assert llm.lifecycle.state == ModelState.COLD
+            llm.lifecycle.start()
+            assert await llm.lifecycle.wait_ready(5)
+            await llm.lifecycle.stop()
+
+            metrics = llm.lifecycle.metrics()
+            assert metrics["state"] == "ready"
+            assert metrics["cold_starts"] == 1 and metrics["load_seconds"] >= 0.3
+            assert fake.requests["/api/generate"] == 1
+
+            # The first real request finds the model warm
+            response = await llm.generate_response("Hello")
+            assert response.startswith("Hello! I'm Lyra")
+            assert llm.lifecycle.stats["last"]["load_seconds"] == 0
+            assert llm.lifecycle.metrics()["cold_starts"] == 1
+
+        asyncio.run(scenario())
+
+def test_stream_records_timing_stats():
+    with FakeOllama(ttft=0.05, token_rate=200) as fake:
+        async def scenario():
+            llm = LLMService(model_name="test-model", host=fake.url)
+            chunks = [chunk async for chunk in llm.stream_response("Hello")]
+            assert "".join(chunks) == fake.reply
+            last = llm.lifecycle.stats["last"]
+            assert last["prompt_eval_seconds"] >= 0.05
+            assert last["eval_tokens"] == len(fake.reply.split(" "))
+            assert llm.lifecycle.metrics()["tokens_per_second"] > 0
+
+        asyncio.run(scenario())
+
+def test_keep_alive_pings_follow_traffic():
+    with FakeOllama() as fake:
+        async def scenario():
+            llm = LLMService(model_name="test-model", host=fake.url, keep_alive=1)
+            lifecycle = llm.lifecycle
+            lifecycle.check_interval = 0.1
+            await lifecycle.preload()
+
+            # Recent traffic and keep_alive about to lapse: re-arm it
+            lifecycle.record_request()
+            lifecycle.last_touch -= 0.9
+            await lifecycle.maintain()
+            assert lifecycle.stats["keep_alive_pings"] == 1
+
+            # Idle past the timeout: no pings, model allowed to go cold
+            lifecycle.idle_timeout = 0
+            lifecycle.last_request -= 10
+            lifecycle.last_touch -= 10
+            await lifecycle.maintain()
+            assert lifecycle.stats["keep_alive_pings"] == 1
+            assert lifecycle.state == ModelState.COLD
+
+        asyncio.run(scenario())
+
+def test_preload_failure_is_reported():
+    async def scenario():
+        llm = LLMService(model_name="test-model", host="http://127.0.0.1:9")
+        await llm.lifecycle.preload()
+        assert llm.lifecycle.state == ModelState.ERROR
+        assert not await llm.lifecycle.wait_ready(0.1)
+
+    asyncio.run(scenario())
+
+def test_health_does_not_wait_for_a_lifecycle_that_never_started():
+    import main
+
+    async def scenario():
+        lifecycle = ModelLifecycle(client=None, model_name="test-model")
+        started = time.monotonic()
+        assert not await lifecycle.wait_ready(5)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1
+
+    lifecycles = main.llm_service.lifecycles
+    original = lifecycles[main.llm_service.model_name]
+    lifecycles[main.llm_service.model_name] = ModelLifecycle(client=None, model_name="test-model")
+    try:
+        client = TestClient(main.app)
+        started = time.monotonic()
+        response = client.get("/health", params={"wait": 5})
+        assert time.monotonic() - started < 1
+        # A model that was never loaded is not ready to serve
+        assert response.status_code == 503 and response.json()["status"] == "cold"
+    finally:
+        lifecycles[main.llm_service.model_name] = original
+
+if __name__ == "__main__":
+    test_preload_marks_ready_and_records_load_time()
+    test_stream_records_timing_stats()
+    test_keep_alive_pings_follow_traffic()
+    test_preload_failure_is_reported()
+    test_health_does_not_wait_for_a_lifecycle_that_never_started()
+    print("✅ Model lifecycle tests passed")
@@ -0,0 +1,106 @@
+import asyncio
+
+from conftest import StubOllamaClient, make_llm
+from brain.model_router import ModelRouter, ModelRoute
+from brain.response_cache import ResponseCache
+
+def make_service(behaviour, timeout=0.2, response_cache=None):
+    router = ModelRouter(
+        small=ModelRoute("small", "tiny-model", first_token_timeout=timeout),
+        large=ModelRoute("large", "big-model", first_token_timeout=timeout)
+    )
+    client = StubOllamaClient(behaviour=behaviour)
+    return make_llm(client, model_name="big-model", router=router, response_cache=response_cache), router
+
+def test_classification():
+    router = ModelRouter(ModelRoute("small", "tiny-model"), ModelRoute("large", "big-model"))
+    assert router.classify("hi there").name == "small"
+    assert router.classify("open firefox").name == "small"
+    assert router.classify("what's on my calendar today").name == "small"
+    assert router.classify("explain how TCP congestion control works").name == "large"
+    assert router.classify(" ".join(["word"] * 40)).name == "large"
+    assert [r.name for r in router.choose("hello")] == ["small", "large"]
+    # Overrides accept route names, model names and ad-hoc models
+    assert router.choose("hello", "large")[0].name == "large"
+    assert router.choose("explain", "tiny-model")[0].name == "small"
+    assert [r.model_name for r in router.choose("hello", "other:7b")] == ["other:7b"]
+
+def test_routes_and_records_stats():
+    llm, router = make_service({})
+
+    async def scenario():
+        assert await llm.generate_response("hello") == "Answer from tiny-model"
+        chunks = [c async for c in llm.stream_response("explain recursion")]
+        assert "".join(chunks) == "Answer from big-model"
+
+    asyncio.run(scenario())
+    metrics = router.metrics()
+    assert metrics["small"]["requests"] == 1 and metrics["large"]["requests"] == 1
+    assert metrics["small"]["tokens_per_second"] == 30.0
+    assert set(llm.lifecycles) == {"big-model", "tiny-model"}
+    assert llm.lifecycles["tiny-model"].stats["requests"] == 1
+
+def test_falls_back_on_error_and_timeout():
+    async def scenario():
+        llm, router = make_service({"tiny-model": "error"})
+        assert await llm.generate_response("hello") == "Answer from big-model"
+        chunks = [c async for c in llm.stream_response("hello")]
+        assert "".join(chunks) == "Answer from big-model"
+        assert router.metrics()["small"]["errors"] == 2
+        assert router.metrics()["large"]["fallbacks"] == 2
+
+        llm, router = make_service({"tiny-model": "hang"})
+        chunks = [c async for c in llm.stream_response("hello")]
+        assert "".join(chunks) == "Answer from big-model"
+        assert llm.client.models == ["tiny-model", "big-model"]
+
+        # Nothing left to fall back to
+        llm, router = make_service({"tiny-model": "error", "big-model": "error"})
+        assert (await llm.generate_response("hello")).startswith("Sorry")
+
+    asyncio.run(scenario())
+
+def test_first_token_timeout_does_not_cap_generation():
+    async def scenario():
+        # The first chunk is quick, the whole answer takes longer than the timeout
+        llm, router = make_service({"tiny-model": "slow"})
+        assert await llm.generate("hello") == "Answer from tiny-model"
+        assert llm.client.models == ["tiny-model"] and router.metrics()["small"]["errors"] == 0
+
+    asyncio.run(scenario())
+
+def test_fallback_answers_are_cached_under_the_fallback_model():
+    async def scenario():
+        cache = ResponseCache()
+        llm, router = make_service({"tiny-model": "error"}, response_cache=cache)
+        options = {"temperature": 0}
+        assert await llm.generate("hello", options=options) == "Answer from big-model"
+        # The small model's key stays empty, so it is asked again next time
+        assert cache.get(cache.make_key("tiny-model", None, "hello", options)) is None
+        assert cache.get(cache.make_key("big-model", None, "hello", options)) == "Answer from big-model"
+        assert await llm.generate("hello", options=options) == "Answer from big-model"
+        assert llm.client.models == ["tiny-model", "big-model", "tiny-model", "big-model"]
+
+    asyncio.run(scenario())
+
+def test_an_empty_stream_is_an_empty_reply():
+    async def scenario():
+        cache = ResponseCache()
+        llm, router = make_service({"tiny-model": "empty"}, response_cache=cache)
+        assert await llm.generate("hello", options={"temperature": 0}) == ""
+        assert [chunk async for chunk in llm.stream_response("hi")] == []
+        # Neither a failure nor a reason to ask the other model
+        assert llm.client.models == ["tiny-model", "tiny-model"]
+        assert router.metrics()["small"]["errors"] == 0 and router.metrics()["small"]["fallbacks"] == 0
+        assert cache.metrics()["entries"] == 0
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_classification()
+    test_routes_and_records_stats()
+    test_falls_back_on_error_and_timeout()
+    test_first_token_timeout_does_not_cap_generation()
+    test_fallback_answers_are_cached_under_the_fallback_model()
+    test_an_empty_stream_is_an_empty_reply()
+    print("✅ Model router tests passed")
@@ -0,0 +1,92 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, echo_prompt
+from api import routes
+
+def run_with_stub(scenario):
+    original_client = routes.llm_service.client
+    original_limit = routes.scheduler.max_in_flight
+    stub = StubOllamaClient(echo_prompt, delay=0.002)
+    routes.llm_service.client = stub
+    routes.scheduler.max_in_flight = 4
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                scenario(websocket, stub)
+    finally:
+        routes.llm_service.client = original_client
+        routes.scheduler.max_in_flight = original_limit
+
+def collect(websocket, until_ended):
+    """Receive frames until every request in `until_ended` has ended or been cancelled"""
+    frames = []
+    pending = set(until_ended)
+    while pending:
+        frame = websocket.receive_json()
+        frames.append(frame)
+        if frame["type"] in ("end", "cancelled"):
+            pending.discard(frame.get("request_id"))
+    return frames
+
+def test_concurrent_requests_do_not_block_each_other():
+    def scenario(websocket, stub):
+        websocket.send_text(json.dumps({"request_id": "answer", "prompt": "long 300"}))
+        websocket.send_text(json.dumps({"request_id": "title", "prompt": "short 3"}))
+        frames = collect(websocket, {"answer", "title"})
+
+        ends = [f["request_id"] for f in frames if f["type"] == "end"]
+        assert ends == ["title", "answer"]
+        text = {}
+        for frame in frames:
+            if frame["type"] == "chunk":
+                text[frame["request_id"]] = text.get(frame["request_id"], "") + frame["content"]
+        assert text == {"answer": "long " * 300, "title": "short " * 3}
+
+    run_with_stub(scenario)
+
+def test_cancel_stops_only_that_request():
+    def scenario(websocket, stub):
+        websocket.send_text(json.dumps({"request_id": "a", "prompt": "slow 5000"}))
+        websocket.send_text(json.dumps({"request_id": "b", "prompt": "quick 5"}))
+        assert websocket.receive_json()["type"] == "chunk"
+        websocket.send_text(json.dumps({"type": "cancel", "request_id": "a"}))
+        frames = collect(websocket, {"a", "b"})
+
+        assert {"type": "cancelled", "request_id": "a"} in frames
+        assert any(f["type"] == "end" and f["request_id"] == "b" for f in frames)
+        assert "slow 5000" in stub.closed
+
+        # Cancelling a finished request reports an error
+        websocket.send_text(json.dumps({"type": "cancel", "request_id": "a"}))
+        assert websocket.receive_json() == {"type": "error", "content": "No such request in progress", "request_id": "a"}
+
+    run_with_stub(scenario)
+
+def test_request_id_validation_and_binary_tags():
+    def scenario(websocket, stub):
+        websocket.send_text(json.dumps({"request_id": 7, "prompt": "x 1"}))
+        assert websocket.receive_json()["content"] == "request_id must be a non-empty string"
+
+        websocket.send_text(json.dumps({"request_id": "dup", "prompt": "first 200"}))
+        websocket.send_text(json.dumps({"request_id": "dup", "prompt": "second 1"}))
+        frames = collect(websocket, {"dup"})
+        assert {"type": "error", "content": "request_id is already in use", "request_id": "dup"} in frames
+
+        websocket.send_text(json.dumps({"type": "configure", "format": "binary"}))
+        assert websocket.receive_json()["format"] == "binary"
+        websocket.send_text(json.dumps({"request_id": "r1", "prompt": "bin 2"}))
+        message = websocket.receive()
+        assert message["bytes"] == b"\x02\x02r1bin "
+
+    run_with_stub(scenario)
+
+if __name__ == "__main__":
+    test_concurrent_requests_do_not_block_each_other()
+    test_cancel_stops_only_that_request()
+    test_request_id_validation_and_binary_tags()
+    print("✅ Multiplexing tests passed")
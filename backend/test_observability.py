@@ -0,0 +1,98 @@
+import asyncio
+import io
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import StubOllamaClient, repeat
+from api import routes
+from api.metrics import router as metrics_router
+from observability import log
+from observability.metrics import Registry, REGISTRY
+from observability.tracing import start_trace, mark, current_trace
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("demo_requests", "Requests", ["endpoint"])
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels("ws").inc()
+    requests.labels(endpoint='say "hi"').inc(2)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value)
+    assert registry.counter("demo_requests", "Requests", ["endpoint"]) is requests
+
+    text = registry.render()
+    assert "# TYPE demo_requests counter" in text
+    assert 'demo_requests_total{endpoint="ws"} 1' in text
+    assert 'demo_requests_total{endpoint="say \\"hi\\""} 2' in text
+    # Buckets are cumulative and end with +Inf
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 3' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 4' in text
+    assert "demo_seconds_count 4" in text and "demo_seconds_sum 4.05" in text
+
+def test_trace_marks_follow_the_request_task():
+    async def scenario():
+        async def request(name, delay):
+            trace = start_trace(name)
+            await asyncio.sleep(delay)
+            mark("admitted")
+            mark("admitted")  # repeats keep the first timing
+            await asyncio.sleep(delay)
+            mark("first_token")
+            return trace
+
+        first, second = await asyncio.gather(request("a", 0.01), request("b", 0.03))
+        assert [stage for stage, _ in first.marks] == ["admitted", "first_token"]
+        assert first.elapsed("first_token") < second.elapsed("first_token")
+        assert 25 < second.spans["first_token"] < 60
+        # No trace outside a request: marking is a no-op
+        assert current_trace() is None
+        mark("persisted")
+
+    asyncio.run(scenario())
+
+def test_websocket_request_is_traced_and_counted():
+    output = io.StringIO()
+    log.configure(level="INFO", fmt="json", stream=output)
+    stub = StubOllamaClient(repeat("t{i} ", 20), delay=0.002)
+    original = routes.llm_service.client
+    routes.llm_service.client = stub
+    conversation_id = f"observability-{time.time()}"
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.include_router(metrics_router)
+    sent_before = REGISTRY.value("lyra_websocket_frames", socket="chat", direction="sent", format="text")
+    completed_before = REGISTRY.value("lyra_requests", endpoint="chat", outcome="completed")
+    try:
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                websocket.send_text(json.dumps({"prompt": "secret prompt", "conversation_id": conversation_id}))
+                while websocket.receive_json()["type"] != "end":
+                    pass
+            text = client.get("/metrics").text
+    finally:
+        routes.llm_service.client = original
+        log.shutdown()
+        log.configure()
+
+    assert REGISTRY.value("lyra_requests", endpoint="chat", outcome="completed") == completed_before + 1
+    assert REGISTRY.value("lyra_websocket_frames", socket="chat", direction="sent", format="text") == sent_before + 21
+    for name in ("lyra_queue_wait_seconds_count", "lyra_time_to_first_token_seconds_count",
+                 "lyra_request_stage_seconds_bucket", "lyra_scheduler_in_flight", "lyra_websocket_frames_total"):
+        assert name in text, name
+
+    events = [json.loads(line) for line in output.getvalue().splitlines()]
+    trace = next(e for e in events if e["event"] == "request_trace" and e.get("conversation_id") == conversation_id)
+    assert list(trace["spans"]) == ["context_built", "admitted", "first_token", "last_token", "persisted"]
+    assert trace["outcome"] == "completed" and trace["chunks"] == 20
+    # Prompts never reach the log
+    assert "secret prompt" not in output.getvalue()
+
+if __name__ == "__main__":
+    test_registry_renders_prometheus_text()
+    test_trace_marks_follow_the_request_task()
+    test_websocket_request_is_traced_and_counted()
+    print("✅ Observability tests passed")
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import routes
+from api.metrics import router as metrics_router
+from brain.ollama_pool import OllamaPool
+from benchmarks.fake_ollama import FakeOllama
+
+async def stream_chat(client, prompt="hi"):
+    reply = ""
+    async for chunk in await client.chat(model="m", messages=[{"role": "user", "content": prompt}], stream=True):
+        reply += chunk["message"]["content"]
+    return reply
+
+def test_pool_bounds_and_reuses_connections_under_load():
+    async def scenario(pool, fake):
+        replies = await asyncio.gather(*(stream_chat(pool.client, f"q{i}") for i in range(30)))
+        assert all(reply == "a b c" for reply in replies)
+        stats = pool.metrics()
+        # 30 concurrent streams shared at most 3 connections, each reused
+        assert fake.connections <= 3
+        assert stats["connections_opened"] == fake.connections
+        assert stats["requests"] == 30 and stats["reused_requests"] >= 27
+        assert stats["peak_in_flight"] == 30 and stats["in_flight"] == 0
+        assert stats["active_connections"] == 0 and stats["idle_connections"] == fake.connections
+
+        await pool.close()
+        assert pool.connection_counts() == {"active": 0, "idle": 0}
+        # A closed pool reconnects on the next request
+        opened = fake.connections
+        assert await stream_chat(pool.client) == "a b c"
+        assert fake.connections == opened + 1
+        await pool.close()
+
+    with FakeOllama(ttft=0.01, token_rate=500, reply="a b c") as fake:
+        asyncio.run(scenario(OllamaPool(host=fake.url, max_connections=3), fake))
+
+def test_sequential_requests_skip_connection_setup():
+    async def scenario(pool):
+        for _ in range(5):
+            await stream_chat(pool.client)
+        await pool.close()
+
+    with FakeOllama(reply="a b c") as fake:
+        pool = OllamaPool(host=fake.url)
+        asyncio.run(scenario(pool))
+    # Only the first request paid for a TCP connect
+    assert fake.connections == 1 and pool.connections_opened == 1
+    assert pool.metrics()["reused_requests"] == 4
+
+def test_unknown_connection_counts_when_httpx_hides_its_pool():
+    async def scenario(pool):
+        assert await stream_chat(pool.client) == "a b c"
+        # As if an httpx upgrade moved the pool: counts go unknown instead of failing
+        transport = pool._transport.open()
+        hidden, transport._pool = transport._pool, object()
+        try:
+            assert pool.connection_counts() is None
+            stats = pool.metrics()
+            assert stats["connections"] is None and stats["utilization"] is None
+            assert stats["requests"] == 1 and stats["connections_opened"] == 1
+        finally:
+            transport._pool = hidden
+        await pool.close()
+
+    with FakeOllama(reply="a b c") as fake:
+        asyncio.run(scenario(OllamaPool(host=fake.url)))
+
+def test_services_share_one_pool_for_the_app_lifespan():
+    services = routes.services
+    assert routes.llm_service.client is services.ollama.client
+    assert all(lifecycle.client is services.ollama.client for lifecycle in routes.llm_service.lifecycles.values())
+    assert routes.agent.llm_service is routes.llm_service
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.include_router(metrics_router)
+    with TestClient(app) as client:
+        stats = client.get("/api/v1/ollama/stats").json()
+        assert stats["max_connections"] == services.ollama.max_connections
+        text = client.get("/metrics").text
+        assert 'lyra_ollama_pool_connections{state="idle"}' in text
+        assert "lyra_ollama_pool_max_connections" in text
+    # Shutdown closed every pooled connection
+    assert services.ollama.connection_counts() == {"active": 0, "idle": 0}
+
+    from main import app as main_app
+    paths = [route.path for route in main_app.routes]
+    assert paths.count("/api/v1/ws/chat") == 1
+
+if __name__ == "__main__":
+    test_pool_bounds_and_reuses_connections_under_load()
+    test_sequential_requests_skip_connection_setup()
+    test_unknown_connection_counts_when_httpx_hides_its_pool()
+    test_services_share_one_pool_for_the_app_lifespan()
+    print("✅ Ollama pool tests passed")
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import tempfile
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from ollama import AsyncClient
+
+from api import routes
+from brain.context_builder import ContextBuilder
+from brain.llm_service import LLMService
+from benchmarks.fake_ollama import FakeOllama
+from memory.embeddings import HashingEmbedder
+from memory.storage import MemoryManager
+from memory.vector_index import VectorIndex
+
+def converse(llm, memory, conversation_id, prompts):
+    async def scenario():
+        for prompt in prompts:
+            reply = ""
+            async for chunk in llm.stream_response(prompt, "You are Lyra", conversation_id):
+                reply += chunk
+            memory.add_message(conversation_id, "user", prompt)
+            memory.add_message(conversation_id, "assistant", reply)
+    asyncio.run(scenario())
+
+def test_follow_up_turns_only_evaluate_the_new_messages():
+    with tempfile.TemporaryDirectory() as tmp, FakeOllama(reply="Sure, happy to help with that.") as fake:
+        index = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder())
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+        llm = LLMService(
+            model_name="m",
+            context_builder=ContextBuilder(memory, token_budgets={"m": 4096}, eviction_target=0.6),
+            client=AsyncClient(host=fake.url)
+        )
+        memory.add_message("notes", "user", "My favourite editor is kate and my shell is fish")
+        converse(llm, memory, "chat", [f"Tell me about topic {i}, my editor and my shell. " + "detail " * 30 for i in range(8)])
+
+        report = llm.sessions.find("chat").report()
+        first, *follow_ups = report["turns"]
+        assert first["prefix_tokens"] == 0
+        # Recalled memories sit after the history, so each turn only evaluates
+        # the last exchange, the snippets and the new prompt, however long the
+        # conversation gets
+        evaluated = [turn["prompt_eval_tokens"] for turn in follow_ups]
+        assert evaluated[1:] == [evaluated[0]] * (len(evaluated) - 1)
+        assert all(later["prefix_tokens"] > earlier["prefix_tokens"] for earlier, later in zip(follow_ups, follow_ups[1:]))
+        last = follow_ups[-1]
+        assert last["prompt_tokens"] > first["prompt_tokens"] * 5
+        assert last["prefix_tokens"] > last["prompt_tokens"] * 0.7
+
+        stats = llm.sessions.metrics()
+        assert stats["turns"] == 8 and stats["sessions"] == 1 and stats["prefix_share"] > 0.4
+        memory.close()
+
+def test_session_endpoints_report_prompt_eval_per_turn():
+    conversation_id = f"session-{uuid.uuid4().hex}"
+    app = FastAPI()
+    app.include_router(routes.router)
+    original = routes.llm_service.client
+    with FakeOllama(reply="Noted.") as fake:
+        routes.llm_service.client = AsyncClient(host=fake.url)
+        try:
+            with TestClient(app) as client:
+                assert client.get(f"/api/v1/sessions/{conversation_id}").status_code == 404
+                for prompt in ("Remember that I like tea", "What do I like?"):
+                    response = client.post("/api/v1/chat", json={"prompt": prompt, "system_prompt": "You are Lyra", "conversation_id": conversation_id})
+                    assert response.status_code == 200
+                report = client.get(f"/api/v1/sessions/{conversation_id}").json()
+                stats = client.get("/api/v1/sessions/stats").json()
+        finally:
+            routes.llm_service.client = original
+    first, second = report["turns"]
+    assert second["messages"] >= first["messages"] + 2
+    assert second["prefix_tokens"] > 0
+    assert all(turn["prompt_eval_tokens"] > 0 and turn["prompt_eval_ms"] >= 0 for turn in report["turns"])
+    assert stats["turns"] >= 2
+
+if __name__ == "__main__":
+    test_follow_up_turns_only_evaluate_the_new_messages()
+    test_session_endpoints_report_prompt_eval_per_turn()
+    print("✅ Prompt cache tests passed")
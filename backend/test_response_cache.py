@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from conftest import StubOllamaClient, make_llm
+from brain.response_cache import ResponseCache
+
+REPLY = "Lyra uses ISO 8601 timestamps."
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+GREEDY = {"temperature": 0}
+
+def test_hits_on_normalized_prompt_and_replays_stream():
+    llm = make_llm(StubOllamaClient(REPLY), response_cache=ResponseCache())
+    first = asyncio.run(llm.generate_response("What's the time format?", "Be brief", options=GREEDY))
+    second = asyncio.run(llm.generate_response("  what's the TIME   format? ", "Be brief", options=GREEDY))
+    assert first == second and len(llm.client.requests) == 1
+
+    chunks = asyncio.run(collect(llm.stream_response("What's the time format?", "Be brief", options=GREEDY)))
+    assert "".join(chunks) == first and len(chunks) > 1
+    assert len(llm.client.requests) == 1
+
+    # A different system prompt is a different key
+    asyncio.run(llm.generate_response("What's the time format?", options=GREEDY))
+    assert len(llm.client.requests) == 2
+    metrics = llm.response_cache.metrics()
+    assert metrics["hits"] == 2 and metrics["misses"] == 2
+
+def test_bypasses_sampling_and_history():
+    llm = make_llm(StubOllamaClient(REPLY), response_cache=ResponseCache())
+    for _ in range(2):
+        asyncio.run(llm.generate_response("Tell me a joke", options={"temperature": 0.9}))
+    assert len(llm.client.requests) == 2
+
+    for _ in range(2):
+        asyncio.run(llm.generate_response("Tell me a joke", options={"temperature": 0.9, "seed": 7}))
+    assert len(llm.client.requests) == 3
+
+    # Without options Ollama samples at its default temperature
+    for _ in range(2):
+        asyncio.run(llm.generate_response("Tell me a joke"))
+    assert len(llm.client.requests) == 5
+    assert llm.response_cache.metrics()["bypassed"] == 4
+
+def test_lru_ttl_and_disk_tier():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for key in "abc":
+        cache.put(key, key.upper())
+    assert cache.get("a") is None and cache.get("c") == "C"
+    assert cache.metrics()["evictions"] == 1
+
+    expiring = ResponseCache(ttl=-1)
+    expiring.put("k", "v")
+    assert expiring.get("k") is None and expiring.stats["expirations"] == 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        disk = ResponseCache(disk_path=path)
+        disk.put("key", "persisted")
+        disk.close()
+
+        reopened = ResponseCache(disk_path=path)
+        assert reopened.get("key") == "persisted"
+        assert reopened.stats["disk_hits"] == 1
+        assert reopened.get("key") == "persisted" and reopened.stats["hits"] == 1
+        reopened.close()
+
+def test_disk_tier_is_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(max_entries=1, disk_path=os.path.join(tmp, "cache.db"), max_disk_entries=5, prune_interval=4)
+        for i in range(12):
+            cache.put(f"key-{i}", f"value-{i}")
+            time.sleep(0.001)
+        cache.prune()
+        assert cache._disk.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 5
+        # The oldest rows went first
+        assert cache.get("key-0") is None and cache.get("key-11") == "value-11" and cache.get("key-7") == "value-7"
+        assert cache.metrics()["disk_evictions"] == 7
+        cache.close()
+
+        # Expired rows are dropped when the cache is opened again
+        cache.ttl = -1
+        cache.open()
+        assert cache._disk.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+        cache.close()
+
+if __name__ == "__main__":
+    test_hits_on_normalized_prompt_and_replays_stream()
+    test_bypasses_sampling_and_history()
+    test_lru_ttl_and_disk_tier()
+    test_disk_tier_is_bounded()
+    print("✅ Response cache tests passed")
@@ -0,0 +1,109 @@
+import asyncio
+
+from conftest import StubOllamaClient, make_llm, repeat
+from brain.scheduler import RequestScheduler, Priority
+
+def test_priority_order_and_positions():
+    async def scenario():
+        scheduler = RequestScheduler(max_in_flight=1, report_interval=0.01)
+        order = []
+        positions = {}
+
+        async def job(name, priority, hold=0.02):
+            async def report(position, waited):
+                positions.setdefault(name, []).append(position)
+            async with scheduler.slot(priority, report):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        first = asyncio.create_task(job("first", Priority.BATCH))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(job("batch", Priority.BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(job("interactive", Priority.INTERACTIVE))
+        await asyncio.gather(first, batch, interactive)
+
+        assert order == ["first", "interactive", "batch"]
+        assert positions["batch"][0] == 1 and 2 in positions["batch"]
+        assert positions["interactive"] == [1, 0]
+        metrics = scheduler.metrics()
+        assert metrics["completed"] == 3 and metrics["in_flight"] == 0 and metrics["queued"] == 0
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        scheduler = RequestScheduler(max_in_flight=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot():
+                await release.wait()
+
+        async def waiter():
+            async with scheduler.slot():
+                pass
+
+        held = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(waiter())
+        await asyncio.sleep(0.01)
+        assert scheduler.queued == 1
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert scheduler.queued == 0
+        release.set()
+        await held
+        assert scheduler.in_flight == 0 and scheduler.stats["cancelled_while_queued"] == 1
+
+    asyncio.run(scenario())
+
+def test_cancelling_consumer_closes_upstream_stream():
+    async def scenario():
+        llm = make_llm(StubOllamaClient(repeat("t{i} ", 1000), delay=0.01))
+
+        async def consume():
+            async for _ in llm.stream_response("Tell me a long story"):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert len(llm.client.closed) == 1
+        assert llm.client.sent < 1000
+        assert llm.scheduler.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_websocket_disconnect_cancels_generation():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes
+
+    client_stub = StubOllamaClient(repeat("t{i} ", 1000), delay=0.005)
+    original = routes.llm_service.client
+    routes.llm_service.client = client_stub
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                websocket.send_text('{"prompt": "Tell me a long story"}')
+                assert websocket.receive_json()["type"] == "chunk"
+            for _ in range(100):
+                if client_stub.closed:
+                    break
+                asyncio.run(asyncio.sleep(0.01))
+        assert len(client_stub.closed) == 1
+        assert client_stub.sent < 1000
+    finally:
+        routes.llm_service.client = original
+
+if __name__ == "__main__":
+    test_priority_order_and_positions()
+    test_cancelled_waiter_leaves_queue()
+    test_cancelling_consumer_closes_upstream_stream()
+    test_websocket_disconnect_cancels_generation()
+    print("✅ Scheduler tests passed")
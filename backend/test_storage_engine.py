@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import time
+
+from memory.storage import MemoryManager
+
+def test_persistence_and_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        memory = MemoryManager(path)
+        conv_id = memory.create_conversation("conv-1")
+        memory.add_message(conv_id, "user", "Hello, how are you?")
+        memory.add_message(conv_id, "assistant", "I'm doing well, thank you!")
+        memory.add_message("conv-2", "user", "Auto-created conversation")
+        memory.close()
+
+        reopened = MemoryManager(path)
+        history = reopened.get_conversation_history("conv-1")
+        assert [m["content"] for m in history] == ["Hello, how are you?", "I'm doing well, thank you!"]
+        assert [c["id"] for c in reopened.conversations] == ["conv-1", "conv-2"]
+
+        # Message IDs keep increasing across restarts
+        reopened.add_message("conv-1", "user", "Still there?")
+        ids = [m["id"] for m in reopened.get_conversation_history("conv-1")]
+        assert ids == sorted(ids) and len(set(ids)) == 3
+
+        assert reopened.delete_conversation("conv-2")
+        assert not reopened.delete_conversation("conv-2")
+        reopened.close()
+
+        assert MemoryManager(path).get_conversation("conv-2") is None
+
+def test_migrates_legacy_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        legacy = [{
+            "id": "old",
+            "created_at": "2025-08-31T10:00:00",
+            "updated_at": "2025-08-31T10:01:00",
+            "messages": [
+                {"role": "user", "content": "Open kate", "timestamp": "2025-08-31T10:00:30"},
+                {"role": "assistant", "content": "Launched kate", "timestamp": "2025-08-31T10:01:00"}
+            ]
+        }]
+        with open(path, 'w') as f:
+            json.dump(legacy, f)
+
+        memory = MemoryManager(path)
+        assert not os.path.exists(path)
+        assert os.path.exists(path + ".migrated")
+        conversation = memory.get_conversation("old")
+        assert conversation["updated_at"] == "2025-08-31T10:01:00"
+        assert [m["content"] for m in conversation["messages"]] == ["Open kate", "Launched kate"]
+        memory.close()
+
+def test_write_behind_group_commit():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        memory = MemoryManager(path, write_behind=True, flush_interval=60, flush_threshold=1000)
+        for i in range(50):
+            memory.add_message("burst", "assistant", f"token {i}")
+        assert memory.store.commits == 0
+        assert len(memory.get_conversation_history("burst")) == 50
+
+        assert memory.flush() == 51
+        assert memory.store.commits == 1
+
+        memory.add_message("burst", "user", "written on close")
+        memory.close()
+        assert len(MemoryManager(path).get_conversation_history("burst")) == 51
+
+def test_write_behind_threshold_triggers_flush():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), write_behind=True, flush_interval=60, flush_threshold=10)
+        for i in range(10):
+            memory.add_message("burst", "user", f"message {i}")
+        deadline = time.monotonic() + 5
+        while memory.store.commits == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert memory.store.commits == 1
+        memory.close()
+
+if __name__ == "__main__":
+    test_persistence_and_index()
+    test_migrates_legacy_json()
+    test_write_behind_group_commit()
+    test_write_behind_threshold_triggers_flush()
+    print("✅ Storage engine tests passed")
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from conftest import StubOllamaClient, repeat
+from api.streaming import StreamOptions, coalesce, encode_chunk, CHUNK_FRAME, TAGGED_CHUNK_FRAME
+
+async def tokens(count, delay=0.0, stall_after=None, stall=0.0):
+    for i in range(count):
+        if stall_after is not None and i == stall_after:
+            await asyncio.sleep(stall)
+        await asyncio.sleep(delay)
+        yield f"t{i} "
+
+def test_coalesce_by_window_and_size():
+    async def scenario():
+        # The first token passes straight through; the rest are merged per window
+        chunks = [c async for c in coalesce(tokens(50, delay=0.001), window=0.05)]
+        assert chunks[0] == "t0 "
+        assert 2 <= len(chunks) < 20
+        assert "".join(chunks) == "".join(f"t{i} " for i in range(50))
+
+        # A byte limit flushes without waiting for the window
+        chunks = [c async for c in coalesce(tokens(50), window=10, max_bytes=40)]
+        assert all(len(c) <= 40 + 4 for c in chunks) and len(chunks) > 5
+
+        # A stalled stream still flushes what is buffered when the window expires
+        received = []
+        async def consume():
+            async for chunk in coalesce(tokens(10, stall_after=5, stall=0.3), window=0.02):
+                received.append((chunk, asyncio.get_running_loop().time()))
+        started = asyncio.get_running_loop().time()
+        await consume()
+        before_stall = [c for c, at in received if at - started < 0.25]
+        assert "".join(before_stall) == "t0 t1 t2 t3 t4 "
+
+    asyncio.run(scenario())
+
+def test_closing_coalescer_closes_source():
+    async def scenario():
+        closed = []
+        async def source():
+            try:
+                for i in range(1000):
+                    await asyncio.sleep(0.001)
+                    yield f"t{i} "
+            finally:
+                closed.append(True)
+
+        stream = coalesce(source(), window=0.01)
+        assert await anext(stream) == "t0 "
+        await stream.aclose()
+        assert closed == [True]
+
+    asyncio.run(scenario())
+
+def test_websocket_binary_coalesced_mode():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes
+
+    original = routes.llm_service.client
+    routes.llm_service.client = StubOllamaClient(repeat("t{i} ", 200), delay=0.001)
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/chat") as websocket:
+                websocket.send_text(json.dumps({"type": "configure", "coalesce_ms": 20, "format": "binary"}))
+                assert websocket.receive_json() == {"type": "configured", "coalesce_ms": 20.0, "max_bytes": 0, "format": "binary"}
+                websocket.send_text(json.dumps({"prompt": "Tell me a story"}))
+                text, frames = "", 0
+                while True:
+                    message = websocket.receive()
+                    if message.get("bytes") is not None:
+                        assert message["bytes"][0] == CHUNK_FRAME
+                        text += message["bytes"][1:].decode("utf-8")
+                        frames += 1
+                    elif json.loads(message["text"])["type"] == "end":
+                        break
+                assert text == "".join(f"t{i} " for i in range(200))
+                assert frames < 100
+
+                # Default JSON frames are still available per connection
+                websocket.send_text(json.dumps({"type": "configure"}))
+                assert websocket.receive_json()["format"] == "json"
+    finally:
+        routes.llm_service.client = original
+
+def test_stream_options_are_clamped():
+    options = StreamOptions.from_message({"coalesce_ms": 10_000, "max_bytes": -5, "format": "msgpack"})
+    assert options.coalesce_ms == 250 and options.max_bytes == 0 and not options.binary
+    assert encode_chunk("hé") == b"\x01h\xc3\xa9"
+    assert encode_chunk("hi", "r1") == bytes((TAGGED_CHUNK_FRAME, 2)) + b"r1hi"
+
+if __name__ == "__main__":
+    test_coalesce_by_window_and_size()
+    test_closing_coalescer_closes_source()
+    test_websocket_binary_coalesced_mode()
+    test_stream_options_are_clamped()
+    print("✅ Stream coalescing tests passed")
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+
+from tools.executor import BlockingTool, Tool, ToolExecutor
+
+class SleepTool(Tool):
+    """Awaits for ``parameters["seconds"]`` and tracks how many calls overlap"""
+
+    def __init__(self, name="sleep", **kwargs):
+        super().__init__(name=name, description="Sleep for a while", **kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def execute(self, parameters):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(parameters.get("seconds", 0.05))
+        finally:
+            self.active -= 1
+        return {"status": "success", "message": "Slept"}
+
+class BusyTool(BlockingTool):
+    """Blocks its worker with time.sleep and reports where it ran"""
+
+    def __init__(self, offload="thread"):
+        super().__init__(name=f"busy_{offload}", description="Block for a while", offload=offload)
+
+    def run(self, parameters):
+        time.sleep(parameters.get("seconds", 0.2))
+        return {"status": "success", "pid": os.getpid()}
+
+def make_executor(*tools):
+    executor = ToolExecutor()
+    for tool in tools:
+        executor.register_tool(tool)
+        executor.grant_permission(tool.name)
+    return executor
+
+def test_timeouts_and_concurrency_limits():
+    async def scenario():
+        slow = SleepTool(name="slow", timeout=0.05)
+        limited = SleepTool(name="limited", max_concurrency=2)
+        executor = make_executor(slow, limited)
+
+        result = await executor.execute_tool("slow", {"seconds": 1})
+        assert result == {"error": "Tool 'slow' timed out after 0.05s"}
+
+        started = time.monotonic()
+        results = await executor.execute_tools([("limited", {"seconds": 0.05})] * 6)
+        elapsed = time.monotonic() - started
+        assert all(r["status"] == "success" for r in results)
+        assert limited.peak == 2
+        assert 0.14 < elapsed < 0.4  # three rounds of two
+
+        stats = executor.metrics()
+        assert stats["slow"]["timeout"] == 1 and stats["slow"]["calls"] == 1
+        assert stats["limited"]["success"] == 6
+        assert sum(stats["limited"]["histogram_ms"].values()) == 6
+
+    asyncio.run(scenario())
+
+def test_limits_work_across_event_loops():
+    limited = SleepTool(name="limited", max_concurrency=2, timeout=1)
+    executor = make_executor(limited)
+
+    async def scenario():
+        results = await executor.execute_tools([("limited", {"seconds": 0.02})] * 4)
+        assert all(r["status"] == "success" for r in results)
+
+    # Each app lifespan (or TestClient) runs its own loop; contended limits
+    # from an earlier loop must not be reused
+    for _ in range(2):
+        asyncio.run(scenario())
+    assert limited.peak == 2 and executor.metrics()["limited"]["success"] == 8
+
+def test_blocking_tools_are_offloaded():
+    async def scenario():
+        executor = make_executor(BusyTool("thread"), BusyTool("process"))
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        try:
+            started = time.monotonic()
+            threaded = await executor.execute_tools([("busy_thread", {"seconds": 0.2})] * 3)
+            assert time.monotonic() - started < 0.35  # the three calls overlapped
+            assert all(r["pid"] == os.getpid() for r in threaded)
+            # The event loop kept running while the workers blocked
+            assert ticks >= 10
+
+            result = await executor.execute_tool("busy_process", {"seconds": 0.01})
+            assert result["status"] == "success" and result["pid"] != os.getpid()
+        finally:
+            beat.cancel()
+            executor.close()
+
+    asyncio.run(scenario())
+
+def test_batches_still_check_permissions():
+    async def scenario():
+        allowed = SleepTool(name="allowed")
+        blocked = SleepTool(name="blocked")
+        executor = make_executor(allowed)
+        executor.register_tool(blocked)
+
+        results = await executor.execute_tools([
+            ("allowed", {"seconds": 0.01}),
+            ("blocked", {"seconds": 0.01}),
+            ("missing", {})
+        ])
+        assert results[0]["status"] == "success"
+        assert results[1] == {"error": "Permission denied for tool 'blocked'"}
+        assert results[2] == {"error": "Tool 'missing' not found"}
+        assert blocked.peak == 0
+
+        stats = executor.metrics()
+        assert stats["blocked"]["denied"] == 1 and stats["allowed"]["success"] == 1
+        assert 5 < stats["allowed"]["latency_ms_p50"] < 100
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_timeouts_and_concurrency_limits()
+    test_limits_work_across_event_loops()
+    test_blocking_tools_are_offloaded()
+    test_batches_still_check_permissions()
+    print("✅ Tool executor tests passed")
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import time
+
+from voice.synthesizer import SineSynthesizer
+from voice.tts import SentenceSegmenter, TTSService, SpeechOutput
+
+REPLY = "Sure, I can help with that. Firefox is opening now! Is there anything else you need today?"
+
+def make_tts(**options):
+    return TTSService("sine", options, workers=2)
+
+def test_segmenter_releases_sentences_as_they_stream():
+    segmenter = SentenceSegmenter()
+    released = []
+    for word in REPLY.split(" "):
+        released.append(segmenter.feed(word + " "))
+    segments = [s for batch in released for s in batch] + segmenter.flush()
+    assert segments == ["Sure, I can help with that.", "Firefox is opening now!", "Is there anything else you need today?"]
+    # The first sentence is released as soon as the next word arrives, not at the end
+    first = next(i for i, batch in enumerate(released) if batch)
+    assert first < len(released) // 2
+
+    # An early clause boundary gets the first audio going; long runs are split
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Well, looking at your calendar for the week, there are ") == ["Well, looking at your calendar for the week,"]
+    segmenter = SentenceSegmenter(max_chars=40)
+    segments = segmenter.feed("word " * 30)
+    assert segments and all(len(s) <= 40 for s in segments)
+    assert " ".join(segments + segmenter.flush()) == " ".join(["word"] * 30)
+
+def test_first_audio_before_generation_finishes_in_order():
+    async def scenario():
+        tts = make_tts(delay=0.05)
+        try:
+            await tts.warm()
+            audio = bytearray()
+            starts = []
+
+            async def send(pcm):
+                audio.extend(pcm)
+
+            async def on_start(sample_rate):
+                starts.append(sample_rate)
+
+            speech = SpeechOutput(tts, send, on_start=on_start)
+            for word in REPLY.split(" "):
+                speech.feed(word + " ")
+                await asyncio.sleep(0.03)
+            generation_done = time.monotonic()
+            await speech.finish()
+
+            assert speech.first_audio_at < generation_done
+            assert starts == [16000]
+            engine = SineSynthesizer()
+            expected = b"".join(engine.synthesize(segment) for segment in speech.spoken)
+            assert bytes(audio) == expected and len(speech.spoken) == 3
+        finally:
+            tts.close()
+
+    asyncio.run(scenario())
+
+def test_phrase_cache_and_cancellation():
+    async def scenario():
+        tts = make_tts(delay=0.2)
+        try:
+            await tts.warm(["Okay."])
+            started = time.monotonic()
+            rate, pcm = await tts.synthesize("okay.")
+            assert time.monotonic() - started < 0.1
+            assert tts.metrics()["cache"]["hits"] == 1
+
+            # Closing drops segments that have not been spoken yet
+            sent = []
+            async def send(pcm):
+                sent.append(pcm)
+            speech = SpeechOutput(tts, send)
+            speech.feed("This is a first long sentence here. And then a second sentence. ")
+            await speech.close()
+            assert sent == [] and speech.spoken == []
+        finally:
+            tts.close()
+
+    asyncio.run(scenario())
+
+def test_voice_websocket_speaks_reply():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes, voice
+    from voice.recognizer import StubRecognizer
+    from conftest import StubOllamaClient, echo_prompt
+    from test_voice_pipeline import tone, silence, blocks
+
+    original_client, original_recognizer, original_tts = routes.llm_service.client, voice.recognizer, voice.tts_service
+    routes.llm_service.client = StubOllamaClient(echo_prompt, delay=0.002)
+    voice.recognizer = StubRecognizer("Hello. 12")
+    tts = voice.tts_service = make_tts()
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        app.include_router(voice.router)
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/voice") as websocket:
+                websocket.send_text(json.dumps({"type": "configure", "speak": True}))
+                assert websocket.receive_json()["speak"] is True
+                for block in blocks(silence(0.2) + tone(0.6) + silence(0.6)):
+                    websocket.send_bytes(block)
+
+                frames, audio = [], b""
+                while not frames or frames[-1]["type"] != "audio_end":
+                    message = websocket.receive()
+                    if message.get("bytes") is not None:
+                        assert message["bytes"][:2] == b"\x03\x0b" and message["bytes"][2:13] == b"utterance-1"
+                        audio += message["bytes"][13:]
+                    else:
+                        frames.append(json.loads(message["text"]))
+                kinds = [frame["type"] for frame in frames]
+                assert kinds.index("audio_start") < kinds.index("audio_end")
+                assert next(f for f in frames if f["type"] == "audio_start")["sample_rate"] == 16000
+                assert len(audio) > 0 and frames[-1]["end_of_speech_to_first_audio_ms"] > 0
+    finally:
+        tts.close()
+        routes.llm_service.client, voice.recognizer, voice.tts_service = original_client, original_recognizer, original_tts
+
+def test_voice_websocket_reports_tts_that_cannot_start():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes, voice
+    from voice.recognizer import StubRecognizer
+
+    originals = voice.recognizer, voice.tts_service, voice.TTS_ENGINE, voice.TTS_OPTIONS
+    voice.recognizer = StubRecognizer("hello")
+    voice.tts_service = None
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        app.include_router(voice.router)
+        with TestClient(app) as client, client.websocket_connect("/api/v1/ws/voice") as websocket:
+            # Rejected in the parent: no worker is started
+            voice.TTS_ENGINE, voice.TTS_OPTIONS = "piper", {"model_path": None}
+            websocket.send_text(json.dumps({"type": "configure", "speak": True}))
+            assert websocket.receive_json()["type"] == "error"
+            assert websocket.receive_json()["speak"] is False
+
+            # The engine fails inside the workers, which die while starting
+            voice.TTS_ENGINE, voice.TTS_OPTIONS = "sine", {"unknown_option": 1}
+            websocket.send_text(json.dumps({"type": "configure", "speak": True}))
+            error = websocket.receive_json()
+            assert error["type"] == "error" and "failed to start" in error["content"]
+            assert websocket.receive_json()["speak"] is False
+            assert voice.tts_service is None
+
+            # The session stays usable
+            websocket.send_text(json.dumps({"type": "configure", "speak": False}))
+            assert websocket.receive_json()["speak"] is False
+    finally:
+        voice.recognizer, voice.tts_service, voice.TTS_ENGINE, voice.TTS_OPTIONS = originals
+
+if __name__ == "__main__":
+    test_segmenter_releases_sentences_as_they_stream()
+    test_first_audio_before_generation_finishes_in_order()
+    test_phrase_cache_and_cancellation()
+    test_voice_websocket_speaks_reply()
+    test_voice_websocket_reports_tts_that_cannot_start()
+    print("✅ TTS pipeline tests passed")
@@ -0,0 +1,131 @@
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.fake_ollama import FakeOllama
+from brain.context_builder import ContextBuilder
+from memory.embeddings import HashingEmbedder, OllamaEmbedder, embedder_from_env
+from memory.storage import MemoryManager
+from memory.vector_index import VectorIndex
+
+def test_hashing_embedder_is_deterministic():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed(["Open the kate editor", ""])
+    second = HashingEmbedder(dim=64).embed(["Open the kate editor", ""])
+    assert first.shape == (2, 64) and first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert not first[1].any()
+
+def test_index_grows_and_persists():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, HashingEmbedder(dim=32), batch_size=8, initial_capacity=4)
+        index.add_many((i, f"message number {i}") for i in range(1, 51))
+        assert index.count == 50 and index.capacity >= 50
+        index.close()
+
+        reopened = VectorIndex(tmp, HashingEmbedder(dim=32))
+        assert reopened.count == 50 and reopened.last_id == 50
+        assert reopened.search("message number 17", k=1)[0][0] == 17
+
+def test_semantic_recall_across_conversations():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder(), batch_size=4)
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+        memory.add_message("music", "user", "Play some jazz music while I work")
+        memory.add_message("music", "assistant", "Starting a jazz playlist")
+        memory.add_message("code", "user", "Open kate so I can edit my python script")
+        memory.add_message("code", "assistant", "Launched kate")
+        memory.add_message("weather", "user", "Will it rain in Jakarta tomorrow?")
+
+        results = memory.search_messages("edit python script in kate", k=2)
+        assert results[0]["conversation_id"] == "code"
+        assert results[0]["content"] == "Open kate so I can edit my python script"
+
+        scoped = memory.search_messages("jazz", k=5, conversation_id="weather")
+        assert [r["conversation_id"] for r in scoped] == ["weather"]
+
+        memory.delete_conversation("code")
+        assert all(r["conversation_id"] != "code" for r in memory.search_messages("kate python", k=3))
+        memory.close()
+
+        # Messages written while the index was closed are embedded on startup
+        plain = MemoryManager(os.path.join(tmp, "conversations.json"))
+        plain.add_message("weather", "assistant", "Expect heavy thunderstorms")
+        plain.close()
+        index = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder())
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+        assert memory.search_messages("thunderstorms", k=1)[0]["content"] == "Expect heavy thunderstorms"
+        memory.close()
+
+def test_deleted_conversations_leave_the_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder(), batch_size=4)
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+        for i in range(6):
+            memory.add_message("kept", "user", f"Remind me about the dentist on day {i}")
+        for i in range(10):
+            memory.add_message(f"gone-{i}", "user", "Remind me about the dentist")
+        memory.add_message("queued", "user", "Remind me about the dentist")
+        assert index.pending
+
+        for i in range(10):
+            memory.delete_conversation(f"gone-{i}")
+        memory.delete_conversation("queued")
+        # The closest matches were deleted, yet a full page of results remains
+        results = memory.search_messages("remind me about the dentist", k=5)
+        assert len(results) == 5 and {r["conversation_id"] for r in results} == {"kept"}
+        memory.close()
+
+        # Tombstones persist, and do not hide the last embedded ID
+        reopened = VectorIndex(os.path.join(tmp, "vectors"), HashingEmbedder())
+        assert reopened.count == 16 and reopened.last_id == 16
+        assert len(reopened.search("dentist", k=20)) == 6
+
+def test_ollama_embedder_recall_and_fallback():
+    with tempfile.TemporaryDirectory() as tmp:
+        with FakeOllama() as fake:
+            embedder = OllamaEmbedder("embed-model", dim=32, host=fake.url)
+            vectors = embedder.embed(["Play some jazz", "Open kate"])
+            assert vectors.shape == (2, 32) and vectors.dtype == np.float32
+            assert fake.requests["/api/embed"] == 1
+
+            index = VectorIndex(os.path.join(tmp, "vectors"), embedder, batch_size=2)
+            memory = MemoryManager(os.path.join(tmp, "conversations.json"), vector_index=index)
+            memory.add_message("music", "user", "Play some jazz")
+            memory.add_message("code", "user", "Open kate")
+            # The fake embeds each text as a digest, so only identical text matches exactly
+            assert memory.search_messages("Open kate", k=1)[0]["conversation_id"] == "code"
+            memory.close()
+
+        # With the model unreachable, messages stay queued and prompts are built without recall
+        index = VectorIndex(os.path.join(tmp, "vectors"), OllamaEmbedder("embed-model", dim=32, host="http://127.0.0.1:9", timeout=1))
+        memory = MemoryManager(os.path.join(tmp, "conversations.json"), write_behind=True, vector_index=index)
+        memory.add_message("code", "assistant", "Launched kate")
+        messages = ContextBuilder(memory).build("m", "Open kate", conversation_id="code")
+        assert [m["content"] for m in messages] == ["Open kate", "Launched kate", "Open kate"]
+        memory.close()
+        assert index.pending == 1
+
+def test_embedder_is_configured_from_the_environment():
+    original = {key: os.environ.pop(key, None) for key in ("LYRA_EMBED_MODEL", "LYRA_EMBED_DIM")}
+    try:
+        assert isinstance(embedder_from_env(), HashingEmbedder)
+        os.environ.update(LYRA_EMBED_MODEL="nomic-embed-text", LYRA_EMBED_DIM="384")
+        embedder = embedder_from_env("http://127.0.0.1:11434")
+        assert isinstance(embedder, OllamaEmbedder)
+        assert (embedder.name, embedder.dim) == ("ollama-nomic-embed-text", 384)
+    finally:
+        for key, value in original.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+if __name__ == "__main__":
+    test_hashing_embedder_is_deterministic()
+    test_index_grows_and_persists()
+    test_semantic_recall_across_conversations()
+    test_deleted_conversations_leave_the_index()
+    test_ollama_embedder_recall_and_fallback()
+    test_embedder_is_configured_from_the_environment()
+    print("✅ Vector index tests passed")
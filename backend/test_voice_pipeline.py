@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+
+from voice.vad import VoiceActivityDetector, pcm16_to_float
+from voice.recognizer import StubRecognizer
+from voice.pipeline import SpeechPipeline
+
+RATE = 16000
+
+def tone(seconds, freq=220.0, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t) * 32767).astype("<i2").tobytes()
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype="<i2").tobytes()
+
+def hiss(seconds, amplitude=0.1):
+    noise = np.random.default_rng(0).uniform(-amplitude, amplitude, int(seconds * RATE))
+    return (noise * 32767).astype("<i2").tobytes()
+
+def blocks(pcm, size=640):
+    """Split PCM into 20 ms network-sized blocks"""
+    return [pcm[i:i + size] for i in range(0, len(pcm), size)]
+
+def test_vad_finds_speech_and_drops_silence_and_hiss():
+    vad = VoiceActivityDetector(sample_rate=RATE)
+    audio = silence(0.5) + tone(0.8) + silence(0.6) + hiss(0.5) + silence(0.2) + tone(0.4) + silence(0.6)
+    events = []
+    for block in blocks(audio, size=1000):
+        events.extend(vad.process(pcm16_to_float(block)))
+
+    kinds = [kind for kind, _ in events if kind != "audio"]
+    assert kinds == ["start", "end", "start", "end"]
+    speech = sum(samples.size for kind, samples in events if kind == "audio")
+    # Only the two tones (plus the hangover tail) reach the recognizer
+    assert 1.2 * RATE <= speech <= 2.1 * RATE
+    assert vad.stats["utterances"] == 2
+    assert vad.stats["speech_frames"] < vad.stats["frames"] * 0.6
+
+def test_pipeline_emits_partials_then_final_off_the_event_loop():
+    async def scenario():
+        events = []
+        utterances = []
+        threads = set()
+        recognizer = StubRecognizer("open firefox and play some music", words_per_second=3, delay=0.01)
+        original = recognizer.transcribe
+
+        def transcribe(audio, final):
+            threads.add(threading.current_thread().name)
+            return original(audio, final)
+        recognizer.transcribe = transcribe
+
+        async def emit(event):
+            events.append(event)
+
+        async def on_utterance(utterance):
+            utterances.append(utterance)
+
+        pipeline = SpeechPipeline(recognizer, emit, on_utterance, partial_interval=0.3)
+        for block in blocks(silence(0.3) + tone(1.5) + silence(0.6)):
+            await pipeline.feed(block)
+            await asyncio.sleep(0.001)
+        await pipeline.finish()
+
+        kinds = [event["type"] for event in events]
+        assert kinds[0] == "speech_start" and kinds[-2:] == ["speech_end", "final"]
+        partials = [event["text"] for event in events if event["type"] == "partial"]
+        assert partials and all("open firefox and play some music".startswith(p) for p in partials)
+        assert events[-1]["text"] == "open firefox and play some music"
+        assert len(utterances) == 1 and 1.4 < utterances[0].audio_seconds < 2.1
+        assert threading.main_thread().name not in threads
+
+    asyncio.run(scenario())
+
+def test_frames_that_split_a_sample_are_joined():
+    async def scenario():
+        events = []
+        utterances = []
+
+        async def emit(event):
+            events.append(event)
+
+        async def on_utterance(utterance):
+            utterances.append(utterance)
+
+        pipeline = SpeechPipeline(StubRecognizer("hello there"), emit, on_utterance)
+        # Odd-sized frames split samples across frames; the first is a lone byte
+        for block in [b"\x00"] + blocks(bytes(1) + tone(1.0) + silence(0.6), size=641):
+            await pipeline.feed(block)
+        await pipeline.finish()
+        assert events[-1] == {"type": "final", "text": "hello there"}
+        # Re-joined on sample boundaries, the tone is heard as sent
+        assert len(utterances) == 1 and 0.9 < utterances[0].audio_seconds < 1.7
+
+    asyncio.run(scenario())
+
+def test_voice_websocket_hands_utterance_to_llm():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes, voice
+    from conftest import StubOllamaClient, echo_prompt
+
+    original_client, original_recognizer = routes.llm_service.client, voice.recognizer
+    routes.llm_service.client = StubOllamaClient(echo_prompt, delay=0.002)
+    voice.recognizer = StubRecognizer("lyra 4")
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        app.include_router(voice.router)
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws/voice") as websocket:
+                websocket.send_text(json.dumps({"type": "configure", "sample_rate": 8000}))
+                assert websocket.receive_json()["sample_rate"] == 8000
+                # 8 kHz audio is resampled for the recognizer
+                t = np.arange(8000) / 8000
+                speech = (0.3 * np.sin(2 * np.pi * 200 * t) * 32767).astype("<i2").tobytes()
+                for block in blocks(bytes(4000) + speech + bytes(8000), size=320):
+                    websocket.send_bytes(block)
+
+                frames = []
+                while not frames or frames[-1]["type"] != "end":
+                    frames.append(websocket.receive_json())
+                kinds = [frame["type"] for frame in frames]
+                assert kinds[0] == "speech_start" and "final" in kinds
+                assert next(f for f in frames if f["type"] == "final")["text"] == "lyra 4"
+                reply = "".join(f["content"] for f in frames if f["type"] == "chunk")
+                assert reply == "lyra " * 4
+                latency = next(f for f in frames if f["type"] == "latency")
+                assert latency["request_id"] == "utterance-1"
+                assert latency["end_of_speech_to_first_token_ms"] >= latency["transcribe_ms"]
+            stats = client.get("/api/v1/voice/stats").json()
+            assert stats["utterances"] >= 1 and 0 < stats["silence_dropped"] < 1
+    finally:
+        routes.llm_service.client, voice.recognizer = original_client, original_recognizer
+
+def test_recognizer_loads_off_the_event_loop():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import routes, voice
+
+    loaded_on = []
+
+    def create(engine):
+        loaded_on.append(threading.current_thread().name)
+        return StubRecognizer("hello")
+
+    originals = voice.recognizer, voice.create_recognizer
+    voice.recognizer, voice.create_recognizer = None, create
+    try:
+        app = FastAPI()
+        app.include_router(routes.router)
+        app.include_router(voice.router)
+        with TestClient(app) as client:
+            for _ in range(2):
+                with client.websocket_connect("/api/v1/ws/voice") as websocket:
+                    websocket.send_text(json.dumps({"type": "configure"}))
+                    assert websocket.receive_json()["sample_rate"] == 16000
+        # Loaded once, on a transcription thread
+        assert len(loaded_on) == 1 and loaded_on[0].startswith("stt")
+    finally:
+        voice.recognizer, voice.create_recognizer = originals
+
+if __name__ == "__main__":
+    test_vad_finds_speech_and_drops_silence_and_hiss()
+    test_pipeline_emits_partials_then_final_off_the_event_loop()
+    test_frames_that_split_a_sample_are_joined()
+    test_voice_websocket_hands_utterance_to_llm()
+    test_recognizer_loads_off_the_event_loop()
+    print("✅ Voice pipeline tests passed")
@@ -0,0 +1,104 @@
+import asyncio
+
+import numpy as np
+
+from benchmarks.wake_word_fixtures import enrollment, stream, render, random_word, RATE, WAKE_WORD
+from voice.wakeword import FeatureRing, LogMelFrontend, WakeWordDetector, extract_templates
+from voice.recognizer import StubRecognizer
+from voice.pipeline import SpeechPipeline
+from test_voice_pipeline import tone, silence, blocks
+
+def test_frontend_streams_into_fixed_buffers():
+    audio, _ = stream(3, seed=7)
+    whole = LogMelFrontend().features(audio)
+
+    frontend = LogMelFrontend()
+    buffers = [id(frontend._samples), id(frontend._frames), id(frontend._spectrum), id(frontend._mel)]
+    ring = FeatureRing(capacity=400, width=frontend.n_mels)
+    quarter = audio.size // 4
+    # Odd block sizes exercise the carried-over partial frame
+    for part, size in enumerate((320, 17, 4000, quarter)):
+        section = audio[part * quarter:(part + 1) * quarter if part < 3 else audio.size]
+        for start in range(0, section.size, size):
+            for _, rows, _ in frontend.process(section[start:start + size]):
+                ring.append(rows)
+    assert ring.filled == len(whole)
+    assert np.allclose(ring.latest(len(whole)), whole, atol=1e-3)
+    assert buffers == [id(frontend._samples), id(frontend._frames), id(frontend._spectrum), id(frontend._mel)]
+
+def test_detector_finds_wake_words_and_ignores_other_speech():
+    templates = extract_templates(enrollment())
+    audio, wake_ends = stream(40, seed=3)
+    detector = WakeWordDetector(templates)
+    found = []
+    for start in range(0, audio.size, 320):
+        found += [(start + offset) / RATE for offset, _ in detector.process(audio[start:start + 320])]
+    assert len(found) == len(wake_ends) > 0
+    assert all(abs(at - end) <= 0.05 for at, end in zip(found, wake_ends))
+
+    # An hour-scale false trigger check is the benchmark's job; here, a
+    # minute of other words must not wake it
+    rng = np.random.default_rng(11)
+    chatter = np.concatenate([np.concatenate((render(random_word(rng), rng), np.zeros(3000, np.float32))) for _ in range(100)])
+    assert detector.process(chatter) == []
+    metrics = detector.metrics.metrics()
+    assert metrics["detections"] == len(wake_ends)
+    assert 0 < metrics["cpu_ms_per_audio_second"] < 200
+
+    # Digital silence skips the FFT and matching altogether
+    quiet = WakeWordDetector(templates)
+    quiet.process(np.zeros(RATE * 2, dtype=np.float32))
+    assert quiet.metrics.silent_seconds >= 1.9
+
+def test_pipeline_sleeps_until_the_wake_word():
+    async def scenario():
+        events = []
+        utterances = []
+        calls = []
+        recognizer = StubRecognizer("open firefox")
+        original = recognizer.transcribe
+
+        def transcribe(audio, final):
+            calls.append(final)
+            return original(audio, final)
+        recognizer.transcribe = transcribe
+
+        async def emit(event):
+            events.append(event["type"])
+
+        async def on_utterance(utterance):
+            utterances.append(utterance.text)
+
+        detector = WakeWordDetector(extract_templates(enrollment()))
+        pipeline = SpeechPipeline(recognizer, emit, on_utterance, wake_word=detector, listen_seconds=2.0)
+        wake = (render(WAKE_WORD, np.random.default_rng(5)) * 32767).astype("<i2").tobytes()
+
+        # Speech without the wake word never reaches the VAD or recognizer
+        for block in blocks(tone(1.0) + silence(0.8)):
+            await pipeline.feed(block)
+        assert events == [] and calls == []
+
+        # Wake word, then a command
+        for block in blocks(silence(0.3) + wake + silence(0.3) + tone(0.8) + silence(0.8)):
+            await pipeline.feed(block)
+        await pipeline.finish()
+        assert utterances == ["open firefox"]
+        assert events[0] == "wake" and events[-1] == "final"
+        assert events.index("speech_start") < events.index("speech_end") < events.index("sleep")
+        assert not pipeline.awake
+
+        # A wake with no command times out as a false trigger
+        events.clear()
+        for block in blocks(silence(0.3) + wake + silence(2.5)):
+            await pipeline.feed(block)
+        assert events == ["wake", "sleep"]
+        assert detector.metrics.false_triggers == 1
+        await pipeline.close()
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_frontend_streams_into_fixed_buffers()
+    test_detector_finds_wake_words_and_ignores_other_speech()
+    test_pipeline_sleeps_until_the_wake_word()
+    print("✅ Wake word tests passed")
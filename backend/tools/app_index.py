@@ -0,0 +1,350 @@
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import shlex
+import threading
+import time
+
+from observability.log import get_logger
+from tools.name_index import NameIndex
+
+CACHE_VERSION = 1
+
+# Keywords describe what an app does ("browser", "editor"); a keyword hit
+# should not outrank an app that is actually called that
+KEYWORD_WEIGHT = 0.85
+
+log = get_logger("tools.app_index")
+
+def xdg_application_dirs() -> List[str]:
+    """XDG application directories, highest precedence first"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    flatpak = [os.path.expanduser("~/.local/share/flatpak/exports/share"), "/var/lib/flatpak/exports/share"]
+    dirs = []
+    for base in [data_home, *data_dirs, *flatpak]:
+        path = os.path.join(base, "applications")
+        if base and path not in dirs:
+            dirs.append(path)
+    return dirs
+
+def exec_command(exec_line: str) -> List[str]:
+    """Split a desktop entry Exec line, dropping field codes such as %f and %U"""
+    args = []
+    for arg in shlex.split(exec_line):
+        if len(arg) == 2 and arg[0] == "%" and arg != "%%":
+            continue
+        args.append(arg.replace("%%", "%"))
+    return args
+
+def parse_desktop_file(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the [Desktop Entry] group of a .desktop file
+
+    Returns:
+        The launchable application's fields, or None for hidden entries,
+        non-applications and unreadable files
+    """
+    entry: Dict[str, str] = {}
+    group = None
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("["):
+                    group = line
+                    continue
+                if group == "[Desktop Entry]" and "=" in line:
+                    key, value = line.split("=", 1)
+                    entry.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if entry.get("Type") != "Application" or not entry.get("Exec"):
+        return None
+    if entry.get("Hidden") == "true" or entry.get("NoDisplay") == "true":
+        return None
+    try:
+        command = exec_command(entry["Exec"])
+    except ValueError:
+        return None
+    if not command:
+        return None
+    aliases = [entry[key] for key in ("GenericName", "X-GNOME-FullName") if entry.get(key)]
+    aliases.append(os.path.basename(command[0]))
+    return {
+        "name": entry.get("Name") or os.path.basename(command[0]),
+        "command": command,
+        "aliases": aliases,
+        "keywords": [k for k in entry.get("Keywords", "").split(";") if k],
+        "terminal": entry.get("Terminal") == "true"
+    }
+
+class DesktopApp:
+    """A launchable application from a .desktop file or PATH"""
+
+    def __init__(
+        self,
+        app_id: str,
+        name: str,
+        command: List[str],
+        aliases: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None,
+        terminal: bool = False,
+        source: str = "path"
+    ):
+        self.app_id = app_id
+        self.name = name
+        self.command = command
+        self.aliases = aliases or []
+        self.keywords = keywords or []
+        self.terminal = terminal
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "app_id": self.app_id, "name": self.name, "command": self.command,
+            "aliases": self.aliases, "keywords": self.keywords,
+            "terminal": self.terminal, "source": self.source
+        }
+
+class AppIndex:
+    """Installed applications, searchable by name, alias and keyword
+
+    Applications come from XDG ``.desktop`` files (user entries override
+    system ones with the same desktop ID) and from executables on PATH
+    that no desktop entry already launches.
+    Nothing is scanned until the index is first used. Scan results are
+    kept per directory together with the directory's mtime, so a refresh
+    only rescans directories whose contents changed (installs and removals
+    change the mtime), and they are persisted to ``cache_path`` so a
+    restart only has to stat the directories. Refreshes happen on lookup,
+    at most every ``refresh_interval`` seconds: ``resolve`` refreshes
+    before answering, while ``search`` (the intent fast path, called on
+    the event loop) hands the refresh to a background thread and answers
+    from the index in memory.
+    """
+
+    def __init__(
+        self,
+        desktop_dirs: Optional[List[str]] = None,
+        path_dirs: Optional[List[str]] = None,
+        cache_path: Optional[str] = None,
+        refresh_interval: float = 5.0
+    ):
+        self.desktop_dirs = desktop_dirs if desktop_dirs is not None else xdg_application_dirs()
+        self.path_dirs = path_dirs if path_dirs is not None else [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self.apps: Dict[str, DesktopApp] = {}
+        self.stats = {"loads": 0, "refreshes": 0, "directories_scanned": 0, "files_parsed": 0}
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._names = NameIndex()
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        self.ensure_fresh()
+        return len(self.apps)
+
+    def _fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.refresh_interval
+
+    def ensure_fresh(self, background: bool = False):
+        """
+        Load on first use, then pick up changed directories at most every ``refresh_interval``
+
+        With ``background`` the load or refresh runs on a worker thread
+        (one at a time) and the caller goes on with the index as it is.
+        """
+        if self._fresh():
+            return
+        if not background:
+            self._update()
+        elif self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._update_in_background, name="app-index-refresh", daemon=True)
+            self._refresher.start()
+
+    def _update(self):
+        with self._lock:
+            # Another caller may have refreshed while this one waited
+            if self._fresh():
+                return
+            if self._checked_at is None:
+                self._load_cache()
+                self.stats["loads"] += 1
+            if self.refresh():
+                self._save_cache()
+            self._checked_at = time.monotonic()
+
+    def _update_in_background(self):
+        try:
+            self._update()
+        except Exception as e:
+            log.warning("app_index_refresh_failed", error=str(e))
+
+    def refresh(self) -> bool:
+        """
+        Rescan the directories whose mtime changed
+
+        Returns:
+            True if anything changed
+        """
+        changed = False
+        wanted = [(d, "desktop") for d in self.desktop_dirs] + [(d, "path") for d in self.path_dirs]
+        for directory, kind in wanted:
+            mtimes = self._directory_mtimes(directory, kind)
+            cached = self._dirs.get(directory)
+            if (cached["mtimes"] if cached else {}) == mtimes:
+                continue
+            changed = True
+            self.stats["directories_scanned"] += 1
+            if not mtimes:
+                self._dirs.pop(directory, None)
+            elif kind == "desktop":
+                self._dirs[directory] = {"mtimes": mtimes, "kind": kind, "files": self._scan_desktop(directory, cached)}
+            else:
+                self._dirs[directory] = {"mtimes": mtimes, "kind": kind, "files": self._scan_path(directory)}
+        for directory in set(self._dirs) - {d for d, _ in wanted}:
+            del self._dirs[directory]
+            changed = True
+        if changed or not self.apps:
+            self._rebuild()
+            self.stats["refreshes"] += 1
+        return changed
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Fuzzy lookup by name, alias or keyword
+
+        Never scans on the calling thread: a stale index is refreshed in
+        the background, and nothing is found before the first load (see
+        ``ensure_fresh``) completes.
+
+        Returns:
+            Up to ``limit`` (app_id, score) pairs, best first
+        """
+        self.ensure_fresh(background=True)
+        return self._names.search(query, limit=limit)
+
+    def resolve(self, name: str, min_score: float = 0.8, margin: float = 0.1) -> Optional[DesktopApp]:
+        """The application ``name`` refers to: an app id, or a confident fuzzy match"""
+        self.ensure_fresh()
+        if name in self.apps:
+            return self.apps[name]
+        candidates = self._names.search(name, limit=2)
+        if not candidates or candidates[0][1] < min_score:
+            return None
+        if len(candidates) > 1 and candidates[0][1] - candidates[1][1] < margin:
+            return None
+        return self.apps.get(candidates[0][0])
+
+    def _directory_mtimes(self, directory: str, kind: str) -> Dict[str, int]:
+        """mtime of the directory (and, for .desktop trees, its subdirectories)"""
+        mtimes = {}
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                mtimes[current] = os.stat(current).st_mtime_ns
+                if kind == "desktop":
+                    with os.scandir(current) as entries:
+                        pending.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+        return mtimes
+
+    def _scan_desktop(self, directory: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Parse the .desktop files under ``directory``, reusing unchanged ones"""
+        previous = cached["files"] if cached else {}
+        files = {}
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if not name.endswith(".desktop"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                if path in previous and previous[path]["mtime"] == mtime:
+                    files[path] = previous[path]
+                    continue
+                self.stats["files_parsed"] += 1
+                # Desktop IDs use "-" for subdirectories: kde4/kate.desktop is kde4-kate
+                app_id = os.path.relpath(path, directory)[:-len(".desktop")].replace(os.sep, "-")
+                files[path] = {"mtime": mtime, "app_id": app_id, "entry": parse_desktop_file(path)}
+        return files
+
+    def _scan_path(self, directory: str) -> Dict[str, Any]:
+        files = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and os.access(entry.path, os.X_OK):
+                            files[entry.path] = {"app_id": entry.name}
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files
+
+    def _rebuild(self):
+        """Merge the per-directory results in precedence order and reindex"""
+        apps: Dict[str, DesktopApp] = {}
+        for directory in self.desktop_dirs:
+            for path, item in sorted(self._dirs.get(directory, {}).get("files", {}).items()):
+                if item["app_id"] in apps:
+                    continue
+                entry = item["entry"]
+                if entry is None:
+                    # A hidden entry still masks lower-precedence ones with its ID
+                    apps[item["app_id"]] = None
+                    continue
+                apps[item["app_id"]] = DesktopApp(item["app_id"], source=path, **entry)
+        apps = {app_id: app for app_id, app in apps.items() if app is not None}
+        # Executables a desktop entry already launches are that app, not another one
+        launched = {app.command[0] for app in apps.values()}
+        launched |= {os.path.basename(command) for command in launched}
+        for directory in self.path_dirs:
+            for path, item in sorted(self._dirs.get(directory, {}).get("files", {}).items()):
+                name = item["app_id"]
+                if name not in apps and name not in launched and path not in launched:
+                    apps[name] = DesktopApp(name, name, [path], source=path)
+
+        names = NameIndex()
+        for app in apps.values():
+            names.add(app.name, app.app_id)
+            names.add(app.app_id.rsplit(".", 1)[-1], app.app_id)
+            for alias in app.aliases:
+                names.add(alias, app.app_id)
+            for keyword in app.keywords:
+                names.add(keyword, app.app_id, weight=KEYWORD_WEIGHT)
+        self.apps = apps
+        self._names = names
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cache.get("version") == CACHE_VERSION:
+            self._dirs = cache["directories"]
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temporary = f"{self.cache_path}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "directories": self._dirs}, f)
+            os.replace(temporary, self.cache_path)
+        except OSError as e:
+            log.warning("app_index_save_failed", path=self.cache_path, error=str(e))
@@ -1,14 +1,54 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+import asyncio
+import multiprocessing
 import subprocess
+import time
 import os
+import weakref
+
+from observability.metrics import REGISTRY
+from tools.app_index import AppIndex
+
+# Upper bounds (ms) of the tool latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+TOOL_SECONDS = REGISTRY.histogram("lyra_tool_seconds", "Tool call latency by outcome", ["tool", "outcome"])
+TOOL_DENIED = REGISTRY.counter("lyra_tool_denied", "Tool calls refused for lack of permission", ["tool"])
 
 class Tool(ABC):
-    """Abstract base class for all tools"""
+    """Abstract base class for all tools
+    
+    ``parameters`` is the JSON schema of the tool's arguments, advertised
+    to the model for tool calling.
+    
+    A tool declares how it should be run: ``timeout`` (seconds, None for
+    no limit), ``max_concurrency`` (None for unlimited) and ``offload``.
+    Tools that do blocking work set ``offload`` to "thread" or "process"
+    and implement ``run``; the executor then calls ``run`` in a worker pool
+    so the event loop never stalls. Process-offloaded tools must be
+    picklable.
+    """
     
-    def __init__(self, name: str, description: str):
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = 30.0,
+        max_concurrency: Optional[int] = None,
+        offload: Optional[str] = None
+    ):
+        if offload not in (None, "thread", "process"):
+            raise ValueError(f"offload must be 'thread' or 'process', not {offload!r}")
         self.name = name
         self.description = description
+        self.parameters = parameters or {"type": "object", "properties": {}}
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.offload = offload
     
     @abstractmethod
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,17 +62,94 @@ class Tool(ABC):
             Result of the tool execution
         """
         pass
+    
+    def schema(self) -> Dict[str, Any]:
+        """The tool in Ollama's (OpenAI-style) function-calling format"""
+        return {
+            "type": "function",
+            "function": {"name": self.name, "description": self.description, "parameters": self.parameters}
+        }
+
+class BlockingTool(Tool):
+    """Base class for tools whose work is synchronous (offloaded to a thread by default)"""
+    
+    def __init__(self, name: str, description: str, offload: str = "thread", **kwargs):
+        super().__init__(name, description, offload=offload, **kwargs)
+    
+    @abstractmethod
+    def run(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Do the tool's work; called in a worker thread or process"""
+        pass
+    
+    async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.run, parameters)
+
+class ToolStats:
+    """Call counts, outcomes and a latency histogram for one tool"""
+    
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.outcomes = {"success": 0, "error": 0, "timeout": 0, "denied": 0}
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum_ms = 0.0
+        self.latencies = deque(maxlen=window)
+    
+    def record(self, outcome: str, seconds: Optional[float] = None):
+        self.calls += 1
+        self.outcomes[outcome] += 1
+        if seconds is None:
+            return
+        ms = seconds * 1000
+        self.latency_sum_ms += ms
+        self.latencies.append(ms)
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+        self.buckets[bucket] += 1
+    
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        bounds = [str(bound) for bound in LATENCY_BUCKETS_MS] + ["+Inf"]
+        return {
+            "calls": self.calls,
+            **self.outcomes,
+            "latency_ms_p50": round(latencies[len(latencies) // 2], 2) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else 0.0,
+            "latency_ms_sum": round(self.latency_sum_ms, 2),
+            "histogram_ms": dict(zip(bounds, self.buckets))
+        }
+
+def _is_error(result: Dict[str, Any]) -> bool:
+    return "error" in result or result.get("status") == "error"
 
 class ToolExecutor:
-    """Executes tools safely with permission checking"""
+    """Executes tools safely with permission checking
     
-    def __init__(self):
+    Every call is checked against ``permissions`` first, then runs under
+    the tool's declared timeout and concurrency limit (the timeout covers
+    waiting for a free slot). The limits are semaphores created per event
+    loop on first use, so an executor outlives the loops (app lifespans,
+    test clients) that call it. Blocking tools are offloaded to a thread
+    pool or a spawned process pool, both started on first use. A timed-out thread
+    or process job cannot be interrupted; its result is discarded.
+    """
+    
+    def __init__(self, thread_workers: int = 4, process_workers: int = 2):
         self.tools: Dict[str, Tool] = {}
         self.permissions: Dict[str, bool] = {}
+        self.stats: Dict[str, ToolStats] = {}
+        self.process_workers = process_workers
+        # event loop -> tool name -> semaphore bounding that tool's calls
+        self._limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self.thread_workers = thread_workers
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
     
     def register_tool(self, tool: Tool):
         """Register a tool with the executor"""
         self.tools[tool.name] = tool
+        self.stats[tool.name] = ToolStats()
+        # A re-registered tool gets fresh limits
+        for limits in self._limits.values():
+            limits.pop(tool.name, None)
         # By default, tools are not permitted
         self.permissions[tool.name] = False
     
@@ -46,6 +163,10 @@ class ToolExecutor:
         if tool_name in self.tools:
             self.permissions[tool_name] = False
     
+    def tool_schemas(self) -> List[Dict[str, Any]]:
+        """Schemas of the permitted tools, to offer to the model"""
+        return [tool.schema() for name, tool in self.tools.items() if self.permissions.get(name, False)]
+    
     async def execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a tool safely
@@ -63,23 +184,108 @@ class ToolExecutor:
         
         # Check if tool is permitted
         if not self.permissions.get(tool_name, False):
+            self.stats[tool_name].record("denied")
+            TOOL_DENIED.labels(tool_name).inc()
             return {"error": f"Permission denied for tool '{tool_name}'"}
         
         # Execute the tool
+        tool = self.tools[tool_name]
+        started = time.monotonic()
         try:
-            result = await self.tools[tool_name].execute(parameters)
-            return result
+            result = await asyncio.wait_for(self._run(tool, parameters), tool.timeout)
+        except asyncio.TimeoutError:
+            self._record(tool_name, "timeout", started)
+            return {"error": f"Tool '{tool_name}' timed out after {tool.timeout:g}s"}
         except Exception as e:
+            self._record(tool_name, "error", started)
             return {"error": f"Error executing tool '{tool_name}': {str(e)}"}
+        self._record(tool_name, "error" if _is_error(result) else "success", started)
+        return result
+    
+    async def execute_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute independent tool calls concurrently
+        
+        Args:
+            calls: (tool_name, parameters) pairs, e.g. all calls from one LLM turn
+            
+        Returns:
+            Results in the same order as ``calls``
+        """
+        return await asyncio.gather(*(self.execute_tool(name, parameters) for name, parameters in calls))
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Per-tool call outcomes and latency histograms"""
+        return {name: stats.metrics() for name, stats in self.stats.items()}
+    
+    def _record(self, tool_name: str, outcome: str, started: float):
+        seconds = time.monotonic() - started
+        self.stats[tool_name].record(outcome, seconds)
+        TOOL_SECONDS.labels(tool_name, outcome).observe(seconds)
+    
+    def close(self):
+        """Stop the worker pools (they are started again on the next offloaded call)"""
+        for pool in (self._threads, self._processes):
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._threads = self._processes = None
+    
+    def _limit(self, tool: Tool) -> Optional[asyncio.Semaphore]:
+        """The running loop's semaphore for ``tool``, if it declares a concurrency limit"""
+        if not tool.max_concurrency:
+            return None
+        limits = self._limits.setdefault(asyncio.get_running_loop(), {})
+        if tool.name not in limits:
+            limits[tool.name] = asyncio.Semaphore(tool.max_concurrency)
+        return limits[tool.name]
+    
+    async def _run(self, tool: Tool, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        limit = self._limit(tool)
+        if limit is None:
+            return await self._call(tool, parameters)
+        async with limit:
+            return await self._call(tool, parameters)
+    
+    async def _call(self, tool: Tool, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        if tool.offload is None:
+            return await tool.execute(parameters)
+        loop = asyncio.get_running_loop()
+        if tool.offload == "thread":
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="tool")
+            return await loop.run_in_executor(self._threads, tool.run, parameters)
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return await loop.run_in_executor(self._processes, tool.run, parameters)
 
 class ApplicationLauncher(Tool):
-    """Tool for launching applications"""
+    """Tool for launching applications
+
+    Names are resolved through the application index, so "Firefox",
+    "firefox" or a desktop ID all find the installed app. Launched
+    processes are reaped in the background when they exit instead of
+    being left as zombies.
+    """
     
-    def __init__(self):
+    def __init__(self, app_index: Optional[AppIndex] = None):
         super().__init__(
             name="app_launcher",
-            description="Launch desktop applications"
+            description="Launch a desktop application installed on the user's computer",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "app_name": {"type": "string", "description": "Application name, e.g. firefox or kate"}
+                },
+                "required": ["app_name"]
+            },
+            timeout=10.0,
+            max_concurrency=4
         )
+        self.app_index = app_index or AppIndex()
+        self._reapers: Set[asyncio.Task] = set()
     
     async def execute(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         app_name = parameters.get("app_name")
@@ -87,18 +293,38 @@ class ApplicationLauncher(Tool):
         if not app_name:
             return {"error": "app_name parameter is required"}
         
-        try:
-            # Attempt to launch the application
-            subprocess.Popen([app_name])
+        # The first lookup may scan the application directories
+        app = await asyncio.to_thread(self.app_index.resolve, app_name)
+        if app is None:
             return {
-                "status": "success",
-                "message": f"Launched {app_name}"
+                "status": "error",
+                "message": f"No installed application matches {app_name}"
             }
+        
+        try:
+            # Attempt to launch the application, detached from our terminal
+            process = await asyncio.create_subprocess_exec(
+                *app.command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Failed to launch {app_name}: {str(e)}"
+                "message": f"Failed to launch {app.name}: {str(e)}"
             }
+        
+        reaper = asyncio.create_task(process.wait())
+        self._reapers.add(reaper)
+        reaper.add_done_callback(self._reapers.discard)
+        return {
+            "status": "success",
+            "message": f"Launched {app.name}",
+            "app_id": app.app_id,
+            "pid": process.pid
+        }
 
 # Example usage
 if __name__ == "__main__":
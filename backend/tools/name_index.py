@@ -0,0 +1,81 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, List, Set, Tuple
+import re
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def normalize_name(text: str) -> str:
+    """Lowercase and reduce punctuation to single spaces ("Kate-Editor" -> "kate editor")"""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded so short names still get several"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """Fuzzy lookup of names through an inverted trigram index
+
+    Each key (a name, alias or keyword) maps to a value, such as an
+    executable. A search only looks at keys sharing trigrams with the
+    query: the best ``candidates`` by Dice coefficient of the trigram sets
+    are rescored with an edit-based similarity, which is kinder to typos,
+    so lookups stay fast even with thousands of names.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._values: List[str] = []
+        self._sizes: List[int] = []
+        self._weights: List[float] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, value: str, weight: float = 1.0):
+        """Make ``value`` findable under ``key``; matches on it score at most ``weight``"""
+        normalized = normalize_name(key)
+        if not normalized:
+            return
+        position = len(self._keys)
+        grams = trigrams(normalized)
+        self._keys.append(normalized)
+        self._values.append(value)
+        self._sizes.append(len(grams))
+        self._weights.append(weight)
+        self._exact.setdefault(normalized, []).append(position)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+
+    def search(self, query: str, limit: int = 5, candidates: int = 20) -> List[Tuple[str, float]]:
+        """
+        Find the values whose keys best match ``query``
+
+        Returns:
+            Up to ``limit`` (value, score) pairs, best first; an exact key
+            match scores its full weight
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        grams = trigrams(normalized)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        nearest = sorted(shared, key=lambda p: -2 * shared[p] / (len(grams) + self._sizes[p]))[:candidates]
+        best: Dict[str, float] = {}
+        matcher = SequenceMatcher(b=normalized, autojunk=False)
+        for position in nearest:
+            matcher.set_seq1(self._keys[position])
+            score = matcher.ratio() * self._weights[position]
+            value = self._values[position]
+            if score > best.get(value, 0.0):
+                best[value] = score
+        for position in self._exact.get(normalized, ()):
+            value = self._values[position]
+            best[value] = max(best.get(value, 0.0), self._weights[position])
+        return sorted(best.items(), key=lambda item: -item[1])[:limit]
@@ -0,0 +1 @@
+# Package initialization for the voice module
\ No newline at end of file
@@ -0,0 +1,261 @@
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+import numpy as np
+
+from observability.log import get_logger
+from voice.vad import VoiceActivityDetector, pcm16_to_float
+from voice.recognizer import Recognizer
+from voice.wakeword import WakeWordDetector
+
+RECOGNIZER_RATE = 16000
+
+log = get_logger("voice.pipeline")
+
+class Utterance:
+    """A finished stretch of speech and its transcript"""
+
+    def __init__(self, text: str, audio_seconds: float, ended_at: float, transcribe_seconds: float):
+        self.text = text
+        self.audio_seconds = audio_seconds
+        # Monotonic time at which the VAD declared the end of speech
+        self.ended_at = ended_at
+        self.transcribe_seconds = transcribe_seconds
+
+def _percentiles(values) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0}
+    return {"p50": ordered[len(ordered) // 2], "p95": ordered[int(len(ordered) * 0.95)]}
+
+class VoiceMetrics:
+    """End-of-speech to first-token latency and where it goes"""
+
+    def __init__(self, window: int = 200):
+        self.utterances = 0
+        self.frames = 0
+        self.speech_frames = 0
+        self.transcribe_ms = deque(maxlen=window)
+        self.first_token_ms = deque(maxlen=window)
+        self.first_audio_ms = deque(maxlen=window)
+        self.interrupts = 0
+        self.cancel_ms = deque(maxlen=window)
+
+    def record_vad(self, stats: Dict[str, int]):
+        self.frames += stats["frames"]
+        self.speech_frames += stats["speech_frames"]
+
+    def record(self, utterance: Utterance, first_token_at: float) -> Dict[str, float]:
+        """
+        Record one utterance's latency breakdown
+
+        Args:
+            utterance: The transcribed utterance
+            first_token_at: Monotonic time the first LLM token was sent
+
+        Returns:
+            The breakdown in milliseconds
+        """
+        self.utterances += 1
+        latency = {
+            "transcribe_ms": round(utterance.transcribe_seconds * 1000, 1),
+            "end_of_speech_to_first_token_ms": round((first_token_at - utterance.ended_at) * 1000, 1)
+        }
+        self.transcribe_ms.append(latency["transcribe_ms"])
+        self.first_token_ms.append(latency["end_of_speech_to_first_token_ms"])
+        return latency
+
+    def record_first_audio(self, seconds: Optional[float]):
+        """Record end of speech to the first byte of spoken reply"""
+        if seconds is not None:
+            self.first_audio_ms.append(round(seconds * 1000, 1))
+
+    def record_interrupt(self, seconds: float):
+        """Record how long an interruption took to stop generation and speech"""
+        self.interrupts += 1
+        self.cancel_ms.append(round(seconds * 1000, 1))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "utterances": self.utterances,
+            "frames": self.frames,
+            "speech_frames": self.speech_frames,
+            "silence_dropped": 1 - self.speech_frames / self.frames if self.frames else 0.0,
+            "transcribe_ms": _percentiles(self.transcribe_ms),
+            "end_of_speech_to_first_token_ms": _percentiles(self.first_token_ms),
+            "end_of_speech_to_first_audio_ms": _percentiles(self.first_audio_ms),
+            "interrupts": self.interrupts,
+            "cancel_latency_ms": _percentiles(self.cancel_ms)
+        }
+
+class SpeechPipeline:
+    """Turns one client's PCM stream into partial and final transcripts
+
+    Audio goes through the VAD first, so silence never reaches the
+    recognizer. While the user talks, a partial transcript is produced
+    every ``partial_interval`` seconds of speech (skipped if the previous
+    partial is still decoding). When the VAD closes the utterance, the
+    final transcript is decoded and handed to ``on_utterance``. All
+    decoding runs in ``executor``.
+
+    With a ``wake_word`` detector the pipeline starts asleep: audio only
+    goes to the detector, and the VAD and recognizer stay idle until the
+    wake word is heard. It then listens for one command and goes back to
+    sleep; a wake with no command within ``listen_seconds`` (or an empty
+    transcript) counts as a false trigger.
+    """
+
+    def __init__(
+        self,
+        recognizer: Recognizer,
+        emit: Callable[[Dict[str, Any]], Awaitable[None]],
+        on_utterance: Callable[[Utterance], Awaitable[None]],
+        executor: Optional[Executor] = None,
+        sample_rate: int = RECOGNIZER_RATE,
+        partial_interval: float = 0.5,
+        vad: Optional[VoiceActivityDetector] = None,
+        wake_word: Optional[WakeWordDetector] = None,
+        listen_seconds: float = 5.0
+    ):
+        self.recognizer = recognizer
+        self.emit = emit
+        self.on_utterance = on_utterance
+        self.executor = executor
+        self.sample_rate = sample_rate
+        self.partial_interval = partial_interval
+        self.vad = vad or VoiceActivityDetector(sample_rate=sample_rate)
+        self._audio: List[np.ndarray] = []
+        self._samples = 0
+        self._partial_at = 0
+        self._utterance = 0
+        self._partial: Optional[asyncio.Task] = None
+        self._final: Optional[asyncio.Task] = None
+        self.wake_word = wake_word
+        self.listen_seconds = listen_seconds
+        self.awake = wake_word is None
+        self._listened = 0
+        self._heard = False
+        # Trailing byte of a frame that split a sample, completed by the next one
+        self._odd_byte = b""
+
+    @property
+    def in_speech(self) -> bool:
+        return self.vad.in_speech
+
+    async def feed(self, pcm: bytes):
+        """Process a block of 16-bit little-endian mono PCM (blocks may split a sample)"""
+        pcm = self._odd_byte + pcm
+        if len(pcm) % 2:
+            pcm, self._odd_byte = pcm[:-1], pcm[-1:]
+        else:
+            self._odd_byte = b""
+        if not pcm:
+            return
+        samples = pcm16_to_float(pcm)
+        if not self.awake:
+            detections = self.wake_word.process(samples)
+            if not detections:
+                return
+            offset, score = detections[0]
+            self.awake = True
+            self._listened = 0
+            self._heard = False
+            await self.emit({"type": "wake", "score": round(score, 3)})
+            samples = samples[offset:]
+        await self._handle(self.vad.process(samples))
+        if self.wake_word and self.awake and not self._heard:
+            self._listened += samples.size
+            if self._listened >= self.listen_seconds * self.sample_rate:
+                self.wake_word.metrics.record_false_trigger()
+                await self._sleep()
+
+    async def finish(self):
+        """End of the audio stream: finalize any open utterance and wait for it"""
+        await self._handle(self.vad.finish())
+        if self._final:
+            await asyncio.gather(self._final, return_exceptions=True)
+
+    async def close(self):
+        """Drop pending decodes (the client has gone away)"""
+        for task in (self._partial, self._final):
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._partial, self._final) if t), return_exceptions=True)
+
+    async def _sleep(self):
+        """Stop listening for a command and go back to waiting for the wake word"""
+        self.awake = False
+        self.wake_word.reset()
+        self.vad.finish()
+        await self.emit({"type": "sleep"})
+
+    async def _handle(self, events):
+        for kind, samples in events:
+            if kind == "start":
+                self._heard = True
+                self._utterance += 1
+                self._audio = []
+                self._samples = 0
+                self._partial_at = 0
+                await self.emit({"type": "speech_start"})
+            elif kind == "audio":
+                self._audio.append(samples)
+                self._samples += samples.size
+                if (
+                    self._samples - self._partial_at >= self.partial_interval * self.sample_rate
+                    and (self._partial is None or self._partial.done())
+                ):
+                    self._partial_at = self._samples
+                    self._partial = asyncio.create_task(self._transcribe_partial(self._utterance, self._collect()))
+            elif kind == "end":
+                ended_at = time.monotonic()
+                await self.emit({"type": "speech_end"})
+                previous = self._final
+                self._final = asyncio.create_task(self._transcribe_final(self._collect(), ended_at, previous))
+                self._audio = []
+                self._samples = 0
+                if self.wake_word:
+                    await self._sleep()
+                    return
+
+    def _collect(self) -> np.ndarray:
+        """Utterance audio so far, resampled for the recognizer"""
+        audio = np.concatenate(self._audio) if self._audio else np.zeros(0, dtype=np.float32)
+        if self.sample_rate != RECOGNIZER_RATE and audio.size:
+            positions = np.arange(0, audio.size, self.sample_rate / RECOGNIZER_RATE)
+            audio = np.interp(positions, np.arange(audio.size), audio).astype(np.float32)
+        return audio
+
+    async def _transcribe(self, audio: np.ndarray, final: bool) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.recognizer.transcribe, audio, final)
+
+    async def _transcribe_partial(self, utterance: int, audio: np.ndarray):
+        try:
+            text = await self._transcribe(audio, final=False)
+        except Exception as e:
+            log.warning("partial_transcription_failed", error=str(e))
+            return
+        # Drop partials that finish after their utterance was finalized
+        if utterance == self._utterance and self.vad.in_speech and text:
+            await self.emit({"type": "partial", "text": text})
+
+    async def _transcribe_final(self, audio: np.ndarray, ended_at: float, previous: Optional[asyncio.Task]):
+        # Utterances are delivered in the order they were spoken
+        if previous:
+            await asyncio.gather(previous, return_exceptions=True)
+        started = time.monotonic()
+        try:
+            text = (await self._transcribe(audio, final=True)).strip()
+        except Exception as e:
+            log.error("transcription_failed", error=str(e))
+            await self.emit({"type": "error", "content": "Speech recognition failed"})
+            return
+        if self.wake_word and not text:
+            self.wake_word.metrics.record_false_trigger()
+        utterance = Utterance(text, audio.size / RECOGNIZER_RATE, ended_at, time.monotonic() - started)
+        await self.emit({"type": "final", "text": text})
+        if text:
+            await self.on_utterance(utterance)
@@ -0,0 +1,97 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import math
+import time
+import numpy as np
+
+class Recognizer(ABC):
+    """Speech-to-text engine
+
+    ``transcribe`` is synchronous and is always called from a worker pool,
+    never on the event loop.
+    """
+
+    name: str = "recognizer"
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, final: bool) -> str:
+        """
+        Transcribe an utterance (or the part of it heard so far)
+
+        Args:
+            audio: Mono float32 samples at 16 kHz
+            final: False for a partial transcript while the user is still talking
+
+        Returns:
+            The transcript text
+        """
+        pass
+
+class StubRecognizer(Recognizer):
+    """Deterministic recognizer for tests and benchmarks
+
+    Reveals a fixed transcript at ``words_per_second`` of audio, so partial
+    transcripts grow with the utterance and the final one is complete.
+    """
+
+    name = "stub"
+
+    def __init__(self, transcript: str = "hello lyra", words_per_second: float = 3.0, delay: float = 0.0):
+        self.transcript = transcript
+        self.words_per_second = words_per_second
+        self.delay = delay
+        self.calls = 0
+
+    def transcribe(self, audio: np.ndarray, final: bool) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        words = self.transcript.split()
+        if final:
+            return self.transcript
+        heard = math.ceil(audio.size / 16000 * self.words_per_second)
+        return " ".join(words[:heard])
+
+class FasterWhisperRecognizer(Recognizer):
+    """Whisper via faster-whisper (CTranslate2)
+
+    CTranslate2 releases the GIL while decoding, so a thread pool gives
+    real parallelism without copying the model into worker processes.
+    Partial transcripts use greedy decoding; the final pass uses beam search.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str = "base.en", device: str = "cpu", compute_type: str = "int8", language: Optional[str] = "en"):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("faster-whisper is not installed; run `poetry install --extras voice`") from e
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        self.language = language
+
+    def transcribe(self, audio: np.ndarray, final: bool) -> str:
+        segments, _ = self.model.transcribe(
+            audio,
+            language=self.language,
+            beam_size=5 if final else 1,
+            vad_filter=False,
+            condition_on_previous_text=False
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+def create_recognizer(engine: str) -> Recognizer:
+    """
+    Build a recognizer by engine name
+
+    Args:
+        engine: "faster-whisper" or "stub"
+
+    Returns:
+        The recognizer
+    """
+    if engine == "stub":
+        return StubRecognizer()
+    if engine == "faster-whisper":
+        return FasterWhisperRecognizer()
+    raise ValueError(f"Unknown speech recognition engine: {engine}")
@@ -0,0 +1,123 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import importlib.util
+import json
+import os
+import time
+import numpy as np
+
+class Synthesizer(ABC):
+    """Text-to-speech engine
+
+    ``synthesize`` is synchronous and runs inside a worker process, so an
+    engine is constructed once per worker and never on the event loop.
+    """
+
+    name: str = "synthesizer"
+    sample_rate: int = 22050
+
+    @abstractmethod
+    def synthesize(self, text: str) -> bytes:
+        """
+        Synthesize one sentence or clause
+
+        Args:
+            text: Text to speak
+
+        Returns:
+            16-bit little-endian mono PCM at ``sample_rate``
+        """
+        pass
+
+class SineSynthesizer(Synthesizer):
+    """Deterministic stand-in engine for tests and benchmarks
+
+    Renders a tone whose pitch depends on the text and whose length grows
+    with it, so audio order and caching are easy to check.
+    """
+
+    name = "sine"
+
+    def __init__(self, sample_rate: int = 16000, seconds_per_char: float = 0.02, delay: float = 0.0):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.delay = delay
+
+    def synthesize(self, text: str) -> bytes:
+        if self.delay:
+            time.sleep(self.delay)
+        frequency = 200 + int.from_bytes(hashlib.blake2b(text.encode(), digest_size=2).digest(), "little") % 400
+        t = np.arange(int(len(text) * self.seconds_per_char * self.sample_rate)) / self.sample_rate
+        return (0.2 * np.sin(2 * np.pi * frequency * t) * 32767).astype("<i2").tobytes()
+
+class PiperSynthesizer(Synthesizer):
+    """Piper neural TTS (ONNX) from the piper-tts package"""
+
+    name = "piper"
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.check(model_path)
+        from piper.voice import PiperVoice
+        self.voice = PiperVoice.load(model_path)
+        with open(f"{model_path}.json") as f:
+            self.sample_rate = json.load(f)["audio"]["sample_rate"]
+
+    @staticmethod
+    def check(model_path: Optional[str] = None):
+        """Fail early, without loading the voice, if piper-tts or the model is missing"""
+        if importlib.util.find_spec("piper") is None:
+            raise ImportError("piper-tts is not installed; run `poetry install --extras voice`")
+        if not model_path:
+            raise ValueError("Set LYRA_PIPER_MODEL to the path of a Piper .onnx voice")
+        if not os.path.exists(model_path):
+            raise ValueError(f"Piper voice not found: {model_path}")
+
+    def synthesize(self, text: str) -> bytes:
+        return b"".join(self.voice.synthesize_stream_raw(text))
+
+def create_synthesizer(engine: str, **options: Any) -> Synthesizer:
+    """
+    Build a synthesizer by engine name
+
+    Args:
+        engine: "piper" or "sine"
+        options: Engine constructor arguments
+
+    Returns:
+        The synthesizer
+    """
+    if engine == "sine":
+        return SineSynthesizer(**options)
+    if engine == "piper":
+        return PiperSynthesizer(**options)
+    raise ValueError(f"Unknown speech synthesis engine: {engine}")
+
+def check_engine(engine: str, **options: Any):
+    """
+    Check in the parent process that an engine can be built by the workers
+
+    Raises:
+        ImportError: If the engine's package is not installed
+        ValueError: If the engine is unknown or misconfigured
+    """
+    if engine == "piper":
+        PiperSynthesizer.check(**options)
+    elif engine != "sine":
+        raise ValueError(f"Unknown speech synthesis engine: {engine}")
+
+# Worker process state: each process in the pool builds its engine once
+_worker_engine: Optional[Synthesizer] = None
+
+def init_worker(engine: str, options: Dict[str, Any]):
+    """Process pool initializer"""
+    global _worker_engine
+    _worker_engine = create_synthesizer(engine, **options)
+
+def worker_sample_rate() -> int:
+    """Sample rate of the worker's engine (also used to start workers early)"""
+    return _worker_engine.sample_rate
+
+def synthesize_in_worker(text: str) -> Tuple[int, bytes]:
+    """Synthesize with the worker's engine; returns (sample_rate, pcm)"""
+    return _worker_engine.sample_rate, _worker_engine.synthesize(text)
@@ -0,0 +1,279 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import multiprocessing
+import re
+import time
+
+from observability.log import get_logger
+from voice.synthesizer import check_engine, init_worker, synthesize_in_worker, worker_sample_rate
+
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+CLAUSE_END = re.compile(r"[,;:—]\s+")
+
+log = get_logger("voice.tts")
+
+class SentenceSegmenter:
+    """Splits a token stream into speakable sentences and clauses
+
+    Segments are released as soon as they are complete, so synthesis of
+    the first sentence starts while the model is still generating the
+    rest. The first segment may end at a clause boundary to get audio
+    started sooner; later ones prefer whole sentences and only fall back
+    to clauses (or whitespace) when they grow long.
+    """
+
+    def __init__(self, min_chars: int = 12, first_clause_chars: int = 24, clause_chars: int = 80, max_chars: int = 240):
+        self.min_chars = min_chars
+        self.first_clause_chars = first_clause_chars
+        self.clause_chars = clause_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text
+
+        Returns:
+            Segments completed by this text
+        """
+        self._buffer += text
+        segments = []
+        while True:
+            split = self._split_point()
+            if split is None:
+                break
+            segment, self._buffer = self._buffer[:split].strip(), self._buffer[split:]
+            if segment:
+                segments.append(segment)
+                self._emitted += 1
+        return segments
+
+    def flush(self) -> List[str]:
+        """The remaining text once the stream has ended"""
+        segment, self._buffer = self._buffer.strip(), ""
+        return [segment] if segment else []
+
+    def _split_point(self) -> Optional[int]:
+        buffer = self._buffer
+        for match in SENTENCE_END.finditer(buffer):
+            if match.start() >= self.min_chars:
+                return match.end()
+        clause_chars = self.first_clause_chars if self._emitted == 0 else self.clause_chars
+        if len(buffer) >= clause_chars:
+            clauses = [m.end() for m in CLAUSE_END.finditer(buffer) if m.start() >= self.min_chars]
+            if clauses:
+                return clauses[-1]
+        if len(buffer) >= self.max_chars:
+            space = buffer.rfind(" ", self.min_chars, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+        return None
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(text.lower().split())
+
+class PhraseCache:
+    """LRU cache of synthesized audio for short, often repeated phrases"""
+
+    def __init__(self, max_entries: int = 256, max_phrase_chars: int = 80):
+        self.max_entries = max_entries
+        self.max_phrase_chars = max_phrase_chars
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, text: str) -> bool:
+        return len(text) <= self.max_phrase_chars
+
+    def get(self, text: str) -> Optional[Tuple[int, bytes]]:
+        key = normalize_phrase(text)
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return audio
+
+    def put(self, text: str, audio: Tuple[int, bytes]):
+        self._entries[normalize_phrase(text)] = audio
+        self._entries.move_to_end(normalize_phrase(text))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": sum(len(pcm) for _, pcm in self._entries.values())
+        }
+
+class TTSService:
+    """Shared speech synthesis: a worker process pool plus the phrase cache
+
+    Each worker process loads the engine once (see ``init_worker``), so a
+    slow model load is paid per worker rather than per sentence, and
+    synthesis never competes with the event loop for the GIL.
+
+    Raises:
+        ImportError, ValueError: If the engine cannot be built (checked
+            before any worker is started)
+    """
+
+    def __init__(
+        self,
+        engine: str = "piper",
+        options: Optional[Dict[str, Any]] = None,
+        workers: int = 2,
+        cache: Optional[PhraseCache] = None,
+        executor: Optional[Executor] = None
+    ):
+        if executor is None:
+            check_engine(engine, **(options or {}))
+        self.engine = engine
+        self.workers = workers
+        self.cache = cache or PhraseCache()
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(engine, options or {})
+        )
+        self.segments = 0
+        self.synthesis_ms = deque(maxlen=200)
+        self.first_audio_ms = deque(maxlen=200)
+
+    async def synthesize(self, text: str) -> Tuple[int, bytes]:
+        """
+        Synthesize a segment, from the phrase cache when possible
+
+        Returns:
+            (sample_rate, 16-bit mono PCM)
+        """
+        self.segments += 1
+        cacheable = self.cache.cacheable(text)
+        if cacheable:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        audio = await loop.run_in_executor(self.executor, synthesize_in_worker, text)
+        self.synthesis_ms.append((time.monotonic() - started) * 1000)
+        if cacheable:
+            self.cache.put(text, audio)
+        return audio
+
+    async def warm(self, phrases: List[str] = ()):
+        """Start the workers (loading the engine in each) and pre-synthesize common phrases"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, worker_sample_rate) for _ in range(self.workers)))
+        await asyncio.gather(*(self.synthesize(phrase) for phrase in phrases))
+
+    def record_first_audio(self, seconds: float):
+        self.first_audio_ms.append(seconds * 1000)
+
+    def metrics(self) -> Dict[str, Any]:
+        def p50(values):
+            ordered = sorted(values)
+            return round(ordered[len(ordered) // 2], 1) if ordered else 0.0
+        return {
+            "engine": self.engine,
+            "segments": self.segments,
+            "synthesis_ms_p50": p50(self.synthesis_ms),
+            "time_to_first_audio_ms_p50": p50(self.first_audio_ms),
+            "cache": self.cache.metrics()
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class SpeechOutput:
+    """Speaks one reply while it is still being generated
+
+    Text is fed in as it streams from the model. Each completed segment is
+    submitted for synthesis straight away, and a sender task streams the
+    audio back strictly in segment order, so sentence two is synthesized
+    while sentence one is playing.
+    """
+
+    def __init__(
+        self,
+        tts: TTSService,
+        send_audio: Callable[[bytes], Awaitable[None]],
+        on_start: Optional[Callable[[int], Awaitable[None]]] = None,
+        started_at: Optional[float] = None,
+        chunk_bytes: int = 8192
+    ):
+        self.tts = tts
+        self.send_audio = send_audio
+        self.on_start = on_start
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.chunk_bytes = chunk_bytes
+        self.segmenter = SentenceSegmenter()
+        self.first_audio_at: Optional[float] = None
+        self.spoken: List[str] = []
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._sender = asyncio.create_task(self._send_loop())
+
+    @property
+    def delivered_text(self) -> str:
+        """Text of the segments whose audio has been sent in full"""
+        return " ".join(self.spoken)
+
+    @property
+    def time_to_first_audio(self) -> Optional[float]:
+        """Seconds from ``started_at`` to the first audio byte sent"""
+        return None if self.first_audio_at is None else self.first_audio_at - self.started_at
+
+    def feed(self, text: str):
+        """Add streamed reply text"""
+        for segment in self.segmenter.feed(text):
+            self._submit(segment)
+
+    async def finish(self):
+        """The reply is complete: speak the remainder and wait for the audio to go out"""
+        for segment in self.segmenter.flush():
+            self._submit(segment)
+        self._pending.put_nowait(None)
+        await self._sender
+
+    async def close(self):
+        """Stop speaking: drop queued segments and stop the sender"""
+        self._sender.cancel()
+        while not self._pending.empty():
+            item = self._pending.get_nowait()
+            if item:
+                item[1].cancel()
+        await asyncio.gather(self._sender, return_exceptions=True)
+
+    def _submit(self, segment: str):
+        self._pending.put_nowait((segment, asyncio.ensure_future(self.tts.synthesize(segment))))
+
+    async def _send_loop(self):
+        while True:
+            item = await self._pending.get()
+            if item is None:
+                return
+            segment, synthesis = item
+            try:
+                sample_rate, pcm = await synthesis
+            except asyncio.CancelledError:
+                synthesis.cancel()
+                raise
+            except Exception as e:
+                log.error("synthesis_failed", error=str(e))
+                continue
+            for offset in range(0, len(pcm), self.chunk_bytes):
+                if self.first_audio_at is None:
+                    if self.on_start:
+                        await self.on_start(sample_rate)
+                    self.first_audio_at = time.monotonic()
+                    self.tts.record_first_audio(self.first_audio_at - self.started_at)
+                await self.send_audio(pcm[offset:offset + self.chunk_bytes])
+            self.spoken.append(segment)
@@ -0,0 +1,116 @@
+from typing import List, Tuple, Any
+import numpy as np
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit PCM bytes to float32 samples in [-1, 1]"""
+    return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing voice activity detection over PCM frames
+
+    Every incoming block is split into fixed-size frames and scored in a
+    single vectorized pass: a frame counts as voiced when its energy is
+    above ``threshold_db`` and its zero-crossing rate is below
+    ``max_zcr`` (broadband hiss crosses zero far more often than speech).
+    A short run of voiced frames opens an utterance and ``hangover_ms`` of
+    unvoiced frames closes it, so only speech reaches the recognizer.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        threshold_db: float = -45.0,
+        max_zcr: float = 0.35,
+        min_speech_ms: int = 60,
+        hangover_ms: int = 400
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.max_zcr = max_zcr
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.hangover_ms = hangover_ms
+        self.in_speech = False
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._onset: List[np.ndarray] = []
+        self._silent_frames = 0
+        self.stats = {"frames": 0, "speech_frames": 0, "utterances": 0}
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Score a (n_frames, frame_length) array of samples
+
+        Returns:
+            Boolean array, True for voiced frames
+        """
+        energy_db = 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frames.shape[1] + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+        return (energy_db > self.threshold_db) & (zcr < self.max_zcr)
+
+    def process(self, samples: np.ndarray) -> List[Tuple[str, Any]]:
+        """
+        Feed a block of float32 samples
+
+        Args:
+            samples: Mono samples at ``sample_rate``; any length
+
+        Returns:
+            Events in order: ("start", None), ("audio", samples) for
+            utterance audio, and ("end", None) once speech stops
+        """
+        if self._remainder.size:
+            samples = np.concatenate((self._remainder, samples))
+        count = samples.size // self.frame_length
+        self._remainder = samples[count * self.frame_length:]
+        if not count:
+            return []
+
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        voiced = self.classify(frames)
+        self.stats["frames"] += count
+
+        events: List[Tuple[str, Any]] = []
+        run_start = 0
+        for i in range(count):
+            if not self.in_speech:
+                if voiced[i]:
+                    self._onset.append(frames[i])
+                    if len(self._onset) >= self.min_speech_frames:
+                        self.in_speech = True
+                        self._silent_frames = 0
+                        self.stats["utterances"] += 1
+                        events.append(("start", None))
+                        events.append(("audio", np.concatenate(self._onset)))
+                        self.stats["speech_frames"] += len(self._onset)
+                        self._onset = []
+                        run_start = i + 1
+                else:
+                    self._onset = []
+                continue
+
+            self._silent_frames = 0 if voiced[i] else self._silent_frames + 1
+            if self._silent_frames >= self.hangover_frames:
+                if i + 1 > run_start:
+                    events.append(("audio", frames[run_start:i + 1].reshape(-1)))
+                    self.stats["speech_frames"] += i + 1 - run_start
+                events.append(("end", None))
+                self.in_speech = False
+                self._silent_frames = 0
+
+        if self.in_speech and count > run_start:
+            events.append(("audio", frames[run_start:].reshape(-1)))
+            self.stats["speech_frames"] += count - run_start
+        return events
+
+    def finish(self) -> List[Tuple[str, Any]]:
+        """Close an utterance still open when the audio stream ends"""
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._onset = []
+        if not self.in_speech:
+            return []
+        self.in_speech = False
+        self._silent_frames = 0
+        return [("end", None)]
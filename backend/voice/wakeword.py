@@ -0,0 +1,365 @@
+from numpy.lib.stride_tricks import as_strided
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import time
+import wave
+import numpy as np
+
+# A detection is reported once the score has stopped rising for this many frames
+PEAK_FRAMES = 3
+
+def read_wav(path: str) -> Tuple[int, np.ndarray]:
+    """
+    Read a 16-bit PCM WAV file
+
+    Returns:
+        (sample_rate, mono float32 samples in [-1, 1])
+    """
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return rate, samples
+
+def write_wav(path: str, sample_rate: int, samples: np.ndarray):
+    """Write float32 samples in [-1, 1] as a 16-bit mono PCM WAV file"""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int, fmin: float = 60.0, fmax: float = 7600.0) -> np.ndarray:
+    """Triangular mel filters as a (n_fft // 2 + 1, n_mels) matrix"""
+    fmax = min(fmax, sample_rate / 2)
+    def to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+    edges = 700 * (10 ** (np.linspace(to_mel(fmin), to_mel(fmax), n_mels + 2) / 2595) - 1)
+    bins = np.linspace(0, sample_rate / 2, n_fft // 2 + 1)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).T.astype(np.float32)
+
+class FeatureRing:
+    """Fixed-size ring of feature rows whose newest rows are always contiguous
+
+    Every row is stored twice, ``capacity`` apart, so the latest ``count``
+    rows can be returned as a plain view, oldest first, without copying or
+    allocating.
+    """
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.filled = 0
+        self._data = np.zeros((2 * capacity, width), dtype=np.float32)
+        self._position = 0
+
+    def append(self, rows: np.ndarray):
+        """Add up to ``capacity`` rows"""
+        count = len(rows)
+        split = min(count, self.capacity - self._position)
+        for start, source in ((self._position, rows[:split]), (0, rows[split:])):
+            end = start + len(source)
+            self._data[start:end] = source
+            self._data[start + self.capacity:end + self.capacity] = source
+        self._position = (self._position + count) % self.capacity
+        self.filled = min(self.capacity, self.filled + count)
+
+    def latest(self, count: int) -> np.ndarray:
+        """View of the newest ``count`` rows, oldest first"""
+        end = self._position + self.capacity
+        return self._data[end - count:end]
+
+    def clear(self):
+        self.filled = 0
+        self._position = 0
+
+class LogMelFrontend:
+    """Streaming log-mel features computed block by block
+
+    Incoming samples are appended to a fixed buffer, every complete
+    ``frame_ms`` frame (advancing by ``hop_ms``) is windowed into a
+    preallocated scratch matrix, and the FFT, power, mel projection and log
+    all write into preallocated arrays, so steady-state processing does
+    not allocate per frame. Band powers are floored at the level white
+    noise at ``silence_db`` would give, and blocks whose samples are all
+    below that level skip the FFT entirely and produce floor rows.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 25,
+        hop_ms: int = 10,
+        n_mels: int = 32,
+        silence_db: float = -50.0,
+        max_block_ms: int = 200
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        self.n_fft = 1 << (self.frame_length - 1).bit_length()
+        self.n_mels = n_mels
+        self.silence_amplitude = 10 ** (silence_db / 20)
+        self.max_frames = max(1, sample_rate * max_block_ms // 1000 // self.hop)
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        self._filters = mel_filterbank(sample_rate, self.n_fft, n_mels)
+        noise_power = self.silence_amplitude ** 2 * np.sum(self._window ** 2)
+        self.floor = np.log(noise_power * self._filters.sum(axis=0)).astype(np.float32)
+        # Samples not yet covered by a whole frame, then room for one block
+        self._samples = np.zeros(self.frame_length + (self.max_frames - 1) * self.hop, dtype=np.float32)
+        self._count = 0
+        # Per-block scratch; the zero padding past frame_length is never written
+        self._frames = np.zeros((self.max_frames, self.n_fft), dtype=np.float32)
+        self._spectrum = np.zeros((self.max_frames, self.n_fft // 2 + 1), dtype=np.complex64)
+        self._power = np.zeros((self.max_frames, self.n_fft // 2 + 1), dtype=np.float32)
+        self._mel = np.zeros((self.max_frames, n_mels), dtype=np.float32)
+        self.skipped_frames = 0
+
+    def process(self, samples: np.ndarray) -> Iterator[Tuple[int, np.ndarray, bool]]:
+        """
+        Feed float32 samples
+
+        Yields:
+            (offset in ``samples`` where the first new frame ends, log-mel
+            rows, whether the block was silent) for each internal block;
+            the rows are a reused buffer, valid until the next iteration
+        """
+        offset = 0
+        while offset < samples.size:
+            take = min(samples.size - offset, self._samples.size - self._count)
+            self._samples[self._count:self._count + take] = samples[offset:offset + take]
+            leftover = self._count
+            self._count += take
+            offset += take
+            if self._count < self.frame_length:
+                continue
+
+            count = (self._count - self.frame_length) // self.hop + 1
+            used = count * self.hop
+            span = self._samples[:used + self.frame_length - self.hop]
+            rows = self._mel[:count]
+            silent = np.abs(span).max() < self.silence_amplitude
+            if silent:
+                rows[:] = self.floor
+                self.skipped_frames += count
+            else:
+                frames = as_strided(span, shape=(count, self.frame_length), strides=(self.hop * 4, 4))
+                np.multiply(frames, self._window, out=self._frames[:count, :self.frame_length])
+                np.fft.rfft(self._frames[:count], axis=1, out=self._spectrum[:count])
+                power = self._power[:count]
+                np.abs(self._spectrum[:count], out=power)
+                np.square(power, out=power)
+                np.matmul(power, self._filters, out=rows)
+                np.maximum(rows, 1e-30, out=rows)
+                np.log(rows, out=rows)
+                np.maximum(rows, self.floor, out=rows)
+
+            remaining = self._count - used
+            self._samples[:remaining] = self._samples[used:self._count]
+            self._count = remaining
+            yield offset - take + self.frame_length - leftover, rows, silent
+
+    def features(self, samples: np.ndarray) -> np.ndarray:
+        """Log-mel rows for a whole clip (enrollment; allocates freely)"""
+        rows = [block.copy() for _, block, _ in self.process(samples)]
+        self.reset()
+        return np.concatenate(rows) if rows else np.zeros((0, self.n_mels), dtype=np.float32)
+
+    def reset(self):
+        self._count = 0
+
+def trim_silence(features: np.ndarray, range_db: float = 30.0) -> np.ndarray:
+    """Cut leading and trailing frames more than ``range_db`` below the loudest frame"""
+    energy = features.max(axis=1)
+    loud = np.flatnonzero(energy >= energy.max() - range_db * np.log(10) / 10)
+    return features[loud[0]:loud[-1] + 1] if loud.size else features
+
+def stretch(template: np.ndarray, factor: float) -> np.ndarray:
+    """Resample a template along time (a faster or slower utterance)"""
+    length = max(2, int(round(len(template) * factor)))
+    positions = np.linspace(0, len(template) - 1, length)
+    low = np.floor(positions).astype(int)
+    high = np.minimum(low + 1, len(template) - 1)
+    fraction = (positions - low)[:, None]
+    return template[low] * (1 - fraction) + template[high] * fraction
+
+def normalize_template(template: np.ndarray) -> np.ndarray:
+    """Remove each band's mean over time and scale to unit norm"""
+    centered = template - template.mean(axis=0)
+    return (centered / (np.linalg.norm(centered) + 1e-10)).astype(np.float32)
+
+def extract_templates(recordings: Sequence[np.ndarray], sample_rate: int = 16000) -> List[np.ndarray]:
+    """
+    Turn recordings of the wake word into matching templates
+
+    Args:
+        recordings: Float32 clips, each containing the wake word once
+        sample_rate: Sample rate of the clips
+
+    Returns:
+        Log-mel templates, trimmed to the spoken part
+    """
+    frontend = LogMelFrontend(sample_rate=sample_rate)
+    return [trim_silence(frontend.features(samples)) for samples in recordings]
+
+def load_templates(paths: Sequence[str]) -> List[np.ndarray]:
+    """Templates from WAV recordings of the wake word (any sample rate)"""
+    templates = []
+    for path in paths:
+        rate, samples = read_wav(path)
+        templates.extend(extract_templates([samples], rate))
+    return templates
+
+class WakeWordMetrics:
+    """CPU cost per second of audio and trigger counts, shared across streams"""
+
+    def __init__(self):
+        self.audio_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.silent_seconds = 0.0
+        self.detections = 0
+        self.false_triggers = 0
+
+    def record_false_trigger(self):
+        """A wake that was not followed by a command"""
+        self.false_triggers += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        hours = self.audio_seconds / 3600
+        return {
+            "audio_seconds": round(self.audio_seconds, 1),
+            "cpu_ms_per_audio_second": round(self.cpu_seconds * 1000 / self.audio_seconds, 3) if self.audio_seconds else 0.0,
+            "silence_skipped": self.silent_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+            "detections": self.detections,
+            "false_triggers": self.false_triggers,
+            "false_triggers_per_hour": round(self.false_triggers / hours, 2) if hours else 0.0
+        }
+
+class WakeWordDetector:
+    """Always-on wake-word spotting by template matching on log-mel features
+
+    Enrollment recordings of the wake word become templates (see
+    ``extract_templates``), time-stretched a little either way to absorb
+    speaking rate. The mel bands span the same frequencies at any sample
+    rate, so templates recorded at 16 kHz also match a 48 kHz stream. Every new
+    feature frame ends a candidate window per template, scored as the
+    cosine similarity between the window and the template after removing
+    each band's mean, which cancels microphone gain and channel colour.
+    All windows of a block, against all templates, are scored with one
+    matrix product plus running sums for the window statistics. Once the
+    best score crosses ``threshold`` the detector follows it to its peak,
+    which marks the end of the word, reports a detection there and then
+    stays quiet for ``refractory_ms``.
+    """
+
+    def __init__(
+        self,
+        templates: Sequence[np.ndarray],
+        sample_rate: int = 16000,
+        threshold: float = 0.75,
+        refractory_ms: int = 1500,
+        stretches: Sequence[float] = (0.85, 1.0, 1.15),
+        metrics: Optional[WakeWordMetrics] = None,
+        frontend: Optional[LogMelFrontend] = None
+    ):
+        if not templates:
+            raise ValueError("Wake word detection needs at least one enrollment template")
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.frontend = frontend or LogMelFrontend(sample_rate=sample_rate)
+        self.metrics = metrics or WakeWordMetrics()
+        self.templates = [normalize_template(stretch(t, factor)) for t in templates for factor in stretches]
+        self.longest = max(len(t) for t in self.templates)
+        self._stacked = np.ascontiguousarray(np.concatenate(self.templates).T)
+        offsets = np.cumsum([0] + [len(t) for t in self.templates])
+        self._layout = [(len(t), int(offset)) for t, offset in zip(self.templates, offsets)]
+        self.ring = FeatureRing(self.longest + self.frontend.max_frames, self.frontend.n_mels)
+        self.refractory_frames = refractory_ms * sample_rate // 1000 // self.frontend.hop
+        self._quiet_frames = 0
+        self._peak: Optional[Tuple[int, float]] = None
+        self._since_peak = 0
+        self._position = 0
+        self.last_score = 0.0
+
+    def process(self, samples: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        Feed a block of float32 samples
+
+        Returns:
+            (sample offset in the block, score) for each detection
+        """
+        started = time.thread_time()
+        detections = []
+        for first_end, rows, silent in self.frontend.process(samples):
+            count = len(rows)
+            self.ring.append(rows)
+            if silent:
+                # Nothing was said in this block, so no wake word can end in it
+                self.metrics.silent_seconds += count * self.frontend.hop / self.sample_rate
+                scores = np.zeros(count)
+            else:
+                scores = self._score(count)
+            for i in range(count):
+                score = float(scores[i])
+                if self._quiet_frames > 0:
+                    self._quiet_frames -= 1
+                elif self._peak is not None and score > self._peak[1]:
+                    self._peak = (self._position + first_end + i * self.frontend.hop, score)
+                    self._since_peak = 0
+                elif self._peak is not None:
+                    # Report the peak, which lines up with the end of the word
+                    self._since_peak += 1
+                    if self._since_peak >= PEAK_FRAMES or score < self.threshold:
+                        at, peak = self._peak
+                        detections.append((min(max(at - self._position, 0), samples.size), peak))
+                        self.metrics.detections += 1
+                        self._peak = None
+                        self._quiet_frames = self.refractory_frames
+                elif score >= self.threshold:
+                    self._peak = (self._position + first_end + i * self.frontend.hop, score)
+                    self._since_peak = 0
+            self.last_score = float(scores.max())
+        self._position += samples.size
+        self.metrics.audio_seconds += samples.size / self.sample_rate
+        self.metrics.cpu_seconds += time.thread_time() - started
+        return detections
+
+    def _score(self, count: int) -> np.ndarray:
+        """Best template similarity for the windows ending at each of the newest ``count`` frames"""
+        rows = self.longest + count - 1
+        if self.ring.filled < rows:
+            return np.zeros(count, dtype=np.float32)
+        window = self.ring.latest(rows)
+        # Templates are zero-mean per band, so correlating them with the raw
+        # window equals correlating with the mean-removed window; one product
+        # covers every template and every window end
+        products = window @ self._stacked
+        row_stride, column_stride = products.strides
+        sums = np.zeros((rows + 1, window.shape[1]))
+        np.cumsum(window, axis=0, out=sums[1:])
+        squares = np.zeros(rows + 1)
+        np.cumsum(np.einsum("ij,ij->i", window, window), out=squares[1:])
+        best = np.full(count, -1.0)
+        for length, column in self._layout:
+            start = self.longest - length
+            diagonal = as_strided(
+                products[start:, column:], shape=(count, length),
+                strides=(row_stride, row_stride + column_stride)
+            )
+            band_sums = sums[self.longest:self.longest + count] - sums[start:start + count]
+            energy = squares[self.longest:self.longest + count] - squares[start:start + count]
+            variance = energy - np.einsum("ij,ij->i", band_sums, band_sums) / length
+            np.maximum(best, diagonal.sum(axis=1) / np.sqrt(np.maximum(variance, 1e-6)), out=best)
+        return best
+
+    def reset(self):
+        """Forget buffered audio (e.g. after handing the stream to the recognizer)"""
+        self.frontend.reset()
+        self.ring.clear()
+        self._quiet_frames = 0
+        self._peak = None
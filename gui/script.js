@@ -4,6 +4,12 @@ class LyraClient {
     constructor() {
         this.ws = null;
         this.isConnected = false;
+        // One conversation per window so the backend can include history
+        this.conversationId = new Date().toISOString();
+        this.decoder = new TextDecoder();
+        // Responses stream concurrently over one socket, keyed by request_id
+        this.nextRequestId = 0;
+        this.responses = new Map();
         this.initializeElements();
         this.attachEventListeners();
         this.createStarfield(); // Add starfield generation
@@ -59,21 +65,43 @@ class LyraClient {
         try {
             // Connect to the WebSocket endpoint on port 5252
             this.ws = new WebSocket('ws://localhost:5252/api/v1/ws/chat');
+            this.ws.binaryType = 'arraybuffer';
             
             this.ws.onopen = () => {
                 this.isConnected = true;
+                // Ask for tokens coalesced per frame (~30 fps) as compact binary frames
+                this.ws.send(JSON.stringify({ type: 'configure', coalesce_ms: 33, max_bytes: 2048, format: 'binary' }));
                 this.updateStatus('connected', 'Connected');
                 this.addMessage('assistant', 'Hello! I\'m Lyra, your AI assistant. How can I help you today?');
             };
             
             this.ws.onmessage = (event) => {
+                if (event.data instanceof ArrayBuffer) {
+                    // Binary chunk frame: type byte, [request_id length + request_id,] UTF-8 text
+                    const bytes = new Uint8Array(event.data);
+                    if (bytes[0] === 0x01) {
+                        this.addStreamingChunk(this.decoder.decode(bytes.subarray(1)));
+                    } else if (bytes[0] === 0x02) {
+                        const end = 2 + bytes[1];
+                        const requestId = this.decoder.decode(bytes.subarray(2, end));
+                        this.addStreamingChunk(this.decoder.decode(bytes.subarray(end)), requestId);
+                    }
+                    return;
+                }
                 const data = JSON.parse(event.data);
                 if (data.type === 'chunk') {
                     // Handle streaming response
-                    this.addStreamingChunk(data.content);
-                } else if (data.type === 'end') {
+                    this.addStreamingChunk(data.content, data.request_id);
+                } else if (data.type === 'queued') {
+                    // Waiting for the model behind other requests
+                    this.updateStatus('connected', `Queued (#${data.position})`);
+                } else if (data.type === 'started') {
+                    this.updateStatus('connected', 'Connected');
+                } else if (data.type === 'configured') {
+                    console.log('Streaming mode:', data);
+                } else if (data.type === 'end' || data.type === 'cancelled') {
                     // End of streaming response
-                    this.endStreaming();
+                    this.endStreaming(data.request_id);
                 } else if (data.type === 'error') {
                     // Handle error
                     this.addMessage('assistant', `Error: ${data.content}`);
@@ -113,11 +141,14 @@ class LyraClient {
         this.userInput.value = '';
         
         // Create a new response container for streaming
-        this.createResponseContainer();
+        const requestId = `r${++this.nextRequestId}`;
+        this.createResponseContainer(requestId);
 
         // Send message to backend
         this.ws.send(JSON.stringify({
-            prompt: message
+            request_id: requestId,
+            prompt: message,
+            conversation_id: this.conversationId
         }));
     }
 
@@ -137,7 +168,7 @@ class LyraClient {
         this.chatHistory.scrollTop = this.chatHistory.scrollHeight;
     }
 
-    createResponseContainer() {
+    createResponseContainer(requestId) {
         this.currentResponseDiv = document.createElement('div');
         // Use the new class name for AI messages
         this.currentResponseDiv.className = 'message assistant-message';
@@ -148,23 +179,31 @@ class LyraClient {
         
         this.currentResponseDiv.appendChild(this.currentContentDiv);
         this.chatHistory.appendChild(this.currentResponseDiv);
+        if (requestId) {
+            this.responses.set(requestId, this.currentContentDiv);
+        }
         
         // Scroll to bottom
         this.chatHistory.scrollTop = this.chatHistory.scrollHeight;
     }
 
-    addStreamingChunk(content) {
-        if (!this.currentContentDiv) {
-            this.createResponseContainer();
+    addStreamingChunk(content, requestId) {
+        let contentDiv = requestId ? this.responses.get(requestId) : this.currentContentDiv;
+        if (!contentDiv) {
+            this.createResponseContainer(requestId);
+            contentDiv = this.currentContentDiv;
         }
         
-        this.currentContentDiv.textContent += content;
+        contentDiv.textContent += content;
         
         // Scroll to bottom
         this.chatHistory.scrollTop = this.chatHistory.scrollHeight;
     }
 
-    endStreaming() {
+    endStreaming(requestId) {
+        if (requestId) {
+            this.responses.delete(requestId);
+        }
         this.currentResponseDiv = null;
         this.currentContentDiv = null;
     }
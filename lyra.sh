@@ -17,19 +17,24 @@ start_server() {
         fi
     fi
     
-    echo "Starting Ollama model: $MODEL_NAME..."
-    # Start the model in background
-    ollama run $MODEL_NAME &>/dev/null &
-    sleep 3  # Give the model time to load
-    
     echo "Starting Lyra AI Agent server..."
     cd "$SCRIPT_DIR/backend" || exit 1
     poetry run python main.py &
     SERVER_PID=$!
     echo $SERVER_PID > "$PID_FILE"
     echo "Server started with PID $SERVER_PID"
-    echo "Access the GUI at http://localhost:5252"
-    echo "Model $MODEL_NAME is loaded and ready"
+    
+    # The server preloads the model itself; /health answers once it is ready
+    echo "Waiting for model $MODEL_NAME to load..."
+    for _ in $(seq 1 60); do
+        if curl -sf "http://localhost:5252/health?wait=5" > /dev/null; then
+            echo "Access the GUI at http://localhost:5252"
+            echo "Model $MODEL_NAME is loaded and ready"
+            return 0
+        fi
+        sleep 1
+    done
+    echo "Model $MODEL_NAME did not become ready; check 'curl localhost:5252/health'"
 }
 
 stop_server() {